@@ -5,7 +5,10 @@ MCP Hybrid Model Automation Script
 This script provides a foundation for using the Model Control Protocol (MCP) with 
 a hybrid model approach that optimizes for both cost and performance by using:
 - Claude 3.7 Sonnet with extended thinking for complex tasks
-- Claude 3.5 Sonnet for simpler tasks
+- Claude 3.5 Haiku for simpler tasks
+
+Model choice for 'auto' complexity is made by a ModelRouter that learns from
+observed latency, cost and quality instead of fixed prompt-length rules.
 """
 
 import os
@@ -13,12 +16,15 @@ import sys
 import argparse
 import logging
 import json
+import time
 from typing import Dict, Any, Optional, List, Union
 
 # Add the src directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.vot1.vot_mcp import VotModelControlProtocol
+from src.vot1.model_router import ModelRouter
+from src.vot1.batch import BatchClient
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -45,7 +51,7 @@ class McpHybridAutomation:
     
     # Constants for models
     SONNET_MODEL = "claude-3-7-sonnet-20240620"
-    THIN_MODEL = "claude-3-5-sonnet-20240620"
+    THIN_MODEL = "claude-3-5-haiku-20241022"
     
     def __init__(
         self,
@@ -53,7 +59,10 @@ class McpHybridAutomation:
         secondary_model: str = THIN_MODEL,
         use_extended_thinking: bool = False,
         max_thinking_tokens: int = 5000,
-        memory_manager = None
+        memory_manager = None,
+        router: Optional[ModelRouter] = None,
+        latency_slo: Optional[float] = None,
+        batch_client: Optional[BatchClient] = None
     ):
         """
         Initialize the MCP hybrid automation.
@@ -64,12 +73,17 @@ class McpHybridAutomation:
             use_extended_thinking: Whether to enable extended thinking for the primary model
             max_thinking_tokens: Maximum thinking tokens when extended thinking is enabled
             memory_manager: Optional memory manager for context
+            router: Optional pre-configured model router
+            latency_slo: Default latency objective in seconds for routed requests
+            batch_client: Optional batch client for offline batch processing
         """
         self.primary_model = primary_model
         self.secondary_model = secondary_model
         self.use_extended_thinking = use_extended_thinking
         self.max_thinking_tokens = max_thinking_tokens if use_extended_thinking else 0
         self.memory_manager = memory_manager
+        self.router = router or ModelRouter([primary_model, secondary_model], latency_slo=latency_slo)
+        self.batch_client = batch_client
         
         # Setup MCP client
         self.mcp = self._setup_mcp()
@@ -122,44 +136,19 @@ class McpHybridAutomation:
         Returns:
             Response data from the model
         """
-        # Determine if this is a complex task requiring the primary model
-        is_complex = task_complexity == "high"
-        
-        # If auto, make a determination based on prompt length and complexity
-        if task_complexity == "auto":
-            is_complex = (
-                len(prompt) > 500 or 
-                any(term in prompt.lower() for term in 
-                    ["analyze", "improve", "optimize", "debug", "complex", 
-                     "architecture", "design", "evaluate"])
-            )
-        
-        # Set default max tokens based on complexity
-        if max_tokens is None:
-            max_tokens = 4096 if is_complex else 1024
+        decision, max_tokens = self._route(prompt, task_complexity, context, max_tokens)
         
-        # Use the appropriate model
-        if is_complex:
-            logger.info(f"Using primary model ({self.primary_model}) for complex task")
-            return self.mcp.process_request(
-                prompt=prompt,
-                system=system,
-                context=context,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
-        else:
-            logger.info(f"Using secondary model ({self.secondary_model}) for simple task")
-            # In a real implementation, you would route to the secondary model here
-            # For this implementation, we're using the same MCP instance but would configure
-            # it to use the secondary model for this request
-            return self.mcp.process_request(
-                prompt=prompt,
-                system=system,
-                context=context,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+        start_time = time.time()
+        response = self.mcp.process_request(
+            prompt=prompt,
+            system=system,
+            context=context,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            model=decision["model"]
+        )
+        self._record(decision, response, time.time() - start_time)
+        return response
     
     async def process_with_optimal_model_async(
         self,
@@ -184,50 +173,98 @@ class McpHybridAutomation:
         Returns:
             Response data from the model
         """
-        # Determine if this is a complex task requiring the primary model
-        is_complex = task_complexity == "high"
+        decision, max_tokens = self._route(prompt, task_complexity, context, max_tokens)
         
-        # If auto, make a determination based on prompt length and complexity
-        if task_complexity == "auto":
-            is_complex = (
-                len(prompt) > 500 or 
-                any(term in prompt.lower() for term in 
-                    ["analyze", "improve", "optimize", "debug", "complex", 
-                     "architecture", "design", "evaluate"])
-            )
+        start_time = time.time()
+        response = await self.mcp.process_request_async(
+            prompt=prompt,
+            system=system,
+            context=context,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            model=decision["model"]
+        )
+        self._record(decision, response, time.time() - start_time)
+        return response
+    
+    def _route(
+        self,
+        prompt: str,
+        task_complexity: str,
+        context: Optional[Dict[str, Any]],
+        max_tokens: Optional[int]
+    ) -> tuple:
+        """
+        Choose the model and token limit for a request.
+        
+        Explicit 'high'/'low' complexity pins the primary/secondary model; 'auto'
+        lets the router pick from observed statistics.
         
-        # Set default max tokens based on complexity
+        Returns:
+            Tuple of (routing decision, max tokens)
+        """
+        candidates = None
+        if task_complexity == "high":
+            candidates = [self.primary_model]
+        elif task_complexity == "low":
+            candidates = [self.secondary_model]
+        
+        context = context or {}
+        decision = self.router.route(
+            prompt,
+            context={**context, "task_complexity": task_complexity},
+            max_tokens=max_tokens or 4096,
+            latency_slo=context.get("latency_slo"),
+            candidates=candidates
+        )
+        
+        # Set default max tokens based on the chosen model
         if max_tokens is None:
-            max_tokens = 4096 if is_complex else 1024
+            max_tokens = 4096 if decision["model"] == self.primary_model else 1024
         
-        # Use the appropriate model
-        if is_complex:
-            logger.info(f"Using primary model ({self.primary_model}) for complex task")
-            return await self.mcp.process_request_async(
-                prompt=prompt,
-                system=system,
-                context=context,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
-        else:
-            logger.info(f"Using secondary model ({self.secondary_model}) for simple task")
-            # In a real implementation, you would route to the secondary model here
-            return await self.mcp.process_request_async(
-                prompt=prompt,
-                system=system,
-                context=context,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+        logger.info(f"Using {decision['model']} ({decision['reason']}) for {task_complexity} task")
+        return decision, max_tokens
+    
+    def _record(self, decision: Dict[str, Any], response: Dict[str, Any], latency: float) -> None:
+        """Feed the observed latency and token usage of a response back to the router."""
+        usage = response.get("usage", {})
+        self.router.record(
+            decision["decision_id"],
+            latency=latency,
+            input_tokens=usage.get("prompt_tokens", 0),
+            output_tokens=usage.get("completion_tokens", 0),
+            success="error" not in response
+        )
+        response["routing_decision_id"] = decision["decision_id"]
+    
+    def record_feedback(self, response: Dict[str, Any], quality: float) -> bool:
+        """
+        Record a quality score (0.0-1.0) for a previous response.
+        
+        Args:
+            response: Response returned by process_with_optimal_model
+            quality: Quality score between 0.0 and 1.0
+            
+        Returns:
+            True if the feedback was applied
+        """
+        decision_id = response.get("routing_decision_id")
+        return bool(decision_id) and self.router.record_feedback(decision_id, quality)
     
     def batch_process(
         self,
-        prompts: List[Dict[str, Any]]
+        prompts: List[Dict[str, Any]],
+        use_batch_api: bool = False,
+        checkpoint_path: Optional[str] = None,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Process multiple prompts in batch, optimizing for cost and performance.
         
+        Without the batch API, prompts are routed individually and processed
+        concurrently, so the batch takes about as long as its slowest request.
+        
         Args:
             prompts: List of dictionaries containing prompt data
                 Each dict should have:
@@ -237,34 +274,139 @@ class McpHybridAutomation:
                 - 'context': Optional additional context
                 - 'max_tokens': Optional max tokens to generate
                 - 'temperature': Optional sampling temperature
+                - 'custom_id': Optional stable ID (used to resume batch jobs)
+            use_batch_api: Whether to submit the prompts as provider batch jobs
+                (cheaper and higher throughput, but results arrive asynchronously)
+            checkpoint_path: Optional checkpoint file for resuming batch jobs
+            max_concurrency: Maximum number of requests in flight (without the batch API)
+            timeout: Optional per-request timeout in seconds (without the batch API)
                 
         Returns:
             List of response data from the models
         """
-        results = []
+        if use_batch_api:
+            return self._batch_process_offline(prompts, checkpoint_path)
         
-        for i, prompt_data in enumerate(prompts):
-            logger.info(f"Processing batch item {i+1}/{len(prompts)}")
+        decisions = []
+        requests = []
+        for prompt_data in prompts:
+            decision, max_tokens = self._route(
+                prompt_data['prompt'],
+                prompt_data.get('task_complexity', 'auto'),
+                prompt_data.get('context'),
+                prompt_data.get('max_tokens')
+            )
+            decisions.append(decision)
+            requests.append({
+                "prompt": prompt_data['prompt'],
+                "system": prompt_data.get('system'),
+                "context": prompt_data.get('context'),
+                "max_tokens": max_tokens,
+                "temperature": prompt_data.get('temperature', 0.7),
+                "model": decision["model"]
+            })
+        
+        logger.info(f"Processing {len(requests)} batch items with up to {max_concurrency} in flight")
+        results = self.mcp.process_batch(requests, max_concurrency=max_concurrency, timeout=timeout)
+        
+        for decision, result in zip(decisions, results):
+            self._record(decision, result, result.get("latency", 0.0))
+        
+        return results
+    
+    def _batch_process_offline(
+        self,
+        prompts: List[Dict[str, Any]],
+        checkpoint_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Process prompts through the Message Batches API.
+        
+        Each prompt is routed to a model as usual and packed into batch jobs.
+        Results come back in input order; results collected by an earlier,
+        interrupted run of the same checkpoint are returned from its results file.
+        Batch latency says nothing about interactive latency, so outcomes are not
+        fed back to the router.
+        
+        Args:
+            prompts: List of prompt dictionaries (see batch_process)
+            checkpoint_path: Optional checkpoint file for resuming batch jobs
             
-            # Extract parameters
+        Returns:
+            List of response data from the models
+            
+        Raises:
+            ValueError: If checkpoint_path differs from the injected batch client's checkpoint
+        """
+        batch_client = self.batch_client
+        if batch_client is None:
+            batch_client = BatchClient(checkpoint_path=checkpoint_path)
+        elif checkpoint_path and batch_client.checkpoint_path != checkpoint_path:
+            raise ValueError(
+                f"checkpoint_path {checkpoint_path} differs from the batch client's checkpoint "
+                f"({batch_client.checkpoint_path}); configure the checkpoint on the batch client"
+            )
+        
+        requests = []
+        decisions = {}
+        for i, prompt_data in enumerate(prompts):
             prompt = prompt_data['prompt']
-            task_complexity = prompt_data.get('task_complexity', 'auto')
-            system = prompt_data.get('system')
             context = prompt_data.get('context')
-            max_tokens = prompt_data.get('max_tokens')
-            temperature = prompt_data.get('temperature', 0.7)
-            
-            # Process with optimal model
-            result = self.process_with_optimal_model(
-                prompt=prompt,
-                task_complexity=task_complexity,
-                system=system,
-                context=context,
-                max_tokens=max_tokens,
-                temperature=temperature
+            decision, max_tokens = self._route(
+                prompt, prompt_data.get('task_complexity', 'auto'), context, prompt_data.get('max_tokens')
             )
             
-            results.append(result)
+            content = prompt
+            if context:
+                content = f"Context:\n{json.dumps(context, indent=2, default=str)}\n\n{prompt}"
+            
+            params = {
+                "model": decision["model"],
+                "max_tokens": max_tokens,
+                "temperature": prompt_data.get('temperature', 0.7),
+                "messages": [{"role": "user", "content": content}]
+            }
+            if prompt_data.get('system'):
+                params["system"] = prompt_data['system']
+            
+            custom_id = str(prompt_data.get('custom_id', f"item-{i}"))
+            requests.append({"custom_id": custom_id, "params": params})
+            decisions[custom_id] = (i, decision)
+        
+        results = [None] * len(prompts)
+        for result in batch_client.run(requests):
+            if result["custom_id"] not in decisions:
+                continue
+            i, decision = decisions[result["custom_id"]]
+            usage = result["usage"]
+            response = {
+                "id": result["custom_id"],
+                "model": result["model"] or decision["model"],
+                "provider": VotModelControlProtocol.PROVIDER_ANTHROPIC,
+                "content": result["content"],
+                "usage": {
+                    "prompt_tokens": usage.get("input_tokens", 0),
+                    "completion_tokens": usage.get("output_tokens", 0),
+                    "total_tokens": usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+                },
+                "routing_decision_id": decision["decision_id"],
+                "batch": True,
+                "created": int(time.time())
+            }
+            if result["error"]:
+                response["error"] = result["error"]
+            results[i] = response
+            logger.info(f"Batch item {i+1}/{len(prompts)} finished ({result['status']})")
+        
+        for custom_id, (i, decision) in decisions.items():
+            if results[i] is None:
+                results[i] = {
+                    "id": custom_id,
+                    "model": decision["model"],
+                    "content": "",
+                    "error": "No result was returned for this batch item",
+                    "batch": True
+                }
         
         return results
     
@@ -316,6 +458,16 @@ def main():
                        help="Primary model to use")
     parser.add_argument("--secondary-model", type=str, default=McpHybridAutomation.THIN_MODEL,
                        help="Secondary model to use")
+    parser.add_argument("--batch-file", type=str,
+                       help="JSON file with a list of prompt objects to process as a batch")
+    parser.add_argument("--batch-api", action="store_true",
+                       help="Submit --batch-file prompts through the Message Batches API")
+    parser.add_argument("--checkpoint", type=str,
+                       help="Checkpoint file for resuming batch jobs")
+    parser.add_argument("--concurrency", type=int, default=8,
+                       help="Maximum concurrent requests for --batch-file prompts")
+    parser.add_argument("--timeout", type=float,
+                       help="Per-request timeout in seconds for --batch-file prompts")
     
     args = parser.parse_args()
     
@@ -329,8 +481,8 @@ def main():
             logger.error(f"Error reading prompt file: {e}")
             sys.exit(1)
     
-    if not prompt:
-        logger.error("No prompt provided. Use --prompt or --prompt-file.")
+    if not prompt and not args.batch_file:
+        logger.error("No prompt provided. Use --prompt, --prompt-file or --batch-file.")
         sys.exit(1)
     
     # Setup MCP hybrid automation
@@ -341,6 +493,22 @@ def main():
         max_thinking_tokens=args.thinking_tokens
     )
     
+    if args.batch_file:
+        with open(args.batch_file, 'r', encoding='utf-8') as f:
+            prompts = json.load(f)
+        results = automation.batch_process(
+            prompts,
+            use_batch_api=args.batch_api,
+            checkpoint_path=args.checkpoint,
+            max_concurrency=args.concurrency,
+            timeout=args.timeout
+        )
+        if args.output:
+            automation.save_response_to_file({"results": results}, args.output)
+        else:
+            print(json.dumps(results, indent=2))
+        return
+    
     # Process the request
     result = automation.process_with_optimal_model(
         prompt=prompt,
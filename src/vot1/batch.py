@@ -0,0 +1,496 @@
+"""
+VOT1 Message Batches
+
+This module implements batch submission for offline bulk workloads. Requests
+are packed into provider batch jobs (the Anthropic Message Batches API), jobs
+are polled with exponential backoff and results are streamed back as each job
+finishes.
+
+Submitted job IDs are checkpointed to a JSON file, so an interrupted run can be
+resumed: requests that were already submitted are not sent again and pending
+jobs are polled until they finish. Collected results are appended to a JSON
+lines file next to the checkpoint before their job is marked as collected, so
+a resumed run returns them again instead of losing them.
+
+The usage of every collected result is recorded in the UsageLedger as a batch
+request, so it is priced at the batch discount.
+
+A LocalBatchServer implements the same backend interface in-process, so batch
+workflows can be exercised without network access.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Any, Optional, Callable, Iterator
+
+from vot1.token_estimator import get_token_estimator
+from vot1.usage import UsageLedger, extract_usage, get_usage_ledger
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AnthropicBatchBackend:
+    """
+    Backend for the Anthropic Message Batches API.
+
+    Batch objects and result entries are converted to plain dictionaries so the
+    BatchClient works the same way with the local stand-in server.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, client=None):
+        """
+        Initialize the backend.
+
+        Args:
+            api_key: Anthropic API key (defaults to ANTHROPIC_API_KEY env var)
+            client: Optional pre-configured anthropic.Anthropic client
+        """
+        if client is None:
+            import anthropic
+
+            api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
+            if not api_key:
+                raise ValueError("Anthropic API key is required. Set the ANTHROPIC_API_KEY environment variable.")
+            client = anthropic.Anthropic(api_key=api_key)
+        self.client = client
+
+    def create(self, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create a batch job from a list of {"custom_id", "params"} requests."""
+        return self.client.messages.batches.create(requests=requests).model_dump()
+
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        """Get the status of a batch job."""
+        return self.client.messages.batches.retrieve(batch_id).model_dump()
+
+    def results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        """Stream the result entries of an ended batch job."""
+        for entry in self.client.messages.batches.results(batch_id):
+            yield entry.model_dump()
+
+    def cancel(self, batch_id: str) -> Dict[str, Any]:
+        """Cancel a batch job."""
+        return self.client.messages.batches.cancel(batch_id).model_dump()
+
+
+class LocalBatchServer:
+    """
+    In-process stand-in for the Message Batches API.
+
+    Jobs end ``processing_delay`` seconds after they are created. Each request
+    is answered by ``handler(params)``, which returns the response text; a
+    handler exception produces an errored result entry.
+    """
+
+    def __init__(self, handler: Optional[Callable[[Dict[str, Any]], str]] = None, processing_delay: float = 0.0):
+        """
+        Initialize the local batch server.
+
+        Args:
+            handler: Function producing the response text for request params
+            processing_delay: Seconds before a created job ends
+        """
+        self.handler = handler or self._echo
+        self.processing_delay = processing_delay
+        self.batches = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _echo(params: Dict[str, Any]) -> str:
+        content = params["messages"][-1]["content"]
+        return f"Processed: {content if isinstance(content, str) else json.dumps(content)}"
+
+    def create(self, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create a batch job."""
+        batch_id = f"msgbatch_local_{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "requests": list(requests),
+                "created": time.time(),
+                "canceled": False,
+            }
+        return self.retrieve(batch_id)
+
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        """Get the status of a batch job."""
+        batch = self.batches[batch_id]
+        ended = batch["canceled"] or time.time() - batch["created"] >= self.processing_delay
+        count = len(batch["requests"])
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else count,
+                "succeeded": count if ended and not batch["canceled"] else 0,
+                "errored": 0,
+                "canceled": count if batch["canceled"] else 0,
+                "expired": 0,
+            },
+        }
+
+    def results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        """Stream the result entries of an ended batch job."""
+        batch = self.batches[batch_id]
+        if self.retrieve(batch_id)["processing_status"] != "ended":
+            raise RuntimeError(f"Batch {batch_id} has not ended yet")
+
+        estimator = get_token_estimator()
+        for request in batch["requests"]:
+            params = request["params"]
+            if batch["canceled"]:
+                yield {"custom_id": request["custom_id"], "result": {"type": "canceled"}}
+                continue
+            try:
+                text = self.handler(params)
+            except Exception as e:
+                yield {
+                    "custom_id": request["custom_id"],
+                    "result": {"type": "errored", "error": {"type": "api_error", "message": str(e)}},
+                }
+                continue
+
+            yield {
+                "custom_id": request["custom_id"],
+                "result": {
+                    "type": "succeeded",
+                    "message": {
+                        "id": f"msg_local_{uuid.uuid4().hex[:12]}",
+                        "type": "message",
+                        "role": "assistant",
+                        "model": params["model"],
+                        "content": [{"type": "text", "text": text}],
+                        "stop_reason": "end_turn",
+                        "usage": {
+                            "input_tokens": estimator.count_request(params),
+                            "output_tokens": estimator.count(text, params["model"]),
+                        },
+                    },
+                },
+            }
+
+    def cancel(self, batch_id: str) -> Dict[str, Any]:
+        """Cancel a batch job."""
+        with self._lock:
+            self.batches[batch_id]["canceled"] = True
+        return self.retrieve(batch_id)
+
+
+class BatchClient:
+    """
+    Submits requests as batch jobs and streams their results.
+    """
+
+    # Provider whose batch API serves the jobs (recorded in the usage ledger)
+    PROVIDER = "anthropic"
+    # Provider limit on the number of requests in one batch job
+    MAX_REQUESTS_PER_BATCH = 10000
+
+    def __init__(
+        self,
+        backend=None,
+        checkpoint_path: Optional[str] = None,
+        batch_size: int = MAX_REQUESTS_PER_BATCH,
+        poll_interval: float = 5.0,
+        max_poll_interval: float = 60.0,
+        poll_backoff: float = 1.5,
+        usage_ledger: Optional[UsageLedger] = None,
+        workflow: str = "batch"
+    ):
+        """
+        Initialize the batch client.
+
+        Args:
+            backend: Batch backend (defaults to the Anthropic Message Batches API)
+            checkpoint_path: Optional JSON file recording submitted jobs for resume
+            batch_size: Maximum requests per batch job; smaller jobs return results sooner
+            poll_interval: Initial seconds between status polls
+            max_poll_interval: Maximum seconds between status polls
+            poll_backoff: Multiplier applied to the poll interval after each poll
+            usage_ledger: Optional usage ledger (defaults to the process-wide ledger)
+            workflow: Workflow name under which collected results are recorded
+        """
+        self.backend = backend or AnthropicBatchBackend()
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = max(1, min(batch_size, self.MAX_REQUESTS_PER_BATCH))
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_backoff = poll_backoff
+        self.usage_ledger = usage_ledger or get_usage_ledger()
+        self.workflow = workflow
+
+        self.checkpoint = self._load_checkpoint()
+        self.stats = {
+            "jobs_submitted": 0,
+            "requests_submitted": 0,
+            "polls": 0,
+            "succeeded": 0,
+            "errored": 0,
+            "canceled": 0,
+            "expired": 0,
+            "restored": 0,
+        }
+
+        logger.info(f"Initialized BatchClient (batch size {self.batch_size})")
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        """Load the job checkpoint, if there is one."""
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            try:
+                with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                    checkpoint = json.load(f)
+                logger.info(f"Resuming from checkpoint with {len(checkpoint.get('jobs', {}))} jobs")
+                return checkpoint
+            except Exception as e:
+                logger.error(f"Error loading batch checkpoint: {e}")
+        return {"jobs": {}}
+
+    def _save_checkpoint(self) -> None:
+        """Write the job checkpoint atomically."""
+        if not self.checkpoint_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.checkpoint, f, indent=2)
+        os.replace(temp_path, self.checkpoint_path)
+
+    @property
+    def results_path(self) -> Optional[str]:
+        """Path of the JSON lines file holding collected results (None without a checkpoint)."""
+        return f"{self.checkpoint_path}.results.jsonl" if self.checkpoint_path else None
+
+    def _save_results(self, results: List[Dict[str, Any]]) -> None:
+        """Append collected results to the results file and flush them to disk."""
+        if not self.results_path:
+            return
+        with open(self.results_path, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _load_results(self) -> Dict[str, Dict[str, Any]]:
+        """Load collected results by custom_id (later entries win)."""
+        stored = {}
+        if not self.results_path or not os.path.exists(self.results_path):
+            return stored
+        with open(self.results_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    # A crash can leave a partial last line
+                    continue
+                stored[result["custom_id"]] = result
+        return stored
+
+    def submit(self, requests: List[Dict[str, Any]]) -> List[str]:
+        """
+        Pack requests into batch jobs and submit them.
+
+        Requests whose custom_id already belongs to a checkpointed job are
+        skipped, so re-submitting after an interruption does not send them again.
+
+        Args:
+            requests: List of {"custom_id": str, "params": Messages API params}
+
+        Returns:
+            IDs of the jobs that cover the requests (new and checkpointed)
+        """
+        submitted = {}
+        for job_id, job in self.checkpoint["jobs"].items():
+            for custom_id in job["custom_ids"]:
+                submitted[custom_id] = job_id
+
+        job_ids = []
+        pending = []
+        for request in requests:
+            job_id = submitted.get(request["custom_id"])
+            if job_id:
+                if job_id not in job_ids:
+                    job_ids.append(job_id)
+            else:
+                pending.append(request)
+
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            batch = self.backend.create(chunk)
+            self.checkpoint["jobs"][batch["id"]] = {
+                "custom_ids": [request["custom_id"] for request in chunk],
+                "status": batch.get("processing_status", "in_progress"),
+                "collected": False,
+                "created": time.time(),
+            }
+            self._save_checkpoint()
+            job_ids.append(batch["id"])
+
+            self.stats["jobs_submitted"] += 1
+            self.stats["requests_submitted"] += len(chunk)
+            logger.info(f"Submitted batch job {batch['id']} with {len(chunk)} requests")
+
+        return job_ids
+
+    def iter_results(self, job_ids: List[str], timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Poll jobs with backoff and yield their results as each job ends.
+
+        Results of jobs collected by a previous run are returned from the
+        results file; if some of them are missing there, the job's results
+        are fetched from the backend again. Only results fetched from the
+        backend are recorded in the usage ledger, so restored results are
+        not counted twice.
+
+        Args:
+            job_ids: IDs of the jobs to wait for
+            timeout: Optional maximum seconds to wait for all jobs
+
+        Yields:
+            Normalized result dictionaries (see ``_normalize_result``)
+        """
+        pending = []
+        stored = None
+        for job_id in job_ids:
+            job = self.checkpoint["jobs"].get(job_id, {})
+            if not job.get("collected"):
+                pending.append(job_id)
+                continue
+            if stored is None:
+                stored = self._load_results()
+            if not all(custom_id in stored for custom_id in job["custom_ids"]):
+                logger.warning(f"Stored results of batch job {job_id} are incomplete; fetching them again")
+                pending.append(job_id)
+                continue
+            for custom_id in job["custom_ids"]:
+                self.stats["restored"] += 1
+                yield stored[custom_id]
+
+        interval = self.poll_interval
+        deadline = time.time() + timeout if timeout is not None else None
+
+        while pending:
+            for job_id in list(pending):
+                status = self.backend.retrieve(job_id)
+                self.stats["polls"] += 1
+                if status.get("processing_status") != "ended":
+                    continue
+
+                # Persist the job's results before marking it collected, so a
+                # crash after this point cannot lose them
+                results = [self._normalize_result(entry) for entry in self.backend.results(job_id)]
+                self._save_results(results)
+                pending.remove(job_id)
+                job = self.checkpoint["jobs"].setdefault(job_id, {"custom_ids": []})
+                job.update({"status": "ended", "collected": True})
+                self._save_checkpoint()
+                self._record_usage(results)
+                logger.info(f"Collected results for batch job {job_id}")
+
+                for result in results:
+                    self.stats[result["status"]] = self.stats.get(result["status"], 0) + 1
+                    yield result
+
+            if not pending:
+                break
+            if deadline is not None and time.time() + interval > deadline:
+                raise TimeoutError(f"Batch jobs still in progress: {', '.join(pending)}")
+
+            time.sleep(interval)
+            interval = min(interval * self.poll_backoff, self.max_poll_interval)
+
+    def run(self, requests: List[Dict[str, Any]], timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Submit requests and stream their results as jobs finish.
+
+        Args:
+            requests: List of {"custom_id": str, "params": Messages API params}
+            timeout: Optional maximum seconds to wait for all jobs
+
+        Yields:
+            Normalized result dictionaries
+        """
+        yield from self.iter_results(self.submit(requests), timeout=timeout)
+
+    def cancel(self, job_ids: Optional[List[str]] = None) -> None:
+        """
+        Cancel jobs that have not been collected yet.
+
+        Args:
+            job_ids: Jobs to cancel (defaults to all uncollected checkpointed jobs)
+        """
+        if job_ids is None:
+            job_ids = [job_id for job_id, job in self.checkpoint["jobs"].items() if not job.get("collected")]
+        for job_id in job_ids:
+            try:
+                self.backend.cancel(job_id)
+                logger.info(f"Canceled batch job {job_id}")
+            except Exception as e:
+                logger.error(f"Error canceling batch job {job_id}: {e}")
+
+    def _record_usage(self, results: List[Dict[str, Any]]) -> None:
+        """Record the usage of a job's answered requests at the batch price."""
+        for result in results:
+            if not result["model"]:
+                # Errored, canceled and expired requests are not billed
+                continue
+            self.usage_ledger.record(
+                self.PROVIDER,
+                result["model"],
+                workflow=self.workflow,
+                success=result["status"] == "succeeded",
+                batch=True,
+                metadata={"custom_id": result["custom_id"]},
+                **extract_usage(result)
+            )
+
+    @staticmethod
+    def _normalize_result(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert a batch result entry into a flat result dictionary.
+
+        Returns:
+            Dictionary with custom_id, status, content, model, usage and error
+        """
+        result = entry.get("result") or {}
+        normalized = {
+            "custom_id": entry.get("custom_id"),
+            "status": result.get("type", "errored"),
+            "content": "",
+            "model": None,
+            "usage": {},
+            "error": None,
+        }
+
+        message = result.get("message")
+        if message:
+            normalized["content"] = "".join(
+                block.get("text", "") for block in message.get("content", []) if block.get("type") == "text"
+            )
+            normalized["model"] = message.get("model")
+            normalized["usage"] = message.get("usage") or {}
+        elif result.get("error"):
+            error = result["error"]
+            # The API nests the error object one level deeper in some responses
+            error = error.get("error", error)
+            normalized["error"] = error.get("message") or error.get("type") or str(error)
+        elif normalized["status"] != "succeeded":
+            normalized["error"] = f"Request {normalized['status']}"
+
+        return normalized
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get batch statistics.
+
+        Returns:
+            Dictionary with job, request and result counts (restored counts
+            results returned from a previous run's results file)
+        """
+        return dict(self.stats)
@@ -10,15 +10,28 @@ This module implements an enhanced client for Anthropic's Claude models with:
 """
 
 import os
-import json
+import asyncio
+import functools
 import logging
+import threading
 import time
-import uuid
-from typing import Dict, List, Any, Optional, Union, Callable
+from typing import Dict, List, Any, Optional, Callable
 
-import anthropic
 from dotenv import load_dotenv
 
+from vot1.context_assembler import ContextAssembler
+from vot1.model_router import ModelRouter
+from vot1.pipeline import (
+    RequestPipeline, MemoryRetrievalStage, ContextAssemblyStage, ModelCallStage,
+    ToolExecutionStage, MemoryPersistStage, AnthropicTransport, get_transport, save_memory,
+    GENERATION_ERROR_PREFIX
+)
+from vot1.rate_limiter import RateLimiter, get_rate_limiter
+from vot1.resilience import ResilientCaller, RetryPolicy
+from vot1.singleflight import SingleFlight, get_singleflight, make_key
+from vot1.tool_executor import get_tool_executor
+from vot1.usage import UsageLedger, extract_usage, get_usage_ledger
+
 # Load environment variables
 load_dotenv()
 
@@ -39,7 +52,7 @@ class EnhancedClaudeClient:
     """
     
     SONNET_MODEL = "claude-3-7-sonnet-20240620"
-    THIN_MODEL = "claude-3-5-sonnet-20240620"
+    THIN_MODEL = "claude-3-5-haiku-20241022"
     
     def __init__(self, 
                  api_key: Optional[str] = None,
@@ -51,7 +64,18 @@ class EnhancedClaudeClient:
                  memory_manager=None,
                  tools: Optional[List[Dict[str, Any]]] = None,
                  auto_tool_execution: bool = True,
-                 cost_optimization: bool = True):
+                 cost_optimization: bool = True,
+                 context_budget: Optional[int] = None,
+                 context_assembler: Optional[ContextAssembler] = None,
+                 router: Optional[ModelRouter] = None,
+                 latency_slo: Optional[float] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 hedge_delay: float = 2.0,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 usage_ledger: Optional[UsageLedger] = None,
+                 coalesce_requests: bool = True,
+                 singleflight: Optional[SingleFlight] = None,
+                 transport: Optional[AnthropicTransport] = None):
         """
         Initialize the enhanced Claude client.
         
@@ -66,9 +90,20 @@ class EnhancedClaudeClient:
             tools: List of available tools
             auto_tool_execution: Whether to automatically execute tools
             cost_optimization: Whether to use cost optimization strategies
+            context_budget: Optional fixed token budget for injected context and memories
+            context_assembler: Optional pre-configured context assembler
+            router: Optional pre-configured model router
+            latency_slo: Default latency objective in seconds used when routing
+            retry_policy: Optional retry policy for transient API errors
+            hedge_delay: Initial hedge delay in seconds for latency-critical requests
+            rate_limiter: Optional rate limiter (defaults to the process-wide limiter)
+            usage_ledger: Optional usage ledger (defaults to the process-wide ledger)
+            coalesce_requests: Whether identical concurrent requests share one API call
+            singleflight: Optional coalescing group (defaults to the process-wide group)
+            transport: Optional transport (e.g. a record/replay transport), replacing the shared one
         """
         self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
-        if not self.api_key:
+        if not self.api_key and transport is None:
             raise ValueError("Anthropic API key is required. Set the ANTHROPIC_API_KEY environment variable.")
         
         self.primary_model = model or self.SONNET_MODEL
@@ -81,16 +116,53 @@ class EnhancedClaudeClient:
         self.tools = tools
         self.auto_tool_execution = auto_tool_execution
         self.cost_optimization = cost_optimization
-        
-        # Initialize clients
-        self.client = anthropic.Anthropic(api_key=self.api_key)
-        
-        # Track usage for cost optimization
+        self.context_assembler = context_assembler or ContextAssembler(budget_tokens=context_budget)
+        self.token_estimator = self.context_assembler.token_estimator
+        self.router = router or ModelRouter(
+            [self.primary_model, self.secondary_model] if self.hybrid_mode else [self.primary_model],
+            latency_slo=latency_slo
+        )
+        self._local = threading.local()
+        
+        # Shared pooled transport (retries are handled by the resilience layer)
+        self.resilience = ResilientCaller("anthropic", retry_policy=retry_policy, hedge_delay=hedge_delay)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.usage_ledger = usage_ledger or get_usage_ledger()
+        self.transport = transport or get_transport(
+            self.api_key,
+            rate_limiter=self.rate_limiter,
+            usage_ledger=self.usage_ledger,
+            token_estimator=self.token_estimator
+        )
+        self.client = self.transport.client
+        self.coalesce_requests = coalesce_requests
+        self.singleflight = singleflight or get_singleflight()
+        
+        # Request pipeline: retrieve -> assemble -> call -> tools -> persist
+        self.tool_handlers = {}
+        self.tool_executor = get_tool_executor()
+        call_stage = ModelCallStage(self._pipeline_call)
+        self.pipeline = RequestPipeline(
+            retrieve=MemoryRetrievalStage(self.memory_manager),
+            assemble=ContextAssemblyStage(self.context_assembler, placement="user"),
+            call=call_stage,
+            tools=ToolExecutionStage(self.tool_handlers, call_stage, executor=self.tool_executor),
+            persist=MemoryPersistStage(self.memory_manager)
+        )
+        
+        # Track usage for cost optimization (every API call is also recorded in the usage ledger)
+        self._usage_lock = threading.Lock()
         self.usage_stats = {
             "total_tokens": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
             "sonnet_calls": 0,
             "thin_calls": 0,
             "tool_calls": 0,
+            "cost": 0.0,
+            "model_calls": {},
             "start_time": time.time()
         }
         
@@ -120,9 +192,8 @@ class EnhancedClaudeClient:
         """
         Select the appropriate model based on the task complexity and cost optimization.
         
-        In hybrid mode, this intelligently chooses between Sonnet and Thin models:
-        - Uses Thin for simpler queries, shorter responses, or when performance isn't critical
-        - Uses Sonnet for complex reasoning, creative tasks, or when high quality is essential
+        In hybrid mode the model router chooses between the primary and secondary
+        models from observed latency, cost and quality statistics.
         
         Args:
             prompt: The user prompt
@@ -131,34 +202,228 @@ class EnhancedClaudeClient:
         Returns:
             The model name to use
         """
-        if not self.hybrid_mode:
-            return self.primary_model
+        return self._route_request(prompt, context)["model"]
+    
+    def _route_request(self,
+                       prompt: str,
+                       context: Optional[Dict[str, Any]] = None,
+                       model: Optional[str] = None,
+                       max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Route a request through the model router.
         
-        # Simple heuristics for model selection
+        An explicit model override is still recorded by the router so that its
+        latency and cost statistics keep improving.
         
-        # Get task type hint from context
-        task_type = context.get("task_type", "") if context else ""
+        Args:
+            prompt: The user prompt
+            context: Additional context (``latency_slo`` overrides the default objective)
+            model: Optional model override
+            max_tokens: Maximum tokens the request may generate
+            
+        Returns:
+            Routing decision from the model router
+        """
+        context = context or {}
+        candidates = [model] if model else None
+        if not self.hybrid_mode and not model:
+            candidates = [self.primary_model]
+        
+        decision = self.router.route(
+            prompt,
+            context=context,
+            max_tokens=max_tokens or self.max_tokens,
+            latency_slo=context.get("latency_slo"),
+            candidates=candidates
+        )
+        self._local.decision_id = decision["decision_id"]
+        return decision
+    
+    def record_feedback(self, quality: float, decision_id: Optional[str] = None) -> bool:
+        """
+        Record a quality signal for a previous response.
         
-        # Default to the primary model (usually Sonnet)
-        selected_model = self.primary_model
+        Args:
+            quality: Quality score between 0.0 and 1.0
+            decision_id: Routing decision to rate (defaults to this thread's last request)
+            
+        Returns:
+            True if the feedback was applied
+        """
+        decision_id = decision_id or getattr(self._local, "decision_id", None)
+        if not decision_id:
+            return False
+        return self.router.record_feedback(decision_id, quality)
+    
+    def get_routing_decisions(self, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """
+        Get recent model routing decisions for inspection.
         
-        # Use Thin for simple, short queries
-        if len(prompt) < 100 and not any(complex_indicator in prompt.lower() for complex_indicator in 
-                                        ["explain", "analyze", "compare", "evaluate", "reason"]):
-            selected_model = self.THIN_MODEL
+        Args:
+            limit: Maximum number of decisions to return
+            
+        Returns:
+            List of routing decisions, newest last
+        """
+        return self.router.get_decisions(limit)
+    
+    def _call_model(self,
+                    model: str,
+                    allow_failover: bool = False,
+                    hedge: bool = False,
+                    workflow: Optional[str] = None,
+                    **request) -> tuple:
+        """
+        Call the Messages API through the resilience layer.
+        
+        Transient errors are retried with backoff, open circuits fail fast and,
+        when failover is allowed in hybrid mode, the other model is tried next.
+        
+        Args:
+            model: Model to call
+            allow_failover: Whether to fail over to the other hybrid model
+            hedge: Whether to hedge the request (for latency-critical calls)
+            workflow: Workflow name recorded in the usage ledger
+            **request: Remaining Messages API parameters
+            
+        Returns:
+            Tuple of (model that served the request, API response)
+        """
+        models = [model]
+        if allow_failover and self.hybrid_mode:
+            models.append(self.secondary_model if model != self.secondary_model else self.primary_model)
+        
+        candidates = [(m, functools.partial(self._send, m, request, workflow)) for m in models]
+        return self.resilience.execute(candidates, hedge=hedge)
+    
+    def _send(self, model: str, request: Dict[str, Any], workflow: Optional[str] = None) -> Any:
+        """
+        Send a single Messages API request through the shared transport.
+        
+        Every attempt (including retries and hedges) is rate limited, recorded
+        in the usage ledger and added to this client's usage statistics.
         
-        # Use Thin for basic information retrieval
-        elif any(simple_task in task_type.lower() for simple_task in 
-                ["lookup", "simple", "information", "basic", "quick"]):
-            selected_model = self.THIN_MODEL
+        Args:
+            model: Model to call
+            request: Remaining Messages API parameters
+            workflow: Workflow name recorded in the usage ledger
+            
+        Returns:
+            API response
+        """
+        return self.transport.send(model, request, workflow=workflow, on_usage=self._update_usage_stats)
+    
+    def _pipeline_call(self, model: str, request: Dict[str, Any], state: Dict[str, Any]) -> tuple:
+        """Call stage function: sends pipeline requests through the resilience layer."""
+        return self._call_model(
+            model,
+            allow_failover=state.get("allow_failover", False),
+            hedge=state.get("hedge", False),
+            workflow=state.get("workflow"),
+            **request
+        )
+    
+    def _update_usage_stats(self, model: str, entry: Dict[str, Any]) -> None:
+        """Add a usage ledger entry to this client's usage statistics."""
+        with self._usage_lock:
+            for field in UsageLedger.TOKEN_FIELDS:
+                self.usage_stats[field] += entry[field]
+            self.usage_stats["total_tokens"] += entry["input_tokens"] + entry["output_tokens"]
+            self.usage_stats["cost"] += entry["cost"]
+            self.usage_stats["model_calls"][model] = self.usage_stats["model_calls"].get(model, 0) + 1
+            if model == self.THIN_MODEL:
+                self.usage_stats["thin_calls"] += 1
+            else:
+                self.usage_stats["sonnet_calls"] += 1
+    
+    def _run_pipeline(self,
+                      prompt: str,
+                      system: Optional[str],
+                      model: Optional[str],
+                      temperature: Optional[float],
+                      max_tokens: Optional[int],
+                      context: Optional[Dict[str, Any]],
+                      workflow: str,
+                      default_model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Route a request and run it through the request pipeline.
         
-        # Use Sonnet for complex reasoning
-        elif any(complex_task in task_type.lower() for complex_task in 
-                ["complex", "reasoning", "creative", "important", "nuanced"]):
-            selected_model = self.SONNET_MODEL
+        Args:
+            prompt: The user prompt
+            system: Optional system prompt override
+            model: Optional model override
+            temperature: Optional temperature override
+            max_tokens: Optional max tokens override
+            context: Additional context for the generation
+            workflow: Default workflow name recorded in the usage ledger
+            default_model: Model to route to when no override is given
             
-        logger.info(f"Selected model {selected_model} for prompt: {prompt[:50]}...")
-        return selected_model
+        Returns:
+            The final pipeline state
+        """
+        context = context or {}
+        max_tokens = max_tokens or self.max_tokens
+        decision = self._route_request(prompt, context, model=model or default_model, max_tokens=max_tokens)
+        
+        state = {
+            "prompt": prompt,
+            "system": system or self.system,
+            "model": decision["model"],
+            "temperature": temperature or self.temperature,
+            "max_tokens": max_tokens,
+            "tools": self.tools,
+            "context": context,
+            "workflow": context.get("workflow", workflow),
+            "allow_failover": model is None,
+            "hedge": bool(context.get("latency_critical")),
+            "execute_tools": self.auto_tool_execution
+        }
+        
+        start_time = time.time()
+        try:
+            self.pipeline.run(state)
+        except Exception:
+            self.router.record(decision["decision_id"], latency=time.time() - start_time, success=False)
+            raise
+        
+        # The router learns from the first model call; tool round-trips depend on the tools
+        usage = extract_usage(state["responses"][0])
+        self.router.record(
+            decision["decision_id"],
+            latency=state["timings"]["call"],
+            input_tokens=usage["input_tokens"],
+            output_tokens=usage["output_tokens"],
+            success=state["model"] == decision["model"]
+        )
+        
+        executed = [call for call in state.get("tool_calls", []) if call["result"] is not None]
+        if executed:
+            with self._usage_lock:
+                self.usage_stats["tool_calls"] += len(executed)
+        
+        return state
+    
+    def _request_key(self, kind: str, *args) -> str:
+        """
+        Build the coalescing key for a request, including the client configuration it depends on.
+        
+        Requests only coalesce across clients that share the transport, the
+        memory manager and the tool handlers, since a waiter gets the leader's
+        result without retrieving or persisting memories or running tools itself.
+        """
+        return make_key(
+            kind,
+            id(self.transport),
+            id(self.memory_manager) if self.memory_manager is not None else None,
+            sorted((name, id(handler)) for name, handler in self.tool_handlers.items()),
+            self.primary_model,
+            self.hybrid_mode,
+            self.system,
+            self.temperature,
+            self.max_tokens,
+            [tool.get("name") for tool in self.tools or []],
+            *args
+        )
     
     def generate(self, 
                 prompt: str, 
@@ -170,6 +435,10 @@ class EnhancedClaudeClient:
         """
         Generate a response to the given prompt.
         
+        Identical requests that are already in flight (from this or another
+        client in the process with the same transport, memory manager and tool
+        handlers) share that call's result instead of issuing a duplicate API call.
+        
         Args:
             prompt: The prompt to generate a response for
             system: Optional system prompt override
@@ -181,82 +450,58 @@ class EnhancedClaudeClient:
         Returns:
             The generated response
         """
-        context = context or {}
+        call = functools.partial(self._generate, prompt, system, model, temperature, max_tokens, context)
+        if not self.coalesce_requests:
+            return call()
         
-        # Determine which model to use
-        model_to_use = model or self._select_model(prompt, context)
+        key = self._request_key("generate", prompt, system, model, temperature, max_tokens, context)
+        return self.singleflight.do(key, call)
+    
+    async def generate_async(self, 
+                             prompt: str, 
+                             system: Optional[str] = None,
+                             model: Optional[str] = None,
+                             temperature: Optional[float] = None,
+                             max_tokens: Optional[int] = None,
+                             context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate a response asynchronously.
         
-        # Retrieve relevant memories if memory manager is available
-        memories = []
-        if self.memory_manager:
-            memories = self.memory_manager.retrieve_relevant_memories(prompt, limit=5)
-            
-            # Add memories to context
-            if memories:
-                memories_text = "\n\n".join([f"Memory {i+1}: {memory['content']}" for i, memory in enumerate(memories)])
-                context["relevant_memories"] = memories_text
-        
-        # Construct the message
-        messages = [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
+        The request runs in a worker thread; identical concurrent requests on the
+        event loop share one call, which is also coalesced with threaded callers.
         
-        # Add context as assistant message if needed
-        if context and any(k for k in context.keys() if k != "task_type"):
-            context_message = "Here is some relevant context:\n\n"
-            
-            for key, value in context.items():
-                if key != "task_type":  # Skip task_type as it's internal
-                    context_message += f"--- {key} ---\n{value}\n\n"
+        Args:
+            prompt: The prompt to generate a response for
+            system: Optional system prompt override
+            model: Optional model override
+            temperature: Optional temperature override
+            max_tokens: Optional max tokens override
+            context: Additional context for the generation
             
-            messages.insert(0, {
-                "role": "assistant",
-                "content": context_message
-            })
+        Returns:
+            The generated response
+        """
+        call = functools.partial(self.generate, prompt, system, model, temperature, max_tokens, context)
+        if not self.coalesce_requests:
+            return await asyncio.to_thread(call)
         
-        # Make the API call
+        key = self._request_key("generate", prompt, system, model, temperature, max_tokens, context)
+        return await self.singleflight.do_async(key, lambda: asyncio.to_thread(call))
+    
+    def _generate(self,
+                  prompt: str,
+                  system: Optional[str] = None,
+                  model: Optional[str] = None,
+                  temperature: Optional[float] = None,
+                  max_tokens: Optional[int] = None,
+                  context: Optional[Dict[str, Any]] = None) -> str:
+        """Generate a response with a single (uncoalesced) pipeline run."""
         try:
-            start_time = time.time()
-            
-            response = self.client.messages.create(
-                model=model_to_use,
-                messages=messages,
-                system=system or self.system,
-                temperature=temperature or self.temperature,
-                max_tokens=max_tokens or self.max_tokens,
-                tools=self.tools
-            )
-            
-            content = response.content[0].text
-            
-            # Update usage statistics
-            self.usage_stats["total_tokens"] += response.usage.input_tokens + response.usage.output_tokens
-            if model_to_use == self.SONNET_MODEL:
-                self.usage_stats["sonnet_calls"] += 1
-            else:
-                self.usage_stats["thin_calls"] += 1
-            
-            # Store in memory if available
-            if self.memory_manager:
-                self.memory_manager.add_memory(
-                    content=content,
-                    memory_type="conversation",
-                    metadata={
-                        "prompt": prompt,
-                        "model": model_to_use,
-                        "timestamp": time.time(),
-                        "response_time": time.time() - start_time
-                    }
-                )
-            
-            return content
-            
+            state = self._run_pipeline(prompt, system, model, temperature, max_tokens, context, "generate")
+            return state["content"]
         except Exception as e:
             logger.error(f"Error generating response: {e}")
-            return f"Error generating response: {str(e)}"
+            return f"{GENERATION_ERROR_PREFIX}{str(e)}"
     
     def generate_with_tools(self,
                            prompt: str,
@@ -268,6 +513,9 @@ class EnhancedClaudeClient:
         """
         Generate a response with potential tool use.
         
+        Identical requests that are already in flight share that call's result
+        (including its tool execution).
+        
         Args:
             prompt: The prompt to generate a response for
             system: Optional system prompt override
@@ -279,6 +527,50 @@ class EnhancedClaudeClient:
         Returns:
             Dictionary with response and tool use details
         """
+        call = functools.partial(self._generate_with_tools, prompt, system, model, temperature, max_tokens, context)
+        if not self.coalesce_requests:
+            return call()
+        
+        key = self._request_key("generate_with_tools", prompt, system, model, temperature, max_tokens, context)
+        # Every caller gets its own copy of the shared result
+        return dict(self.singleflight.do(key, call))
+    
+    async def generate_with_tools_async(self,
+                                        prompt: str,
+                                        system: Optional[str] = None,
+                                        model: Optional[str] = None,
+                                        temperature: Optional[float] = None,
+                                        max_tokens: Optional[int] = None,
+                                        context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Generate a response with potential tool use asynchronously.
+        
+        Args:
+            prompt: The prompt to generate a response for
+            system: Optional system prompt override
+            model: Optional model override
+            temperature: Optional temperature override
+            max_tokens: Optional max tokens override
+            context: Additional context
+            
+        Returns:
+            Dictionary with response and tool use details
+        """
+        call = functools.partial(self.generate_with_tools, prompt, system, model, temperature, max_tokens, context)
+        if not self.coalesce_requests:
+            return await asyncio.to_thread(call)
+        
+        key = self._request_key("generate_with_tools", prompt, system, model, temperature, max_tokens, context)
+        return dict(await self.singleflight.do_async(key, lambda: asyncio.to_thread(call)))
+    
+    def _generate_with_tools(self,
+                             prompt: str,
+                             system: Optional[str] = None,
+                             model: Optional[str] = None,
+                             temperature: Optional[float] = None,
+                             max_tokens: Optional[int] = None,
+                             context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate a response with potential tool use in a single (uncoalesced) pipeline run."""
         if not self.tools:
             logger.warning("No tools available for generate_with_tools call")
             return {
@@ -286,188 +578,68 @@ class EnhancedClaudeClient:
                 "used_tools": False
             }
         
-        context = context or {}
-        
         # Always use the primary model (usually Sonnet) for tool use
-        model_to_use = model or self.primary_model
-        
-        # Retrieve relevant memories if memory manager is available
-        memories = []
-        if self.memory_manager:
-            memories = self.memory_manager.retrieve_relevant_memories(prompt, limit=5)
-            
-            # Add memories to context
-            if memories:
-                memories_text = "\n\n".join([f"Memory {i+1}: {memory['content']}" for i, memory in enumerate(memories)])
-                context["relevant_memories"] = memories_text
-        
-        # Construct the message
-        messages = []
-        
-        # Add context as assistant message if needed
-        if context and any(k for k in context.keys() if k != "task_type"):
-            context_message = "Here is some relevant context:\n\n"
-            
-            for key, value in context.items():
-                if key != "task_type":  # Skip task_type as it's internal
-                    context_message += f"--- {key} ---\n{value}\n\n"
-            
-            messages.append({
-                "role": "assistant",
-                "content": context_message
-            })
-        
-        # Add user message
-        messages.append({
-            "role": "user",
-            "content": prompt
-        })
-        
-        # Make the API call
         try:
-            response = self.client.messages.create(
-                model=model_to_use,
-                messages=messages,
-                system=system or self.system,
-                temperature=temperature or self.temperature,
-                max_tokens=max_tokens or self.max_tokens,
-                tools=self.tools
+            state = self._run_pipeline(
+                prompt, system, model, temperature, max_tokens, context,
+                "generate_with_tools", default_model=self.primary_model
             )
-            
-            # Update usage statistics
-            self.usage_stats["total_tokens"] += response.usage.input_tokens + response.usage.output_tokens
-            self.usage_stats["sonnet_calls"] += 1
-            
-            # Check if the model wants to use a tool
-            if response.content[0].type == "tool_use":
-                tool_use = response.content[0].tool_use
-                
-                if self.auto_tool_execution:
-                    # Execute the tool
-                    tool_result = self._execute_tool(tool_use)
-                    self.usage_stats["tool_calls"] += 1
-                    
-                    # Continue the conversation with the tool result
-                    messages.append({
-                        "role": "assistant",
-                        "content": None,
-                        "tool_use": {
-                            "name": tool_use.name,
-                            "input": tool_use.input
-                        }
-                    })
-                    
-                    messages.append({
-                        "role": "user",
-                        "content": None,
-                        "tool_result": {
-                            "content": json.dumps(tool_result)
-                        }
-                    })
-                    
-                    # Get the final response
-                    final_response = self.client.messages.create(
-                        model=model_to_use,
-                        messages=messages,
-                        system=system or self.system,
-                        temperature=temperature or self.temperature,
-                        max_tokens=max_tokens or self.max_tokens
-                    )
-                    
-                    # Update usage statistics again
-                    self.usage_stats["total_tokens"] += final_response.usage.input_tokens + final_response.usage.output_tokens
-                    
-                    content = final_response.content[0].text
-                    
-                    result = {
-                        "content": content,
-                        "used_tools": True,
-                        "tool_use": {
-                            "name": tool_use.name,
-                            "input": tool_use.input,
-                            "result": tool_result
-                        }
-                    }
-                else:
-                    # Return without executing
-                    result = {
-                        "content": None,
-                        "used_tools": True,
-                        "tool_use": {
-                            "name": tool_use.name,
-                            "input": tool_use.input,
-                            "result": None
-                        },
-                        "message": "Tool use requested but auto_tool_execution is disabled"
-                    }
-            else:
-                # No tool use
-                content = response.content[0].text
-                result = {
-                    "content": content,
-                    "used_tools": False
-                }
-            
-            # Store in memory if available
-            if self.memory_manager:
-                self.memory_manager.add_memory(
-                    content=result["content"] if result["content"] else str(result),
-                    memory_type="conversation",
-                    metadata={
-                        "prompt": prompt,
-                        "model": model_to_use,
-                        "used_tools": result["used_tools"],
-                        "timestamp": time.time()
-                    }
-                )
-            
-            return result
-            
         except Exception as e:
             logger.error(f"Error generating response with tools: {e}")
             return {
-                "content": f"Error generating response: {str(e)}",
+                "content": f"{GENERATION_ERROR_PREFIX}{str(e)}",
                 "used_tools": False,
                 "error": str(e)
             }
-    
-    def _execute_tool(self, tool_use: Any) -> Dict[str, Any]:
-        """
-        Execute a tool based on the tool use request.
-        
-        Args:
-            tool_use: Tool use request from Claude
-            
-        Returns:
-            Tool execution result
-        """
-        tool_name = tool_use.name
-        tool_input = json.loads(tool_use.input) if isinstance(tool_use.input, str) else tool_use.input
         
-        logger.info(f"Executing tool: {tool_name}")
+        tool_calls = state.get("tool_calls", [])
+        if not tool_calls:
+            return {
+                "content": state["content"],
+                "used_tools": False
+            }
         
-        try:
-            # Here we would dispatch to the appropriate tool handler
-            # This is a simplified implementation
-            if tool_name == "web_search" and hasattr(self, "_web_search"):
-                return self._web_search(tool_input.get("query", ""))
-            elif tool_name == "calculator" and hasattr(self, "_calculator"):
-                return self._calculator(tool_input.get("expression", ""))
-            else:
-                logger.warning(f"Unknown tool or no handler available: {tool_name}")
-                return {"error": f"Unknown tool or no handler available: {tool_name}"}
-        except Exception as e:
-            logger.error(f"Error executing tool {tool_name}: {e}")
-            return {"error": f"Error executing tool {tool_name}: {str(e)}"}
+        first_call = tool_calls[0]
+        result = {
+            "content": state["content"] or None,
+            "used_tools": True,
+            "tool_use": {
+                "name": first_call["name"],
+                "input": first_call["input"],
+                "result": first_call["result"]
+            },
+            "tool_calls": tool_calls
+        }
+        if not self.auto_tool_execution:
+            result["content"] = None
+            result["message"] = "Tool use requested but auto_tool_execution is disabled"
+        return result
     
-    def register_tool_handler(self, tool_name: str, handler: Callable) -> None:
+    def register_tool_handler(
+        self,
+        tool_name: str,
+        handler: Callable,
+        **policy
+    ) -> None:
         """
         Register a handler for a specific tool.
         
         Args:
             tool_name: Name of the tool
-            handler: Function to handle tool execution
+            handler: Function to handle tool execution (called with the tool input as keyword arguments)
+            **policy: Optional execution and caching policy for ToolExecutor.configure
+                (timeout, max_concurrency, isolation, cacheable, cache_ttl, invalidation_key);
+                without one the tool runs with the executor's defaults
         """
+        previous = self.tool_handlers.get(tool_name)
+        if previous is not None:
+            # Re-registering must not keep the policy of the replaced handler
+            self.tool_executor.reset(tool_name, previous)
+        if policy:
+            self.tool_executor.configure(tool_name, handler=handler, **policy)
+        else:
+            self.tool_executor.reset(tool_name, handler)
+        self.tool_handlers[tool_name] = handler
         setattr(self, f"_{tool_name}", handler)
         logger.info(f"Registered handler for tool: {tool_name}")
     
@@ -508,7 +680,7 @@ class EnhancedClaudeClient:
             self.tools.append(web_search_tool)
             
             # Register handler
-            self.register_tool_handler("web_search", self._web_search_handler)
+            self.register_tool_handler("web_search", self._web_search_handler, cacheable=True, cache_ttl=600.0)
             
             logger.info("Web search capability added successfully")
             
@@ -534,10 +706,11 @@ class EnhancedClaudeClient:
             
             # Store in memory if available
             if self.memory_manager:
-                self.memory_manager.add_memory(
-                    content=result["content"],
-                    memory_type="semantic",
-                    metadata={
+                save_memory(
+                    self.memory_manager,
+                    result["content"],
+                    "semantic",
+                    {
                         "source": "web_search",
                         "query": query,
                         "timestamp": time.time()
@@ -619,10 +792,11 @@ class EnhancedClaudeClient:
             
             # Store in memory if available
             if self.memory_manager:
-                self.memory_manager.add_memory(
-                    content=f"Reasoning: {result.get('answer', '')}",
-                    memory_type="semantic",
-                    metadata={
+                save_memory(
+                    self.memory_manager,
+                    f"Reasoning: {result.get('answer', '')}",
+                    "semantic",
+                    {
                         "source": "enhanced_reasoning",
                         "query": query,
                         "strategy": strategy,
@@ -644,12 +818,25 @@ class EnhancedClaudeClient:
         Returns:
             Dictionary with usage statistics
         """
-        stats = self.usage_stats.copy()
+        with self._usage_lock:
+            stats = {**self.usage_stats, "model_calls": dict(self.usage_stats["model_calls"])}
         stats["runtime"] = time.time() - stats["start_time"]
         
-        # Calculate approximate costs
+        # Costs are priced per request from the actual token usage
         stats["estimated_cost"] = self._calculate_estimated_cost()
         
+        # Retry, failover, hedging and circuit breaker metrics
+        stats["resilience"] = self.resilience.get_stats()
+        
+        # Client-side rate limiting (queueing) metrics
+        stats["rate_limits"] = self.rate_limiter.get_stats()
+        
+        # Per-model and per-workflow token, latency and cost aggregates
+        stats["ledger"] = self.usage_ledger.get_summary()
+        
+        # Request coalescing (in-flight deduplication) metrics
+        stats["coalescing"] = self.singleflight.get_stats()
+        
         return stats
     
     def _calculate_estimated_cost(self) -> float:
@@ -659,28 +846,4 @@ class EnhancedClaudeClient:
         Returns:
             Estimated cost in USD
         """
-        # These rates are approximations and should be updated as pricing changes
-        sonnet_input_cost_per_1k = 0.009
-        sonnet_output_cost_per_1k = 0.027
-        thin_input_cost_per_1k = 0.003
-        thin_output_cost_per_1k = 0.015
-        
-        # Estimate token split between models and between input/output
-        # This is a simplified calculation
-        total_tokens = self.usage_stats["total_tokens"]
-        sonnet_ratio = self.usage_stats["sonnet_calls"] / (self.usage_stats["sonnet_calls"] + self.usage_stats["thin_calls"]) if (self.usage_stats["sonnet_calls"] + self.usage_stats["thin_calls"]) > 0 else 0
-        
-        sonnet_tokens = total_tokens * sonnet_ratio
-        thin_tokens = total_tokens * (1 - sonnet_ratio)
-        
-        # Assume 30% input, 70% output split on average
-        sonnet_input_tokens = sonnet_tokens * 0.3
-        sonnet_output_tokens = sonnet_tokens * 0.7
-        thin_input_tokens = thin_tokens * 0.3
-        thin_output_tokens = thin_tokens * 0.7
-        
-        # Calculate costs
-        sonnet_cost = (sonnet_input_tokens / 1000 * sonnet_input_cost_per_1k) + (sonnet_output_tokens / 1000 * sonnet_output_cost_per_1k)
-        thin_cost = (thin_input_tokens / 1000 * thin_input_cost_per_1k) + (thin_output_tokens / 1000 * thin_output_cost_per_1k)
-        
-        return sonnet_cost + thin_cost 
\ No newline at end of file
+        return round(self.usage_stats["cost"], 6)
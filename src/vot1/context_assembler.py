@@ -0,0 +1,312 @@
+"""
+VOT1 Context Assembler
+
+This module builds the context block that the clients inject ahead of a prompt.
+Context values and retrieved memories are split into blocks, each block is
+scored for relevance and measured in tokens, and the highest-ranked blocks are
+packed into a token budget derived from ``max_tokens`` and the model's context
+window. Blocks that do not fit are truncated (or summarized when a summarizer
+is supplied) or dropped.
+
+Token counts come from the shared TokenEstimator and are memoized per content
+hash, so repeated assembly of the same context (e.g. the same source file
+across several workflow steps) stays cheap.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Callable
+
+from vot1.token_estimator import TokenEstimator, get_token_estimator
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+
+
+class ContextAssembler:
+    """
+    Token-budget-aware assembly of context and memory blocks.
+
+    Blocks are dictionaries with ``key``, ``content`` and ``score`` entries.
+    Explicit context values default to a score of 1.0 and memories use their
+    retrieval similarity, so caller-provided context wins ties against memory.
+    """
+
+    # Context window sizes (in tokens) for known models
+    MODEL_CONTEXT_WINDOWS = {
+        "claude-3-7-sonnet-20240620": 200000,
+        "claude-3-5-sonnet-20240620": 200000,
+        "claude-3-opus-20240229": 200000,
+        "claude-3-7-sonnet": 200000,
+        "sonar-reasoning-pro": 127000,
+        "pplx-70b-online": 4096,
+    }
+    DEFAULT_CONTEXT_WINDOW = 200000
+
+    # Context keys that are used internally (routing, resilience, telemetry) and never sent to the model
+    INTERNAL_KEYS = ("task_type", "task_complexity", "latency_slo", "latency_critical", "workflow")
+
+    TRUNCATION_MARKER = "\n[... truncated]"
+
+    def __init__(
+        self,
+        budget_tokens: Optional[int] = None,
+        budget_ratio: float = 4.0,
+        reserve_tokens: int = 512,
+        min_block_tokens: int = 64,
+        summarizer: Optional[Callable[[str, int], str]] = None,
+        cache_size: int = 4096,
+        token_estimator: Optional[TokenEstimator] = None
+    ):
+        """
+        Initialize the context assembler.
+
+        Args:
+            budget_tokens: Fixed context budget in tokens (overrides budget_ratio)
+            budget_ratio: Context budget as a multiple of the request's max_tokens
+            reserve_tokens: Tokens kept free in the model window for framing overhead
+            min_block_tokens: Smallest useful size for a truncated block
+            summarizer: Optional callable (text, max_tokens) -> str used instead of truncation
+            cache_size: Maximum number of memoized token counts
+            token_estimator: Optional token estimator (defaults to the process-wide estimator)
+        """
+        self.budget_tokens = budget_tokens
+        self.budget_ratio = budget_ratio
+        self.reserve_tokens = reserve_tokens
+        self.min_block_tokens = min_block_tokens
+        self.summarizer = summarizer
+        self.cache_size = cache_size
+        self.token_estimator = token_estimator or get_token_estimator()
+
+        self._token_cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "assemblies": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "blocks_truncated": 0,
+            "blocks_dropped": 0
+        }
+
+    def count_tokens(self, text: str, model: Optional[str] = None) -> int:
+        """
+        Estimate the number of tokens in a piece of text.
+
+        Raw counts are memoized per content hash and scaled by the model's
+        calibration ratio.
+
+        Args:
+            text: Text to measure
+            model: Optional model the text will be sent to
+
+        Returns:
+            Estimated token count
+        """
+        if not text:
+            return 0
+
+        digest = hashlib.sha1(text.encode("utf-8", errors="replace")).hexdigest()
+        with self._lock:
+            cached = self._token_cache.get(digest)
+            if cached is not None:
+                self._token_cache.move_to_end(digest)
+                self.stats["cache_hits"] += 1
+                return self.token_estimator.apply_calibration(cached, model)
+
+        count = max(1, self.token_estimator.estimate_raw(text))
+
+        with self._lock:
+            self.stats["cache_misses"] += 1
+            self._token_cache[digest] = count
+            if len(self._token_cache) > self.cache_size:
+                self._token_cache.popitem(last=False)
+
+        return self.token_estimator.apply_calibration(count, model)
+
+    def get_budget(self, model: Optional[str], max_tokens: int, prompt: str = "") -> int:
+        """
+        Compute the context budget for a request.
+
+        Args:
+            model: Model the request will be sent to
+            max_tokens: Maximum tokens the request may generate
+            prompt: The user prompt (counted against the model window)
+
+        Returns:
+            Context budget in tokens
+        """
+        window = self.MODEL_CONTEXT_WINDOWS.get(model, self.DEFAULT_CONTEXT_WINDOW)
+        available = window - max_tokens - self.count_tokens(prompt, model) - self.reserve_tokens
+
+        budget = self.budget_tokens if self.budget_tokens is not None else int(max_tokens * self.budget_ratio)
+        return max(0, min(budget, available))
+
+    def build_blocks(
+        self,
+        context: Optional[Dict[str, Any]] = None,
+        memories: Optional[List[Dict[str, Any]]] = None,
+        scores: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Convert a context dictionary and retrieved memories into scored blocks.
+
+        Args:
+            context: Context values keyed by name
+            memories: Memories as returned by the memory manager
+            scores: Optional relevance overrides for context keys
+
+        Returns:
+            List of blocks in presentation order
+        """
+        scores = scores or {}
+        blocks = []
+
+        for key, value in (context or {}).items():
+            if key in self.INTERNAL_KEYS or value is None:
+                continue
+            blocks.append({
+                "key": key,
+                "content": value if isinstance(value, str) else str(value),
+                "score": float(scores.get(key, 1.0))
+            })
+
+        for i, memory in enumerate(memories or []):
+            blocks.append({
+                "key": f"memory {i+1}",
+                "content": str(memory.get("content", "")),
+                "score": float(memory.get("similarity", 0.5))
+            })
+
+        return blocks
+
+    def assemble(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        memories: Optional[List[Dict[str, Any]]] = None,
+        model: Optional[str] = None,
+        max_tokens: int = 1024,
+        scores: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Assemble context and memories into a single budgeted context message.
+
+        Args:
+            prompt: The user prompt, used for relevance tie-breaking
+            context: Context values keyed by name
+            memories: Retrieved memories with similarity scores
+            model: Model the request will be sent to
+            max_tokens: Maximum tokens the request may generate
+            scores: Optional relevance overrides for context keys
+
+        Returns:
+            Dictionary with the rendered text, included blocks, token usage and
+            the keys that were truncated or dropped
+        """
+        blocks = self.build_blocks(context, memories, scores)
+        budget = self.get_budget(model, max_tokens, prompt)
+
+        result = {
+            "text": "",
+            "blocks": [],
+            "tokens": 0,
+            "budget": budget,
+            "truncated": [],
+            "dropped": []
+        }
+        if not blocks:
+            return result
+
+        prompt_words = set(_WORD_RE.findall(prompt.lower()))
+        for position, block in enumerate(blocks):
+            block["position"] = position
+            block["tokens"] = self.count_tokens(block["content"]) + self.count_tokens(block["key"]) + 4
+            block["overlap"] = self._lexical_overlap(prompt_words, block["content"])
+
+        ranked = sorted(blocks, key=lambda b: (b["score"], b["overlap"]), reverse=True)
+
+        remaining = budget
+        selected = []
+        for block in ranked:
+            if block["tokens"] <= remaining:
+                selected.append(block)
+                remaining -= block["tokens"]
+                continue
+
+            if remaining >= self.min_block_tokens:
+                shortened = self._shrink(block["content"], remaining - self.count_tokens(block["key"]) - 4)
+                if shortened:
+                    block["content"] = shortened
+                    block["tokens"] = remaining
+                    selected.append(block)
+                    result["truncated"].append(block["key"])
+                    remaining = 0
+                    continue
+
+            result["dropped"].append(block["key"])
+
+        selected.sort(key=lambda b: b["position"])
+
+        text = ""
+        if selected:
+            text = "Here is some relevant context:\n\n"
+            for block in selected:
+                text += f"--- {block['key']} ---\n{block['content']}\n\n"
+
+        result["text"] = text
+        result["blocks"] = [{"key": b["key"], "score": b["score"], "tokens": b["tokens"]} for b in selected]
+        result["tokens"] = budget - remaining
+
+        with self._lock:
+            self.stats["assemblies"] += 1
+            self.stats["blocks_truncated"] += len(result["truncated"])
+            self.stats["blocks_dropped"] += len(result["dropped"])
+
+        if result["truncated"] or result["dropped"]:
+            logger.info(
+                f"Context budget {budget} tokens: truncated {result['truncated']}, dropped {result['dropped']}"
+            )
+
+        return result
+
+    def _shrink(self, content: str, max_tokens: int) -> str:
+        """Reduce content to roughly max_tokens by summarizing or truncating."""
+        if max_tokens <= 0:
+            return ""
+
+        if self.summarizer:
+            try:
+                summary = self.summarizer(content, max_tokens)
+                if summary and self.count_tokens(summary) <= max_tokens:
+                    return summary
+            except Exception as e:
+                logger.warning(f"Context summarizer failed, falling back to truncation: {e}")
+
+        marker_tokens = self.count_tokens(self.TRUNCATION_MARKER)
+        max_chars = max(0, (max_tokens - marker_tokens) * 4)
+        truncated = content[:max_chars]
+
+        # Prefer cutting at a line boundary when one is reasonably close
+        cut = truncated.rfind("\n")
+        if cut > max_chars * 0.8:
+            truncated = truncated[:cut]
+
+        return truncated + self.TRUNCATION_MARKER if truncated else ""
+
+    def _lexical_overlap(self, prompt_words: set, content: str) -> float:
+        """Fraction of prompt words that also occur in the content."""
+        if not prompt_words:
+            return 0.0
+        content_words = set(_WORD_RE.findall(content[:20000].lower()))
+        return len(prompt_words & content_words) / len(prompt_words)
+
+    def clear_cache(self) -> None:
+        """Clear the memoized token counts."""
+        with self._lock:
+            self._token_cache.clear()
@@ -8,16 +8,23 @@ access to the latest information.
 """
 
 import os
-import json
+import functools
 import logging
-import requests
-from typing import Dict, List, Any, Optional, Union, Callable
-import anthropic
-from anthropic.types import Message
+from typing import Dict, Any, Optional, Union
 from datetime import datetime
 
+from vot1.context_assembler import ContextAssembler
 from vot1.perplexity_client import PerplexityMcpClient, create_mcp_tool_spec
 from vot1.memory import MemoryManager
+from vot1.pipeline import (
+    RequestPipeline, MemoryRetrievalStage, ContextAssemblyStage, ModelCallStage,
+    ToolExecutionStage, MemoryPersistStage, AnthropicTransport, get_transport
+)
+from vot1.rate_limiter import RateLimiter, get_rate_limiter
+from vot1.resilience import ResilientCaller, RetryPolicy
+from vot1.token_estimator import get_token_estimator
+from vot1.tool_executor import get_tool_executor
+from vot1.usage import UsageLedger, get_usage_ledger
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +45,12 @@ class VOT1Client:
         perplexity_model: str = "sonar-reasoning-pro",
         memory_manager: Optional[MemoryManager] = None,
         max_tokens: int = 4096,
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        fallback_model: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        usage_ledger: Optional[UsageLedger] = None,
+        transport: Optional[AnthropicTransport] = None
     ):
         """
         Initialize the VOT1 client with both Claude and Perplexity capabilities.
@@ -51,17 +63,34 @@ class VOT1Client:
             memory_manager: Optional MemoryManager instance for memory capabilities.
             max_tokens: Maximum tokens for Claude responses.
             system_prompt: Custom system prompt for Claude.
+            fallback_model: Optional Claude model to fail over to when the primary model is unavailable.
+            retry_policy: Optional retry policy for transient API errors.
+            rate_limiter: Optional rate limiter. Defaults to the process-wide limiter.
+            usage_ledger: Optional usage ledger. Defaults to the process-wide ledger.
+            transport: Optional transport (e.g. a record/replay transport). Defaults to the shared transport.
         """
         # Initialize the Anthropic client
         self.anthropic_api_key = anthropic_api_key or os.environ.get("ANTHROPIC_API_KEY")
-        if not self.anthropic_api_key:
+        if not self.anthropic_api_key and transport is None:
             raise ValueError(
                 "Anthropic API key is required. Either pass it directly or "
                 "set the ANTHROPIC_API_KEY environment variable."
             )
         
-        self.client = anthropic.Anthropic(api_key=self.anthropic_api_key)
+        # Shared pooled transport (retries are handled by the resilience layer)
+        self.resilience = ResilientCaller("anthropic", retry_policy=retry_policy)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.usage_ledger = usage_ledger or get_usage_ledger()
+        self.token_estimator = get_token_estimator()
+        self.transport = transport or get_transport(
+            self.anthropic_api_key,
+            rate_limiter=self.rate_limiter,
+            usage_ledger=self.usage_ledger,
+            token_estimator=self.token_estimator
+        )
+        self.client = self.transport.client
         self.claude_model = claude_model
+        self.fallback_model = fallback_model
         self.max_tokens = max_tokens
         
         # Initialize the default system prompt if none provided
@@ -93,8 +122,20 @@ class VOT1Client:
         
         # Set up tools for Claude
         self.tools = []
+        self.tool_handlers = {}
         if self.has_perplexity:
             self.tools.append(create_mcp_tool_spec())
+            self.tool_handlers["search_web"] = self._search_web_tool
+        
+        # Request pipeline: retrieve -> assemble -> call -> tools -> persist
+        call_stage = ModelCallStage(self._pipeline_call)
+        self.pipeline = RequestPipeline(
+            retrieve=MemoryRetrievalStage(self.memory_manager),
+            assemble=ContextAssemblyStage(ContextAssembler(token_estimator=self.token_estimator), placement="system"),
+            call=call_stage,
+            tools=ToolExecutionStage(self.tool_handlers, call_stage, executor=get_tool_executor()),
+            persist=MemoryPersistStage(self.memory_manager)
+        )
         
         logger.info(f"VOT1 client initialized with Claude model: {claude_model}")
         if self.has_perplexity:
@@ -125,132 +166,99 @@ class VOT1Client:
         Returns:
             Dict containing the response and metadata
         """
-        # Prepare system prompt
-        system_prompt = custom_system_prompt or self.system_prompt
-        
-        # Retrieve relevant memory if memory manager is available and use_memory is True
-        memory_context = ""
-        if self.memory_manager and use_memory and conversation_id:
-            memories = self.memory_manager.retrieve_relevant_memories(prompt, limit=5)
-            if memories:
-                memory_context = "Relevant information from memory:\n"
-                for i, memory in enumerate(memories, 1):
-                    memory_context += f"{i}. {memory['content']}\n"
-                memory_context += "\n"
-        
-        # Set up the messages
-        messages = []
-        if memory_context:
-            # Add memory context to the system prompt
-            system_prompt = f"{system_prompt}\n\n{memory_context}"
-        
-        # Build available tools
-        tools = []
+        # Memories are only retrieved and saved for identified conversations
+        state = {
+            "prompt": prompt,
+            "system": custom_system_prompt or self.system_prompt,
+            "model": self.claude_model,
+            "max_tokens": self.max_tokens,
+            "conversation_id": conversation_id,
+            "use_memory": use_memory and bool(conversation_id),
+            "save_to_memory": save_to_memory and bool(conversation_id),
+            "workflow": "vot1"
+        }
         if use_web_search and self.has_perplexity:
-            tools = self.tools
+            state["tools"] = self.tools
+            if tool_choice:
+                state["tool_choice"] = {"type": "any" if tool_choice == "required" else tool_choice}
         
-        # Make the request to Claude
         try:
-            response = self.client.messages.create(
-                model=self.claude_model,
-                max_tokens=self.max_tokens,
-                system=system_prompt,
-                messages=[{"role": "user", "content": prompt}],
-                tools=tools if tools else None,
-                tool_choice=tool_choice
-            )
-            
-            # Process tool calls if any
-            processed_response = self._process_tool_calls(response, prompt)
-            
-            # Save to memory if requested
-            if save_to_memory and self.memory_manager and conversation_id:
-                self.memory_manager.add_conversation_memory(
-                    conversation_id=conversation_id,
-                    role="user",
-                    content=prompt,
-                    timestamp=datetime.now().isoformat()
-                )
-                self.memory_manager.add_conversation_memory(
-                    conversation_id=conversation_id,
-                    role="assistant",
-                    content=processed_response["content"],
-                    timestamp=datetime.now().isoformat(),
-                    metadata={"web_search_used": processed_response.get("web_search_used", False)}
-                )
-            
-            return processed_response
-            
+            self.pipeline.run(state)
         except Exception as e:
             logger.error(f"Error generating response: {e}")
             return {
                 "content": f"I encountered an error while processing your request: {str(e)}",
                 "error": str(e)
             }
-    
-    def _process_tool_calls(self, response: Message, original_prompt: str) -> Dict[str, Any]:
-        """Process any tool calls in the Claude response."""
+        
+        searches = [call for call in state.get("tool_calls", []) if call["name"] == "search_web"]
         result = {
-            "content": response.content[0].text,
-            "model": self.claude_model,
-            "web_search_used": False
+            "content": state["content"],
+            "model": state["model"],
+            "web_search_used": any(isinstance(call["result"], str) for call in searches)
         }
+        errors = [call["result"]["error"] for call in searches if isinstance(call["result"], dict)]
+        if errors:
+            result["web_search_error"] = errors[-1]
+        return result
+    
+    def _pipeline_call(self, model: str, request: Dict[str, Any], state: Dict[str, Any]) -> tuple:
+        """Call stage function: tries the Claude model, then the fallback model."""
+        models = [model]
+        if self.fallback_model and self.fallback_model not in models:
+            models.append(self.fallback_model)
         
-        # Check if there are tool calls
-        if not hasattr(response, 'tool_calls') or not response.tool_calls:
-            return result
+        return self.resilience.execute([
+            (m, functools.partial(self.transport.send, m, request, state.get("workflow", "vot1")))
+            for m in models
+        ])
+    
+    def _search_web_tool(
+        self,
+        query: str,
+        include_links: bool = True,
+        detailed_responses: bool = True
+    ) -> Union[str, Dict[str, Any]]:
+        """
+        Handle the search_web tool: search with Perplexity and format the results for Claude.
         
-        # Process each tool call
-        for tool_call in response.tool_calls:
-            if tool_call.name == "search_web" and self.has_perplexity:
-                # Execute web search
-                query = tool_call.input.get("query")
-                include_links = tool_call.input.get("include_links", True)
-                detailed_responses = tool_call.input.get("detailed_responses", True)
-                
-                if query:
-                    try:
-                        search_result = self.perplexity_client.search(
-                            query=query,
-                            include_links=include_links,
-                            detailed_responses=detailed_responses
-                        )
-                        
-                        # Format the search result for Claude
-                        if "answer" in search_result:
-                            web_info = f"Web search results for '{query}':\n{search_result['answer']}\n\n"
-                            if include_links and "links" in search_result and search_result["links"]:
-                                web_info += "Sources:\n"
-                                for link in search_result["links"]:
-                                    web_info += f"- {link.get('title', 'Unnamed Source')}: {link.get('url', '')}\n"
-                            
-                            # Generate a new response with the web search results
-                            new_response = self.client.messages.create(
-                                model=self.claude_model,
-                                max_tokens=self.max_tokens,
-                                system=f"{self.system_prompt}\n\nWEB SEARCH RESULTS:\n{web_info}",
-                                messages=[{"role": "user", "content": original_prompt}]
-                            )
-                            
-                            result["content"] = new_response.content[0].text
-                            result["web_search_used"] = True
-                            
-                            # Save search result to memory if memory manager is available
-                            if self.memory_manager:
-                                self.memory_manager.add_semantic_memory(
-                                    content=web_info,
-                                    metadata={
-                                        "type": "web_search",
-                                        "query": query,
-                                        "source": "perplexity",
-                                        "timestamp": datetime.now().isoformat()
-                                    }
-                                )
-                    except Exception as e:
-                        logger.error(f"Error during web search: {e}")
-                        result["web_search_error"] = str(e)
+        Args:
+            query: The search query
+            include_links: Whether to include source links
+            detailed_responses: Whether to request a detailed answer
+            
+        Returns:
+            Formatted search results, or a dict with an error
+        """
+        try:
+            search_result = self.perplexity_client.search(
+                query=query,
+                include_links=include_links,
+                detailed_responses=detailed_responses
+            )
+        except Exception as e:
+            logger.error(f"Error during web search: {e}")
+            return {"error": str(e)}
         
-        return result
+        if "answer" not in search_result:
+            return {"error": search_result.get("error", "No answer returned by web search")}
+        
+        web_info = f"Web search results for '{query}':\n{search_result['answer']}\n\n"
+        if include_links and search_result.get("links"):
+            web_info += "Sources:\n"
+            for link in search_result["links"]:
+                web_info += f"- {link.get('title', 'Unnamed Source')}: {link.get('url', '')}\n"
+        
+        # Save search result to memory if memory manager is available
+        if self.memory_manager:
+            self.add_knowledge(web_info, {
+                "type": "web_search",
+                "query": query,
+                "source": "perplexity",
+                "timestamp": datetime.now().isoformat()
+            })
+        
+        return web_info
     
     def search_web(self, query: str) -> Dict[str, Any]:
         """
@@ -293,4 +301,17 @@ class VOT1Client:
             return True
         except Exception as e:
             logger.error(f"Error adding knowledge: {e}")
-            return False 
\ No newline at end of file
+            return False
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """
+        Get usage statistics for the client.
+        
+        Returns:
+            Dictionary with retry, failover, circuit breaker, rate limiting and usage metrics
+        """
+        return {
+            "resilience": self.resilience.get_stats(),
+            "rate_limits": self.rate_limiter.get_stats(),
+            "ledger": self.usage_ledger.get_summary()
+        }
@@ -0,0 +1,617 @@
+"""
+VOT1 Model Control Protocol Backends
+
+This module provides the provider backends used by VotModelControlProtocol:
+
+1. AnthropicBackend: the Messages API through the shared pooled transport
+2. OpenAICompatibleBackend: any OpenAI-compatible chat completions server
+   (local inference servers, gateways), over a pooled aiohttp session
+3. PerplexityBackend: the Perplexity API (OpenAI-compatible)
+4. MockBackend: canned responses for offline runs and tests
+
+Backends are async-first. ``generate`` takes a normalized request dictionary
+(prompt, system, model, temperature, max_tokens, tools, thinking_tokens) and
+returns a normalized result with the content, optional thinking text, tool
+calls and token usage, so the protocol can route and fail over between
+providers without knowing their wire formats.
+
+``stream`` yields the same response incrementally as chunk dictionaries:
+{"type": "thinking" | "content", "text": ...} while tokens arrive, then one
+{"type": "result", "result": ...} with the normalized result. Chunks are only
+produced as fast as the consumer reads them, and closing the stream cancels
+the provider call.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Dict, List, Any, Optional, Callable, AsyncIterator, Iterator, Union
+
+from vot1.rate_limiter import RateLimiter, get_rate_limiter
+from vot1.token_estimator import TokenEstimator, get_token_estimator
+from vot1.usage import UsageLedger, extract_usage, get_usage_ledger
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_tool(tool: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize a tool definition to {name, description, input_schema}.
+
+    Accepts Anthropic tools, OpenAI function tools and VOT1's shorthand
+    ({name, description, parameters: {property: schema}}).
+
+    Args:
+        tool: Tool definition
+
+    Returns:
+        Normalized tool definition
+    """
+    if tool.get("type") == "function" and "function" in tool:
+        tool = tool["function"]
+    schema = tool.get("input_schema") or tool.get("parameters") or {}
+    if schema.get("type") != "object":
+        schema = {"type": "object", "properties": schema}
+    return {"name": tool["name"], "description": tool.get("description", ""), "input_schema": schema}
+
+
+def parse_arguments(arguments: Any) -> Dict[str, Any]:
+    """Parse tool call arguments sent as a JSON string or a dictionary."""
+    if isinstance(arguments, str):
+        return json.loads(arguments) if arguments.strip() else {}
+    return arguments or {}
+
+
+async def iterate_in_thread(factory: Callable[[], Iterator[Any]], buffer: int = 32) -> AsyncIterator[Any]:
+    """
+    Consume a blocking iterator from async code.
+
+    The iterator runs in a worker thread that hands items over through a
+    bounded queue, so it blocks (and stops reading from the network) while
+    the consumer is behind. Closing the async iterator stops the worker and
+    closes the blocking iterator.
+
+    Args:
+        factory: Function creating the blocking iterator (called in the worker thread)
+        buffer: Maximum number of items read ahead of the consumer
+
+    Yields:
+        Items of the blocking iterator
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=buffer)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        try:
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        except RuntimeError:
+            return False
+        while not stopped.is_set():
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                continue
+        future.cancel()
+        return False
+
+    def produce():
+        iterator = None
+        try:
+            iterator = factory()
+            for item in iterator:
+                if not put((False, item)):
+                    return
+            put((True, None))
+        except BaseException as e:
+            put((True, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+
+    threading.Thread(target=produce, name="vot-stream", daemon=True).start()
+    try:
+        while True:
+            done, item = await queue.get()
+            if done:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+class ModelBackend:
+    """
+    Base class for model backends.
+
+    ``records_usage`` tells the protocol whether the backend records its own
+    calls in the usage ledger (the protocol records them otherwise).
+    """
+
+    provider = "custom"
+    records_usage = False
+
+    async def generate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate a response.
+
+        Args:
+            request: Normalized request (prompt, system, model, temperature,
+                max_tokens, context, tools, thinking_tokens, workflow)
+
+        Returns:
+            Dictionary with content, thinking, tool_calls, model, provider and usage
+        """
+        raise NotImplementedError
+
+    async def stream(self, request: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a response incrementally.
+
+        Backends without native streaming yield their thinking and content as
+        one chunk each once the whole response is available.
+
+        Args:
+            request: Normalized request (see ``generate``)
+
+        Yields:
+            Thinking and content chunks, then the normalized result
+        """
+        result = await self.generate(request)
+        for kind in ("thinking", "content"):
+            if result.get(kind):
+                yield {"type": kind, "text": result[kind]}
+        yield {"type": "result", "result": result}
+
+    async def close(self) -> None:
+        """Release any connections held by the backend."""
+
+    def _result(self, request: Dict[str, Any], content: str, usage: Optional[Dict[str, int]] = None,
+                thinking: str = "", tool_calls: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Build a normalized result."""
+        return {
+            "content": content,
+            "thinking": thinking,
+            "tool_calls": tool_calls or [],
+            "model": request["model"],
+            "provider": self.provider,
+            "usage": usage
+        }
+
+
+class MockBackend(ModelBackend):
+    """
+    Backend returning canned responses without network access.
+
+    Latency is only simulated when configured, so offline runs are as fast as
+    the code around them.
+    """
+
+    provider = "mock"
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[str, Optional[str], Optional[Dict[str, Any]]], str]] = None,
+        thinker: Optional[Callable[[str, Optional[Dict[str, Any]]], str]] = None,
+        latency: Union[float, Callable[[], float]] = 0.0
+    ):
+        """
+        Initialize the mock backend.
+
+        Args:
+            responder: Function (prompt, system, context) -> response text
+            thinker: Function (prompt, context) -> thinking text
+            latency: Simulated latency in seconds, or a function drawing it per call
+        """
+        self.responder = responder or (lambda prompt, system, context: f"Mock response to: {prompt[:100]}")
+        self.thinker = thinker
+        self.latency = latency
+
+    def _latency(self) -> float:
+        """Get the simulated latency of a call."""
+        return max(0.0, self.latency()) if callable(self.latency) else self.latency
+
+    async def generate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        latency = self._latency()
+        if latency:
+            await asyncio.sleep(latency)
+        thinking = ""
+        if request.get("thinking_tokens") and self.thinker:
+            thinking = self.thinker(request["prompt"], request.get("context"))
+        content = self.responder(request["prompt"], request.get("system"), request.get("context"))
+        return self._result(request, content, thinking=thinking)
+
+    async def stream(self, request: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        thinking = ""
+        if request.get("thinking_tokens") and self.thinker:
+            thinking = self.thinker(request["prompt"], request.get("context"))
+        content = self.responder(request["prompt"], request.get("system"), request.get("context"))
+
+        # Thinking streams line by line and content word by word, spreading the latency over the chunks
+        chunks = [("thinking", line) for line in thinking.splitlines(keepends=True)]
+        chunks += [("content", word) for word in re.findall(r"\s*\S+\s*", content)]
+        latency = self._latency()
+        delay = latency / len(chunks) if chunks else latency
+        for kind, text in chunks:
+            await asyncio.sleep(delay)
+            yield {"type": kind, "text": text}
+        yield {"type": "result", "result": self._result(request, content, thinking=thinking)}
+
+
+class AnthropicBackend(ModelBackend):
+    """
+    Backend for the Anthropic Messages API.
+
+    Calls go through the shared pooled transport, which rate limits them and
+    records their usage. The SDK client is synchronous, so each call runs in
+    a worker thread.
+    """
+
+    provider = "anthropic"
+    records_usage = True
+
+    # Extended thinking needs at least this many budget tokens
+    MIN_THINKING_TOKENS = 1024
+
+    # Streaming events read ahead of the consumer
+    STREAM_BUFFER = 32
+
+    def __init__(self, api_key: Optional[str] = None, transport=None, **transport_options):
+        """
+        Initialize the Anthropic backend.
+
+        Args:
+            api_key: Anthropic API key (defaults to ANTHROPIC_API_KEY env var)
+            transport: Optional pre-configured transport
+            **transport_options: Options passed to get_transport
+
+        Raises:
+            ValueError: If no API key is available
+        """
+        if transport is None:
+            api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
+            if not api_key:
+                raise ValueError("Anthropic API key is required. Set the ANTHROPIC_API_KEY environment variable.")
+            from vot1.pipeline import get_transport
+            transport = get_transport(api_key, **transport_options)
+        self.transport = transport
+
+    def build_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the Messages API parameters for a normalized request."""
+        params = {
+            "messages": [{"role": "user", "content": request["prompt"]}],
+            "max_tokens": request.get("max_tokens", 1024),
+            "temperature": request.get("temperature", 0.7)
+        }
+        if request.get("system"):
+            params["system"] = request["system"]
+        if request.get("tools"):
+            params["tools"] = [normalize_tool(tool) for tool in request["tools"]]
+
+        thinking_tokens = request.get("thinking_tokens") or 0
+        if thinking_tokens >= self.MIN_THINKING_TOKENS:
+            # The thinking budget is part of max_tokens, and thinking requires the default temperature
+            params["thinking"] = {"type": "enabled", "budget_tokens": thinking_tokens}
+            params["max_tokens"] += thinking_tokens
+            params.pop("temperature")
+        return params
+
+    async def generate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from vot1.pipeline import content_blocks
+
+        response = await asyncio.to_thread(
+            self.transport.send, request["model"], self.build_request(request), request.get("workflow")
+        )
+        blocks = content_blocks(response)
+        return self._result(
+            request,
+            "".join(block.get("text", "") for block in blocks if block.get("type") == "text"),
+            usage=extract_usage(response),
+            thinking="".join(block.get("thinking", "") for block in blocks if block.get("type") == "thinking"),
+            tool_calls=[
+                {"id": block.get("id"), "name": block["name"], "input": block.get("input") or {}}
+                for block in blocks if block.get("type") == "tool_use"
+            ]
+        )
+
+    async def stream(self, request: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        params = self.build_request(request)
+        content, thinking, tool_calls, arguments = [], [], [], []
+        usage = {}
+
+        events = iterate_in_thread(
+            lambda: self.transport.stream(request["model"], params, request.get("workflow")), self.STREAM_BUFFER
+        )
+        async for event in events:
+            event_type = event.get("type")
+            if event_type == "message_start":
+                usage = extract_usage(event.get("message") or {})
+            elif event_type == "message_delta":
+                usage["output_tokens"] = extract_usage(event)["output_tokens"] or usage.get("output_tokens", 0)
+            elif event_type == "content_block_start":
+                block = event.get("content_block") or {}
+                if block.get("type") == "tool_use":
+                    tool_calls.append({"id": block.get("id"), "name": block.get("name"), "input": {}})
+                    arguments.append([])
+            elif event_type == "content_block_delta":
+                delta = event.get("delta") or {}
+                if delta.get("type") == "text_delta":
+                    content.append(delta.get("text", ""))
+                    yield {"type": "content", "text": delta.get("text", "")}
+                elif delta.get("type") == "thinking_delta":
+                    thinking.append(delta.get("thinking", ""))
+                    yield {"type": "thinking", "text": delta.get("thinking", "")}
+                elif delta.get("type") == "input_json_delta" and arguments:
+                    arguments[-1].append(delta.get("partial_json", ""))
+
+        for call, parts in zip(tool_calls, arguments):
+            call["input"] = parse_arguments("".join(parts))
+        yield {"type": "result", "result": self._result(
+            request, "".join(content), usage=usage, thinking="".join(thinking), tool_calls=tool_calls
+        )}
+
+
+class OpenAICompatibleBackend(ModelBackend):
+    """
+    Backend for OpenAI-compatible chat completions servers.
+
+    One aiohttp session (and connection pool) is kept per event loop. Calls
+    are rate limited per provider and model and recorded in the usage ledger.
+    """
+
+    provider = "custom"
+    records_usage = True
+
+    DEFAULT_BASE_URL = "http://localhost:8000/v1"
+    BASE_URL_ENV = "VOT1_CUSTOM_BASE_URL"
+    API_KEY_ENV = "VOT1_CUSTOM_API_KEY"
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: float = 600.0,
+        provider: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        usage_ledger: Optional[UsageLedger] = None,
+        token_estimator: Optional[TokenEstimator] = None
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            base_url: API base URL (defaults to the backend's base URL env var)
+            api_key: Optional API key sent as a bearer token
+            timeout: Total request timeout in seconds
+            provider: Provider name used for rate limits and usage (defaults to the class provider)
+            rate_limiter: Optional rate limiter (defaults to the process-wide limiter)
+            usage_ledger: Optional usage ledger (defaults to the process-wide ledger)
+            token_estimator: Optional token estimator (defaults to the process-wide estimator)
+        """
+        self.base_url = (base_url or os.environ.get(self.BASE_URL_ENV) or self.DEFAULT_BASE_URL).rstrip("/")
+        self.api_key = api_key or os.environ.get(self.API_KEY_ENV)
+        self.timeout = timeout
+        self.provider = provider or self.provider
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.usage_ledger = usage_ledger or get_usage_ledger()
+        self.token_estimator = token_estimator or get_token_estimator()
+        self._sessions = weakref.WeakKeyDictionary()
+
+    def build_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the chat completions payload for a normalized request."""
+        messages = []
+        if request.get("system"):
+            messages.append({"role": "system", "content": request["system"]})
+        messages.append({"role": "user", "content": request["prompt"]})
+
+        payload = {
+            "model": request["model"],
+            "messages": messages,
+            "max_tokens": request.get("max_tokens", 1024),
+            "temperature": request.get("temperature", 0.7)
+        }
+        if request.get("tools"):
+            payload["tools"] = [
+                {"type": "function", "function": {
+                    "name": tool["name"], "description": tool["description"], "parameters": tool["input_schema"]
+                }}
+                for tool in map(normalize_tool, request["tools"])
+            ]
+        return payload
+
+    async def _session(self):
+        """Get the aiohttp session for the running event loop."""
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            session = aiohttp.ClientSession(headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._sessions[loop] = session
+        return session
+
+    async def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a chat completions request."""
+        session = await self._session()
+        async with session.post(f"{self.base_url}/chat/completions", json=payload) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def _post_stream(self, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Send a streaming chat completions request and yield its server-sent events."""
+        session = await self._session()
+        async with session.post(f"{self.base_url}/chat/completions", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.content:
+                line = line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                yield json.loads(data)
+
+    async def generate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        payload = self.build_request(request)
+        model = payload["model"]
+        input_tokens = self.token_estimator.count_request(
+            {"messages": payload["messages"], "tools": payload.get("tools")}, model
+        )
+
+        async with await self.rate_limiter.acquire_async(self.provider, model, input_tokens, payload["max_tokens"]) as slot:
+            start_time = time.time()
+            try:
+                data = await self._post(payload)
+            except Exception:
+                self.usage_ledger.record(
+                    self.provider, model, queue_time=slot.waited, total_time=time.time() - start_time,
+                    workflow=request.get("workflow"), success=False
+                )
+                raise
+
+            entry = self.usage_ledger.record_response(
+                self.provider, model, data, queue_time=slot.waited, total_time=time.time() - start_time,
+                workflow=request.get("workflow")
+            )
+            slot.settle(entry["output_tokens"], entry["input_tokens"] or None)
+
+        message = (data.get("choices") or [{}])[0].get("message") or {}
+        tool_calls = [
+            {
+                "id": call.get("id"),
+                "name": call.get("function", {}).get("name"),
+                "input": parse_arguments(call.get("function", {}).get("arguments"))
+            }
+            for call in message.get("tool_calls") or []
+        ]
+        return self._result(
+            request,
+            message.get("content") or "",
+            usage=extract_usage(data),
+            thinking=message.get("reasoning_content") or "",
+            tool_calls=tool_calls
+        )
+
+    async def stream(self, request: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        payload = {**self.build_request(request), "stream": True, "stream_options": {"include_usage": True}}
+        model = payload["model"]
+        input_tokens = self.token_estimator.count_request(
+            {"messages": payload["messages"], "tools": payload.get("tools")}, model
+        )
+        parts = {"thinking": [], "content": []}
+        calls = {}
+        usage_data = {}
+
+        async with await self.rate_limiter.acquire_async(self.provider, model, input_tokens, payload["max_tokens"]) as slot:
+            start_time = time.time()
+            ttft = None
+            try:
+                async for event in self._post_stream(payload):
+                    if event.get("usage"):
+                        usage_data = event
+                    delta = ((event.get("choices") or [{}])[0]).get("delta") or {}
+                    for kind, field in (("thinking", "reasoning_content"), ("content", "content")):
+                        if delta.get(field):
+                            if ttft is None:
+                                ttft = time.time() - start_time
+                            parts[kind].append(delta[field])
+                            yield {"type": kind, "text": delta[field]}
+                    # Tool calls arrive as fragments keyed by their index
+                    for fragment in delta.get("tool_calls") or []:
+                        call = calls.setdefault(fragment.get("index", 0), {"id": None, "name": "", "arguments": []})
+                        function = fragment.get("function") or {}
+                        call["id"] = fragment.get("id") or call["id"]
+                        call["name"] += function.get("name") or ""
+                        call["arguments"].append(function.get("arguments") or "")
+            except BaseException:
+                self.usage_ledger.record(
+                    self.provider, model, queue_time=slot.waited, ttft=ttft, total_time=time.time() - start_time,
+                    workflow=request.get("workflow"), success=False
+                )
+                raise
+
+            entry = self.usage_ledger.record_response(
+                self.provider, model, usage_data, queue_time=slot.waited, ttft=ttft,
+                total_time=time.time() - start_time, workflow=request.get("workflow")
+            )
+            slot.settle(entry["output_tokens"], entry["input_tokens"] or None)
+
+        tool_calls = [
+            {"id": call["id"], "name": call["name"], "input": parse_arguments("".join(call["arguments"]))}
+            for _, call in sorted(calls.items())
+        ]
+        yield {"type": "result", "result": self._result(
+            request, "".join(parts["content"]), usage=extract_usage(usage_data),
+            thinking="".join(parts["thinking"]), tool_calls=tool_calls
+        )}
+
+    async def close(self) -> None:
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+class PerplexityBackend(OpenAICompatibleBackend):
+    """Backend for the Perplexity API."""
+
+    provider = "perplexity"
+
+    DEFAULT_BASE_URL = "https://api.perplexity.ai"
+    BASE_URL_ENV = "PERPLEXITY_BASE_URL"
+    API_KEY_ENV = "PERPLEXITY_API_KEY"
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        """
+        Initialize the Perplexity backend.
+
+        Args:
+            api_key: Perplexity API key (defaults to PERPLEXITY_API_KEY env var)
+            **kwargs: OpenAICompatibleBackend options
+
+        Raises:
+            ValueError: If no API key is available
+        """
+        super().__init__(api_key=api_key, **kwargs)
+        if not self.api_key:
+            raise ValueError("Perplexity API key is required. Set the PERPLEXITY_API_KEY environment variable.")
+
+
+BACKENDS = {
+    "anthropic": AnthropicBackend,
+    "perplexity": PerplexityBackend,
+    "custom": OpenAICompatibleBackend,
+    "mock": MockBackend,
+}
+
+
+def create_backend(provider: str, **options) -> ModelBackend:
+    """
+    Create the backend for a provider.
+
+    Args:
+        provider: Provider name ("anthropic", "perplexity", "custom" or "mock")
+        **options: Backend options
+
+    Returns:
+        Model backend
+
+    Raises:
+        ValueError: For unknown providers or missing credentials
+    """
+    backend_class = BACKENDS.get(provider)
+    if backend_class is None:
+        raise ValueError(f"Unknown model provider: {provider}")
+    return backend_class(**options)
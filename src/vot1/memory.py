@@ -8,9 +8,11 @@ for semantic memory and conversation history management.
 
 import os
 import json
+import hashlib
 import logging
 import sqlite3
-from typing import Dict, List, Any, Optional, Union
+import threading
+from typing import Dict, List, Any, Optional, Union, Tuple
 from datetime import datetime
 import uuid
 import numpy as np
@@ -48,9 +50,10 @@ class VectorStore:
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(storage_path), exist_ok=True)
         
-        # Connect to SQLite database
-        self.conn = sqlite3.connect(storage_path)
+        # Connect to SQLite database (shared with background writers, so guarded by a lock)
+        self.conn = sqlite3.connect(storage_path, check_same_thread=False)
         self.cursor = self.conn.cursor()
+        self._lock = threading.RLock()
         
         # Create tables if they don't exist
         self._create_tables()
@@ -91,24 +94,68 @@ class VectorStore:
         """
         memory_id = str(uuid.uuid4())
         timestamp = datetime.now().timestamp()
+        embedding = self._embed([content])[0]
+        
+        with self._lock:
+            # Store memory
+            self.cursor.execute(
+                "INSERT INTO memories (id, content, metadata, timestamp) VALUES (?, ?, ?, ?)",
+                (memory_id, content, json.dumps(metadata or {}), timestamp)
+            )
+            
+            # Store embedding
+            self.cursor.execute(
+                "INSERT INTO embeddings (memory_id, embedding) VALUES (?, ?)",
+                (memory_id, embedding.tobytes())
+            )
+            
+            self.conn.commit()
+        return memory_id
+    
+    def add_batch(self, items: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[str]:
+        """
+        Add several contents in one transaction.
         
-        # Store memory
-        self.cursor.execute(
-            "INSERT INTO memories (id, content, metadata, timestamp) VALUES (?, ?, ?, ?)",
-            (memory_id, content, json.dumps(metadata or {}), timestamp)
-        )
+        Embeddings are computed for the whole batch at once. Memory IDs are
+        derived from the content, so content already stored (in this batch
+        or an earlier one) is not stored again.
         
-        # Create a dummy embedding (random vector)
-        embedding = np.random.rand(self.dimension).astype(np.float32)
+        Args:
+            items: List of (content, metadata) pairs
+            
+        Returns:
+            IDs of the stored memories, in the order of the items
+        """
+        memory_ids = [str(uuid.uuid5(uuid.NAMESPACE_OID, hashlib.sha256(content.encode("utf-8")).hexdigest()))
+                      for content, _ in items]
+        unique = {}
+        for memory_id, (content, metadata) in zip(memory_ids, items):
+            unique.setdefault(memory_id, (content, metadata))
+        if not unique:
+            return memory_ids
         
-        # Store embedding
-        self.cursor.execute(
-            "INSERT INTO embeddings (memory_id, embedding) VALUES (?, ?)",
-            (memory_id, embedding.tobytes())
-        )
+        timestamp = datetime.now().timestamp()
+        embeddings = self._embed([content for content, _ in unique.values()])
+        with self._lock:
+            with self.conn:
+                self.cursor.executemany(
+                    "INSERT OR IGNORE INTO memories (id, content, metadata, timestamp) VALUES (?, ?, ?, ?)",
+                    [(memory_id, content, json.dumps(metadata or {}), timestamp)
+                     for memory_id, (content, metadata) in unique.items()]
+                )
+                self.cursor.executemany(
+                    "INSERT OR IGNORE INTO embeddings (memory_id, embedding) VALUES (?, ?)",
+                    [(memory_id, embedding.tobytes()) for memory_id, embedding in zip(unique, embeddings)]
+                )
+        return memory_ids
+    
+    def _embed(self, contents: List[str]) -> np.ndarray:
+        """
+        Compute embeddings for a batch of contents.
         
-        self.conn.commit()
-        return memory_id
+        This simplified implementation returns random vectors.
+        """
+        return np.random.rand(len(contents), self.dimension).astype(np.float32)
     
     def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -124,13 +171,14 @@ class VectorStore:
             List of similar memories with similarity scores
         """
         # Simplified implementation: return random memories
-        self.cursor.execute(
-            "SELECT id, content, metadata FROM memories ORDER BY RANDOM() LIMIT ?",
-            (limit,)
-        )
+        with self._lock:
+            rows = self.cursor.execute(
+                "SELECT id, content, metadata FROM memories ORDER BY RANDOM() LIMIT ?",
+                (limit,)
+            ).fetchall()
         
         results = []
-        for row in self.cursor.fetchall():
+        for row in rows:
             memory_id, content, metadata_str = row
             metadata = json.loads(metadata_str)
             
@@ -158,12 +206,11 @@ class VectorStore:
         Returns:
             Memory data or None if not found
         """
-        self.cursor.execute(
-            "SELECT content, metadata, timestamp FROM memories WHERE id = ?",
-            (memory_id,)
-        )
-        
-        row = self.cursor.fetchone()
+        with self._lock:
+            row = self.cursor.execute(
+                "SELECT content, metadata, timestamp FROM memories WHERE id = ?",
+                (memory_id,)
+            ).fetchone()
         if not row:
             return None
         
@@ -243,6 +290,26 @@ class MemoryManager:
         logger.debug(f"Added semantic memory: {content[:50]}... [id: {memory_id}]")
         return memory_id
     
+    def add_semantic_memories(self, memories: List[Dict[str, Any]]) -> List[str]:
+        """
+        Add several semantic memories in one batched, deduplicated insert.
+        
+        Args:
+            memories: List of dictionaries with content and optional metadata
+            
+        Returns:
+            IDs of the stored memories, in order
+        """
+        items = []
+        for memory in memories:
+            metadata = dict(memory.get("metadata") or {})
+            metadata.setdefault("type", "semantic")
+            items.append((memory["content"], metadata))
+        
+        memory_ids = self.vector_store.add_batch(items)
+        logger.debug(f"Added {len(set(memory_ids))} semantic memories in one batch")
+        return memory_ids
+    
     def add_conversation_memory(
         self, 
         role: str, 
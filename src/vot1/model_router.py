@@ -0,0 +1,503 @@
+"""
+VOT1 Model Router
+
+This module implements cost/latency-aware model routing for the hybrid model
+approach. Instead of fixed keyword rules, the router treats model selection as
+a contextual bandit:
+
+1. Cheap features are extracted from the prompt (size, complexity hints, code)
+   and bucketed into a routing context
+2. For every (context, model) arm the router keeps running means of latency,
+   cost and quality, seeded with priors from the model profiles
+3. Each request picks the arm with the best upper-confidence reward among the
+   models that can meet the request's latency SLO
+4. Observed latency, token usage and optional quality feedback update the arm
+
+Every decision is logged with its features and per-candidate scores so that
+routing can be inspected (``get_decisions``) and tuned.
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+from vot1.token_estimator import TokenEstimator, get_token_estimator
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+class ModelRouter:
+    """
+    Contextual bandit router over a set of candidate models.
+
+    Rewards combine quality, cost and latency:
+    ``quality - cost_weight * cost / cost_reference - latency_weight * latency / latency_reference``
+    """
+
+    # Priors per model: pricing in USD per 1K tokens, latency model and quality
+    MODEL_PROFILES = {
+        "claude-3-7-sonnet-20240620": {
+            "input_cost_per_1k": 0.003,
+            "output_cost_per_1k": 0.015,
+            "base_latency": 1.2,
+            "latency_per_1k_output": 14.0,
+            "quality": 0.95
+        },
+        "claude-3-5-sonnet-20240620": {
+            "input_cost_per_1k": 0.003,
+            "output_cost_per_1k": 0.015,
+            "base_latency": 1.0,
+            "latency_per_1k_output": 12.0,
+            "quality": 0.9
+        },
+        "claude-3-5-haiku-20241022": {
+            "input_cost_per_1k": 0.0008,
+            "output_cost_per_1k": 0.004,
+            "base_latency": 0.5,
+            "latency_per_1k_output": 6.0,
+            "quality": 0.75
+        },
+        "claude-3-opus-20240229": {
+            "input_cost_per_1k": 0.015,
+            "output_cost_per_1k": 0.075,
+            "base_latency": 2.0,
+            "latency_per_1k_output": 30.0,
+            "quality": 0.97
+        }
+    }
+    DEFAULT_PROFILE = {
+        "input_cost_per_1k": 0.003,
+        "output_cost_per_1k": 0.015,
+        "base_latency": 1.0,
+        "latency_per_1k_output": 12.0,
+        "quality": 0.85
+    }
+
+    COMPLEX_INDICATORS = [
+        "explain", "analyze", "compare", "evaluate", "reason", "improve", "optimize",
+        "debug", "design", "architecture", "prove", "refactor", "plan", "why"
+    ]
+    SIMPLE_TASK_HINTS = ["lookup", "simple", "information", "basic", "quick", "low"]
+    COMPLEX_TASK_HINTS = ["complex", "reasoning", "creative", "important", "nuanced", "high"]
+
+    def __init__(
+        self,
+        models: List[str],
+        latency_slo: Optional[float] = None,
+        exploration: float = 0.1,
+        cost_weight: float = 0.1,
+        latency_weight: float = 0.1,
+        cost_reference: float = 0.02,
+        latency_reference: float = 30.0,
+        prior_weight: float = 2.0,
+        history_size: int = 500,
+        token_estimator: Optional[TokenEstimator] = None
+    ):
+        """
+        Initialize the model router.
+
+        Args:
+            models: Candidate model identifiers
+            latency_slo: Default latency objective in seconds (None for no objective)
+            exploration: Weight of the upper-confidence exploration bonus
+            cost_weight: Weight of normalized cost in the reward
+            latency_weight: Weight of normalized latency in the reward
+            cost_reference: Request cost (USD) that counts as one unit of cost penalty
+            latency_reference: Latency (seconds) that counts as one unit of latency penalty
+            prior_weight: Pseudo-observation count given to the profile priors
+            history_size: Number of decisions and latency samples kept for inspection
+            token_estimator: Optional token estimator (defaults to the process-wide estimator)
+        """
+        if not models:
+            raise ValueError("ModelRouter requires at least one candidate model")
+
+        self.models = list(dict.fromkeys(models))
+        self.latency_slo = latency_slo
+        self.exploration = exploration
+        self.cost_weight = cost_weight
+        self.latency_weight = latency_weight
+        self.cost_reference = cost_reference
+        self.latency_reference = latency_reference
+        self.prior_weight = prior_weight
+        self.history_size = history_size
+        self.token_estimator = token_estimator or get_token_estimator()
+
+        self.arms = {}
+        self.decisions = deque(maxlen=history_size)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        logger.info(f"Initialized ModelRouter with candidates: {self.models}")
+
+    def get_profile(self, model: str) -> Dict[str, float]:
+        """Get the prior profile for a model."""
+        return self.MODEL_PROFILES.get(model, self.DEFAULT_PROFILE)
+
+    def estimate_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        """
+        Estimate the cost of a request from the model's pricing.
+
+        Args:
+            model: Model identifier
+            input_tokens: Number of input tokens
+            output_tokens: Number of output tokens
+
+        Returns:
+            Estimated cost in USD
+        """
+        profile = self.get_profile(model)
+        return (
+            input_tokens / 1000 * profile["input_cost_per_1k"]
+            + output_tokens / 1000 * profile["output_cost_per_1k"]
+        )
+
+    def extract_features(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        max_tokens: int = 1024
+    ) -> Dict[str, Any]:
+        """
+        Extract cheap routing features from a request.
+
+        Args:
+            prompt: The user prompt
+            context: Additional context (``task_type`` and ``task_complexity`` are used as hints)
+            max_tokens: Maximum tokens the request may generate
+
+        Returns:
+            Dictionary of features including the routing context key
+        """
+        context = context or {}
+        prompt_lower = prompt.lower()
+        words = set(_WORD_RE.findall(prompt_lower))
+
+        prompt_tokens = max(1, self.token_estimator.count(prompt))
+        context_tokens = sum(
+            self.token_estimator.count(str(v)) for k, v in context.items() if k not in ("task_type", "task_complexity")
+        )
+        complex_hits = sum(1 for indicator in self.COMPLEX_INDICATORS if indicator in words)
+        has_code = "```" in prompt or "def " in prompt or "function " in prompt
+
+        hint = f"{context.get('task_type', '')} {context.get('task_complexity', '')}".lower()
+        if any(h in hint for h in self.COMPLEX_TASK_HINTS):
+            complexity = 1.0
+        elif any(h in hint for h in self.SIMPLE_TASK_HINTS):
+            complexity = 0.0
+        else:
+            complexity = min(1.0, 0.35 * complex_hits + (0.3 if has_code else 0.0) + min(0.3, prompt_tokens / 2000))
+
+        if prompt_tokens < 64:
+            size_bucket = "short"
+        elif prompt_tokens < 512:
+            size_bucket = "medium"
+        else:
+            size_bucket = "long"
+
+        complexity_bucket = "complex" if complexity >= 0.5 else "simple"
+
+        return {
+            "prompt_tokens": prompt_tokens,
+            "context_tokens": context_tokens,
+            "expected_output_tokens": min(max_tokens, 256 + int(768 * complexity)),
+            "complex_hits": complex_hits,
+            "has_code": has_code,
+            "complexity": round(complexity, 3),
+            "context_key": f"{size_bucket}:{complexity_bucket}"
+        }
+
+    def _get_arm(self, context_key: str, model: str, features: Dict[str, Any]) -> Dict[str, Any]:
+        """Get or create the statistics for a (context, model) arm, seeded from priors."""
+        key = (context_key, model)
+        arm = self.arms.get(key)
+        if arm is None:
+            profile = self.get_profile(model)
+            expected_output = features["expected_output_tokens"]
+            input_tokens = features["prompt_tokens"] + features["context_tokens"]
+            arm = {
+                "n": 0,
+                "latency": profile["base_latency"] + expected_output / 1000 * profile["latency_per_1k_output"],
+                "cost": self.estimate_cost(model, input_tokens, expected_output),
+                "quality": 1.0 - features["complexity"] * (1.0 - profile["quality"]),
+                "quality_n": 0,
+                "latency_samples": deque(maxlen=50)
+            }
+            self.arms[key] = arm
+        return arm
+
+    def _expected_latency(self, arm: Dict[str, Any]) -> float:
+        """Latency estimate used for SLO checks (p90 once enough samples exist)."""
+        samples = sorted(arm["latency_samples"])
+        if len(samples) >= 5:
+            return samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+        return arm["latency"]
+
+    def _reward(self, arm: Dict[str, Any]) -> float:
+        """Reward estimate for an arm."""
+        return (
+            arm["quality"]
+            - self.cost_weight * arm["cost"] / self.cost_reference
+            - self.latency_weight * arm["latency"] / self.latency_reference
+        )
+
+    def route(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        max_tokens: int = 1024,
+        latency_slo: Optional[float] = None,
+        candidates: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Choose a model for a request.
+
+        Args:
+            prompt: The user prompt
+            context: Additional context
+            max_tokens: Maximum tokens the request may generate
+            latency_slo: Latency objective for this request in seconds (overrides default)
+            candidates: Optional subset of models to choose from
+
+        Returns:
+            Decision dictionary with ``decision_id`` and the selected ``model``
+        """
+        features = self.extract_features(prompt, context, max_tokens)
+        context_key = features["context_key"]
+        slo = latency_slo if latency_slo is not None else self.latency_slo
+        candidates = candidates or self.models
+
+        with self._lock:
+            total = sum(self._get_arm(context_key, m, features)["n"] for m in candidates)
+
+            scores = {}
+            for model in candidates:
+                arm = self._get_arm(context_key, model, features)
+                bonus = self.exploration * math.sqrt(
+                    math.log(total + 2) / (arm["n"] + self.prior_weight)
+                )
+                scores[model] = {
+                    "reward": round(self._reward(arm), 4),
+                    "score": round(self._reward(arm) + bonus, 4),
+                    "expected_latency": round(self._expected_latency(arm), 3),
+                    "expected_cost": round(arm["cost"], 6),
+                    "quality": round(arm["quality"], 3),
+                    "n": arm["n"]
+                }
+
+            eligible = [m for m in candidates if slo is None or scores[m]["expected_latency"] <= slo]
+            if len(candidates) == 1:
+                reason = "forced"
+                selected = candidates[0]
+            elif eligible:
+                reason = "bandit" if len(eligible) > 1 else "latency_slo"
+                selected = max(eligible, key=lambda m: scores[m]["score"])
+            else:
+                reason = "latency_slo_fallback"
+                selected = min(candidates, key=lambda m: scores[m]["expected_latency"])
+
+            decision = {
+                "decision_id": str(uuid.uuid4()),
+                "timestamp": time.time(),
+                "model": selected,
+                "reason": reason,
+                "latency_slo": slo,
+                "features": features,
+                "candidates": scores,
+                "outcome": None
+            }
+            self.decisions.append(decision)
+            self._pending[decision["decision_id"]] = decision
+
+            # Bound the pending map in case outcomes are never recorded
+            while len(self._pending) > self.history_size:
+                self._pending.pop(next(iter(self._pending)))
+
+        logger.info(f"Routed request to {selected} ({reason}, context {context_key})")
+        return decision
+
+    def select(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        max_tokens: int = 1024,
+        latency_slo: Optional[float] = None
+    ) -> str:
+        """
+        Choose a model for a request and return only its name.
+
+        Args:
+            prompt: The user prompt
+            context: Additional context
+            max_tokens: Maximum tokens the request may generate
+            latency_slo: Latency objective for this request in seconds
+
+        Returns:
+            The selected model identifier
+        """
+        return self.route(prompt, context, max_tokens, latency_slo)["model"]
+
+    def record(
+        self,
+        decision_id: str,
+        latency: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cost: Optional[float] = None,
+        success: bool = True
+    ) -> None:
+        """
+        Record the outcome of a routed request.
+
+        Args:
+            decision_id: ID returned by ``route``
+            latency: Observed end-to-end latency in seconds
+            input_tokens: Input tokens reported by the provider
+            output_tokens: Output tokens reported by the provider
+            cost: Actual cost in USD (estimated from pricing if omitted)
+            success: Whether the request succeeded (failures count as zero quality)
+        """
+        with self._lock:
+            decision = self._pending.get(decision_id)
+            if decision is None:
+                logger.debug(f"Ignoring outcome for unknown routing decision {decision_id}")
+                return
+
+            model = decision["model"]
+            if cost is None:
+                cost = self.estimate_cost(model, input_tokens, output_tokens)
+
+            arm = self._get_arm(decision["features"]["context_key"], model, decision["features"])
+            arm["n"] += 1
+            weight = 1.0 / (arm["n"] + self.prior_weight - 1)
+            arm["latency"] += (latency - arm["latency"]) * weight
+            arm["cost"] += (cost - arm["cost"]) * weight
+            arm["latency_samples"].append(latency)
+            if not success:
+                self._update_quality(arm, 0.0)
+
+            decision["outcome"] = {
+                "latency": latency,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cost": cost,
+                "success": success,
+                "quality": None
+            }
+
+    def record_feedback(self, decision_id: str, quality: float) -> bool:
+        """
+        Record a quality signal for a routed request.
+
+        Args:
+            decision_id: ID returned by ``route``
+            quality: Quality score between 0.0 and 1.0
+
+        Returns:
+            True if the feedback was applied
+        """
+        quality = max(0.0, min(1.0, float(quality)))
+        with self._lock:
+            decision = self._pending.get(decision_id)
+            if decision is None:
+                return False
+
+            arm = self._get_arm(decision["features"]["context_key"], decision["model"], decision["features"])
+            self._update_quality(arm, quality)
+            if decision["outcome"] is not None:
+                decision["outcome"]["quality"] = quality
+            return True
+
+    def _update_quality(self, arm: Dict[str, Any], quality: float) -> None:
+        """Fold a quality observation into an arm's running mean."""
+        arm["quality_n"] += 1
+        arm["quality"] += (quality - arm["quality"]) / (arm["quality_n"] + self.prior_weight)
+
+    def get_decisions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get recent routing decisions, newest last.
+
+        Args:
+            limit: Optional maximum number of decisions to return
+
+        Returns:
+            List of decision dictionaries
+        """
+        with self._lock:
+            decisions = list(self.decisions)
+        return decisions[-limit:] if limit else decisions
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the learned statistics per routing context and model.
+
+        Returns:
+            Nested dictionary of context key -> model -> statistics
+        """
+        stats = {}
+        with self._lock:
+            for (context_key, model), arm in self.arms.items():
+                stats.setdefault(context_key, {})[model] = {
+                    "n": arm["n"],
+                    "latency": round(arm["latency"], 3),
+                    "p90_latency": round(self._expected_latency(arm), 3),
+                    "cost": round(arm["cost"], 6),
+                    "quality": round(arm["quality"], 3),
+                    "reward": round(self._reward(arm), 4)
+                }
+        return stats
+
+    def save(self, path: str) -> None:
+        """
+        Save the learned arm statistics to a JSON file.
+
+        Args:
+            path: File path to write
+        """
+        with self._lock:
+            data = [
+                {
+                    "context_key": context_key,
+                    "model": model,
+                    "n": arm["n"],
+                    "latency": arm["latency"],
+                    "cost": arm["cost"],
+                    "quality": arm["quality"],
+                    "quality_n": arm["quality_n"],
+                    "latency_samples": list(arm["latency_samples"])
+                }
+                for (context_key, model), arm in self.arms.items()
+            ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    def load(self, path: str) -> None:
+        """
+        Load arm statistics previously written by ``save``.
+
+        Args:
+            path: File path to read
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        with self._lock:
+            for entry in data:
+                self.arms[(entry["context_key"], entry["model"])] = {
+                    "n": entry["n"],
+                    "latency": entry["latency"],
+                    "cost": entry["cost"],
+                    "quality": entry["quality"],
+                    "quality_n": entry["quality_n"],
+                    "latency_samples": deque(entry["latency_samples"], maxlen=50)
+                }
+        logger.info(f"Loaded {len(data)} routing arms from {path}")
@@ -8,12 +8,21 @@ OWL provides a powerful framework for:
 1. Structured reasoning with ontology-based knowledge organization
 2. Step-by-step decision making with workflow management
 3. Enhanced problem-solving capabilities
+
+Multi-strategy reasoning runs the selected strategies concurrently, each
+with its own timeout, groups their answers by agreement and stops waiting
+as soon as a quorum of strategies agrees, so it takes about as long as the
+fastest agreeing strategies rather than the sum of all of them.
 """
 
+import concurrent.futures
+import difflib
 import logging
 import os
+import re
 import sys
-from typing import Dict, List, Optional, Any, Union
+import time
+from typing import Dict, List, Optional, Any, Union, Callable
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -59,6 +68,24 @@ except ImportError:
         class TreeOfThoughtAgent(ReasoningAgent):
             pass
 
+def answer_similarity(first: str, second: str) -> float:
+    """
+    Similarity of two answers, ignoring case and punctuation.
+    
+    Args:
+        first: First answer
+        second: Second answer
+        
+    Returns:
+        Similarity ratio between 0.0 and 1.0
+    """
+    first_words = re.findall(r"\w+", first.lower())
+    second_words = re.findall(r"\w+", second.lower())
+    if first_words == second_words:
+        return 1.0
+    return difflib.SequenceMatcher(None, first_words, second_words, autojunk=False).ratio()
+
+
 class OwlEnhancedReasoning:
     """
     Enhanced reasoning capabilities using OWL framework.
@@ -69,7 +96,9 @@ class OwlEnhancedReasoning:
     def __init__(self, 
                  default_strategy: str = "tot", 
                  model_name: str = "claude-3-7-sonnet",
-                 verbose: bool = False):
+                 verbose: bool = False,
+                 similarity: Optional[Callable[[str, str], float]] = None,
+                 agreement_threshold: float = 0.8):
         """
         Initialize OwlEnhancedReasoning with specified strategy and model.
         
@@ -77,10 +106,16 @@ class OwlEnhancedReasoning:
             default_strategy: One of 'react', 'cot', 'reflexion', 'tot'
             model_name: The LLM model to use
             verbose: Whether to output detailed reasoning steps
+            similarity: Optional function scoring the agreement of two answers
+                between 0.0 and 1.0, e.g. an embedding cosine (defaults to
+                answer_similarity)
+            agreement_threshold: Similarity at which two answers count as agreeing
         """
         self.verbose = verbose
         self.model_name = model_name
         self.default_strategy = default_strategy
+        self.similarity = similarity or answer_similarity
+        self.agreement_threshold = agreement_threshold
         
         # Map strategy names to their agent classes
         self.strategy_map = {
@@ -129,30 +164,103 @@ class OwlEnhancedReasoning:
     
     def multi_strategy_reason(self, 
                              query: str, 
-                             strategies: List[str] = None) -> Dict[str, Any]:
+                             strategies: List[str] = None,
+                             context: Optional[Dict[str, Any]] = None,
+                             timeout: Optional[float] = None,
+                             quorum: Optional[int] = None) -> Dict[str, Any]:
         """
-        Apply multiple reasoning strategies and combine their results.
+        Apply multiple reasoning strategies concurrently and combine their results.
+        
+        Answers are grouped by agreement (``similarity`` at least
+        ``agreement_threshold``). Once ``quorum`` strategies agree, the
+        remaining ones are cancelled (strategies already running are left to
+        finish in the background and their results are ignored).
         
         Args:
             query: The question or task to reason about
             strategies: List of strategies to use, if None uses all available strategies
+            context: Additional context information
+            timeout: Optional per-strategy timeout in seconds
+            quorum: Number of agreeing strategies that ends the run early
+                (defaults to a majority of the strategies)
             
         Returns:
-            Dict containing reasoning processes and consolidated answer
+            Dict containing reasoning processes, consolidated answer and
+            agreement details
         """
         strategies = strategies or list(self.strategy_map.keys())
+        quorum = quorum or len(strategies) // 2 + 1
+        agents = {strategy: self._get_agent(strategy) for strategy in strategies}
+        start_time = time.time()
+        
         results = {}
+        clusters = []  # Lists of strategies whose answers agree, in completion order
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(strategies), thread_name_prefix="vot-reasoning")
+        futures = {
+            executor.submit(agents[strategy].reason, query, context=context or {}): strategy
+            for strategy in strategies
+        }
+        logger.info(f"Reasoning using {len(strategies)} strategies concurrently (quorum {quorum})")
         
-        for strategy in strategies:
-            results[strategy] = self.reason(query, strategy=strategy)
+        pending = set(futures)
+        agreed = None
+        try:
+            while pending and agreed is None:
+                remaining = None if timeout is None else timeout - (time.time() - start_time)
+                if remaining is not None and remaining <= 0:
+                    break
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    strategy = futures[future]
+                    try:
+                        results[strategy] = future.result()
+                    except Exception as e:
+                        logger.error(f"Reasoning with {strategy} strategy failed: {e}")
+                        results[strategy] = {"error": str(e)}
+                        continue
+                    cluster = self._add_to_cluster(clusters, results, strategy)
+                    if cluster is not None and len(cluster) >= quorum:
+                        agreed = cluster
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        # TODO: Implement more sophisticated result consolidation
-        # For now, we'll return all results and the TOT result as the final answer
+        unfinished = [futures[future] for future in pending]
+        if agreed is not None:
+            logger.info(f"Strategies {agreed} agreed; cancelled {unfinished}")
+        
+        # Without a quorum, the largest group of agreeing strategies wins (ties go to the default strategy)
+        winner = agreed or max(
+            clusters, key=lambda cluster: (len(cluster), self.default_strategy in cluster), default=[]
+        )
+        representative = self.default_strategy if self.default_strategy in winner else (winner[0] if winner else None)
         return {
             "detailed_results": results,
-            "consolidated_answer": results.get(self.default_strategy, {}).get("answer", 
-                                   "No consolidated answer available")
+            "consolidated_answer": results[representative].get("answer") if representative
+                                   else "No consolidated answer available",
+            "agreement": {
+                "strategies": list(winner),
+                "votes": len(winner),
+                "quorum": quorum,
+                "quorum_reached": agreed is not None
+            },
+            "cancelled": unfinished if agreed is not None else [],
+            "timed_out": unfinished if agreed is None else [],
+            "elapsed": time.time() - start_time
         }
+    
+    def _add_to_cluster(self, clusters: List[List[str]], results: Dict[str, Dict[str, Any]], strategy: str) -> Optional[List[str]]:
+        """Add a strategy to the group of strategies its answer agrees with, returning that group."""
+        answer = results[strategy].get("answer")
+        if not isinstance(answer, str) or not answer.strip():
+            return None
+        for cluster in clusters:
+            if self.similarity(results[cluster[0]]["answer"], answer) >= self.agreement_threshold:
+                cluster.append(strategy)
+                return cluster
+        clusters.append([strategy])
+        return clusters[-1]
 
 class FeedbackLoopEnhancer:
     """
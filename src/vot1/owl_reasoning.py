@@ -3,19 +3,53 @@ VOT1 OWL Reasoning Module
 
 This module implements basic OWL reasoning capabilities for testing the
 self-improvement workflow.
+
+Knowledge lives in an indexed TripleStore: statements are turned into
+rdf:type / rdfs:subClassOf / property triples, ontologies are bulk loaded
+(saved triple files natively, OWL/Turtle/RDF files through rdflib when it
+is installed), and entity lookups and class-membership questions only touch
+the triples of the entities involved.
 """
 
 import os
 import json
 import logging
+import re
 import time
+from collections import deque
 from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 
+from vot1.triple_store import RDF_TYPE, RDFS_SUBCLASS_OF, VOCABULARY, TripleStore, local_name
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default VOT1 ontology: (class, subclasses, instances)
+DEFAULT_ONTOLOGY = [
+    ("CodeComponent", ["Visualization", "Memory", "OWLReasoning", "Agent"], []),
+    ("Visualization", [], ["THREE.js", "Dashboard"]),
+    ("Memory", [], ["VectorStore", "ConversationMemory"]),
+    ("OWLReasoning", [], ["OWLEngine"]),
+    ("Agent", [], ["SelfImprovementAgent"]),
+]
+
+# "A dog is a mammal that barks." / "Fluffy is a cat."
+STATEMENT_PATTERN = re.compile(
+    r"^\s*(?P<article>an?\s+)?(?P<subject>.+?)\s+is\s+(?:an?\s+)(?P<object>.+?)(?:\s+that\s+(?P<clause>.+?))?\s*[.!]?\s*$",
+    re.IGNORECASE
+)
+# "Is Fluffy a mammal?"
+QUESTION_PATTERN = re.compile(r"^\s*is\s+(?:an?\s+)?(?P<subject>.+?)\s+an?\s+(?P<object>.+?)\s*\?*\s*$", re.IGNORECASE)
+
+
+def _term(name: str) -> str:
+    """Normalize a name from a statement into a term (capitalized, single-spaced)."""
+    name = " ".join(name.split())
+    return name[:1].upper() + name[1:]
+
+
 class OWLReasoningEngine:
     """
     Basic OWL reasoning engine for testing purposes.
@@ -48,29 +82,131 @@ class OWLReasoningEngine:
         else:
             logger.warning(f"Ontology file not found: {ontology_path}")
         
-        # Mock knowledge base for testing
-        self.kb = {
-            "CodeComponent": {
-                "subclasses": ["Visualization", "Memory", "OWLReasoning", "Agent"],
-                "instances": []
-            },
-            "Visualization": {
-                "subclasses": [],
-                "instances": ["THREE.js", "Dashboard"]
-            },
-            "Memory": {
-                "subclasses": [],
-                "instances": ["VectorStore", "ConversationMemory"]
-            },
-            "OWLReasoning": {
-                "subclasses": [],
-                "instances": ["OWLEngine"]
-            },
-            "Agent": {
-                "subclasses": [],
-                "instances": ["SelfImprovementAgent"]
-            }
-        }
+        # Knowledge graph, seeded with the default VOT1 ontology
+        self.graph = TripleStore()
+        self.graph.add_many(
+            triple
+            for class_name, subclasses, instances in DEFAULT_ONTOLOGY
+            for triple in [(subclass, RDFS_SUBCLASS_OF, class_name) for subclass in subclasses]
+                          + [(instance, RDF_TYPE, class_name) for instance in instances]
+        )
+        self.stats = {"queries": 0, "triples_added": 0, "load_time": 0.0, "query_time": 0.0}
+        if ontology_path and os.path.isdir(ontology_path):
+            for path in sorted(Path(ontology_path).iterdir()):
+                if path.is_file():
+                    self.load(str(path))
+        elif ontology_path and os.path.isfile(ontology_path):
+            self.load(ontology_path)
+    
+    def add_triples(self, triples: List[tuple]) -> int:
+        """
+        Bulk load triples into the knowledge graph.
+        
+        Args:
+            triples: (subject, predicate, object) triples
+            
+        Returns:
+            Number of new triples
+        """
+        start_time = time.time()
+        added = self.graph.add_many(triples)
+        self.stats["triples_added"] += added
+        self.stats["load_time"] += time.time() - start_time
+        return added
+    
+    def load(self, path: str) -> int:
+        """
+        Load an ontology file into the knowledge graph.
+        
+        Triple files written by save (".jsonl") are loaded natively; other
+        formats (OWL/XML, Turtle, N-Triples, ...) need rdflib. rdf:type and
+        rdfs:subClassOf IRIs are stored under their prefixed names; other
+        terms keep their full IRIs and are found by their local names. A file
+        that cannot be read or parsed is logged and skipped.
+        
+        Args:
+            path: Ontology file path
+            
+        Returns:
+            Number of new triples
+        """
+        start_time = time.time()
+        try:
+            if path.endswith(".jsonl"):
+                added = self.graph.load(path)
+            else:
+                try:
+                    import rdflib
+                except ImportError:
+                    logger.warning(f"rdflib is not installed; cannot load ontology {path}")
+                    return 0
+                ontology = rdflib.Graph()
+                ontology.parse(path)
+                added = self.graph.add_many(
+                    tuple(VOCABULARY.get(str(term), str(term)) for term in triple) for triple in ontology
+                )
+        except Exception as e:
+            logger.error(f"Error loading ontology {path}: {e}")
+            return 0
+        self.stats["triples_added"] += added
+        self.stats["load_time"] += time.time() - start_time
+        logger.info(f"Loaded {added} triples from ontology {path}")
+        return added
+    
+    def save(self, path: str) -> None:
+        """
+        Save the knowledge graph as a triple file that load reads back.
+        
+        Args:
+            path: File path (".jsonl")
+        """
+        self.graph.save(path)
+    
+    def _context_to_triples(self, statements: List[str]) -> List[tuple]:
+        """
+        Turn simple natural language statements into triples.
+        
+        "Fluffy is a cat." gives (Fluffy, rdf:type, Cat); "A dog is a mammal
+        that barks." gives (Dog, rdfs:subClassOf, Mammal) and a property
+        triple per clause ("has fur and produces milk" gives (X, has, Fur)
+        and (X, produces, Milk); a lone verb gives (X, vot:does, verb)).
+        Statements that do not match are skipped.
+        
+        Args:
+            statements: Natural language statements
+            
+        Returns:
+            List of (subject, predicate, object) triples
+        """
+        triples = []
+        for statement in statements:
+            match = STATEMENT_PATTERN.match(statement)
+            if not match:
+                logger.debug(f"Skipping statement without a known form: {statement}")
+                continue
+            subject, obj = _term(match.group("subject")), _term(match.group("object"))
+            triples.append((subject, RDFS_SUBCLASS_OF if match.group("article") else RDF_TYPE, obj))
+            for clause in re.split(r"\s+and\s+|,\s*", match.group("clause") or ""):
+                words = clause.split()
+                if len(words) == 1:
+                    triples.append((subject, "vot:does", words[0].lower()))
+                elif words:
+                    triples.append((subject, words[0].lower(), _term(" ".join(words[1:]))))
+        return triples
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get usage and knowledge graph statistics.
+        
+        Returns:
+            Dictionary with query, load and triple statistics
+        """
+        graph_stats = self.graph.get_stats()
+        return {**self.stats, **graph_stats, "total_axioms": graph_stats["triples"]}
+    
+    def clear(self) -> None:
+        """Remove all knowledge from the graph."""
+        self.graph.clear()
     
     def reason(self, query: str, context: Optional[List[str]] = None) -> str:
         """
@@ -88,12 +224,24 @@ class OWLReasoningEngine:
         if context:
             logger.debug(f"Context: {context[:1]}...")
         
-        # Mock reasoning for code analysis
-        if "code" in query.lower() or "analyze" in query.lower():
-            return self._mock_code_analysis(query, context)
-        
-        # Mock reasoning for general queries
-        return self._mock_general_reasoning(query)
+        start_time = time.time()
+        self.stats["queries"] += 1
+        try:
+            # Mock reasoning for code analysis
+            if "code" in query.lower() or "analyze" in query.lower():
+                return self._mock_code_analysis(query, context)
+            
+            # Class membership questions are answered from the knowledge graph
+            question = QUESTION_PATTERN.match(query)
+            if question:
+                answer = self._answer_membership(question.group("subject"), question.group("object"))
+                if answer:
+                    return answer
+            
+            # Mock reasoning for general queries
+            return self._mock_general_reasoning(query)
+        finally:
+            self.stats["query_time"] += time.time() - start_time
     
     def _mock_code_analysis(self, query: str, context: Optional[List[str]]) -> str:
         """Provide mock code analysis results."""
@@ -182,12 +330,55 @@ class OWLReasoningEngine:
         
         return top_category[0]
     
+    def _find_entities(self, query: str) -> List[str]:
+        """Find the graph terms named in a query (single words and word pairs)."""
+        words = [word.strip("?!.,;:'\"()") for word in query.split()]
+        words = [word for word in words if word]
+        names = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+        return list(dict.fromkeys(term for name in names for term in self.graph.find_terms(name)))
+    
+    def _superclasses(self, term: str) -> Dict[str, Optional[tuple]]:
+        """Get the classes a term belongs to, each with the triple that led to it."""
+        found = {}
+        queue = deque()
+        for triple in self.graph.triples(term, RDF_TYPE) + self.graph.triples(term, RDFS_SUBCLASS_OF):
+            if triple[2] not in found:
+                found[triple[2]] = triple
+                queue.append(triple[2])
+        while queue:
+            for triple in self.graph.triples(queue.popleft(), RDFS_SUBCLASS_OF):
+                if triple[2] not in found:
+                    found[triple[2]] = triple
+                    queue.append(triple[2])
+        return found
+    
+    def _answer_membership(self, subject_name: str, class_name: str) -> Optional[str]:
+        """Answer "is X a Y?" by following rdf:type and rdfs:subClassOf, or None if X is unknown."""
+        subjects = self.graph.find_terms(" ".join(subject_name.split()))
+        if not subjects:
+            return None
+        subject = subjects[0]
+        chain = self._superclasses(subject)
+        name = " ".join(class_name.split()).lower()
+        target = next((cls for cls in chain if name in (cls.lower(), local_name(cls).lower())), None)
+        if target is None:
+            return f"No, {local_name(subject)} is not known to be a {class_name} in the ontology."
+        
+        # Walk back from the class to the subject to explain the inference
+        steps, current = [], target
+        while True:
+            s, p, o = chain[current]
+            steps.append(f"{local_name(s)} is {'a subclass of' if p == RDFS_SUBCLASS_OF else 'a'} {local_name(o)}")
+            if s == subject:
+                break
+            current = s
+        return f"Yes, {local_name(subject)} is a {local_name(target)}: " + "; ".join(reversed(steps)) + "."
+    
     def _mock_general_reasoning(self, query: str) -> str:
         """Provide mock results for general reasoning queries."""
-        # Check if query is about specific entities in the KB
-        for entity in list(self.kb.keys()) + sum([v["instances"] for v in self.kb.values()], []):
-            if entity.lower() in query.lower():
-                return self._describe_entity(entity)
+        # Check if query is about specific entities in the knowledge graph
+        for entity in self._find_entities(query):
+            return self._describe_entity(entity)
         
         # Default response
         return (
@@ -198,28 +389,30 @@ class OWLReasoningEngine:
         )
     
     def _describe_entity(self, entity: str) -> str:
-        """Generate a description of an entity based on the KB."""
+        """Generate a description of an entity based on the knowledge graph."""
+        subclasses = self.graph.subjects(RDFS_SUBCLASS_OF, entity)
+        instances = self.graph.subjects(RDF_TYPE, entity)
+        
+        name = local_name(entity)
+        
         # Check if it's a class
-        if entity in self.kb:
-            subclasses = self.kb[entity]["subclasses"]
-            instances = self.kb[entity]["instances"]
-            
-            description = f"{entity} is a class in the VOT1 ontology."
+        if subclasses or instances or self.graph.count(entity, RDFS_SUBCLASS_OF):
+            description = f"{name} is a class in the VOT1 ontology."
             
             if subclasses:
-                description += f" It has the following subclasses: {', '.join(subclasses)}."
+                description += f" It has the following subclasses: {', '.join(map(local_name, subclasses))}."
             
             if instances:
-                description += f" It has the following instances: {', '.join(instances)}."
+                description += f" It has the following instances: {', '.join(map(local_name, instances))}."
             
             return description
         
         # Check if it's an instance
-        for class_name, class_info in self.kb.items():
-            if entity in class_info["instances"]:
-                return f"{entity} is an instance of the {class_name} class in the VOT1 ontology."
+        classes = self.graph.objects(entity, RDF_TYPE)
+        if classes:
+            return f"{name} is an instance of the {local_name(classes[0])} class in the VOT1 ontology."
         
-        return f"No information found about {entity} in the ontology."
+        return f"No information found about {name} in the ontology."
 
 
 class OWLReasoner:
@@ -246,7 +439,7 @@ class OWLReasoner:
         )
         logger.info("OWL reasoner initialized")
     
-    def reason(self, query: str, context: Optional[List[str]] = None) -> Dict[str, Any]:
+    def reason(self, query: str, context: Optional[List[str]] = None) -> str:
         """
         Perform reasoning on a natural language query.
         
@@ -255,7 +448,7 @@ class OWLReasoner:
             context: Additional context statements to consider
             
         Returns:
-            Dictionary with reasoning results
+            The reasoning result text
         """
         return self.engine.reason(query, context)
     
@@ -271,16 +464,8 @@ class OWLReasoner:
         """
         triples = self.engine._context_to_triples(statements)
         
-        # Add triples to graph
-        old_count = len(self.engine.graph)
-        for triple in triples:
-            self.engine.graph.add(triple)
-        new_count = len(self.engine.graph)
-        
-        added = new_count - old_count
-        self.engine.stats["total_axioms"] = new_count
-        
-        return added
+        # Bulk load the triples into the graph
+        return self.engine.add_triples(triples)
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -321,9 +506,5 @@ if __name__ == "__main__":
     result = reasoner.reason(query)
     
     print(f"\nQuery: {query}")
-    print(f"Response: {result['response']}")
-    print("\nReasoning chain:")
-    for step in result["reasoning_chain"]:
-        print(f"- {step}")
-    print(f"\nConfidence: {result['confidence']}")
-    print(f"Processing time: {result['processing_time']:.3f} seconds") 
\ No newline at end of file
+    print(f"Response: {result}")
+    print(f"\nStats: {reasoner.get_stats()}")
\ No newline at end of file
@@ -6,10 +6,18 @@ This module provides a client for the Perplexity API, enabling the VOT1 system
 to leverage web search and online information for enhanced reasoning.
 """
 
+import json
 import logging
 import os
+import time
+import uuid
 from typing import Dict, List, Any, Optional
 
+from vot1.rate_limiter import RateLimiter, get_rate_limiter
+from vot1.resilience import ResilientCaller, RetryPolicy
+from vot1.token_estimator import get_token_estimator
+from vot1.usage import UsageLedger, get_usage_ledger
+
 logger = logging.getLogger(__name__)
 
 class PerplexityClient:
@@ -18,16 +26,28 @@ class PerplexityClient:
     This is a simplified implementation for testing purposes.
     """
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "pplx-70b-online"):
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 model: str = "pplx-70b-online",
+                 retry_policy: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 usage_ledger: Optional[UsageLedger] = None):
         """
         Initialize the Perplexity client.
         
         Args:
             api_key: Perplexity API key (defaults to PERPLEXITY_API_KEY env var)
             model: Perplexity model to use
+            retry_policy: Optional retry policy for transient API errors
+            rate_limiter: Optional rate limiter (defaults to the process-wide limiter)
+            usage_ledger: Optional usage ledger (defaults to the process-wide ledger)
         """
         self.api_key = api_key or os.environ.get("PERPLEXITY_API_KEY")
         self.model = model
+        self.resilience = ResilientCaller("perplexity", retry_policy=retry_policy)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.usage_ledger = usage_ledger or get_usage_ledger()
+        self.token_estimator = get_token_estimator()
         
         if not self.api_key:
             logger.warning("No Perplexity API key provided. Web search will be simulated.")
@@ -45,7 +65,13 @@ class PerplexityClient:
             Search results
         """
         logger.info(f"Performing web search: {query}")
-        
+        return await self.resilience.call_async(
+            lambda: self._limited(lambda: self._search(query), self.token_estimator.count(query, self.model)),
+            model=self.model
+        )
+    
+    async def _search(self, query: str) -> Dict[str, Any]:
+        """Perform a single web search request."""
         # In a real implementation, this would make an API call to Perplexity
         # For testing, we return mock results
         return {
@@ -83,7 +109,36 @@ class PerplexityClient:
             Response data
         """
         logger.info(f"Querying Perplexity: {prompt[:50]}...")
-        
+        return await self.resilience.call_async(
+            lambda: self._limited(
+                lambda: self._query(prompt, system),
+                self.token_estimator.count(prompt, self.model) + self.token_estimator.count(system or "", self.model)
+            ),
+            model=self.model
+        )
+    
+    async def _limited(self, request_fn, input_tokens: int) -> Dict[str, Any]:
+        """Run a single request once the rate limiter has room for it, recording its usage."""
+        async with await self.rate_limiter.acquire_async("perplexity", self.model, input_tokens) as slot:
+            start_time = time.time()
+            try:
+                result = await request_fn()
+            except Exception:
+                self.usage_ledger.record(
+                    "perplexity", self.model, queue_time=slot.waited,
+                    total_time=time.time() - start_time, workflow="web_search", success=False
+                )
+                raise
+            
+            entry = self.usage_ledger.record_response(
+                "perplexity", self.model, result, queue_time=slot.waited,
+                total_time=time.time() - start_time, workflow="web_search"
+            )
+            slot.settle(entry["output_tokens"], entry["input_tokens"] or None)
+            return result
+    
+    async def _query(self, prompt: str, system: Optional[str] = None) -> Dict[str, Any]:
+        """Send a single query request."""
         # In a real implementation, this would make an API call to Perplexity
         # For testing, we return mock results
         return {
@@ -92,11 +147,24 @@ class PerplexityClient:
             "created": 1678912345,
             "content": f"This is a simulated response from Perplexity for: {prompt[:50]}...",
             "usage": {
-                "prompt_tokens": len(prompt) // 4,
+                "prompt_tokens": self.token_estimator.count(prompt, self.model),
                 "completion_tokens": 250,
-                "total_tokens": (len(prompt) // 4) + 250
+                "total_tokens": self.token_estimator.count(prompt, self.model) + 250
             }
         }
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """
+        Get usage statistics for the client.
+        
+        Returns:
+            Dictionary with retry, failover, circuit breaker, rate limiting and usage metrics
+        """
+        return {
+            "resilience": self.resilience.get_stats(),
+            "rate_limits": self.rate_limiter.get_stats(),
+            "ledger": self.usage_ledger.get_summary()
+        }
 
 
 class PerplexityMcpClient:
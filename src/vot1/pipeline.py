@@ -0,0 +1,633 @@
+"""
+VOT1 Request Pipeline
+
+This module provides the request core shared by the VOT1 clients:
+
+1. A pooled transport: one provider SDK client (and HTTP connection pool) per
+   API key per process, wrapping every call with rate limiting, usage
+   accounting and token-estimator calibration
+2. A request pipeline with pluggable stages:
+   retrieve -> assemble -> call -> tools -> persist
+
+Each stage is a callable that takes the request state dictionary and updates
+it in place. Clients build a pipeline from the stock stages below and supply
+their own call function (model routing, retries, failover), so optimizations
+added to a stage or to the transport apply to every client.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Any, Optional, Callable, Iterator
+
+from vot1.rate_limiter import RateLimiter, get_rate_limiter
+from vot1.token_estimator import TokenEstimator, get_token_estimator
+from vot1.tool_executor import ToolExecutor
+from vot1.usage import UsageLedger, extract_usage, get_usage_ledger
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Prefix of the text the clients return in place of a response when generation fails
+GENERATION_ERROR_PREFIX = "Error generating response: "
+
+
+def is_generation_error(text: Any) -> bool:
+    """Check whether a client response is the placeholder for a failed generation."""
+    return isinstance(text, str) and text.startswith(GENERATION_ERROR_PREFIX)
+
+
+def content_blocks(response: Any) -> List[Dict[str, Any]]:
+    """
+    Get the content blocks of a Messages API response as dictionaries.
+
+    Args:
+        response: API response object or dictionary
+
+    Returns:
+        List of content block dictionaries
+    """
+    content = response.get("content") if isinstance(response, dict) else getattr(response, "content", None)
+    if isinstance(content, str):
+        return [{"type": "text", "text": content}]
+    return [block_to_dict(block) for block in content or []]
+
+
+def response_text(response: Any) -> str:
+    """
+    Get the concatenated text blocks of a Messages API response.
+
+    Args:
+        response: API response object or dictionary
+
+    Returns:
+        Response text
+    """
+    return "".join(block.get("text", "") for block in content_blocks(response) if block.get("type") == "text")
+
+
+def block_to_dict(block: Any) -> Dict[str, Any]:
+    """Convert a response content block (SDK object or dict) into a dictionary."""
+    if isinstance(block, dict):
+        return block
+    if hasattr(block, "model_dump"):
+        return block.model_dump(exclude_none=True)
+    return {key: value for key, value in vars(block).items() if not key.startswith("_")}
+
+
+def retrieve_memories(memory_manager, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Retrieve memories relevant to a query from any supported memory manager.
+
+    Args:
+        memory_manager: Memory manager (retrieve_relevant_memories or search_memories API)
+        query: Query text
+        limit: Maximum number of memories
+
+    Returns:
+        List of memories (empty on error)
+    """
+    try:
+        if hasattr(memory_manager, "retrieve_relevant_memories"):
+            return memory_manager.retrieve_relevant_memories(query, limit=limit) or []
+        if hasattr(memory_manager, "search_memories"):
+            return memory_manager.search_memories(query, limit=limit) or []
+    except Exception as e:
+        logger.error(f"Error retrieving memories: {e}")
+    return []
+
+
+def save_memory(memory_manager, content: str, memory_type: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Save a memory with any supported memory manager.
+
+    Args:
+        memory_manager: Memory manager (add_memory or add_semantic_memory API)
+        content: Memory content
+        memory_type: Memory type ("conversation", "semantic", ...)
+        metadata: Optional metadata
+
+    Returns:
+        True if the memory was saved
+    """
+    try:
+        if hasattr(memory_manager, "add_memory"):
+            memory_manager.add_memory(content=content, memory_type=memory_type, metadata=metadata or {})
+        else:
+            memory_manager.add_semantic_memory(content=content, metadata={"type": memory_type, **(metadata or {})})
+        return True
+    except Exception as e:
+        logger.error(f"Error saving to memory: {e}")
+        return False
+
+
+def save_memories(memory_manager, memories: List[Dict[str, Any]]) -> int:
+    """
+    Save several memories at once, skipping duplicate contents.
+
+    Memory managers with a batch API (add_semantic_memories) get a single
+    insert; others get one save_memory call per memory.
+
+    Args:
+        memory_manager: Memory manager
+        memories: List of dictionaries with content, memory_type and optional metadata
+
+    Returns:
+        Number of memories saved
+    """
+    unique = {}
+    for memory in memories:
+        content = memory.get("content")
+        if content and content.strip() and content.strip() not in unique:
+            unique[content.strip()] = memory
+    if not unique:
+        return 0
+
+    if hasattr(memory_manager, "add_semantic_memories"):
+        try:
+            memory_manager.add_semantic_memories([
+                {"content": memory["content"],
+                 "metadata": {"type": memory.get("memory_type", "semantic"), **(memory.get("metadata") or {})}}
+                for memory in unique.values()
+            ])
+            return len(unique)
+        except Exception as e:
+            logger.error(f"Error saving to memory: {e}")
+            return 0
+
+    return sum(
+        save_memory(memory_manager, memory["content"], memory.get("memory_type", "semantic"), memory.get("metadata"))
+        for memory in unique.values()
+    )
+
+
+class AnthropicTransport:
+    """
+    Pooled transport for the Anthropic Messages API.
+
+    Retries are left to the callers' resilience layer, so the SDK client is
+    created with ``max_retries=0``.
+    """
+
+    provider = "anthropic"
+
+    def __init__(
+        self,
+        api_key: str,
+        rate_limiter: Optional[RateLimiter] = None,
+        usage_ledger: Optional[UsageLedger] = None,
+        token_estimator: Optional[TokenEstimator] = None,
+        client=None
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            api_key: Anthropic API key
+            rate_limiter: Optional rate limiter (defaults to the process-wide limiter)
+            usage_ledger: Optional usage ledger (defaults to the process-wide ledger)
+            token_estimator: Optional token estimator (defaults to the process-wide estimator)
+            client: Optional pre-configured anthropic.Anthropic client
+        """
+        if client is None:
+            import anthropic
+            client = anthropic.Anthropic(api_key=api_key, max_retries=0)
+        self.client = client
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.usage_ledger = usage_ledger or get_usage_ledger()
+        self.token_estimator = token_estimator or get_token_estimator()
+
+    def send(
+        self,
+        model: str,
+        request: Dict[str, Any],
+        workflow: Optional[str] = None,
+        on_usage: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Any:
+        """
+        Send a single Messages API request once the rate limiter admits it.
+
+        The request reserves one request plus its estimated input and output
+        tokens and is queued until the model's per-minute budget has room. The
+        reported usage is recorded in the usage ledger and calibrates the token
+        estimator.
+
+        Args:
+            model: Model to call
+            request: Remaining Messages API parameters
+            workflow: Workflow name recorded in the usage ledger
+            on_usage: Optional callback (model, ledger entry) for per-client accounting
+
+        Returns:
+            API response
+        """
+        raw_input_tokens = self.token_estimator.count_request(request, model, calibrated=False)
+        input_tokens = self.token_estimator.apply_calibration(raw_input_tokens, model)
+
+        with self.rate_limiter.acquire(self.provider, model, input_tokens, request.get("max_tokens", 0)) as slot:
+            start_time = time.time()
+            try:
+                response = self._create(model, request)
+            except Exception:
+                self.usage_ledger.record(
+                    self.provider, model, queue_time=slot.waited, total_time=time.time() - start_time,
+                    workflow=workflow, success=False
+                )
+                raise
+
+            usage = extract_usage(response)
+            total_input_tokens = (
+                usage["input_tokens"] + usage["cache_creation_input_tokens"] + usage["cache_read_input_tokens"]
+            )
+            slot.settle(usage["output_tokens"], total_input_tokens)
+            self.token_estimator.calibrate(model, raw_input_tokens, total_input_tokens)
+            entry = self.usage_ledger.record(
+                self.provider, model, queue_time=slot.waited, total_time=time.time() - start_time,
+                workflow=workflow, **usage
+            )
+            if on_usage:
+                on_usage(model, entry)
+            return response
+
+    def stream(
+        self,
+        model: str,
+        request: Dict[str, Any],
+        workflow: Optional[str] = None,
+        on_usage: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a single Messages API request once the rate limiter admits it.
+
+        Streaming events are yielded as dictionaries while they arrive. Usage
+        (including the time to the first token) is recorded when the stream
+        ends; a stream closed early is recorded as unsuccessful.
+
+        Args:
+            model: Model to call
+            request: Remaining Messages API parameters
+            workflow: Workflow name recorded in the usage ledger
+            on_usage: Optional callback (model, ledger entry) for per-client accounting
+
+        Yields:
+            Streaming event dictionaries (message_start, content_block_delta, ...)
+        """
+        raw_input_tokens = self.token_estimator.count_request(request, model, calibrated=False)
+        input_tokens = self.token_estimator.apply_calibration(raw_input_tokens, model)
+
+        with self.rate_limiter.acquire(self.provider, model, input_tokens, request.get("max_tokens", 0)) as slot:
+            start_time = time.time()
+            ttft = None
+            usage = {field: 0 for field in UsageLedger.TOKEN_FIELDS}
+            try:
+                for event in self._create_stream(model, request):
+                    event = block_to_dict(event)
+                    if event.get("type") == "message_start":
+                        usage.update(extract_usage(event.get("message") or {}))
+                    elif event.get("type") == "message_delta":
+                        usage["output_tokens"] = extract_usage(event)["output_tokens"] or usage["output_tokens"]
+                    elif event.get("type") == "content_block_delta" and ttft is None:
+                        ttft = time.time() - start_time
+                    yield event
+            except BaseException:
+                self.usage_ledger.record(
+                    self.provider, model, queue_time=slot.waited, ttft=ttft, total_time=time.time() - start_time,
+                    workflow=workflow, success=False, **usage
+                )
+                raise
+
+            total_input_tokens = (
+                usage["input_tokens"] + usage["cache_creation_input_tokens"] + usage["cache_read_input_tokens"]
+            )
+            slot.settle(usage["output_tokens"], total_input_tokens)
+            self.token_estimator.calibrate(model, raw_input_tokens, total_input_tokens)
+            entry = self.usage_ledger.record(
+                self.provider, model, queue_time=slot.waited, ttft=ttft, total_time=time.time() - start_time,
+                workflow=workflow, **usage
+            )
+            if on_usage:
+                on_usage(model, entry)
+
+    def _create(self, model: str, request: Dict[str, Any]) -> Any:
+        """Perform the provider call."""
+        return self.client.messages.create(model=model, **request)
+
+    def _create_stream(self, model: str, request: Dict[str, Any]) -> Iterator[Any]:
+        """Perform the provider call as a stream, closing the connection when the consumer stops."""
+        stream = self.client.messages.create(model=model, stream=True, **request)
+        try:
+            yield from stream
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(
+    api_key: str,
+    rate_limiter: Optional[RateLimiter] = None,
+    usage_ledger: Optional[UsageLedger] = None,
+    token_estimator: Optional[TokenEstimator] = None
+) -> AnthropicTransport:
+    """
+    Get a transport for an API key backed by the process-wide connection pool.
+
+    Clients that share a key share one SDK client and HTTP connection pool.
+    Clients with their own rate limiter, usage ledger or token estimator get a
+    transport of their own that still uses the shared SDK client.
+
+    Args:
+        api_key: Anthropic API key
+        rate_limiter: Optional rate limiter (defaults to the process-wide limiter)
+        usage_ledger: Optional usage ledger (defaults to the process-wide ledger)
+        token_estimator: Optional token estimator (defaults to the process-wide estimator)
+
+    Returns:
+        AnthropicTransport instance
+    """
+    key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    with _transports_lock:
+        shared = _transports.get(key)
+        if shared is None:
+            shared = _transports[key] = AnthropicTransport(api_key)
+
+    if (rate_limiter in (None, shared.rate_limiter)
+            and usage_ledger in (None, shared.usage_ledger)
+            and token_estimator in (None, shared.token_estimator)):
+        return shared
+    return AnthropicTransport(
+        api_key,
+        rate_limiter=rate_limiter or shared.rate_limiter,
+        usage_ledger=usage_ledger or shared.usage_ledger,
+        token_estimator=token_estimator or shared.token_estimator,
+        client=shared.client
+    )
+
+
+class MemoryRetrievalStage:
+    """Retrieve stage: loads memories relevant to the prompt."""
+
+    def __init__(self, memory_manager, limit: int = 5):
+        """
+        Initialize the stage.
+
+        Args:
+            memory_manager: Memory manager to search (None disables retrieval)
+            limit: Maximum number of memories
+        """
+        self.memory_manager = memory_manager
+        self.limit = limit
+
+    def __call__(self, state: Dict[str, Any]) -> None:
+        if self.memory_manager and state.get("use_memory", True):
+            state["memories"] = retrieve_memories(self.memory_manager, state["prompt"], self.limit)
+
+
+class ContextAssemblyStage:
+    """
+    Assemble stage: packs context and memories into the token budget and
+    builds the messages.
+
+    ``placement`` decides where the assembled context goes: "user" prepends it
+    to the user message, "system" appends it to the system prompt.
+    """
+
+    def __init__(self, assembler, placement: str = "user"):
+        """
+        Initialize the stage.
+
+        Args:
+            assembler: ContextAssembler used for budgeting
+            placement: "user" or "system"
+        """
+        if placement not in ("user", "system"):
+            raise ValueError(f"Unknown context placement: {placement}")
+        self.assembler = assembler
+        self.placement = placement
+
+    def __call__(self, state: Dict[str, Any]) -> None:
+        prompt = state["prompt"]
+        assembled = self.assembler.assemble(
+            prompt,
+            context=state.get("context") or {},
+            memories=state.get("memories") or [],
+            model=state.get("model"),
+            max_tokens=state.get("max_tokens", 1024)
+        )
+        state["context_tokens"] = assembled["tokens"]
+
+        content = prompt
+        if assembled["text"]:
+            if self.placement == "system":
+                state["system"] = f"{state.get('system') or ''}\n\n{assembled['text']}".strip()
+            else:
+                content = f"{assembled['text']}{prompt}"
+
+        state["messages"] = list(state.get("history") or []) + [{"role": "user", "content": content}]
+
+
+class ModelCallStage:
+    """
+    Call stage: sends the request through a client-supplied call function.
+
+    The call function takes (model, request, state) and returns a tuple of
+    (model that served the request, response); clients use it to add routing,
+    retries and failover.
+    """
+
+    REQUEST_KEYS = ("system", "messages", "max_tokens", "temperature", "tools", "tool_choice")
+
+    def __init__(self, call: Callable[[str, Dict[str, Any], Dict[str, Any]], tuple]):
+        """
+        Initialize the stage.
+
+        Args:
+            call: Function (model, request, state) -> (served model, response)
+        """
+        self.call = call
+
+    def build_request(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the Messages API parameters from the state."""
+        return {key: state[key] for key in self.REQUEST_KEYS if state.get(key) is not None}
+
+    def __call__(self, state: Dict[str, Any]) -> None:
+        model, response = self.call(state["model"], self.build_request(state), state)
+        state["model"] = model
+        state["response"] = response
+        state["responses"] = state.get("responses", []) + [response]
+        state["content"] = response_text(response)
+
+
+class ToolExecutionStage:
+    """
+    Tools stage: executes tool_use blocks and continues the conversation with
+    the tool results until the model stops asking for tools.
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, Callable],
+        call_stage: ModelCallStage,
+        executor: Optional[ToolExecutor] = None,
+        max_rounds: int = 5
+    ):
+        """
+        Initialize the stage.
+
+        Args:
+            handlers: Tool handlers by tool name (called with the tool input as keyword arguments)
+            call_stage: Call stage used to continue the conversation
+            executor: Optional tool executor running the handlers with their timeouts (inline otherwise)
+            max_rounds: Maximum number of tool round-trips per request
+        """
+        self.handlers = handlers
+        self.call_stage = call_stage
+        self.executor = executor
+        self.max_rounds = max_rounds
+
+    def execute(self, name: str, tool_input: Dict[str, Any]) -> Any:
+        """Execute a single tool call."""
+        handler = self.handlers.get(name)
+        if handler is None:
+            logger.warning(f"Unknown tool or no handler available: {name}")
+            return {"error": f"Unknown tool or no handler available: {name}"}
+        try:
+            if self.executor is not None:
+                return self.executor.execute(name, handler, tool_input)
+            return handler(**tool_input)
+        except Exception as e:
+            logger.error(f"Error executing tool {name}: {e}")
+            return {"error": f"Error executing tool {name}: {str(e)}"}
+
+    def __call__(self, state: Dict[str, Any]) -> None:
+        state.setdefault("tool_calls", [])
+        for _ in range(self.max_rounds):
+            blocks = content_blocks(state["response"])
+            tool_uses = [block for block in blocks if block.get("type") == "tool_use"]
+            if not tool_uses:
+                return
+
+            if not state.get("execute_tools", True):
+                state["tool_calls"].extend(
+                    {"id": use.get("id"), "name": use["name"], "input": use.get("input", {}), "result": None}
+                    for use in tool_uses
+                )
+                return
+
+            results = []
+            for use in tool_uses:
+                tool_input = use.get("input") or {}
+                if isinstance(tool_input, str):
+                    tool_input = json.loads(tool_input)
+                logger.info(f"Executing tool: {use['name']}")
+                result = self.execute(use["name"], tool_input)
+                state["tool_calls"].append({"id": use.get("id"), "name": use["name"], "input": tool_input, "result": result})
+                results.append({
+                    "type": "tool_result",
+                    "tool_use_id": use.get("id"),
+                    "content": result if isinstance(result, str) else json.dumps(result, default=str),
+                    **({"is_error": True} if isinstance(result, dict) and "error" in result else {})
+                })
+
+            state["messages"] = state["messages"] + [
+                {"role": "assistant", "content": blocks},
+                {"role": "user", "content": results}
+            ]
+            self.call_stage(state)
+
+        logger.warning(f"Stopped tool execution after {self.max_rounds} rounds")
+
+
+class MemoryPersistStage:
+    """Persist stage: saves the exchange to memory."""
+
+    def __init__(self, memory_manager):
+        """
+        Initialize the stage.
+
+        Args:
+            memory_manager: Memory manager to write to (None disables persistence)
+        """
+        self.memory_manager = memory_manager
+
+    def __call__(self, state: Dict[str, Any]) -> None:
+        if not self.memory_manager or not state.get("save_to_memory", True) or not state.get("content"):
+            return
+
+        metadata = {
+            "prompt": state["prompt"],
+            "model": state.get("model"),
+            "used_tools": bool(state.get("tool_calls")),
+            "timestamp": time.time(),
+            **(state.get("memory_metadata") or {})
+        }
+        conversation_id = state.get("conversation_id")
+        if conversation_id and hasattr(self.memory_manager, "add_conversation_memory"):
+            metadata["conversation_id"] = conversation_id
+            try:
+                self.memory_manager.add_conversation_memory("user", state["prompt"], metadata=metadata)
+                self.memory_manager.add_conversation_memory("assistant", state["content"], metadata=metadata)
+            except Exception as e:
+                logger.error(f"Error saving to memory: {e}")
+        else:
+            save_memory(self.memory_manager, state["content"], "conversation", metadata)
+
+
+class RequestPipeline:
+    """
+    Runs a request state through the retrieve, assemble, call, tools and
+    persist stages.
+    """
+
+    STAGES = ("retrieve", "assemble", "call", "tools", "persist")
+
+    def __init__(self, **stages: Optional[Callable[[Dict[str, Any]], None]]):
+        """
+        Initialize the pipeline.
+
+        Args:
+            **stages: Stage callables keyed by stage name (missing stages are skipped)
+        """
+        unknown = set(stages) - set(self.STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown))}")
+        self.stages = {name: stages.get(name) for name in self.STAGES}
+
+    def set_stage(self, name: str, stage: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        """
+        Replace (or with None, disable) a stage.
+
+        Args:
+            name: Stage name
+            stage: Stage callable
+        """
+        if name not in self.STAGES:
+            raise ValueError(f"Unknown pipeline stage: {name}")
+        self.stages[name] = stage
+
+    def run(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run the stages over a request state.
+
+        Args:
+            state: Request state (prompt, system, model, max_tokens, context, ...)
+
+        Returns:
+            The updated state, including per-stage timings
+        """
+        timings = state.setdefault("timings", {})
+        for name in self.STAGES:
+            stage = self.stages[name]
+            if stage is None:
+                continue
+            start_time = time.time()
+            stage(state)
+            timings[name] = time.time() - start_time
+        return state
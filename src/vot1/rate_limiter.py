@@ -0,0 +1,457 @@
+"""
+VOT1 Rate Limiter
+
+This module implements client-side rate limiting for provider APIs using token
+buckets keyed by provider and model. Three buckets are tracked per key:
+
+- requests per minute (RPM)
+- input tokens per minute (ITPM)
+- output tokens per minute (OTPM)
+
+Instead of failing when a bucket is empty, callers reserve capacity up front and
+wait until the reservation is covered. Reservations are granted in arrival
+order, which queues bursts and keeps throughput at the sustainable rate instead
+of thrashing on 429s. Output tokens are reserved at the model's recent average
+output (with headroom, capped at ``max_tokens``; the first request reserves
+``max_tokens``) and reconciled once the provider reports actual usage: unused
+tokens are refunded and overruns are charged to the bucket.
+
+Limits are opt-in: without configured limits nothing is throttled. Limits
+come from the constructor, ``configure``, or for the process-wide limiter the
+VOT1_RATE_LIMITS environment variable (JSON limits, or "tier1" for
+TIER_1_LIMITS). A request that would wait longer than ``max_wait`` seconds
+is not admitted: its reservation is given back and RateLimitWaitExceeded is
+raised (a retryable error with a retry-after hint), so a backlog drains at
+the sustainable rate instead of being released in one burst.
+
+Bucket state lives in memory by default (process-wide), or in a shared SQLite
+database so that several worker processes share one budget.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MemoryBucketStore:
+    """
+    In-process token bucket state.
+
+    Bucket levels may go negative: a negative level is outstanding debt that is
+    repaid at the refill rate, and the caller waits until it is repaid.
+    """
+
+    def __init__(self):
+        """Initialize the store."""
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, amount: float, capacity: float, rate: float) -> float:
+        """
+        Reserve capacity from a bucket.
+
+        Args:
+            key: Bucket key
+            amount: Amount to reserve
+            capacity: Bucket capacity
+            rate: Refill rate per second
+
+        Returns:
+            Seconds to wait before the reservation is covered
+        """
+        now = time.time()
+        with self._lock:
+            level, updated = self._buckets.get(key, (capacity, now))
+            level = min(capacity, level + (now - updated) * rate) - amount
+            self._buckets[key] = (level, now)
+        return max(0.0, -level / rate)
+
+    def refund(self, key: str, amount: float, capacity: float) -> None:
+        """
+        Return unused capacity to a bucket.
+
+        Args:
+            key: Bucket key
+            amount: Amount to return
+            capacity: Bucket capacity
+        """
+        with self._lock:
+            if key in self._buckets:
+                level, updated = self._buckets[key]
+                self._buckets[key] = (min(capacity, level + amount), updated)
+
+
+class SqliteBucketStore:
+    """
+    Token bucket state shared between processes through SQLite.
+
+    Each reservation runs in an immediate transaction, so the database lock
+    serializes reservations across processes.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        """
+        Initialize the store.
+
+        Args:
+            path: Path to the shared SQLite database
+            timeout: Seconds to wait for the database lock
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, key: str, amount: float, capacity: float, rate: float) -> float:
+        """Reserve capacity from a shared bucket (see MemoryBucketStore.reserve)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT level, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            level, updated = row if row else (capacity, now)
+            level = min(capacity, level + (now - updated) * rate) - amount
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, level, updated) VALUES (?, ?, ?)",
+                (key, level, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return max(0.0, -level / rate)
+
+    def refund(self, key: str, amount: float, capacity: float) -> None:
+        """Return unused capacity to a shared bucket."""
+        conn = self._connect()
+        conn.execute(
+            "UPDATE buckets SET level = MIN(?, level + ?) WHERE key = ?",
+            (capacity, amount, key)
+        )
+
+
+class RateLimitWaitExceeded(TimeoutError):
+    """
+    Raised when a reservation would wait longer than ``max_wait``.
+
+    The reservation is given back to the buckets. ``retry_after`` is a hint
+    for when capacity is expected (honoured by the resilience layer's
+    retries, which treat this like a provider 429).
+    """
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Rate limit for {key} would need a wait beyond max_wait")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class RateLimitSlot:
+    """
+    A granted reservation.
+
+    Call ``settle`` with the usage reported by the provider so that unused
+    output tokens are returned to the bucket. Used as a context manager, an
+    unsettled slot refunds all of its output tokens on exit (e.g. on error).
+    """
+
+    def __init__(self, limiter: "RateLimiter", key: str, limits: Dict[str, float],
+                 input_tokens: int, output_tokens: int, waited: float):
+        self.limiter = limiter
+        self.key = key
+        self.limits = limits
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.waited = waited
+        self.settled = False
+
+    def settle(self, output_tokens: int, input_tokens: Optional[int] = None) -> None:
+        """
+        Reconcile the reservation with actual usage.
+
+        Args:
+            output_tokens: Output tokens reported by the provider
+            input_tokens: Input tokens reported by the provider (optional)
+        """
+        if self.settled:
+            return
+        self.settled = True
+        self.limiter._refund(self, output_tokens, input_tokens)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.settle(0)
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.settle(0)
+        return False
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter keyed by provider and model.
+    """
+
+    # Per-model limits of the lowest usage tiers (requests/min, input tokens/min,
+    # output tokens/min); pass them as limits to stay within an entry-level account
+    TIER_1_LIMITS = {
+        "anthropic": {"rpm": 50, "input_tpm": 40000, "output_tpm": 8000},
+        "perplexity": {"rpm": 50, "input_tpm": 0, "output_tpm": 0},
+    }
+    # Default cap in seconds on queueing for a reservation
+    DEFAULT_MAX_WAIT = 60.0
+    # Output tokens reserved relative to the recent average output
+    OUTPUT_HEADROOM = 1.5
+    # Weight of the latest request in the average output
+    OUTPUT_SMOOTHING = 0.2
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, float]]] = None,
+        shared_path: Optional[str] = None,
+        max_wait: Optional[float] = DEFAULT_MAX_WAIT
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            limits: Limits keyed by "provider" or "provider:model"; 0 or a
+                missing entry disables a bucket (no limits by default)
+            shared_path: Optional SQLite path to share buckets between processes
+            max_wait: Longest wait in seconds a request is queued for; requests
+                that would wait longer raise RateLimitWaitExceeded (None waits
+                as long as needed)
+        """
+        self.limits = dict(limits or {})
+        self.store = SqliteBucketStore(shared_path) if shared_path else MemoryBucketStore()
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._output_averages = {}
+        self.stats = {}
+
+        logger.info(f"Initialized RateLimiter ({'shared: ' + shared_path if shared_path else 'in-process'})")
+
+    def configure(self, provider: str, model: Optional[str] = None, **limits) -> None:
+        """
+        Set limits for a provider or a specific model.
+
+        Args:
+            provider: Provider name
+            model: Optional model name
+            **limits: Any of rpm, input_tpm, output_tpm
+        """
+        key = f"{provider}:{model}" if model else provider
+        with self._lock:
+            self.limits[key] = {**self.get_limits(provider, model), **limits}
+
+    def get_limits(self, provider: str, model: Optional[str] = None) -> Dict[str, float]:
+        """Get the effective limits for a provider and model."""
+        return self.limits.get(f"{provider}:{model}") or self.limits.get(provider) or {}
+
+    def _reserve(self, provider: str, model: Optional[str], input_tokens: int, output_tokens: int) -> RateLimitSlot:
+        key = f"{provider}:{model}"
+        limits = self.get_limits(provider, model)
+
+        # Reserve the expected output rather than the worst case; settle charges any overrun
+        with self._lock:
+            average = self._output_averages.get(key)
+        if average is not None and output_tokens:
+            output_tokens = min(output_tokens, max(1, math.ceil(average * self.OUTPUT_HEADROOM)))
+
+        wait = 0.0
+        reserved = []
+        for bucket, amount in (("rpm", 1), ("input_tpm", input_tokens), ("output_tpm", output_tokens)):
+            per_minute = limits.get(bucket, 0)
+            if not per_minute or not amount:
+                continue
+            # Requests larger than a whole bucket can never fit; cap them at capacity
+            amount = min(amount, per_minute)
+            wait = max(wait, self.store.reserve(f"{key}:{bucket}", amount, per_minute, per_minute / 60.0))
+            reserved.append((f"{key}:{bucket}", amount, per_minute))
+
+        with self._lock:
+            stats = self.stats.setdefault(
+                key, {"requests": 0, "throttled": 0, "rejected": 0, "total_wait": 0.0, "max_wait": 0.0}
+            )
+            if self.max_wait is not None and wait > self.max_wait:
+                stats["rejected"] += 1
+            else:
+                stats["requests"] += 1
+
+        if self.max_wait is not None and wait > self.max_wait:
+            # Releasing the request after max_wait would send it before its
+            # capacity exists (a backlog would fire all at once), so give the
+            # reservation back and let the caller retry later
+            for bucket_key, amount, per_minute in reserved:
+                self.store.refund(bucket_key, amount, per_minute)
+            logger.warning(f"Rate limit wait for {key} is {wait:.1f}s (max_wait {self.max_wait}s); rejecting the request")
+            raise RateLimitWaitExceeded(key, wait - self.max_wait)
+
+        with self._lock:
+            if wait > 0:
+                stats["throttled"] += 1
+                stats["total_wait"] += wait
+                stats["max_wait"] = max(stats["max_wait"], wait)
+
+        if wait > 0:
+            logger.debug(f"Rate limiting {key}: waiting {wait:.2f}s")
+
+        return RateLimitSlot(self, key, limits, input_tokens, output_tokens, wait)
+
+    def _refund(self, slot: RateLimitSlot, output_tokens: int, input_tokens: Optional[int]) -> None:
+        if output_tokens or input_tokens is not None:
+            # A settled request (not one released on error) updates the expected output
+            with self._lock:
+                average = self._output_averages.get(slot.key)
+                self._output_averages[slot.key] = output_tokens if average is None else (
+                    average + self.OUTPUT_SMOOTHING * (output_tokens - average)
+                )
+
+        unused_output = slot.output_tokens - output_tokens
+        per_minute = slot.limits.get("output_tpm", 0)
+        if per_minute and unused_output > 0:
+            self.store.refund(f"{slot.key}:output_tpm", min(unused_output, per_minute), per_minute)
+        elif per_minute and unused_output < 0:
+            # Charge the overrun; later requests wait for it to be repaid
+            self.store.reserve(f"{slot.key}:output_tpm", min(-unused_output, per_minute), per_minute, per_minute / 60.0)
+
+        per_minute = slot.limits.get("input_tpm", 0)
+        if per_minute and input_tokens is not None and slot.input_tokens > input_tokens:
+            self.store.refund(f"{slot.key}:input_tpm", slot.input_tokens - input_tokens, per_minute)
+
+    def acquire(self, provider: str, model: Optional[str] = None,
+                input_tokens: int = 0, output_tokens: int = 0) -> RateLimitSlot:
+        """
+        Reserve capacity for a request, blocking until it is available.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            input_tokens: Estimated input tokens
+            output_tokens: Maximum output tokens (refunded on settle)
+
+        Returns:
+            The granted slot
+
+        Raises:
+            RateLimitWaitExceeded: If the wait would exceed max_wait
+        """
+        slot = self._reserve(provider, model, input_tokens, output_tokens)
+        if slot.waited > 0:
+            time.sleep(slot.waited)
+        return slot
+
+    async def acquire_async(self, provider: str, model: Optional[str] = None,
+                            input_tokens: int = 0, output_tokens: int = 0) -> RateLimitSlot:
+        """
+        Async variant of ``acquire`` that waits without blocking the event loop.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            input_tokens: Estimated input tokens
+            output_tokens: Maximum output tokens (refunded on settle)
+
+        Returns:
+            The granted slot
+
+        Raises:
+            RateLimitWaitExceeded: If the wait would exceed max_wait
+        """
+        slot = self._reserve(provider, model, input_tokens, output_tokens)
+        if slot.waited > 0:
+            await asyncio.sleep(slot.waited)
+        return slot
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queueing statistics per provider and model.
+
+        Returns:
+            Dictionary keyed by "provider:model"
+        """
+        with self._lock:
+            return {
+                key: {**stats, "total_wait": round(stats["total_wait"], 3), "max_wait": round(stats["max_wait"], 3)}
+                for key, stats in self.stats.items()
+            }
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the process-wide rate limiter.
+
+    The limiter is configured from the environment:
+
+    - VOT1_RATE_LIMITS: JSON limits keyed by "provider" or "provider:model"
+      (e.g. {"anthropic": {"rpm": 1000, "output_tpm": 80000}}), or "tier1"
+      for RateLimiter.TIER_1_LIMITS; unset means no limits
+    - VOT1_RATE_LIMIT_MAX_WAIT: cap in seconds on queueing
+    - VOT1_RATE_LIMIT_DB: SQLite file sharing the buckets across processes
+
+    Returns:
+        The shared RateLimiter instance
+
+    Raises:
+        ValueError: If VOT1_RATE_LIMITS is not valid JSON limits
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter(
+                limits=_limits_from_env(os.environ.get("VOT1_RATE_LIMITS")),
+                shared_path=os.environ.get("VOT1_RATE_LIMIT_DB"),
+                max_wait=float(os.environ.get("VOT1_RATE_LIMIT_MAX_WAIT", RateLimiter.DEFAULT_MAX_WAIT))
+            )
+        return _default_limiter
+
+
+def _limits_from_env(value: Optional[str]) -> Dict[str, Dict[str, float]]:
+    """Parse the VOT1_RATE_LIMITS environment variable."""
+    if not value:
+        return {}
+    if value.strip().lower() == "tier1":
+        return dict(RateLimiter.TIER_1_LIMITS)
+    try:
+        limits = json.loads(value)
+    except ValueError as e:
+        raise ValueError(f"VOT1_RATE_LIMITS is not valid JSON: {e}") from e
+    if not isinstance(limits, dict) or not all(isinstance(entry, dict) for entry in limits.values()):
+        raise ValueError("VOT1_RATE_LIMITS must map providers to limit dictionaries")
+    return limits
@@ -0,0 +1,479 @@
+"""
+VOT1 Record/Replay
+
+This module records model request/response pairs to a compact on-disk store
+and replays them by request hash, so pipelines can be benchmarked and
+regression-tested offline, deterministically and at no cost:
+
+1. ReplayStore: SQLite store of zlib-compressed recordings (response,
+   latency, time to first token and optional streaming chunks)
+2. RecordReplayTransport: drop-in AnthropicTransport for the Claude clients
+3. RecordReplayBackend: wraps a VotModelControlProtocol backend
+
+Modes are "record" (call the provider and store the result), "replay" (serve
+stored results only) and "auto" (replay when recorded, otherwise record).
+Identical requests recorded several times are replayed in recording order.
+Replayed latency can be skipped, taken from the recording, or drawn from a
+distribution such as ``lognormal_latency``. Streamed calls are recorded chunk
+by chunk with their timing, and replayed with the same relative pacing.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Any, Optional, Callable, Union, AsyncIterator, Iterator, Tuple
+
+from vot1.mcp_backends import ModelBackend
+from vot1.pipeline import AnthropicTransport, block_to_dict
+from vot1.singleflight import make_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODE_AUTO = "auto"
+MODES = (MODE_RECORD, MODE_REPLAY, MODE_AUTO)
+
+# Request fields that do not change what the provider returns
+VOLATILE_KEYS = ("workflow", "context")
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode when a request has no recording."""
+
+
+def request_key(provider: str, model: str, request: Dict[str, Any]) -> str:
+    """
+    Hash a request for recording and lookup.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        request: Request parameters
+
+    Returns:
+        Hex digest identifying the request
+    """
+    return make_key(provider, model, {key: value for key, value in request.items() if key not in VOLATILE_KEYS})
+
+
+def to_serializable(response: Any) -> Any:
+    """Convert a provider response (SDK object or dictionary) into plain JSON data."""
+    if isinstance(response, (dict, list, str, int, float, bool)) or response is None:
+        return response
+    if hasattr(response, "model_dump"):
+        return response.model_dump(mode="json", exclude_none=True)
+    return block_to_dict(response)
+
+
+def lognormal_latency(median: float, sigma: float = 0.5, seed: Optional[int] = None) -> Callable[[float], float]:
+    """
+    Build a latency model drawing from a log-normal distribution.
+
+    Args:
+        median: Median latency in seconds
+        sigma: Shape parameter (larger values give a longer tail)
+        seed: Optional seed for reproducible draws
+
+    Returns:
+        Function (recorded latency) -> simulated latency
+    """
+    rng = random.Random(seed)
+    mu = math.log(median)
+    return lambda recorded: rng.lognormvariate(mu, sigma)
+
+
+class ReplayStore:
+    """
+    On-disk store of recorded model responses.
+
+    Payloads are JSON compressed with zlib. The store is safe to share across
+    threads; several recordings per request are kept in order.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Initialize the store.
+
+        Args:
+            path: SQLite file path (":memory:" for a temporary store)
+        """
+        self.path = path
+        directory = os.path.dirname(path) if path != ":memory:" else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS recordings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL,
+                provider TEXT,
+                model TEXT,
+                latency REAL,
+                ttft REAL,
+                payload BLOB NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_recordings_key ON recordings (key, id)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._cursors = {}
+
+        logger.info(f"Initialized ReplayStore at {path}")
+
+    def put(
+        self,
+        key: str,
+        provider: str,
+        model: str,
+        response: Any,
+        latency: float,
+        ttft: Optional[float] = None,
+        chunks: Optional[List[List[Any]]] = None
+    ) -> None:
+        """
+        Store a recording.
+
+        Args:
+            key: Request key
+            provider: Provider name
+            model: Model name
+            response: Provider response
+            latency: Seconds from request to full response
+            ttft: Seconds until the first streamed token
+            chunks: Optional streamed chunks as [seconds since request, chunk] pairs
+        """
+        payload = {"response": to_serializable(response)}
+        if chunks:
+            payload["chunks"] = [[offset, to_serializable(chunk)] for offset, chunk in chunks]
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO recordings (key, provider, model, latency, ttft, payload, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, latency, ttft, blob, time.time())
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the next recording for a request.
+
+        Successive calls cycle through the request's recordings in order.
+
+        Args:
+            key: Request key
+
+        Returns:
+            Dictionary with response, latency, ttft and chunks, or None if not recorded
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT latency, ttft, payload FROM recordings WHERE key = ? ORDER BY id", (key,)
+            ).fetchall()
+            if not rows:
+                return None
+            index = self._cursors.get(key, 0) % len(rows)
+            self._cursors[key] = index + 1
+
+        latency, ttft, blob = rows[index]
+        payload = json.loads(zlib.decompress(blob))
+        return {
+            "response": payload["response"],
+            "chunks": payload.get("chunks", []),
+            "latency": latency,
+            "ttft": ttft
+        }
+
+    def count(self) -> int:
+        """Get the number of recordings."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+    def rewind(self) -> None:
+        """Restart replay from the first recording of every request."""
+        with self._lock:
+            self._cursors.clear()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+
+class _Replayer:
+    """Mode and latency handling shared by the transport and the backend."""
+
+    def __init__(self, store: ReplayStore, mode: str, latency: Union[str, Callable[[float], float], None],
+                 latency_scale: float):
+        if mode not in MODES:
+            raise ValueError(f"Unknown record/replay mode: {mode}")
+        if isinstance(latency, str) and latency not in ("recorded", "none"):
+            raise ValueError(f"Unknown replay latency model: {latency}")
+        self.store = store
+        self.mode = mode
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        self._stats_lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        """Increment a statistics counter."""
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the recording to replay for a request, or None if it should go live."""
+        if self.mode == MODE_RECORD:
+            return None
+        recording = self.store.get(key)
+        if recording is not None:
+            self.count("replayed")
+            return recording
+        self.count("misses")
+        if self.mode == MODE_REPLAY:
+            raise ReplayMissError(f"No recording for request {key[:12]}")
+        return None
+
+    def delay(self, recording: Dict[str, Any]) -> float:
+        """Get the simulated latency for a replayed recording."""
+        recorded = recording.get("latency") or 0.0
+        if self.latency is None or self.latency == "none":
+            return 0.0
+        if self.latency == "recorded":
+            return recorded * self.latency_scale
+        return max(0.0, self.latency(recorded)) * self.latency_scale
+
+    def pace(self, recording: Dict[str, Any], chunks: List[List[Any]]) -> List[Tuple[float, Any]]:
+        """
+        Schedule the chunks of a replayed stream.
+
+        Recorded chunk offsets are stretched to the simulated latency, so the
+        time to first token and the gaps between chunks keep their proportions.
+
+        Args:
+            recording: Recording being replayed
+            chunks: [seconds since request, chunk] pairs
+
+        Returns:
+            (seconds to wait, chunk) pairs, ending with the wait for the full response and None
+        """
+        recorded = recording.get("latency") or 0.0
+        factor = self.delay(recording) / recorded if recorded else 0.0
+        schedule, previous = [], 0.0
+        for offset, chunk in chunks:
+            offset = min(offset, recorded)
+            schedule.append(((offset - previous) * factor, chunk))
+            previous = offset
+        schedule.append(((recorded - previous) * factor, None))
+        return schedule
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {"mode": self.mode, **self.stats, "recordings": self.store.count()}
+
+
+class _OfflineClient:
+    """Placeholder SDK client for replay-only transports."""
+
+    @property
+    def messages(self):
+        raise ReplayMissError("Replay transport has no live client; use mode 'record' or 'auto' with a client")
+
+
+class RecordReplayTransport(AnthropicTransport):
+    """
+    AnthropicTransport that records or replays Messages API calls.
+
+    Replayed calls still pass through rate limiting and usage accounting, so
+    throughput and cost measurements match live runs.
+    """
+
+    def __init__(
+        self,
+        store: ReplayStore,
+        mode: str = MODE_REPLAY,
+        api_key: Optional[str] = None,
+        client=None,
+        latency: Union[str, Callable[[float], float], None] = "recorded",
+        latency_scale: float = 1.0,
+        **kwargs
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            store: Recording store
+            mode: "record", "replay" or "auto"
+            api_key: Anthropic API key (not needed in replay mode)
+            client: Optional pre-configured anthropic.Anthropic client
+            latency: "recorded", "none" or a function (recorded latency) -> seconds
+            latency_scale: Multiplier applied to simulated latency
+            **kwargs: AnthropicTransport options
+        """
+        if client is None and mode == MODE_REPLAY:
+            client = _OfflineClient()
+        elif client is None and not api_key:
+            api_key = os.environ.get("ANTHROPIC_API_KEY")
+            if not api_key:
+                raise ValueError("Anthropic API key is required to record. Set the ANTHROPIC_API_KEY environment variable.")
+        super().__init__(api_key, client=client, **kwargs)
+        self.replayer = _Replayer(store, mode, latency, latency_scale)
+
+    def _create(self, model: str, request: Dict[str, Any]) -> Any:
+        key = request_key(self.provider, model, request)
+        recording = self.replayer.lookup(key)
+        if recording is not None:
+            time.sleep(self.replayer.delay(recording))
+            return recording["response"]
+
+        start_time = time.time()
+        response = super()._create(model, request)
+        self.replayer.store.put(key, self.provider, model, response, time.time() - start_time)
+        self.replayer.count("recorded")
+        return response
+
+    def _create_stream(self, model: str, request: Dict[str, Any]) -> Iterator[Any]:
+        key = request_key(self.provider, model, {**request, "stream": True})
+        recording = self.replayer.lookup(key)
+        if recording is not None:
+            for wait, event in self.replayer.pace(recording, recording["chunks"]):
+                time.sleep(wait)
+                if event is not None:
+                    yield event
+            return
+
+        # Only streams read to the end are recorded
+        start_time = time.time()
+        ttft = None
+        events = []
+        for event in super()._create_stream(model, request):
+            event = to_serializable(event)
+            offset = time.time() - start_time
+            if ttft is None and event.get("type") == "content_block_delta":
+                ttft = offset
+            events.append([offset, event])
+            yield event
+        self.replayer.store.put(key, self.provider, model, None, time.time() - start_time, ttft, events)
+        self.replayer.count("recorded")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get record/replay statistics.
+
+        Returns:
+            Dictionary with mode, recorded, replayed, misses and recordings counts
+        """
+        return self.replayer.get_stats()
+
+
+class RecordReplayBackend(ModelBackend):
+    """
+    VotModelControlProtocol backend that records or replays another backend.
+
+    Results carry ``usage_recorded`` so the protocol records replayed calls
+    in the usage ledger without double-counting live ones.
+    """
+
+    def __init__(
+        self,
+        store: ReplayStore,
+        backend: Optional[ModelBackend] = None,
+        mode: str = MODE_REPLAY,
+        latency: Union[str, Callable[[float], float], None] = "recorded",
+        latency_scale: float = 1.0,
+        provider: Optional[str] = None
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            store: Recording store
+            backend: Backend to record (not needed in replay mode)
+            mode: "record", "replay" or "auto"
+            latency: "recorded", "none" or a function (recorded latency) -> seconds
+            latency_scale: Multiplier applied to simulated latency
+            provider: Provider name used in request keys (defaults to the wrapped backend's)
+        """
+        if backend is None and mode != MODE_REPLAY:
+            raise ValueError(f"A backend to record is required in {mode} mode")
+        self.backend = backend
+        self.provider = provider or (backend.provider if backend else "replay")
+        self.replayer = _Replayer(store, mode, latency, latency_scale)
+
+    async def generate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        key = request_key(self.provider, request["model"], request)
+        recording = self.replayer.lookup(key)
+        if recording is not None:
+            delay = self.replayer.delay(recording)
+            if delay:
+                await asyncio.sleep(delay)
+            return {**recording["response"], "usage_recorded": False}
+
+        start_time = time.time()
+        result = await self.backend.generate(request)
+        self.replayer.store.put(key, self.provider, request["model"], result, time.time() - start_time)
+        self.replayer.count("recorded")
+        # Live calls are recorded by the wrapped backend (if it records usage), replayed calls by the protocol
+        return {**result, "usage_recorded": self.backend.records_usage}
+
+    async def stream(self, request: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        key = request_key(self.provider, request["model"], request)
+        recording = self.replayer.lookup(key)
+        if recording is not None:
+            response = recording["response"]
+            # Results recorded without streaming replay as one chunk per kind
+            chunks = recording["chunks"] or [
+                [recording.get("latency") or 0.0, {"type": kind, "text": response[kind]}]
+                for kind in ("thinking", "content") if response.get(kind)
+            ]
+            for wait, chunk in self.replayer.pace(recording, chunks):
+                if wait:
+                    await asyncio.sleep(wait)
+                if chunk is not None:
+                    yield chunk
+            yield {"type": "result", "result": {**response, "usage_recorded": False}}
+            return
+
+        start_time = time.time()
+        ttft = None
+        chunks = []
+        result = None
+        async for chunk in self.backend.stream(request):
+            if chunk["type"] == "result":
+                result = chunk["result"]
+                continue
+            offset = time.time() - start_time
+            if ttft is None:
+                ttft = offset
+            chunks.append([offset, chunk])
+            yield chunk
+        if result is None:
+            raise RuntimeError(f"{self.provider} stream ended without a result")
+
+        self.replayer.store.put(key, self.provider, request["model"], result, time.time() - start_time, ttft, chunks)
+        self.replayer.count("recorded")
+        yield {"type": "result", "result": {**result, "usage_recorded": self.backend.records_usage}}
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get record/replay statistics.
+
+        Returns:
+            Dictionary with mode, recorded, replayed, misses and recordings counts
+        """
+        return self.replayer.get_stats()
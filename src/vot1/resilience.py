@@ -0,0 +1,559 @@
+"""
+VOT1 Resilience Layer
+
+This module provides the retry, circuit breaker and hedging logic shared by all
+provider clients (Anthropic and Perplexity):
+
+1. Jittered exponential backoff that honours ``retry-after`` hints for
+   transient errors (429, 5xx, 529 overloaded, connection errors, timeouts)
+2. Circuit breakers per provider and model, so a hard outage fails fast
+   instead of every request waiting out its full timeout
+3. Request hedging for latency-critical calls: a duplicate request is fired
+   when the first one is slower than the observed p90 latency
+4. Failover to the next model in preference order (e.g. the secondary model)
+
+Circuit breakers are process-wide and shared by every client, while retry and
+hedging metrics are collected per ``ResilientCaller`` and surface in the
+clients' usage stats.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+    "OverloadedError",
+    "ServiceUnavailableError",
+    "ClientConnectionError",
+    "ServerDisconnectedError",
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when every candidate is rejected by an open circuit breaker."""
+
+
+def get_status_code(error: BaseException) -> Optional[int]:
+    """Extract an HTTP status code from a provider exception, if any."""
+    for attr in ("status_code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Decide whether an error is transient and worth retrying.
+
+    Args:
+        error: Exception raised by a provider call
+
+    Returns:
+        True for rate limits, overload, server errors, timeouts and connection errors
+    """
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+
+    status = get_status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """
+    Extract a ``retry-after`` hint (in seconds) from a provider exception.
+
+    Args:
+        error: Exception raised by a provider call
+
+    Returns:
+        Seconds to wait, or None if the provider gave no hint
+    """
+    value = getattr(error, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or getattr(error, "headers", None)
+        if headers is not None:
+            try:
+                value = headers.get("retry-after-ms")
+                if value is not None:
+                    return max(0.0, float(value) / 1000)
+                value = headers.get("retry-after")
+            except Exception:
+                value = None
+
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        max_retry_after: float = 60.0
+    ):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_retries: Maximum retries per candidate after the first attempt
+            base_delay: Delay scale for the first retry in seconds
+            max_delay: Upper bound for computed backoff delays in seconds
+            max_retry_after: Upper bound for honoured retry-after hints in seconds
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Compute the delay before a retry.
+
+        Args:
+            attempt: Zero-based retry number
+            retry_after: Optional provider hint in seconds
+
+        Returns:
+            Delay in seconds
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with closed, open and half-open states.
+
+    The breaker opens after ``failure_threshold`` consecutive failures, rejects
+    calls for ``recovery_timeout`` seconds, then lets a limited number of probe
+    calls through (half-open) before closing again on success.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            name: Name used in logs and stats
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds to stay open before probing
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Check whether a call may proceed."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.half_open_calls = 0
+                logger.info(f"Circuit {self.name} half-open, probing")
+
+            if self.state == self.HALF_OPEN:
+                if self.half_open_calls >= self.half_open_max_calls:
+                    return False
+                self.half_open_calls += 1
+
+            return True
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.half_open_calls = 0
+
+    def record_failure(self) -> None:
+        """Record a failed call."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit {self.name} opened after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the breaker state."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str, model: Optional[str] = None, **kwargs) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker for a provider (and optionally a model).
+
+    Args:
+        provider: Provider name (e.g. "anthropic", "perplexity")
+        model: Optional model name for a model-scoped breaker
+        **kwargs: CircuitBreaker settings used when the breaker is first created
+
+    Returns:
+        The shared CircuitBreaker instance
+    """
+    name = f"{provider}/{model}" if model else provider
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **kwargs)
+            _breakers[name] = breaker
+        return breaker
+
+
+def reset_circuit_breakers() -> None:
+    """Forget all process-wide circuit breakers."""
+    with _breakers_lock:
+        _breakers.clear()
+
+
+class ResilientCaller:
+    """
+    Executes provider calls with retries, circuit breaking, hedging and failover.
+
+    Calls are given as a list of ``(model, fn)`` candidates in preference order.
+    Each candidate is retried according to the retry policy; when it is exhausted
+    (or its circuit is open) the next candidate is tried.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge_delay: float = 2.0,
+        breaker_settings: Optional[Dict[str, Any]] = None,
+        max_hedge_workers: int = 8
+    ):
+        """
+        Initialize the resilient caller.
+
+        Args:
+            provider: Provider name used for circuit breakers and stats
+            retry_policy: Retry policy (defaults to RetryPolicy())
+            hedge_delay: Hedge delay in seconds until enough latency samples exist
+            breaker_settings: Optional CircuitBreaker settings
+            max_hedge_workers: Thread pool size used for hedged sync calls
+        """
+        self.provider = provider
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedge_delay = hedge_delay
+        self.breaker_settings = breaker_settings or {}
+        self.max_hedge_workers = max_hedge_workers
+
+        self._executor = None
+        self._latencies = {}
+        self._models = set()
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "attempts": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "backoff_time": 0.0,
+            "failovers": 0,
+            "circuit_rejections": 0,
+            "hedges_fired": 0,
+            "hedge_wins": 0
+        }
+
+    def _breaker(self, model: Optional[str]) -> CircuitBreaker:
+        return get_circuit_breaker(self.provider, model, **self.breaker_settings)
+
+    def _count(self, key: str, value: float = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    def _record_latency(self, model: Optional[str], latency: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=100)).append(latency)
+
+    def get_hedge_delay(self, model: Optional[str]) -> float:
+        """Hedge delay for a model: observed p90 latency, or the configured default."""
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < 10:
+            return self.hedge_delay
+        return samples[int(len(samples) * 0.9)]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_hedge_workers,
+                    thread_name_prefix=f"{self.provider}-hedge"
+                )
+            return self._executor
+
+    def call(self, fn: Callable[[], Any], model: Optional[str] = None, hedge: bool = False) -> Any:
+        """
+        Execute a single call with retries and circuit breaking.
+
+        Args:
+            fn: Zero-argument callable performing the request
+            model: Optional model name for the breaker scope
+            hedge: Whether to hedge the call
+
+        Returns:
+            The call's result
+        """
+        return self.execute([(model, fn)], hedge=hedge)[1]
+
+    def execute(self, candidates: List[Tuple[Optional[str], Callable[[], Any]]], hedge: bool = False) -> Tuple[Optional[str], Any]:
+        """
+        Execute a call with retries, circuit breaking, hedging and failover.
+
+        Args:
+            candidates: ``(model, fn)`` pairs in preference order
+            hedge: Whether to hedge each attempt
+
+        Returns:
+            Tuple of (model that served the request, result)
+        """
+        self._count("calls")
+        last_error = None
+
+        for index, (model, fn) in enumerate(candidates):
+            if index > 0:
+                self._count("failovers")
+                logger.warning(f"Failing over {self.provider} request to {model}")
+
+            breaker = self._breaker(model)
+            self._models.add(model)
+            for attempt in range(self.retry_policy.max_retries + 1):
+                if not breaker.allow_request():
+                    self._count("circuit_rejections")
+                    last_error = last_error or CircuitOpenError(f"Circuit open for {breaker.name}")
+                    break
+
+                self._count("attempts")
+                start = time.time()
+                try:
+                    result = self._hedged(fn, model) if hedge else fn()
+                except Exception as e:
+                    last_error = e
+                    if not is_retryable(e):
+                        # The provider answered, so this does not count against the circuit
+                        breaker.record_success()
+                        break
+                    breaker.record_failure()
+                    if attempt < self.retry_policy.max_retries:
+                        delay = self.retry_policy.compute_delay(attempt, get_retry_after(e))
+                        logger.warning(
+                            f"{self.provider} call to {model} failed ({e}); retry {attempt + 1} in {delay:.2f}s"
+                        )
+                        self._count("retries")
+                        self._count("backoff_time", delay)
+                        time.sleep(delay)
+                    continue
+
+                breaker.record_success()
+                self._record_latency(model, time.time() - start)
+                self._count("successes")
+                return model, result
+
+        self._count("failures")
+        raise last_error or CircuitOpenError(f"No candidates available for {self.provider}")
+
+    def _hedged(self, fn: Callable[[], Any], model: Optional[str]) -> Any:
+        """Run fn, firing a duplicate if the first call exceeds the hedge delay."""
+        executor = self._get_executor()
+        primary = executor.submit(fn)
+        done, _ = wait([primary], timeout=self.get_hedge_delay(model))
+        if done:
+            return primary.result()
+
+        self._count("hedges_fired")
+        backup = executor.submit(fn)
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def call_async(self, fn: Callable[[], Any], model: Optional[str] = None, hedge: bool = False) -> Any:
+        """
+        Execute a single async call with retries and circuit breaking.
+
+        Args:
+            fn: Zero-argument callable returning an awaitable
+            model: Optional model name for the breaker scope
+            hedge: Whether to hedge the call
+
+        Returns:
+            The call's result
+        """
+        return (await self.execute_async([(model, fn)], hedge=hedge))[1]
+
+    async def execute_async(self, candidates: List[Tuple[Optional[str], Callable[[], Any]]], hedge: bool = False) -> Tuple[Optional[str], Any]:
+        """
+        Async variant of ``execute``; ``fn`` returns an awaitable.
+
+        Args:
+            candidates: ``(model, fn)`` pairs in preference order
+            hedge: Whether to hedge each attempt
+
+        Returns:
+            Tuple of (model that served the request, result)
+        """
+        self._count("calls")
+        last_error = None
+
+        for index, (model, fn) in enumerate(candidates):
+            if index > 0:
+                self._count("failovers")
+                logger.warning(f"Failing over {self.provider} request to {model}")
+
+            breaker = self._breaker(model)
+            self._models.add(model)
+            for attempt in range(self.retry_policy.max_retries + 1):
+                if not breaker.allow_request():
+                    self._count("circuit_rejections")
+                    last_error = last_error or CircuitOpenError(f"Circuit open for {breaker.name}")
+                    break
+
+                self._count("attempts")
+                start = time.time()
+                try:
+                    result = await (self._hedged_async(fn, model) if hedge else fn())
+                except Exception as e:
+                    last_error = e
+                    if not is_retryable(e):
+                        # The provider answered, so this does not count against the circuit
+                        breaker.record_success()
+                        break
+                    breaker.record_failure()
+                    if attempt < self.retry_policy.max_retries:
+                        delay = self.retry_policy.compute_delay(attempt, get_retry_after(e))
+                        logger.warning(
+                            f"{self.provider} call to {model} failed ({e}); retry {attempt + 1} in {delay:.2f}s"
+                        )
+                        self._count("retries")
+                        self._count("backoff_time", delay)
+                        await asyncio.sleep(delay)
+                    continue
+
+                breaker.record_success()
+                self._record_latency(model, time.time() - start)
+                self._count("successes")
+                return model, result
+
+        self._count("failures")
+        raise last_error or CircuitOpenError(f"No candidates available for {self.provider}")
+
+    async def _hedged_async(self, fn: Callable[[], Any], model: Optional[str]) -> Any:
+        """Async hedging: the losing request is cancelled."""
+        primary = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({primary}, timeout=self.get_hedge_delay(model))
+        if done:
+            return primary.result()
+
+        self._count("hedges_fired")
+        backup = asyncio.ensure_future(fn())
+        pending = {primary, backup}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get retry, failover and hedging metrics plus circuit breaker states.
+
+        Returns:
+            Dictionary of resilience metrics
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            models = list(self._models)
+        stats["backoff_time"] = round(stats["backoff_time"], 3)
+        stats["circuits"] = {
+            self._breaker(model).name: self._breaker(model).get_stats() for model in models
+        }
+        return stats
@@ -41,6 +41,7 @@ logger = logging.getLogger(__name__)
 # Import VOT1 modules
 try:
     from vot1.vot_mcp import VotModelControlProtocol
+    from vot1.tool_executor import file_mtimes
     from vot1.memory import MemoryManager, VectorStore
     from vot1.owl_reasoning import OWLReasoningEngine
     from vot1.perplexity_client import PerplexityClient
@@ -226,10 +227,14 @@ class SelfImprovementWorkflow:
     
     def _register_tool_handlers(self):
         """Register handlers for MCP tools."""
-        self.mcp.register_tool("search_codebase", self._handle_search_codebase)
-        self.mcp.register_tool("analyze_code", self._handle_analyze_code)
-        self.mcp.register_tool("modify_code", self._handle_modify_code)
-        self.mcp.register_tool("commit_changes", self._handle_commit_changes)
+        # Searches can be slow on large trees; file edits and commits must not overlap.
+        # Read-only tools are cached until the files they read change (modify_code drops search results).
+        self.mcp.register_tool("search_codebase", self._handle_search_codebase, timeout=30.0, max_concurrency=4,
+                               cacheable=True, cache_ttl=300.0)
+        self.mcp.register_tool("analyze_code", self._handle_analyze_code, timeout=10.0,
+                               invalidation_key=file_mtimes("file_path", root=str(self.workspace_dir)))
+        self.mcp.register_tool("modify_code", self._handle_modify_code, timeout=30.0, max_concurrency=1)
+        self.mcp.register_tool("commit_changes", self._handle_commit_changes, timeout=120.0, max_concurrency=1)
     
     def _handle_search_codebase(self, query: str, file_types: List[str]) -> Dict[str, Any]:
         """
@@ -250,7 +255,7 @@ class SelfImprovementWorkflow:
         
         try:
             cmd = f'grep -r {extensions} -n "{query}" {self.workspace_dir}'
-            output = subprocess.check_output(cmd, shell=True, text=True)
+            output = subprocess.check_output(cmd, shell=True, text=True, timeout=30)
             
             for line in output.strip().split('\n'):
                 if line:
@@ -273,6 +278,13 @@ class SelfImprovementWorkflow:
                 "count": 0,
                 "error": "No matches found or search error"
             }
+        except subprocess.TimeoutExpired:
+            return {
+                "success": False,
+                "results": [],
+                "count": 0,
+                "error": "Search timed out"
+            }
     
     def _handle_analyze_code(self, file_path: str, start_line: int, end_line: int) -> Dict[str, Any]:
         """
@@ -373,6 +385,7 @@ class SelfImprovementWorkflow:
             
             with open(full_path, 'w') as f:
                 f.writelines(new_lines)
+            self.mcp.tool_executor.invalidate("search_codebase", handler=self._handle_search_codebase)
             
             logger.info(f"Modified code in {file_path} from line {start_line} to {end_line}")
             
@@ -674,21 +687,22 @@ class SelfImprovementWorkflow:
         results = {}
         
         try:
-            # Step 1: Integrate OWL reasoning
-            logger.info("Step 1: Integrating OWL reasoning")
-            results["owl_integration"] = await self.integrate_owl_reasoning()
-            
-            # Step 2: Enhance memory system
-            logger.info("Step 2: Enhancing memory system")
-            results["memory_enhancement"] = await self.enhance_memory_system()
-            
-            # Step 3: Improve THREE.js visualization
-            logger.info("Step 3: Improving THREE.js visualization")
-            results["three_js_improvement"] = await self.improve_three_js_visualization()
-            
-            # Step 4: Create self-improvement agent
-            logger.info("Step 4: Creating self-improvement agent")
-            results["self_improvement_agent"] = await self.create_self_improvement_agent()
+            # Steps 1-4 are independent, so their model requests run concurrently
+            logger.info("Steps 1-4: Integrating OWL reasoning, enhancing memory system, "
+                        "improving THREE.js visualization and creating self-improvement agent")
+            steps = {
+                "owl_integration": self.integrate_owl_reasoning(),
+                "memory_enhancement": self.enhance_memory_system(),
+                "three_js_improvement": self.improve_three_js_visualization(),
+                "self_improvement_agent": self.create_self_improvement_agent()
+            }
+            outcomes = await asyncio.gather(*steps.values(), return_exceptions=True)
+            errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+            results.update(
+                (name, outcome) for name, outcome in zip(steps, outcomes) if not isinstance(outcome, Exception)
+            )
+            if errors:
+                raise errors[0]
             
             # Step 5: Commit changes to GitHub if enabled
             if self.github_enabled:
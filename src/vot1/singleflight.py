@@ -0,0 +1,181 @@
+"""
+VOT1 Single Flight
+
+This module implements request coalescing ("singleflight"): while a call for a
+key is in flight, identical calls for the same key wait for it and receive its
+result (or exception) instead of issuing their own. Nothing is cached once the
+call completes, so later requests always get a fresh result.
+
+Both thread-based (``do``) and asyncio (``do_async``) callers are supported.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import weakref
+from typing import Dict, Any, Callable, Awaitable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Build a stable request key from JSON-serializable parts.
+
+    Args:
+        *parts: Request components (prompt, model, parameters, context, ...)
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8", errors="replace")).hexdigest()
+
+
+class _Call:
+    """An in-flight call shared by the leader and its waiters."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one execution.
+    """
+
+    def __init__(self):
+        """Initialize the single-flight group."""
+        self._calls = {}
+        self._lock = threading.Lock()
+        # In-flight tasks per event loop (tasks cannot be awaited across loops)
+        self._tasks = weakref.WeakKeyDictionary()
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn`` once per key among concurrent callers.
+
+        Args:
+            key: Request key
+            fn: Function performing the request
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            logger.debug(f"Coalescing request {key[:12]} with an in-flight call")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await ``fn()`` once per key among concurrent coroutines.
+
+        The shared call runs as its own task, so cancelling one caller (even
+        the first) does not cancel the call for the others.
+
+        Args:
+            key: Request key
+            fn: Coroutine function performing the request
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.stats["calls"] += 1
+            tasks = self._tasks.setdefault(loop, {})
+            task = tasks.get(key)
+            if task is not None:
+                self.stats["coalesced"] += 1
+            else:
+                task = tasks[key] = loop.create_task(fn())
+                self.stats["executions"] += 1
+                task.add_done_callback(lambda _: self._forget(loop, key, task))
+
+        return await asyncio.shield(task)
+
+    def _forget(self, loop, key: str, task) -> None:
+        """Remove a finished task from the in-flight table."""
+        with self._lock:
+            tasks = self._tasks.get(loop)
+            if tasks is not None and tasks.get(key) is task:
+                del tasks[key]
+        # Retrieve the exception so unobserved failures are not logged as never retrieved
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        """Get the number of calls currently in flight."""
+        with self._lock:
+            return len(self._calls) + sum(len(tasks) for tasks in self._tasks.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics.
+
+        Returns:
+            Dictionary with calls, executions and coalesced counts
+        """
+        with self._lock:
+            return dict(self.stats)
+
+
+_default_group = None
+_default_group_lock = threading.Lock()
+
+
+def get_singleflight() -> SingleFlight:
+    """
+    Get the process-wide single-flight group.
+
+    Sharing one group lets separate client instances (e.g. swarm agents)
+    coalesce identical requests with each other.
+
+    Returns:
+        The shared SingleFlight instance
+    """
+    global _default_group
+    with _default_group_lock:
+        if _default_group is None:
+            _default_group = SingleFlight()
+        return _default_group
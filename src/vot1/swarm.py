@@ -9,19 +9,167 @@ The system uses a combination of:
 2. Orchestration - a coordinator agent assigns tasks and consolidates results
 3. Iterative refinement - solutions are improved through multiple rounds of feedback
 4. Emergent intelligence - the system as a whole exhibits capabilities beyond individual agents
+
+The coordinator decomposes a task into structured JSON subtasks (validated
+against SUBTASK_SCHEMA) with dependency edges; duplicate subtasks are merged
+and each one is routed to the agent whose specialization matches it best, so
+a run's token spend scales with the real work rather than agents x task.
+
+Runs are async-native: subtasks are scheduled as a dependency graph, agent
+results stream to the integrator as they complete, and integration can start
+speculatively before the slowest agents finish, so a run's latency follows
+its critical path rather than the sum of its stages.
+
+Refinement stops early once the solution converges (consecutive versions
+are nearly identical) or an optional quality judge scores it high enough;
+only the first refinement sees summaries of the agent results, later ones
+see the diff of the previous round.
+
+With a SwarmRunStore, every completed step of a run is persisted: a run
+that fails midway resumes from its last completed step (``resume_run``),
+and subtasks identical to ones already answered in the run (or, if enabled,
+in earlier runs) are served from the store. Failed generations are treated
+as errors and never persisted.
+
+Agents can also do local CPU-bound work (a picklable ``handler``) instead
+of calling a model; with a WorkStealingExecutor those handlers run across
+worker processes rather than being serialized by the GIL.
 """
 
+import asyncio
+import difflib
+import inspect
+import json
 import logging
+import math
+import re
 import threading
 import uuid
 import time
-from typing import Dict, List, Optional, Any, Union, Callable
+from typing import Dict, List, Optional, Any, Union, Callable, AsyncIterator, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
+from vot1.pipeline import is_generation_error, save_memories
+from vot1.singleflight import make_key
+from vot1.swarm_store import (
+    EVENT_COMPLETE, EVENT_DECOMPOSITION, EVENT_INTEGRATION, EVENT_REFINEMENT, EVENT_START, EVENT_SUBTASK
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Structure of the coordinator's task decomposition
+SUBTASK_SCHEMA = {
+    "type": "object",
+    "required": ["subtasks"],
+    "properties": {
+        "subtasks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["id", "description", "specialization"],
+                "properties": {
+                    "id": {"type": "string"},
+                    "description": {"type": "string"},
+                    "specialization": {"type": "string"},
+                    "depends_on": {"type": "array", "items": {"type": "string"}}
+                }
+            }
+        },
+        "integration": {"type": "string"}
+    }
+}
+
+
+def extract_json(text: str) -> Any:
+    """
+    Parse the JSON object in a model response.
+
+    Accepts bare JSON, fenced code blocks and JSON surrounded by prose.
+
+    Args:
+        text: Model response
+
+    Returns:
+        Parsed JSON value
+
+    Raises:
+        ValueError: If the response contains no valid JSON object
+    """
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("No JSON object in response")
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+
+
+def validate_schema(value: Any, schema: Dict[str, Any], path: str = "$") -> None:
+    """
+    Validate a JSON value against a schema (the type/required/properties/items subset of JSON Schema).
+
+    Args:
+        value: Value to validate
+        schema: Schema dictionary
+        path: Location of the value, used in error messages
+
+    Raises:
+        ValueError: If the value does not match the schema
+    """
+    types = {"object": dict, "array": list, "string": str, "number": (int, float), "integer": int, "boolean": bool}
+    expected = schema.get("type")
+    if expected and not isinstance(value, types[expected]):
+        raise ValueError(f"{path} must be of type {expected}")
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                raise ValueError(f"{path} is missing required key '{key}'")
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                validate_schema(value[key], subschema, f"{path}.{key}")
+    elif isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            validate_schema(item, schema["items"], f"{path}[{index}]")
+
+
+def text_similarity(first: str, second: str) -> float:
+    """
+    Word-level similarity of two texts (1.0 for identical texts).
+    
+    Args:
+        first: First text
+        second: Second text
+        
+    Returns:
+        The similarity ratio between 0.0 and 1.0
+    """
+    return difflib.SequenceMatcher(None, first.split(), second.split(), autojunk=False).ratio()
+
+
+def _join_chunks(response: Any) -> Any:
+    """Join the text chunks of a streaming (generator) handler's response."""
+    if inspect.isgenerator(response) or isinstance(response, (list, tuple)):
+        return "".join(str(chunk) for chunk in response)
+    return response
+
+
+def _check_generation(response: Any) -> Any:
+    """Raise if a client returned the placeholder of a failed generation instead of a response."""
+    if is_generation_error(response):
+        raise RuntimeError(response)
+    return response
+
+
+def _words(text: str) -> set:
+    """Get the lowercase words of a text."""
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
 class SwarmAgent:
     """
     Individual agent in the swarm with specialized capabilities.
@@ -35,7 +183,9 @@ class SwarmAgent:
                  system_prompt: str,
                  model_name: str = "claude-3-7-sonnet", 
                  temperature: float = 0.5,
-                 client=None):
+                 client=None,
+                 handler: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+                 executor=None):
         """
         Initialize a swarm agent with specific capabilities.
         
@@ -46,7 +196,15 @@ class SwarmAgent:
             system_prompt: Custom system prompt defining the agent's behavior
             model_name: LLM model to use
             temperature: Temperature setting for generation
-            client: Optional pre-configured client instance
+            client: Optional pre-configured client instance (defaults to the
+                pooled client for the model; system prompt and temperature are
+                sent with each request)
+            handler: Optional function (prompt, context) -> response doing the
+                agent's work locally instead of calling a model, e.g. code
+                analysis or reasoning; generator handlers stream text chunks
+            executor: Optional WorkStealingExecutor running the handler in
+                worker processes (it runs in a thread otherwise); the handler
+                must then be picklable
         """
         self.agent_id = agent_id
         self.name = name
@@ -55,23 +213,16 @@ class SwarmAgent:
         self.model_name = model_name
         self.temperature = temperature
         self._client = client
+        self.handler = handler
+        self.executor = executor
         self.active = True
         self.task_history = []
-        
-        # Lazily load the client when needed
-        if self._client is None:
-            self._load_client()
     
     def _load_client(self):
-        """Initialize the Claude client."""
+        """Get the pooled client for the agent's model (loaded when the first task arrives)."""
         try:
-            from vot1.client import EnhancedClaudeClient
-            self._client = EnhancedClaudeClient(
-                model=self.model_name,
-                temperature=self.temperature,
-                system=self.system_prompt
-            )
-            logger.info(f"Agent {self.name} initialized with {self.model_name}")
+            self._client = get_swarm_client(self.model_name)
+            logger.debug(f"Agent {self.name} using pooled {self.model_name} client")
         except ImportError as e:
             logger.error(f"Failed to load EnhancedClaudeClient: {e}")
             raise
@@ -87,71 +238,127 @@ class SwarmAgent:
             Dictionary with task results and metadata
         """
         if not self.active:
-            logger.warning(f"Agent {self.name} is inactive but received a task")
-            return {
-                "agent_id": self.agent_id,
-                "name": self.name,
-                "status": "inactive",
-                "result": None,
-                "error": "Agent is inactive"
-            }
+            return self._inactive_result()
+        
+        if not self._client and self.handler is None:
+            self._load_client()
+        
+        task_id, prompt, enhanced_prompt, context = self._prepare_task(task)
+        try:
+            if self.handler is not None:
+                if self.executor is not None:
+                    response = self.executor.submit(self.handler, prompt, context, affinity=self.agent_id).result()
+                else:
+                    response = self.handler(prompt, context)
+                response = _join_chunks(response)
+            else:
+                # Generate response using the enhanced client
+                response = _check_generation(self._client.generate(
+                    enhanced_prompt, system=self.system_prompt, temperature=self.temperature, context=context
+                ))
+            return self._completed_result(task_id, prompt, response)
+        except Exception as e:
+            return self._error_result(task_id, e)
+    
+    async def process_task_async(self, task: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Process a task assigned to this agent without blocking the event loop.
+        
+        Args:
+            task: Dictionary containing task details
+            timeout: Optional timeout in seconds
+            
+        Returns:
+            Dictionary with task results and metadata ("timeout" status if it timed out)
+        """
+        if not self.active:
+            return self._inactive_result()
         
-        if not self._client:
+        if not self._client and self.handler is None:
             self._load_client()
         
+        task_id, prompt, enhanced_prompt, context = self._prepare_task(task)
+        try:
+            if self.handler is not None:
+                if self.executor is not None:
+                    work = self.executor.submit_async(self.handler, prompt, context, affinity=self.agent_id)
+                else:
+                    work = asyncio.to_thread(lambda: _join_chunks(self.handler(prompt, context)))
+                response = _join_chunks(await asyncio.wait_for(work, timeout))
+            else:
+                response = _check_generation(await asyncio.wait_for(
+                    self._client.generate_async(
+                        enhanced_prompt, system=self.system_prompt, temperature=self.temperature, context=context
+                    ),
+                    timeout
+                ))
+            return self._completed_result(task_id, prompt, response)
+        except asyncio.TimeoutError:
+            logger.warning(f"Agent {self.name} timed out on task {task_id} after {timeout}s")
+            return {**self._error_result(task_id, f"Timed out after {timeout}s"), "status": "timeout"}
+        except Exception as e:
+            return self._error_result(task_id, e)
+    
+    def _prepare_task(self, task: Dict[str, Any]) -> Tuple[str, str, str, Dict[str, Any]]:
+        """Get the task id, prompt, specialized prompt and context of a task."""
         task_id = task.get("task_id", str(uuid.uuid4()))
         prompt = task.get("prompt", "")
         context = task.get("context", {})
         
         logger.info(f"Agent {self.name} processing task {task_id}")
         
-        try:
-            # Add agent specialization context to the prompt
-            enhanced_prompt = f"As a specialist in {self.specialization}, {prompt}"
-            
-            # Generate response using the enhanced client
-            response = self._client.generate(
-                enhanced_prompt,
-                context=context
-            )
-            
-            result = {
-                "agent_id": self.agent_id,
-                "name": self.name,
-                "task_id": task_id,
-                "specialization": self.specialization,
-                "status": "completed",
-                "result": response,
-                "timestamp": time.time()
-            }
-            
-            # Add to task history
-            self.task_history.append({
-                "task_id": task_id,
-                "prompt": prompt,
-                "result": result,
-                "timestamp": time.time()
-            })
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error in agent {self.name} processing task {task_id}: {e}")
-            return {
-                "agent_id": self.agent_id,
-                "name": self.name,
-                "task_id": task_id,
-                "status": "error",
-                "error": str(e),
-                "timestamp": time.time()
-            }
+        # Add agent specialization context to the prompt
+        return task_id, prompt, f"As a specialist in {self.specialization}, {prompt}", context
+    
+    def _completed_result(self, task_id: str, prompt: str, response: str) -> Dict[str, Any]:
+        """Build the result of a completed task and add it to the task history."""
+        result = {
+            "agent_id": self.agent_id,
+            "name": self.name,
+            "task_id": task_id,
+            "specialization": self.specialization,
+            "status": "completed",
+            "result": response,
+            "timestamp": time.time()
+        }
+        
+        # Add to task history
+        self.task_history.append({
+            "task_id": task_id,
+            "prompt": prompt,
+            "result": result,
+            "timestamp": time.time()
+        })
+        
+        return result
+    
+    def _error_result(self, task_id: str, error: Union[str, Exception]) -> Dict[str, Any]:
+        """Build the result of a failed task."""
+        logger.error(f"Error in agent {self.name} processing task {task_id}: {error}")
+        return {
+            "agent_id": self.agent_id,
+            "name": self.name,
+            "task_id": task_id,
+            "specialization": self.specialization,
+            "status": "error",
+            "error": str(error),
+            "timestamp": time.time()
+        }
+    
+    def _inactive_result(self) -> Dict[str, Any]:
+        """Build the result of a task sent to an inactive agent."""
+        logger.warning(f"Agent {self.name} is inactive but received a task")
+        return {
+            "agent_id": self.agent_id,
+            "name": self.name,
+            "status": "inactive",
+            "result": None,
+            "error": "Agent is inactive"
+        }
     
     def update_system_prompt(self, new_prompt: str) -> None:
-        """Update the agent's system prompt."""
+        """Update the agent's system prompt (used from the next request on)."""
         self.system_prompt = new_prompt
-        # Recreate client with new settings if it exists
-        if self._client:
-            self._load_client()
 
 
 class SwarmOrchestrator:
@@ -161,6 +368,22 @@ class SwarmOrchestrator:
     collaborative problem-solving.
     """
     
+    # Upper bound on the subtasks accepted from one decomposition
+    MAX_SUBTASKS = 12
+    
+    COORDINATOR_PROMPT = """
+    You are a Swarm Coordinator that orchestrates multiple AI agents to solve complex problems.
+    Your responsibilities include:
+    1. Breaking down complex tasks into subtasks appropriate for specialized agents
+    2. Assigning tasks to the most suitable agents based on their specialization
+    3. Consolidating and synthesizing results from multiple agents
+    4. Identifying conflicts, gaps, or inconsistencies in agent outputs
+    5. Producing a cohesive final solution that leverages the strengths of all agents
+    
+    Always maintain a meta-perspective on the problem-solving process, focusing on how
+    different viewpoints and approaches can be combined to create superior solutions.
+    """
+    
     DEFAULT_AGENT_TEMPLATES = {
         "creative": {
             "name": "Creative Explorer",
@@ -195,7 +418,16 @@ class SwarmOrchestrator:
                  custom_agents: Optional[List[Dict[str, Any]]] = None,
                  feedback_loops: int = 2,
                  coordinator_model: str = "claude-3-7-sonnet",
-                 memory_manager=None):
+                 memory_manager=None,
+                 coordinator=None,
+                 client=None,
+                 convergence_threshold: float = 0.95,
+                 similarity: Optional[Callable[[str, str], float]] = None,
+                 quality_judge: Optional[Callable[[str, str], Any]] = None,
+                 quality_threshold: float = 0.9,
+                 store=None,
+                 reuse_subtask_results: bool = False,
+                 executor=None):
         """
         Initialize the swarm orchestrator.
         
@@ -206,8 +438,34 @@ class SwarmOrchestrator:
             feedback_loops: Number of refinement iterations
             coordinator_model: Model to use for the coordinator
             memory_manager: Optional memory manager for storing results
+            coordinator: Optional pre-configured coordinator client
+            client: Optional client shared by the agents and the coordinator
+                (defaults to the pooled client of each model)
+            convergence_threshold: Similarity between consecutive solutions at
+                which refinement stops
+            similarity: Optional similarity function of two solutions, e.g. an
+                embedding cosine (defaults to text_similarity)
+            quality_judge: Optional function scoring (task, solution) between
+                0.0 and 1.0, sync or async
+            quality_threshold: Judge score at which refinement stops
+            store: Optional SwarmRunStore persisting runs for resumption
+            reuse_subtask_results: Also serve subtasks identical to ones answered
+                in earlier stored runs from the store (within a run they are
+                always reused)
+            executor: Optional WorkStealingExecutor running the handlers of
+                local agents (custom agents configured with a "handler") in
+                worker processes
         """
         self.feedback_loops = feedback_loops
+        self.convergence_threshold = convergence_threshold
+        self.similarity = similarity or text_similarity
+        self.quality_judge = quality_judge
+        self.quality_threshold = quality_threshold
+        self.store = store
+        self._memory_writer = None
+        self._memory_writes = []
+        self._memory_lock = threading.Lock()
+        self.reuse_subtask_results = reuse_subtask_results
         self.memory_manager = memory_manager
         
         # Initialize agents
@@ -215,164 +473,595 @@ class SwarmOrchestrator:
         
         if custom_agents:
             # Use custom agent configurations
-            for agent_config in custom_agents:
-                agent_id = agent_config.get("agent_id", str(uuid.uuid4()))
+            for index, agent_config in enumerate(custom_agents):
+                agent_id = agent_config.get("agent_id", f"agent-{index}")
                 agent = SwarmAgent(
                     agent_id=agent_id,
                     name=agent_config.get("name", f"Agent-{agent_id}"),
                     specialization=agent_config.get("specialization", "general"),
                     system_prompt=agent_config.get("system_prompt", ""),
                     model_name=agent_config.get("model_name", "claude-3-7-sonnet"),
-                    temperature=agent_config.get("temperature", 0.7)
+                    temperature=agent_config.get("temperature", 0.7),
+                    client=agent_config.get("client", client),
+                    handler=agent_config.get("handler"),
+                    executor=agent_config.get("executor", executor)
                 )
                 self.agents.append(agent)
         else:
             # Use template-based agents
             agent_types = agent_types or list(self.DEFAULT_AGENT_TEMPLATES.keys())[:num_agents]
             
-            for agent_type in agent_types[:num_agents]:
+            for index, agent_type in enumerate(agent_types[:num_agents]):
                 if agent_type in self.DEFAULT_AGENT_TEMPLATES:
                     template = self.DEFAULT_AGENT_TEMPLATES[agent_type]
-                    agent_id = str(uuid.uuid4())
+                    # Stable ids, so a run stored by one orchestrator can be resumed by another
+                    agent_id = f"{agent_type}-{index}"
                     agent = SwarmAgent(
                         agent_id=agent_id,
                         name=template["name"],
                         specialization=template["specialization"],
                         system_prompt=template["system_prompt"],
-                        model_name=coordinator_model
+                        model_name=coordinator_model,
+                        client=client
                     )
                     self.agents.append(agent)
         
         # Initialize coordinator
-        self.coordinator = self._create_coordinator(coordinator_model)
+        self.coordinator_model = coordinator_model
+        self._coordinator = coordinator or client
         
         logger.info(f"Swarm initialized with {len(self.agents)} agents and {feedback_loops} feedback loops")
     
+    @property
+    def coordinator(self):
+        """The coordinator client (the pooled client of the coordinator model unless configured)."""
+        if self._coordinator is None:
+            self._coordinator = self._create_coordinator(self.coordinator_model)
+        return self._coordinator
+    
     def _create_coordinator(self, model_name: str):
-        """Create the coordinator agent."""
+        """Get the coordinator's client."""
         try:
-            from vot1.client import EnhancedClaudeClient
-            
-            coordinator_prompt = """
-            You are a Swarm Coordinator that orchestrates multiple AI agents to solve complex problems.
-            Your responsibilities include:
-            1. Breaking down complex tasks into subtasks appropriate for specialized agents
-            2. Assigning tasks to the most suitable agents based on their specialization
-            3. Consolidating and synthesizing results from multiple agents
-            4. Identifying conflicts, gaps, or inconsistencies in agent outputs
-            5. Producing a cohesive final solution that leverages the strengths of all agents
-            
-            Always maintain a meta-perspective on the problem-solving process, focusing on how
-            different viewpoints and approaches can be combined to create superior solutions.
-            """
-            
-            coordinator = EnhancedClaudeClient(
-                model=model_name, 
-                system=coordinator_prompt,
-                temperature=0.3  # Lower temperature for more consistent coordination
-            )
-            
-            return coordinator
-            
+            return get_swarm_client(model_name)
         except ImportError as e:
             logger.error(f"Failed to load EnhancedClaudeClient for coordinator: {e}")
             raise
     
+    async def _coordinate(self, prompt: str) -> str:
+        """
+        Send a prompt to the coordinator with its system prompt and temperature.
+        
+        Raises:
+            RuntimeError: If the coordinator's generation failed (so the
+                failure is not recorded as a step of the run)
+        """
+        return _check_generation(await self.coordinator.generate_async(
+            prompt,
+            system=self.COORDINATOR_PROMPT,
+            temperature=0.3  # Lower temperature for more consistent coordination
+        ))
+    
     def solve_complex_task(self, 
                           task: str, 
                           context: Optional[Dict[str, Any]] = None,
-                          max_workers: int = 3) -> Dict[str, Any]:
+                          max_workers: int = 3,
+                          agent_timeout: Optional[float] = None,
+                          speculative_quorum: Optional[float] = 0.75,
+                          run_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Solve a complex task using the swarm of agents.
         
         Args:
             task: The main task to solve
             context: Additional context for the task
-            max_workers: Maximum number of parallel workers
+            max_workers: Maximum number of agents working at once
+            agent_timeout: Optional per-agent timeout in seconds
+            speculative_quorum: Fraction of agent results after which a draft
+                integration starts (None disables speculative integration)
+            run_id: Optional run identifier; with a store, an interrupted run
+                with this id resumes from its last completed step
             
         Returns:
             Dictionary with the final solution and process details
         """
-        context = context or {}
-        task_id = str(uuid.uuid4())
-        
-        logger.info(f"Starting swarm solution for task: {task_id}")
+        return run_sync(self.solve_complex_task_async(
+            task, context, max_workers, agent_timeout, speculative_quorum, run_id
+        ))
+    
+    async def solve_complex_task_async(self, 
+                                       task: str, 
+                                       context: Optional[Dict[str, Any]] = None,
+                                       max_workers: int = 3,
+                                       agent_timeout: Optional[float] = None,
+                                       speculative_quorum: Optional[float] = 0.75,
+                                       run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Solve a complex task using the swarm of agents.
         
-        # Step 1: Task decomposition by coordinator
-        decomposition_prompt = f"""
-        I need to break down the following complex task into subtasks for specialized agents:
+        Subtasks run as a dependency graph with at most ``max_workers`` agents
+        working at once. Once ``speculative_quorum`` of the results are in, a
+        draft integration starts alongside the remaining agents; results
+        arriving later are merged into the draft instead of integrating
+        everything again.
         
-        TASK: {task}
+        With a store, each completed step is persisted under the run id; a
+        run id the store already knows resumes after its last completed step
+        (a completed run returns its stored result).
         
-        For each subtask, please:
-        1. Provide a clear description of what needs to be addressed
-        2. Explain why this subtask is important to the overall solution
-        3. Indicate which type of specialist would be best suited (choose from: {[agent.specialization for agent in self.agents]})
-        
-        Finally, suggest a process for integrating the results of these subtasks into a cohesive solution.
+        Args:
+            task: The main task to solve
+            context: Additional context for the task
+            max_workers: Maximum number of agents working at once
+            agent_timeout: Optional per-agent timeout in seconds
+            speculative_quorum: Fraction of agent results after which a draft
+                integration starts (None disables speculative integration)
+            run_id: Optional run identifier (generated if not given)
+            
+        Returns:
+            Dictionary with the final solution and process details
         """
+        context = context or {}
+        task_id = run_id or str(uuid.uuid4())
+        start_time = time.time()
+        timings = {}
         
-        decomposition = self.coordinator.generate(decomposition_prompt)
-        
-        # Process decomposition to extract subtasks (simplified for now)
-        subtasks = self._parse_subtasks(decomposition, task, self.agents)
+        state = self.store.load_run(task_id) if self.store else None
+        if state and state["final"] is not None:
+            logger.info(f"Swarm run {task_id} already completed; returning the stored solution")
+            return state["final"]
+        if state:
+            logger.info(f"Resuming swarm run {task_id}")
+        else:
+            logger.info(f"Starting swarm solution for task: {task_id}")
+            self._record(task_id, EVENT_START, {"task": task, "context": context})
         
-        # Step 2: Parallel task processing
-        results = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(agent.process_task, subtask) for agent, subtask in subtasks]
-            for future in futures:
-                results.append(future.result())
+        # Step 1: Task decomposition by coordinator
+        subtasks = self._restore_subtasks(state["subtasks"]) if state and state["subtasks"] is not None else None
+        if subtasks is not None:
+            decomposition = state["decomposition"]
+        else:
+            decomposition, subtasks = await self._decompose(task)
+            self._record(task_id, EVENT_DECOMPOSITION, {
+                "decomposition": decomposition,
+                "subtasks": [{"agent_id": agent.agent_id, **subtask} for agent, subtask in subtasks]
+            })
+        timings["decomposition"] = time.time() - start_time
         
-        # Step 3: Result integration and refinement
-        solution = self._integrate_results(task, results, context)
+        # Step 2: Subtask graph, integrating results as they complete
+        if state and state["integration"] is not None:
+            integration = state["integration"]
+            results, solution, speculative = integration["results"], integration["solution"], integration["speculative"]
+        else:
+            results, solution, speculative = await self._run_and_integrate(
+                task, subtasks, context, max_workers, agent_timeout, speculative_quorum, timings, task_id
+            )
+            self._record(task_id, EVENT_INTEGRATION, {"results": results, "solution": solution, "speculative": speculative})
         
-        # Step 4: Feedback loop refinement
-        for i in range(self.feedback_loops):
-            logger.info(f"Refinement loop {i+1}/{self.feedback_loops}")
-            solution = self._refine_solution(task, solution, results)
+        # Step 3: Feedback loop refinement until the solution converges
+        refinement_start = time.time()
+        solution, refinement = await self._refine_until_converged(
+            task, solution, results, task_id, state["refinements"] if state else None
+        )
+        timings["refinement"] = time.time() - refinement_start
+        timings["total"] = time.time() - start_time
         
-        # Step 5: Final solution and metadata
+        # Step 4: Final solution and metadata
         final_solution = {
             "task_id": task_id,
             "task": task,
             "solution": solution,
             "process": {
                 "decomposition": decomposition,
-                "subtasks": subtasks,
+                "subtasks": [{"agent_id": agent.agent_id, "agent": agent.name, **subtask} for agent, subtask in subtasks],
                 "agent_results": results,
             },
             "metadata": {
                 "num_agents": len(self.agents),
                 "feedback_loops": self.feedback_loops,
+                "refinement": refinement,
+                "speculative_integration": speculative,
+                "resumed": state is not None,
+                "store_hits": sum(1 for result in results if result.get("cached")),
+                "timings": timings,
                 "timestamp": time.time()
             }
         }
         
-        # Step 6: Store in memory if available
+        self._record(task_id, EVENT_COMPLETE, final_solution)
+        
+        # Step 5: Store in memory if available (in the background, off the run's latency)
         if self.memory_manager:
-            self.memory_manager.add_memory(
-                content=f"Swarm solution for: {task}\n\n{solution}",
-                memory_type="swarm_solution",
-                metadata={
-                    "task_id": task_id,
-                    "task": task,
-                    "num_agents": len(self.agents),
-                    "timestamp": time.time()
-                }
-            )
+            self._save_run_memories(task_id, task, decomposition, results, solution)
         
         return final_solution
     
+    def _save_run_memories(self,
+                           task_id: str,
+                           task: str,
+                           decomposition: str,
+                           results: List[Dict[str, Any]],
+                           solution: str) -> None:
+        """Queue a run's decomposition, agent results and solution as one batched memory write."""
+        metadata = {"task_id": task_id, "task": task, "num_agents": len(self.agents), "timestamp": time.time()}
+        memories = [{
+            "content": f"Swarm decomposition for: {task}\n\n{decomposition}",
+            "memory_type": "swarm_decomposition",
+            "metadata": metadata
+        }]
+        memories += [
+            {
+                "content": f"{result.get('name', 'Agent')} ({result.get('specialization', 'general')}) on: {task}\n\n{result['result']}",
+                "memory_type": "swarm_agent_result",
+                "metadata": {**metadata, "agent_id": result.get("agent_id"), "subtask_id": result.get("task_id")}
+            }
+            for result in results if result.get("status") == "completed"
+        ]
+        memories.append({
+            "content": f"Swarm solution for: {task}\n\n{solution}",
+            "memory_type": "swarm_solution",
+            "metadata": metadata
+        })
+        
+        with self._memory_lock:
+            if self._memory_writer is None:
+                self._memory_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vot-swarm-memory")
+            self._memory_writes = [write for write in self._memory_writes if not write.done()]
+            self._memory_writes.append(self._memory_writer.submit(save_memories, self.memory_manager, memories))
+    
+    def flush_memory(self, timeout: Optional[float] = None) -> int:
+        """
+        Wait for queued memory writes to finish.
+        
+        Args:
+            timeout: Optional timeout in seconds
+            
+        Returns:
+            Number of memories saved by the writes still queued or running
+        """
+        with self._memory_lock:
+            writes, self._memory_writes = self._memory_writes, []
+        saved = 0
+        for write in writes:
+            try:
+                saved += write.result(timeout=timeout)
+            except Exception as e:
+                logger.error(f"Error saving swarm run to memory: {e}")
+        return saved
+    
+    def resume_run(self, run_id: str, **kwargs) -> Dict[str, Any]:
+        """
+        Resume a stored run from its last completed step.
+        
+        Args:
+            run_id: Identifier of the run in the store
+            **kwargs: Options passed on to solve_complex_task
+            
+        Returns:
+            Dictionary with the final solution and process details
+        """
+        return run_sync(self.resume_run_async(run_id, **kwargs))
+    
+    async def resume_run_async(self, run_id: str, **kwargs) -> Dict[str, Any]:
+        """
+        Resume a stored run from its last completed step.
+        
+        Args:
+            run_id: Identifier of the run in the store
+            **kwargs: Options passed on to solve_complex_task_async
+            
+        Returns:
+            Dictionary with the final solution and process details
+            
+        Raises:
+            ValueError: If there is no store or the store does not know the run
+        """
+        state = self.store.load_run(run_id) if self.store else None
+        if state is None:
+            raise ValueError(f"Unknown swarm run: {run_id}")
+        return await self.solve_complex_task_async(state["task"], state["context"], run_id=run_id, **kwargs)
+    
+    def _record(self, run_id: str, kind: str, payload: Dict[str, Any], key: Optional[str] = None) -> None:
+        """Append an event to the run store; a failing store does not fail the run."""
+        if self.store is None:
+            return
+        try:
+            self.store.append(run_id, kind, payload, key)
+        except Exception as e:
+            logger.error(f"Error recording swarm run {run_id} ({kind}): {e}")
+    
+    def _restore_subtasks(self, stored: List[Dict[str, Any]]) -> Optional[List[tuple]]:
+        """Map stored subtasks back to (agent, subtask) pairs, or None if an agent is gone."""
+        agents = {agent.agent_id: agent for agent in self.agents}
+        if any(item.get("agent_id") not in agents for item in stored):
+            logger.warning("Stored decomposition refers to unknown agents; decomposing again")
+            return None
+        return [
+            (agents[item["agent_id"]], {key: value for key, value in item.items() if key != "agent_id"})
+            for item in stored
+        ]
+    
+    @staticmethod
+    def _subtask_key(agent: SwarmAgent, subtask: Dict[str, Any]) -> str:
+        """Key identifying a subtask by what determines its answer."""
+        return make_key(
+            agent.model_name, agent.system_prompt, agent.temperature, agent.specialization,
+            subtask.get("prompt", ""), subtask.get("context", {})
+        )
+    
+    def _stored_result(self, run_id: Optional[str], agent: SwarmAgent, subtask: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get a stored result for a subtask from this run (or any run, if reuse is enabled)."""
+        if self.store is None or run_id is None:
+            return None
+        try:
+            key = self._subtask_key(agent, subtask)
+            stored = self.store.find_result(key, run_id=run_id)
+            if stored is None and self.reuse_subtask_results:
+                stored = self.store.find_result(key)
+        except Exception as e:
+            logger.error(f"Error reading swarm run store: {e}")
+            return None
+        if stored is None:
+            return None
+        logger.info(f"Serving subtask {subtask['task_id']} from the run store")
+        return {**stored, "task_id": subtask["task_id"], "cached": True}
+    
+    def _decomposition_prompt(self, task: str) -> str:
+        """Build the coordinator prompt decomposing a task."""
+        return f"""
+        I need to break down the following complex task into subtasks for specialized agents:
+        
+        TASK: {task}
+        
+        Split the task into at most {self.MAX_SUBTASKS} non-overlapping subtasks. Only create a subtask
+        for real work; do not give every specialist the whole task. For each subtask, provide:
+        1. "id": a short unique identifier
+        2. "description": a self-contained description of what needs to be addressed
+        3. "specialization": the best suited specialist (choose from: {[agent.specialization for agent in self.agents]})
+        4. "depends_on": ids of subtasks whose results this subtask needs (empty if none)
+        
+        Finally, suggest a process for integrating the results of these subtasks into a cohesive solution.
+        
+        Reply with JSON only, in this format:
+        {{"subtasks": [{{"id": "...", "description": "...", "specialization": "...", "depends_on": []}}],
+          "integration": "..."}}
+        """
+    
+    async def _decompose(self, task: str) -> Tuple[str, List[tuple]]:
+        """
+        Decompose a task with the coordinator.
+        
+        An invalid decomposition is sent back to the coordinator once for
+        correction before falling back to giving every agent the whole task.
+        
+        Returns:
+            Tuple of (decomposition text, list of (agent, subtask) pairs)
+        """
+        prompt = self._decomposition_prompt(task)
+        decomposition = await self._coordinate(prompt)
+        try:
+            return decomposition, self._parse_subtasks(decomposition, task, self.agents)
+        except ValueError as e:
+            logger.warning(f"Invalid task decomposition ({e}); asking the coordinator to correct it")
+            decomposition = await self._coordinate(
+                f"{prompt}\n\nYour previous answer was invalid: {e}\n\nPREVIOUS ANSWER:\n{decomposition}\n\n"
+                "Reply again with valid JSON only."
+            )
+        try:
+            return decomposition, self._parse_subtasks(decomposition, task, self.agents)
+        except ValueError as e:
+            logger.warning(f"Invalid task decomposition ({e}); every agent will address the whole task")
+            return decomposition, self._perspective_subtasks(decomposition, task, self.agents)
+    
+    async def _run_and_integrate(self,
+                                 task: str,
+                                 subtasks: List[tuple],
+                                 context: Dict[str, Any],
+                                 max_workers: int,
+                                 agent_timeout: Optional[float],
+                                 speculative_quorum: Optional[float],
+                                 timings: Dict[str, float],
+                                 run_id: Optional[str] = None) -> Tuple[List[Dict[str, Any]], str, bool]:
+        """
+        Run the subtask graph and integrate its results.
+        
+        Returns:
+            Tuple of (agent results in completion order, integrated solution,
+            whether a speculative draft was used)
+        """
+        quorum = len(subtasks)
+        if speculative_quorum is not None and len(subtasks) > 1:
+            quorum = max(1, math.ceil(len(subtasks) * speculative_quorum))
+        
+        agents_start = time.time()
+        results = []
+        draft_task, draft_covers = None, 0
+        try:
+            async for result in self._run_subtasks(subtasks, max_workers, agent_timeout, run_id):
+                results.append(result)
+                if draft_task is None and quorum <= len(results) < len(subtasks):
+                    logger.info(f"Starting speculative integration with {len(results)}/{len(subtasks)} results")
+                    draft_task = asyncio.create_task(self._integrate_results(task, list(results), context))
+                    draft_covers = len(results)
+            timings["agents"] = time.time() - agents_start
+            
+            integration_start = time.time()
+            if draft_task is not None and draft_task.done() and not draft_task.cancelled() and not draft_task.exception():
+                late_results = [result for result in results[draft_covers:] if result.get("status") == "completed"]
+                solution = draft_task.result()
+                if late_results:
+                    solution = await self._integrate_results(task, late_results, context, draft=solution)
+                timings["integration"] = time.time() - integration_start
+                return results, solution, True
+        finally:
+            # A draft still running when the last result arrives would not save time
+            if draft_task is not None and not draft_task.done():
+                draft_task.cancel()
+        
+        solution = await self._integrate_results(task, results, context)
+        timings["integration"] = time.time() - integration_start
+        return results, solution, False
+    
+    async def _run_subtasks(self,
+                            subtasks: List[tuple],
+                            max_workers: int,
+                            agent_timeout: Optional[float],
+                            run_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run (agent, subtask) pairs as a dependency graph, yielding results as they complete.
+        
+        A subtask starts once the subtasks listed in its "depends_on" have
+        finished; their results are passed in its context under
+        "dependency_results". Closing the iterator cancels the remaining subtasks.
+        
+        With a store and a run id, stored results are served without calling
+        the agent and newly completed results are persisted. Each result gets
+        a "timing" entry with the times the subtask became ready (its
+        dependencies finished), started (got a worker) and finished.
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+        finished = {subtask["task_id"]: asyncio.Event() for _, subtask in subtasks}
+        results = {}
+        
+        async def run(agent: SwarmAgent, subtask: Dict[str, Any]) -> Dict[str, Any]:
+            dependencies = [task_id for task_id in subtask.get("depends_on", []) if task_id in finished]
+            for task_id in dependencies:
+                await finished[task_id].wait()
+            if dependencies:
+                subtask = {**subtask, "context": {
+                    **subtask.get("context", {}),
+                    "dependency_results": {task_id: results[task_id].get("result") for task_id in dependencies}
+                }}
+            ready = time.time()
+            try:
+                stored = self._stored_result(run_id, agent, subtask)
+                if stored is not None:
+                    result, started = stored, time.time()
+                else:
+                    async with semaphore:
+                        started = time.time()
+                        result = await agent.process_task_async(subtask, timeout=agent_timeout)
+                    if run_id is not None and result.get("status") == "completed":
+                        self._record(run_id, EVENT_SUBTASK, result, self._subtask_key(agent, subtask))
+                results[subtask["task_id"]] = {
+                    **result, "timing": {"ready": ready, "started": started, "finished": time.time()}
+                }
+            finally:
+                finished[subtask["task_id"]].set()
+            return results[subtask["task_id"]]
+        
+        tasks = [asyncio.create_task(run(agent, subtask)) for agent, subtask in subtasks]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for pending in tasks:
+                pending.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
     def _parse_subtasks(self, decomposition: str, main_task: str, agents: List[SwarmAgent]) -> List[tuple]:
         """
-        Parse the decomposition output into subtasks assigned to agents.
+        Parse the coordinator's JSON decomposition into subtasks assigned to agents.
+        
+        Subtasks with the same description are merged (dependencies on a
+        merged subtask point at the one kept), dependency edges are checked
+        for unknown ids and cycles, and each subtask goes to the agent whose
+        specialization matches best.
+        
+        Args:
+            decomposition: Coordinator response
+            main_task: The main task
+            agents: Agents to route subtasks to
+            
+        Returns:
+            List of (agent, subtask) pairs
+            
+        Raises:
+            ValueError: If the decomposition is not valid
+        """
+        data = extract_json(decomposition)
+        validate_schema(data, SUBTASK_SCHEMA)
+        if not data["subtasks"]:
+            raise ValueError("The decomposition has no subtasks")
+        if len(data["subtasks"]) > self.MAX_SUBTASKS:
+            raise ValueError(f"The decomposition has more than {self.MAX_SUBTASKS} subtasks")
+        if not agents:
+            raise ValueError("The swarm has no agents")
+        
+        # Merge duplicate subtasks
+        kept, aliases, by_description = [], {}, {}
+        for item in data["subtasks"]:
+            if item["id"] in aliases:
+                raise ValueError(f"Duplicate subtask id '{item['id']}'")
+            description = " ".join(item["description"].lower().split())
+            if description in by_description:
+                aliases[item["id"]] = by_description[description]["id"]
+                continue
+            by_description[description] = item
+            aliases[item["id"]] = item["id"]
+            kept.append(item)
+        if len(kept) < len(data["subtasks"]):
+            logger.info(f"Merged {len(data['subtasks']) - len(kept)} duplicate subtasks")
+        
+        for item in kept:
+            depends_on = []
+            for task_id in item.get("depends_on", []):
+                if task_id not in aliases:
+                    raise ValueError(f"Subtask '{item['id']}' depends on unknown subtask '{task_id}'")
+                if aliases[task_id] != item["id"] and aliases[task_id] not in depends_on:
+                    depends_on.append(aliases[task_id])
+            item["depends_on"] = depends_on
+        self._check_acyclic(kept)
+        
+        subtasks = []
+        load = {agent.agent_id: 0 for agent in agents}
+        for item in kept:
+            agent = self._match_agent(item, agents, load)
+            load[agent.agent_id] += 1
+            subtasks.append((agent, {
+                "task_id": item["id"],
+                "prompt": f"{item['description']}\n\nThis is part of the overall task: {main_task}",
+                "depends_on": item["depends_on"],
+                "context": {
+                    "main_task": main_task,
+                    "specialization": agent.specialization,
+                    "integration": data.get("integration", "")
+                }
+            }))
+        return subtasks
+    
+    @staticmethod
+    def _match_agent(item: Dict[str, Any], agents: List[SwarmAgent], load: Dict[str, int]) -> SwarmAgent:
+        """Get the agent whose specialization best matches a subtask, preferring less loaded agents on ties."""
+        requested = item["specialization"].strip().lower()
+        requested_words = _words(requested)
+        description_words = _words(item["description"])
+        
+        def score(agent: SwarmAgent) -> tuple:
+            specialization = agent.specialization.lower()
+            words = _words(specialization)
+            exact = specialization == requested
+            overlap = len(words & requested_words) / len(words | requested_words) if words | requested_words else 0.0
+            return (exact, overlap, len(words & description_words), -load[agent.agent_id])
+        
+        return max((agent for agent in agents if agent.active), key=score, default=agents[0])
+    
+    @staticmethod
+    def _check_acyclic(items: List[Dict[str, Any]]) -> None:
+        """Raise ValueError if the subtask dependencies contain a cycle."""
+        remaining = {item["id"]: set(item["depends_on"]) for item in items}
+        while remaining:
+            ready = [task_id for task_id, depends_on in remaining.items() if not depends_on & remaining.keys()]
+            if not ready:
+                raise ValueError(f"Subtask dependencies contain a cycle: {sorted(remaining)}")
+            for task_id in ready:
+                del remaining[task_id]
+    
+    def _perspective_subtasks(self, decomposition: str, main_task: str, agents: List[SwarmAgent]) -> List[tuple]:
+        """
+        Assign the main task to every agent, each from its own perspective.
         
-        This is a simplified implementation - in a full system, this would use more 
-        sophisticated parsing to extract structured subtasks.
+        Used when the coordinator does not produce a valid decomposition.
         """
-        # For now, we'll do a simple approach - assign the main task to all agents
-        # with different perspectives based on their specialization
         subtasks = []
         
         for agent in agents:
@@ -389,12 +1078,31 @@ class SwarmOrchestrator:
         
         return subtasks
     
-    def _integrate_results(self, task: str, results: List[Dict[str, Any]], context: Dict[str, Any]) -> str:
+    async def _integrate_results(self,
+                                 task: str,
+                                 results: List[Dict[str, Any]],
+                                 context: Dict[str, Any],
+                                 draft: Optional[str] = None) -> str:
         """
         Integrate results from multiple agents into a cohesive solution.
+        
+        With a draft (a speculative integration of earlier results), only the
+        given late results are merged into it.
         """
         # Prepare integration prompt
-        integration_prompt = f"""
+        if draft is not None:
+            integration_prompt = f"""
+        I need to extend a draft solution with results from specialized agents that finished after it was written:
+        
+        ORIGINAL TASK: {task}
+        
+        DRAFT SOLUTION:
+        {draft}
+        
+        ADDITIONAL AGENT RESULTS:
+        """
+        else:
+            integration_prompt = f"""
         I need to integrate the results from multiple specialized agents working on this task:
         
         ORIGINAL TASK: {task}
@@ -421,13 +1129,106 @@ class SwarmOrchestrator:
         """
         
         # Generate integrated solution
-        integrated_solution = self.coordinator.generate(integration_prompt)
+        integrated_solution = await self._coordinate(integration_prompt)
         
         return integrated_solution
     
-    def _refine_solution(self, task: str, current_solution: str, agent_results: List[Dict[str, Any]]) -> str:
+    async def _refine_until_converged(self,
+                                      task: str,
+                                      solution: str,
+                                      agent_results: List[Dict[str, Any]],
+                                      run_id: Optional[str] = None,
+                                      completed: Optional[List[Dict[str, Any]]] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Refine a solution for at most ``feedback_loops`` rounds, stopping early.
+        
+        Refinement stops once a round changes the solution less than
+        ``convergence_threshold`` allows, or once the quality judge (if any)
+        scores the solution at least ``quality_threshold``. Each round is
+        persisted under the run id; ``completed`` rounds of a resumed run are
+        not repeated.
+        
+        Returns:
+            Tuple of the final solution and a summary of the refinement
+        """
+        refinement = {"iterations": 0, "stopped": "max_loops", "similarities": [], "scores": []}
+        if self.feedback_loops <= 0:
+            return solution, refinement
+        
+        if completed:
+            solution = completed[-1]["solution"]
+            refinement["iterations"] = len(completed)
+            refinement["similarities"] = [iteration["similarity"] for iteration in completed]
+            if refinement["similarities"][-1] >= self.convergence_threshold:
+                refinement["stopped"] = "converged"
+                return solution, refinement
+        
+        if await self._judge_solution(task, solution, refinement):
+            refinement["stopped"] = "quality"
+            return solution, refinement
+        
+        delta = None
+        for i in range(refinement["iterations"], self.feedback_loops):
+            logger.info(f"Refinement loop {i+1}/{self.feedback_loops}")
+            refined = await self._refine_solution(task, solution, agent_results if i == 0 else None, delta)
+            refinement["iterations"] += 1
+            
+            similarity = self.similarity(solution, refined)
+            refinement["similarities"].append(similarity)
+            delta = "\n".join(difflib.unified_diff(
+                solution.splitlines(), refined.splitlines(), "previous", "current", lineterm=""
+            ))
+            solution = refined
+            if run_id is not None:
+                self._record(run_id, EVENT_REFINEMENT, {"iteration": i + 1, "solution": solution, "similarity": similarity})
+            
+            if similarity >= self.convergence_threshold:
+                logger.info(f"Refinement converged after {i+1} loops (similarity {similarity:.3f})")
+                refinement["stopped"] = "converged"
+                break
+            if await self._judge_solution(task, solution, refinement):
+                refinement["stopped"] = "quality"
+                break
+        
+        return solution, refinement
+    
+    async def _judge_solution(self, task: str, solution: str, refinement: Dict[str, Any]) -> bool:
+        """Score a solution with the quality judge, returning whether it is good enough."""
+        if self.quality_judge is None:
+            return False
+        try:
+            score = self.quality_judge(task, solution)
+            if inspect.isawaitable(score):
+                score = await score
+            score = float(score)
+        except Exception as e:
+            logger.error(f"Quality judge failed: {e}")
+            return False
+        refinement["scores"].append(score)
+        return score >= self.quality_threshold
+    
+    @staticmethod
+    def _summarize_results(agent_results: List[Dict[str, Any]], max_words: int = 60) -> str:
+        """Summarize agent results as the first words of each completed result."""
+        summaries = []
+        for result in agent_results:
+            if result.get("status") != "completed":
+                continue
+            words = str(result.get("result", "")).split()
+            summary = " ".join(words[:max_words]) + (" ..." if len(words) > max_words else "")
+            summaries.append(f"- {result.get('name', 'Unknown agent')} ({result.get('specialization', 'Unknown')}): {summary}")
+        return "\n".join(summaries)
+    
+    async def _refine_solution(self,
+                               task: str,
+                               current_solution: str,
+                               agent_results: Optional[List[Dict[str, Any]]] = None,
+                               delta: Optional[str] = None) -> str:
         """
         Refine the current solution through a feedback loop.
+        
+        The first round gets summaries of the agent results; later rounds get
+        the diff of the previous round instead, so they focus on what changed.
         """
         refinement_prompt = f"""
         I need to further refine and improve our current solution to this task:
@@ -436,7 +1237,20 @@ class SwarmOrchestrator:
         
         CURRENT SOLUTION:
         {current_solution}
+        """
+        
+        if agent_results:
+            refinement_prompt += f"""
+        SUMMARY OF AGENT RESULTS:
+        {self._summarize_results(agent_results)}
+        """
+        if delta:
+            refinement_prompt += f"""
+        CHANGES MADE IN THE PREVIOUS REFINEMENT:
+        {delta}
+        """
         
+        refinement_prompt += """
         Please critically evaluate this solution and suggest specific improvements by:
         1. Identifying any weaknesses, gaps, or inconsistencies
         2. Suggesting concrete ways to enhance the solution
@@ -447,6 +1261,52 @@ class SwarmOrchestrator:
         """
         
         # Generate refined solution
-        refined_solution = self.coordinator.generate(refinement_prompt)
+        refined_solution = await self._coordinate(refinement_prompt)
         
-        return refined_solution 
\ No newline at end of file
+        return refined_solution
+
+
+def run_sync(coroutine) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+    
+    Inside a running event loop the coroutine runs on a fresh loop in a
+    worker thread, so synchronous callers in async code do not deadlock.
+    
+    Args:
+        coroutine: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result() 
+
+
+_client_pool = {}
+_client_pool_lock = threading.Lock()
+
+
+def get_swarm_client(model_name: str):
+    """
+    Get the pooled client for a model.
+    
+    Every agent and coordinator using the model shares the client (and its
+    connection pool); system prompts and temperatures are sent per request.
+    
+    Args:
+        model_name: Model the client routes to
+        
+    Returns:
+        The shared EnhancedClaudeClient for the model
+    """
+    with _client_pool_lock:
+        client = _client_pool.get(model_name)
+        if client is None:
+            from vot1.client import EnhancedClaudeClient
+            client = _client_pool[model_name] = EnhancedClaudeClient(model=model_name)
+        return client
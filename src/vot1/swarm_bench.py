@@ -0,0 +1,314 @@
+"""
+VOT1 Swarm Load Test
+
+This module drives SwarmOrchestrator at scale against simulated agents, fully
+offline, to show where a swarm run spends its time:
+
+1. BackendClient: adapts a VotModelControlProtocol backend (MockBackend,
+   RecordReplayBackend, ...) to the client interface swarm agents use
+2. run_swarm_benchmark: runs batches of concurrent swarm tasks with
+   configurable agent counts, subtask graphs, refinement depth and latency
+   distributions
+3. main: command line entry point (``python -m vot1.swarm_bench``)
+
+The report gives throughput, run latency, critical-path latency (the
+dependency chain of model calls a run cannot avoid), per-subtask queueing
+delay, coordinator and agent busy time, and peak Python memory. A run whose
+latency is well above its critical path is waiting on workers or the
+coordinator rather than on models.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+import zlib
+from typing import Dict, List, Any, Optional, Callable, Union
+
+from vot1.mcp_backends import MockBackend, ModelBackend
+from vot1.replay import lognormal_latency
+from vot1.swarm import SwarmAgent, SwarmOrchestrator, run_sync
+from vot1.usage import LatencyHistogram
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BackendClient:
+    """
+    Swarm client backed by a model backend, counting its calls and busy time.
+    """
+
+    def __init__(self, backend: ModelBackend, model: str = "mock-model", max_tokens: int = 1024):
+        """
+        Initialize the client.
+
+        Args:
+            backend: Backend answering the requests
+            model: Model name sent with each request
+            max_tokens: Maximum tokens per response
+        """
+        self.backend = backend
+        self.model = model
+        self.max_tokens = max_tokens
+        self.calls = 0
+        self.busy = 0.0
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        """Generate a response from synchronous code."""
+        return run_sync(self.generate_async(prompt, **kwargs))
+
+    async def generate_async(self,
+                             prompt: str,
+                             system: Optional[str] = None,
+                             temperature: Optional[float] = None,
+                             max_tokens: Optional[int] = None,
+                             context: Optional[Dict[str, Any]] = None,
+                             **kwargs) -> str:
+        """
+        Generate a response with the backend.
+
+        Returns:
+            The response content
+        """
+        start_time = time.time()
+        try:
+            result = await self.backend.generate({
+                "prompt": prompt,
+                "system": system,
+                "temperature": 0.7 if temperature is None else temperature,
+                "max_tokens": max_tokens or self.max_tokens,
+                "context": context,
+                "model": self.model
+            })
+        finally:
+            self.calls += 1
+            self.busy += time.time() - start_time
+        return result["content"]
+
+
+def mock_responder(num_subtasks: int, dependency_depth: int = 1, response_words: int = 200) -> Callable:
+    """
+    Build a MockBackend responder for swarm runs.
+
+    Decomposition prompts get a valid structured decomposition into
+    ``num_subtasks`` subtasks arranged in ``dependency_depth`` layers (each
+    subtask depends on one subtask of the previous layer); every other
+    prompt gets ``response_words`` words that differ per prompt, so
+    refinement never converges by accident.
+
+    Args:
+        num_subtasks: Subtasks per decomposition
+        dependency_depth: Number of dependency layers
+        response_words: Words per response
+
+    Returns:
+        Function (prompt, system, context) -> response text
+    """
+    width = max(1, -(-num_subtasks // max(1, dependency_depth)))
+
+    def respond(prompt: str, system: Optional[str], context: Optional[Dict[str, Any]]) -> str:
+        if "break down the following complex task" in prompt:
+            return json.dumps({"subtasks": [
+                {
+                    "id": f"s{index}",
+                    "description": f"Part {index} of the task",
+                    "specialization": f"skill-{index}",
+                    "depends_on": [f"s{index - width}"] if index >= width else []
+                }
+                for index in range(num_subtasks)
+            ], "integration": "Combine the parts in order."})
+        seed = zlib.crc32(prompt.encode("utf-8"))
+        return " ".join(f"w{(seed + index) % 997}" for index in range(response_words))
+
+    return respond
+
+
+def _critical_path(solution: Dict[str, Any]) -> float:
+    """Get the critical-path latency of a run: its stages plus its longest chain of subtasks."""
+    timings = solution["metadata"]["timings"]
+    subtasks = {subtask["task_id"]: subtask for subtask in solution["process"]["subtasks"]}
+    durations = {
+        result["task_id"]: result["timing"]["finished"] - result["timing"]["started"]
+        for result in solution["process"]["agent_results"] if "timing" in result
+    }
+    chains = {}
+
+    def chain(task_id: str) -> float:
+        if task_id not in chains:
+            dependencies = subtasks.get(task_id, {}).get("depends_on", [])
+            chains[task_id] = durations.get(task_id, 0.0) + max((chain(dep) for dep in dependencies), default=0.0)
+        return chains[task_id]
+
+    longest = max((chain(task_id) for task_id in durations), default=0.0)
+    return timings.get("decomposition", 0.0) + longest + timings.get("integration", 0.0) + timings.get("refinement", 0.0)
+
+
+async def run_swarm_benchmark_async(num_agents: int = 100,
+                                    num_runs: int = 4,
+                                    concurrent_runs: int = 2,
+                                    num_subtasks: Optional[int] = None,
+                                    dependency_depth: int = 1,
+                                    feedback_loops: int = 2,
+                                    max_workers: int = 16,
+                                    latency: Union[float, Callable[[float], float]] = 0.05,
+                                    response_words: int = 200,
+                                    backend: Optional[ModelBackend] = None,
+                                    speculative_quorum: Optional[float] = 0.75,
+                                    **orchestrator_kwargs) -> Dict[str, Any]:
+    """
+    Run swarm tasks against simulated agents and report where time goes.
+
+    Args:
+        num_agents: Agents in the swarm
+        num_runs: Swarm tasks to solve
+        concurrent_runs: Tasks solved at once
+        num_subtasks: Subtasks per task (defaults to one per agent)
+        dependency_depth: Layers of the subtask dependency graph
+        feedback_loops: Refinement rounds per task (all of them run)
+        max_workers: Agents working at once per task
+        latency: Model latency in seconds, or a function (0.0) -> seconds
+            such as ``lognormal_latency(0.05)``
+        response_words: Words per simulated response
+        backend: Optional backend instead of the MockBackend (e.g. a
+            RecordReplayBackend in replay mode)
+        speculative_quorum: Passed on to solve_complex_task_async
+        **orchestrator_kwargs: Extra SwarmOrchestrator options (e.g.
+            memory_manager, store)
+
+    Returns:
+        Benchmark report
+    """
+    num_subtasks = num_agents if num_subtasks is None else num_subtasks
+    if backend is None:
+        draw = latency if callable(latency) else None
+        backend = MockBackend(
+            responder=mock_responder(num_subtasks, dependency_depth, response_words),
+            latency=(lambda: draw(0.0)) if draw else latency
+        )
+    coordinator = BackendClient(backend)
+    agent_client = BackendClient(backend)
+
+    orchestrator_kwargs.setdefault("convergence_threshold", float("inf"))
+    swarm = SwarmOrchestrator(num_agents=0, feedback_loops=feedback_loops, coordinator=coordinator,
+                              **orchestrator_kwargs)
+    swarm.agents = [
+        SwarmAgent(f"agent-{index}", f"Agent {index}", f"skill-{index}", "", client=agent_client)
+        for index in range(num_agents)
+    ]
+    # Let the whole swarm get work, not just the default subtask cap
+    swarm.MAX_SUBTASKS = max(swarm.MAX_SUBTASKS, num_subtasks)
+
+    run_latency, critical_path, queue_time = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    stages = {}
+    semaphore = asyncio.Semaphore(concurrent_runs)
+
+    async def solve(index: int) -> None:
+        async with semaphore:
+            solution = await swarm.solve_complex_task_async(
+                f"Benchmark task {index}", max_workers=max_workers, speculative_quorum=speculative_quorum
+            )
+        timings = solution["metadata"]["timings"]
+        run_latency.add(timings["total"])
+        critical_path.add(_critical_path(solution))
+        for stage, seconds in timings.items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+        for result in solution["process"]["agent_results"]:
+            if "timing" in result:
+                queue_time.add(result["timing"]["started"] - result["timing"]["ready"])
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start_time = time.time()
+    try:
+        await asyncio.gather(*(solve(index) for index in range(num_runs)))
+        wall_time = time.time() - start_time
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    calls = coordinator.calls + agent_client.calls
+    mean_latency = run_latency.total / run_latency.count if run_latency.count else 0.0
+    mean_critical = critical_path.total / critical_path.count if critical_path.count else 0.0
+    return {
+        "config": {
+            "num_agents": num_agents,
+            "num_runs": num_runs,
+            "concurrent_runs": concurrent_runs,
+            "num_subtasks": num_subtasks,
+            "dependency_depth": dependency_depth,
+            "feedback_loops": feedback_loops,
+            "max_workers": max_workers
+        },
+        "wall_time": wall_time,
+        "throughput": {
+            "runs_per_second": num_runs / wall_time if wall_time else None,
+            "calls_per_second": calls / wall_time if wall_time else None
+        },
+        "run_latency": run_latency.to_dict(),
+        "critical_path": critical_path.to_dict(),
+        "critical_path_ratio": mean_latency / mean_critical if mean_critical else None,
+        "queue_time": queue_time.to_dict(),
+        "stages": {stage: seconds / num_runs for stage, seconds in stages.items()} if num_runs else {},
+        "coordinator": {"calls": coordinator.calls, "busy": coordinator.busy},
+        "agents": {"calls": agent_client.calls, "busy": agent_client.busy},
+        "peak_memory": peak_memory
+    }
+
+
+def run_swarm_benchmark(**kwargs) -> Dict[str, Any]:
+    """
+    Run swarm tasks against simulated agents and report where time goes.
+
+    Args:
+        **kwargs: Options of run_swarm_benchmark_async
+
+    Returns:
+        Benchmark report
+    """
+    return run_sync(run_swarm_benchmark_async(**kwargs))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the swarm load test from the command line and print its report as JSON."""
+    parser = argparse.ArgumentParser(description="Load test SwarmOrchestrator against simulated agents")
+    parser.add_argument("--agents", type=int, default=100, help="Agents in the swarm")
+    parser.add_argument("--runs", type=int, default=4, help="Swarm tasks to solve")
+    parser.add_argument("--concurrent-runs", type=int, default=2, help="Tasks solved at once")
+    parser.add_argument("--subtasks", type=int, default=None, help="Subtasks per task (default: one per agent)")
+    parser.add_argument("--depth", type=int, default=1, help="Layers of the subtask dependency graph")
+    parser.add_argument("--feedback-loops", type=int, default=2, help="Refinement rounds per task")
+    parser.add_argument("--max-workers", type=int, default=16, help="Agents working at once per task")
+    parser.add_argument("--latency", type=float, default=0.05, help="Median model latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.0,
+                        help="Log-normal latency spread (0 for a fixed latency)")
+    parser.add_argument("--response-words", type=int, default=200, help="Words per simulated response")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency draws")
+    args = parser.parse_args(argv)
+
+    latency = args.latency
+    if args.latency_sigma > 0:
+        latency = lognormal_latency(args.latency, args.latency_sigma, args.seed)
+
+    report = run_swarm_benchmark(
+        num_agents=args.agents,
+        num_runs=args.runs,
+        concurrent_runs=args.concurrent_runs,
+        num_subtasks=args.subtasks,
+        dependency_depth=args.depth,
+        feedback_loops=args.feedback_loops,
+        max_workers=args.max_workers,
+        latency=latency,
+        response_words=args.response_words
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+VOT1 Swarm Run Store
+
+This module persists swarm runs to an append-only SQLite event log, so an
+interrupted or crashed run can resume from its last completed step instead
+of paying for every model call again:
+
+1. Runs are logged as events: start, decomposition, subtask results,
+   integration, refinement iterations and completion
+2. load_run folds a run's events into its latest state
+3. find_result serves the latest completed result of an identical subtask,
+   from the same run or from earlier ones
+
+Events are never updated or deleted; payloads are JSON compressed with zlib.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Any, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EVENT_START = "start"
+EVENT_DECOMPOSITION = "decomposition"
+EVENT_SUBTASK = "subtask"
+EVENT_INTEGRATION = "integration"
+EVENT_REFINEMENT = "refinement"
+EVENT_COMPLETE = "complete"
+
+
+class SwarmRunStore:
+    """
+    Append-only store of swarm run events.
+
+    The store is safe to share across threads and orchestrators.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Initialize the store.
+
+        Args:
+            path: SQLite file path (":memory:" for a temporary store)
+        """
+        self.path = path
+        directory = os.path.dirname(path) if path != ":memory:" else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                key TEXT,
+                payload BLOB NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_events_run ON events (run_id, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_events_key ON events (key, id)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+        logger.info(f"Initialized SwarmRunStore at {path}")
+
+    def append(self, run_id: str, kind: str, payload: Dict[str, Any], key: Optional[str] = None) -> None:
+        """
+        Append an event to a run.
+
+        Args:
+            run_id: Run identifier
+            kind: Event kind (one of the EVENT_* constants)
+            payload: JSON-serializable event data
+            key: Optional lookup key (the subtask key of subtask results)
+        """
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO events (run_id, kind, key, payload, created) VALUES (?, ?, ?, ?, ?)",
+                (run_id, kind, key, blob, time.time())
+            )
+            self._db.commit()
+
+    def events(self, run_id: str) -> List[Dict[str, Any]]:
+        """
+        Get a run's events in order.
+
+        Args:
+            run_id: Run identifier
+
+        Returns:
+            List of events with kind, key, payload and created time
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, key, payload, created FROM events WHERE run_id = ? ORDER BY id", (run_id,)
+            ).fetchall()
+        return [
+            {"kind": kind, "key": key, "payload": json.loads(zlib.decompress(blob)), "created": created}
+            for kind, key, blob, created in rows
+        ]
+
+    def load_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fold a run's events into its latest state.
+
+        Args:
+            run_id: Run identifier
+
+        Returns:
+            Dictionary with the run's task, context, decomposition, subtasks,
+            subtask results, integrated solution, refinement iterations and
+            final result (None for steps not reached), or None if unknown
+        """
+        events = self.events(run_id)
+        if not events:
+            return None
+
+        state = {
+            "run_id": run_id,
+            "task": None,
+            "context": {},
+            "decomposition": None,
+            "subtasks": None,
+            "results": {},
+            "integration": None,
+            "refinements": [],
+            "final": None,
+            "status": "running"
+        }
+        for event in events:
+            payload = event["payload"]
+            if event["kind"] == EVENT_START:
+                state["task"] = payload.get("task")
+                state["context"] = payload.get("context") or {}
+            elif event["kind"] == EVENT_DECOMPOSITION:
+                state["decomposition"] = payload.get("decomposition")
+                state["subtasks"] = payload.get("subtasks", [])
+            elif event["kind"] == EVENT_SUBTASK:
+                state["results"][payload.get("task_id")] = payload
+            elif event["kind"] == EVENT_INTEGRATION:
+                state["integration"] = payload
+            elif event["kind"] == EVENT_REFINEMENT:
+                state["refinements"].append(payload)
+            elif event["kind"] == EVENT_COMPLETE:
+                state["final"] = payload
+                state["status"] = "completed"
+        return state
+
+    def find_result(self, key: str, run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest stored result of a subtask.
+
+        Args:
+            key: Subtask key
+            run_id: Optional run to restrict the lookup to
+
+        Returns:
+            The stored subtask result, or None if there is none
+        """
+        query = "SELECT payload FROM events WHERE key = ? AND kind = ?"
+        params = [key, EVENT_SUBTASK]
+        if run_id is not None:
+            query += " AND run_id = ?"
+            params.append(run_id)
+        with self._lock:
+            row = self._db.execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def list_runs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List the stored runs, oldest first.
+
+        Args:
+            status: Optional filter ("running" for interrupted or in-progress
+                runs, "completed" for finished ones)
+
+        Returns:
+            List of dictionaries with run_id, task, started time and status
+        """
+        with self._lock:
+            starts = self._db.execute(
+                "SELECT run_id, payload, created FROM events WHERE kind = ? ORDER BY id", (EVENT_START,)
+            ).fetchall()
+            completed = {row[0] for row in self._db.execute(
+                "SELECT DISTINCT run_id FROM events WHERE kind = ?", (EVENT_COMPLETE,)
+            )}
+
+        runs = []
+        for run_id, blob, created in starts:
+            run_status = "completed" if run_id in completed else "running"
+            if status is None or status == run_status:
+                runs.append({
+                    "run_id": run_id,
+                    "task": json.loads(zlib.decompress(blob)).get("task"),
+                    "started": created,
+                    "status": run_status
+                })
+        return runs
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
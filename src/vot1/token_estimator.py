@@ -0,0 +1,315 @@
+"""
+VOT1 Token Estimator
+
+This module provides fast local token counts for pre-flight decisions (model
+routing, context budgeting, rate limiting) without a network round-trip.
+
+Raw counts come from a BPE-like pre-tokenizer heuristic, or from tiktoken's
+cl100k_base encoding when tiktoken is installed. Raw counts are then scaled
+by a per-model calibration ratio, learned from the input token counts that
+providers report in their usage data. Raw counts are memoized by content hash,
+so the same text (system prompts, tool specs, files re-sent across steps) is
+only measured once.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Words, digit runs, single symbols and whitespace runs, like a BPE pre-tokenizer
+_PIECE_RE = re.compile(r"[^\W\d_]+|\d+|\s+|.", re.UNICODE)
+
+
+class TokenEstimator:
+    """
+    Calibrated, memoized local token counter.
+    """
+
+    # Key of the calibration ratio used when the model is unknown
+    DEFAULT_KEY = "*"
+
+    # Framing tokens added per message and per request by the Messages API
+    MESSAGE_OVERHEAD = 4
+    REQUEST_OVERHEAD = 8
+
+    # Hidden system prompt added when tools are supplied (documented provider value)
+    TOOL_USE_OVERHEAD = 346
+
+    def __init__(
+        self,
+        cache_size: int = 8192,
+        smoothing: float = 0.1,
+        min_calibration_tokens: int = 32,
+        use_tiktoken: bool = True
+    ):
+        """
+        Initialize the token estimator.
+
+        Args:
+            cache_size: Maximum number of memoized raw counts
+            smoothing: Weight of each new observation in the calibration ratio
+            min_calibration_tokens: Smallest raw count used for calibration
+            use_tiktoken: Whether to use tiktoken for raw counts when it is installed
+        """
+        self.cache_size = cache_size
+        self.smoothing = smoothing
+        self.min_calibration_tokens = min_calibration_tokens
+
+        self.ratios = {}
+        self.observations = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "calibrations": 0}
+
+        self._encoding = None
+        if use_tiktoken:
+            try:
+                import tiktoken
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                logger.debug("tiktoken not available; using heuristic token estimates")
+
+    def estimate_raw(self, text: str) -> int:
+        """
+        Count tokens in a piece of text without calibration or memoization.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Raw token estimate
+        """
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+
+        tokens = 0
+        for piece in _PIECE_RE.findall(text):
+            first = piece[0]
+            if first.isspace():
+                # A single space merges into the next word; newlines and indentation do not
+                if piece != " ":
+                    tokens += max(1, len(piece) // 4)
+            elif first.isdigit():
+                tokens += math.ceil(len(piece) / 3)
+            elif first.isalpha():
+                if ord(first) > 0x2E7F:
+                    # CJK and similar scripts are roughly one token per character
+                    tokens += len(piece)
+                else:
+                    tokens += 1 + max(0, len(piece) - 6) // 4
+            else:
+                tokens += 1
+        return tokens
+
+    def count_raw(self, text: str) -> int:
+        """
+        Count tokens in a piece of text, memoized by content hash.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Raw (uncalibrated) token estimate
+        """
+        if not text:
+            return 0
+
+        digest = hashlib.sha1(text.encode("utf-8", errors="replace")).hexdigest()
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None:
+                self._cache.move_to_end(digest)
+                self.stats["cache_hits"] += 1
+                return cached
+
+        count = self.estimate_raw(text)
+
+        with self._lock:
+            self.stats["cache_misses"] += 1
+            self._cache[digest] = count
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return count
+
+    def get_ratio(self, model: Optional[str] = None) -> float:
+        """Get the calibration ratio for a model (or the default ratio)."""
+        with self._lock:
+            return self.ratios.get(model) or self.ratios.get(self.DEFAULT_KEY, 1.0)
+
+    def apply_calibration(self, raw_tokens: int, model: Optional[str] = None) -> int:
+        """
+        Scale a raw count by the model's calibration ratio.
+
+        Args:
+            raw_tokens: Raw token estimate
+            model: Model the text will be sent to
+
+        Returns:
+            Calibrated token estimate
+        """
+        if raw_tokens <= 0:
+            return 0
+        return max(1, int(round(raw_tokens * self.get_ratio(model))))
+
+    def count(self, text: str, model: Optional[str] = None) -> int:
+        """
+        Estimate the tokens a model will count for a piece of text.
+
+        Args:
+            text: Text to measure
+            model: Model the text will be sent to
+
+        Returns:
+            Calibrated token estimate
+        """
+        return self.apply_calibration(self.count_raw(text), model)
+
+    def count_request(self, request: Dict[str, Any], model: Optional[str] = None, calibrated: bool = True) -> int:
+        """
+        Estimate the input tokens of a Messages API request.
+
+        Args:
+            request: Request parameters (system, messages, tools)
+            model: Model the request will be sent to (defaults to request["model"])
+            calibrated: Whether to apply the model's calibration ratio
+
+        Returns:
+            Input token estimate
+        """
+        model = model or request.get("model")
+        raw = self.REQUEST_OVERHEAD + self._count_content(request.get("system"))
+
+        for message in request.get("messages") or []:
+            raw += self.MESSAGE_OVERHEAD + self._count_content(message.get("content"))
+
+        if request.get("tools"):
+            raw += self.TOOL_USE_OVERHEAD + self.count_raw(json.dumps(request["tools"], sort_keys=True))
+
+        return self.apply_calibration(raw, model) if calibrated else raw
+
+    def _count_content(self, content: Any) -> int:
+        """Count raw tokens in message content (a string or a list of content blocks)."""
+        if not content:
+            return 0
+        if isinstance(content, str):
+            return self.count_raw(content)
+        if isinstance(content, list):
+            total = 0
+            for block in content:
+                if isinstance(block, dict) and block.get("type") == "text":
+                    total += self.count_raw(block.get("text", ""))
+                elif isinstance(block, str):
+                    total += self.count_raw(block)
+                else:
+                    total += self.count_raw(json.dumps(block, default=str, sort_keys=True))
+            return total
+        return self.count_raw(json.dumps(content, default=str, sort_keys=True))
+
+    def calibrate(self, model: Optional[str], raw_tokens: int, actual_tokens: int) -> None:
+        """
+        Update a model's calibration ratio from provider-reported usage.
+
+        Args:
+            model: Model that served the request
+            raw_tokens: Raw (uncalibrated) estimate of the request's input tokens
+            actual_tokens: Input tokens reported by the provider (including cached tokens)
+        """
+        if raw_tokens < self.min_calibration_tokens or actual_tokens <= 0:
+            return
+
+        sample = min(3.0, max(0.5, actual_tokens / raw_tokens))
+        with self._lock:
+            for key in filter(None, (model, self.DEFAULT_KEY)):
+                n = self.observations.get(key, 0)
+                # Average the first few samples, then switch to an exponential moving average
+                weight = max(self.smoothing, 1.0 / (n + 1))
+                self.ratios[key] = self.ratios.get(key, sample) * (1 - weight) + sample * weight
+                self.observations[key] = n + 1
+            self.stats["calibrations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache and calibration statistics.
+
+        Returns:
+            Dictionary with cache counters and per-model ratios
+        """
+        with self._lock:
+            return {
+                **self.stats,
+                "backend": "tiktoken" if self._encoding is not None else "heuristic",
+                "ratios": {key: round(ratio, 4) for key, ratio in self.ratios.items()},
+                "observations": dict(self.observations),
+            }
+
+    def save(self, path: str) -> None:
+        """
+        Save the calibration ratios to a JSON file.
+
+        Args:
+            path: File path to write
+        """
+        with self._lock:
+            data = {"ratios": dict(self.ratios), "observations": dict(self.observations)}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    def load(self, path: str) -> bool:
+        """
+        Load calibration ratios from a JSON file.
+
+        Args:
+            path: File path to read
+
+        Returns:
+            True if the calibration was loaded
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                self.ratios.update(data.get("ratios", {}))
+                self.observations.update(data.get("observations", {}))
+            logger.info(f"Loaded token calibration for {len(data.get('ratios', {}))} models from {path}")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading token calibration from {path}: {e}")
+            return False
+
+
+_default_estimator = None
+_default_estimator_lock = threading.Lock()
+
+
+def get_token_estimator() -> TokenEstimator:
+    """
+    Get the process-wide token estimator.
+
+    Calibration is loaded from the file named by the VOT1_TOKEN_CALIBRATION
+    environment variable, if it is set and exists.
+
+    Returns:
+        The shared TokenEstimator instance
+    """
+    global _default_estimator
+    with _default_estimator_lock:
+        if _default_estimator is None:
+            _default_estimator = TokenEstimator()
+            calibration_path = os.environ.get("VOT1_TOKEN_CALIBRATION")
+            if calibration_path and os.path.exists(calibration_path):
+                _default_estimator.load(calibration_path)
+        return _default_estimator
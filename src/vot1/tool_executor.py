@@ -0,0 +1,604 @@
+"""
+VOT1 Tool Executor
+
+This module runs tool handlers off the caller's thread, so one slow or
+hanging tool cannot stall a whole request pipeline:
+
+1. Dedicated bounded thread pool for I/O-bound tools and a process pool for
+   CPU-bound ones (``isolation="process"``; the handler and its arguments
+   must be picklable)
+2. Per-tool timeouts and concurrency limits
+3. Cancellation: queued calls are cancelled on timeout, coroutine handlers
+   are cancelled, and the process pool is restarted to stop a runaway tool
+4. Per-tool timing metrics (calls, errors, timeouts, latency percentiles)
+5. Result caching for pure tools, with a TTL and invalidation keys (for
+   example the modification times of the files a code tool reads); results
+   are cached per handler, so registries sharing the process-wide executor
+   (for example workflows on different workspaces) never share results
+
+Threads cannot be interrupted, so a timed-out thread tool keeps its
+concurrency slot until it actually returns; the per-tool limit keeps a hung
+tool from taking over the shared pool.
+"""
+
+import asyncio
+import concurrent.futures
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from vot1.singleflight import make_key
+from vot1.usage import LatencyHistogram
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ISOLATION_THREAD = "thread"
+ISOLATION_PROCESS = "process"
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a tool does not finish within its timeout."""
+
+
+def file_mtimes(*arg_names: str, root: Optional[str] = None) -> Callable[[Dict[str, Any]], List[Optional[float]]]:
+    """
+    Build an invalidation key from the files named in a tool's arguments.
+
+    Cached results of a code tool are reused only while the files it read
+    are unchanged.
+
+    Args:
+        *arg_names: Names of the arguments holding file paths (or lists of paths)
+        root: Directory relative paths are resolved against
+
+    Returns:
+        Function (tool arguments) -> modification times (None for missing files)
+    """
+    def mtime(path: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(os.path.join(root, path) if root else path)
+        except OSError:
+            return None
+
+    def key(tool_args: Dict[str, Any]) -> List[Optional[float]]:
+        mtimes = []
+        for name in arg_names:
+            paths = tool_args.get(name)
+            for path in paths if isinstance(paths, (list, tuple)) else [paths]:
+                if path:
+                    mtimes.append(mtime(str(path)))
+        return mtimes
+
+    return key
+
+
+def handler_identity(handler: Callable) -> str:
+    """
+    Identify a tool handler for result caching.
+
+    Bound methods are identified by their function and the object they are
+    bound to (each attribute access creates a new method object).
+
+    Args:
+        handler: Tool handler
+
+    Returns:
+        Identity string, stable for the lifetime of the handler
+    """
+    owner = getattr(handler, "__self__", None)
+    function = getattr(handler, "__func__", handler)
+    name = f"{getattr(function, '__module__', '')}.{getattr(function, '__qualname__', type(function).__name__)}"
+    return f"{name}@{id(owner) if owner is not None else id(function)}"
+
+
+def is_error_result(result: Any) -> bool:
+    """Check whether a tool result reports a failure (such results are never cached)."""
+    return isinstance(result, dict) and ("error" in result or result.get("success") is False)
+
+
+class ToolCache:
+    """
+    LRU cache of tool results.
+
+    Keys combine the tool name, the handler's identity, its arguments and
+    the tool's invalidation key, so a result is reused only for identical
+    calls of the same handler while the invalidation key is unchanged.
+    Cached results are returned as copies.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(tool_name: str, tool_args: Dict[str, Any], invalidation_key: Optional[Callable] = None,
+            scope: Optional[str] = None) -> str:
+        """
+        Build the cache key of a tool call.
+
+        Args:
+            tool_name: Name of the tool
+            tool_args: Tool arguments
+            invalidation_key: Optional function (tool arguments) -> value that changes when results go stale
+            scope: Optional owner of the result (the handler identity)
+
+        Returns:
+            Hex digest identifying the call
+        """
+        return make_key(tool_name, scope, tool_args, invalidation_key(tool_args) if invalidation_key else None)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a result.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (hit, result)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires, _, result = entry
+            if expires is not None and time.time() >= expires:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+        return True, copy.deepcopy(result)
+
+    def put(self, key: str, tool_name: str, result: Any, ttl: Optional[float] = None,
+            scope: Optional[str] = None) -> None:
+        """
+        Store a result.
+
+        Args:
+            key: Cache key
+            tool_name: Name of the tool (for invalidation)
+            result: Tool result
+            ttl: Seconds the result stays valid (None for no expiry)
+            scope: Optional owner of the result (for invalidation)
+        """
+        with self._lock:
+            self._entries[key] = (
+                time.time() + ttl if ttl is not None else None, (tool_name, scope), copy.deepcopy(result)
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tool_name: Optional[str] = None, scope: Optional[str] = None) -> int:
+        """
+        Drop cached results.
+
+        Args:
+            tool_name: Tool whose results to drop (None for all tools)
+            scope: Owner whose results to drop (None for all owners)
+
+        Returns:
+            Number of dropped results
+        """
+        with self._lock:
+            keys = [
+                key for key, (_, (name, owner), _) in self._entries.items()
+                if (tool_name is None or name == tool_name) and (scope is None or owner == scope)
+            ]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class ToolExecutor:
+    """
+    Executes tool handlers in bounded pools with per-tool policies.
+
+    Policies are dictionaries with "timeout" (seconds, None for no limit),
+    "max_concurrency" (None for no per-tool limit), "isolation" ("thread" or
+    "process") and the caching policy ("cacheable", "cache_ttl",
+    "invalidation_key"). Policies configured with a handler apply to that
+    handler only, so registries sharing the executor do not override each
+    other; policies configured without one apply to every handler of the
+    tool. Unconfigured tools use the default timeout in the thread pool and
+    are not cached.
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 8,
+        max_processes: int = 2,
+        default_timeout: Optional[float] = 60.0,
+        cache: Optional[ToolCache] = None
+    ):
+        """
+        Initialize the executor.
+
+        Args:
+            max_threads: Size of the tool thread pool
+            max_processes: Size of the tool process pool (started on first use)
+            default_timeout: Timeout for tools without their own (None for no limit)
+            cache: Optional result cache for cacheable tools
+        """
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.default_timeout = default_timeout
+        self.cache = cache or ToolCache()
+        self.policies = {}
+        self.stats = {}
+        self._limits = {}
+        self._lock = threading.Lock()
+        self._threads = concurrent.futures.ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="vot-tool")
+        self._processes = None
+
+        logger.info(f"Initialized ToolExecutor ({max_threads} threads, {max_processes} processes)")
+
+    def configure(
+        self,
+        tool_name: str,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        isolation: str = ISOLATION_THREAD,
+        cacheable: bool = False,
+        cache_ttl: Optional[float] = None,
+        invalidation_key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        handler: Optional[Callable] = None
+    ) -> None:
+        """
+        Set the execution policy of a tool.
+
+        Args:
+            tool_name: Name of the tool
+            timeout: Timeout in seconds (defaults to the executor's default timeout)
+            max_concurrency: Maximum concurrent calls of the tool
+            isolation: "thread" or "process"
+            cacheable: Whether the tool is pure, so identical calls can reuse its result
+            cache_ttl: Seconds a cached result stays valid (None for no expiry)
+            invalidation_key: Optional function (tool arguments) -> value that changes
+                when cached results go stale (see ``file_mtimes``)
+            handler: Handler the policy applies to (None for every handler of the tool)
+        """
+        if isolation not in (ISOLATION_THREAD, ISOLATION_PROCESS):
+            raise ValueError(f"Unknown tool isolation: {isolation}")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        scope = self._scope(tool_name, handler)
+        with self._lock:
+            self.policies[scope] = {
+                "timeout": timeout if timeout is not None else self.default_timeout,
+                "max_concurrency": max_concurrency,
+                "isolation": isolation,
+                "cacheable": cacheable or cache_ttl is not None or invalidation_key is not None,
+                "cache_ttl": cache_ttl,
+                "invalidation_key": invalidation_key
+            }
+            self._limits[scope] = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+
+    def reset(self, tool_name: str, handler: Optional[Callable] = None) -> None:
+        """
+        Drop the policy of a tool, so it runs with the defaults again.
+
+        Args:
+            tool_name: Name of the tool
+            handler: Handler whose policy to drop (None for the policy configured
+                without a handler)
+        """
+        scope = self._scope(tool_name, handler)
+        with self._lock:
+            self.policies.pop(scope, None)
+            self._limits.pop(scope, None)
+
+    def get_policy(self, tool_name: str, handler: Optional[Callable] = None) -> Dict[str, Any]:
+        """Get the execution policy of a tool's handler, falling back to the tool's own policy."""
+        with self._lock:
+            scope = self._resolve(tool_name, handler)
+            return self.policies[scope] if scope is not None else {
+                "timeout": self.default_timeout, "max_concurrency": None, "isolation": ISOLATION_THREAD,
+                "cacheable": False, "cache_ttl": None, "invalidation_key": None
+            }
+
+    def execute(self, tool_name: str, handler: Callable, tool_args: Dict[str, Any]) -> Any:
+        """
+        Execute a tool and wait for its result.
+
+        Args:
+            tool_name: Name of the tool (selects its policy)
+            handler: Tool handler (called with the arguments as keyword arguments)
+            tool_args: Tool arguments
+
+        Returns:
+            The handler's result
+
+        Raises:
+            ToolTimeoutError: If the tool did not finish within its timeout
+            Exception: Any exception raised by the handler
+        """
+        policy = self.get_policy(tool_name, handler)
+        hit, result, cache_key = self._lookup(tool_name, handler, tool_args, policy)
+        if hit:
+            return result
+        deadline = self._deadline(policy)
+        start_time = time.time()
+
+        limit = self._limit(tool_name, handler)
+        if limit is not None and not limit.acquire(timeout=self._remaining(deadline)):
+            self._record(tool_name, start_time, start_time, timed_out=True)
+            raise ToolTimeoutError(f"Tool {tool_name} waited {policy['timeout']}s for a free slot")
+
+        run_time = time.time()
+        future = self._submit(policy, handler, tool_args, limit)
+        try:
+            result = future.result(timeout=self._remaining(deadline))
+        except concurrent.futures.TimeoutError:
+            self._cancel(tool_name, policy, future)
+            self._record(tool_name, start_time, run_time, timed_out=True)
+            raise ToolTimeoutError(f"Tool {tool_name} timed out after {policy['timeout']}s")
+        except BaseException:
+            self._record(tool_name, start_time, run_time, error=True)
+            raise
+
+        self._record(tool_name, start_time, run_time)
+        self._store(tool_name, handler, cache_key, result, policy)
+        return result
+
+    async def execute_async(self, tool_name: str, handler: Callable, tool_args: Dict[str, Any]) -> Any:
+        """
+        Execute a tool without blocking the event loop.
+
+        Coroutine handlers run on the event loop and are cancelled on timeout.
+        Cancelling the caller cancels the tool call.
+
+        Args:
+            tool_name: Name of the tool (selects its policy)
+            handler: Tool handler (function or coroutine function)
+            tool_args: Tool arguments
+
+        Returns:
+            The handler's result
+
+        Raises:
+            ToolTimeoutError: If the tool did not finish within its timeout
+            Exception: Any exception raised by the handler
+        """
+        policy = self.get_policy(tool_name, handler)
+        hit, result, cache_key = self._lookup(tool_name, handler, tool_args, policy)
+        if hit:
+            return result
+        deadline = self._deadline(policy)
+        start_time = time.time()
+
+        limit = self._limit(tool_name, handler)
+        if limit is not None and not await self._acquire_async(limit, deadline):
+            self._record(tool_name, start_time, start_time, timed_out=True)
+            raise ToolTimeoutError(f"Tool {tool_name} waited {policy['timeout']}s for a free slot")
+
+        run_time = time.time()
+        future = None
+        try:
+            if asyncio.iscoroutinefunction(handler):
+                try:
+                    result = await asyncio.wait_for(handler(**tool_args), self._remaining(deadline))
+                finally:
+                    if limit is not None:
+                        limit.release()
+            else:
+                # The slot is released by the pool once the call really finishes
+                future = self._submit(policy, handler, tool_args, limit)
+                result = await asyncio.wait_for(asyncio.wrap_future(future), self._remaining(deadline))
+        except asyncio.TimeoutError:
+            if future is not None:
+                self._cancel(tool_name, policy, future)
+            self._record(tool_name, start_time, run_time, timed_out=True)
+            raise ToolTimeoutError(f"Tool {tool_name} timed out after {policy['timeout']}s")
+        except BaseException:
+            self._record(tool_name, start_time, run_time, error=True)
+            raise
+
+        self._record(tool_name, start_time, run_time)
+        self._store(tool_name, handler, cache_key, result, policy)
+        return result
+
+    def _lookup(self, tool_name: str, handler: Callable, tool_args: Dict[str, Any],
+                policy: Dict[str, Any]) -> Tuple[bool, Any, Optional[str]]:
+        """Look up a cached result of a handler, returning (hit, result, cache key)."""
+        if not policy["cacheable"]:
+            return False, None, None
+        cache_key = self.cache.key(tool_name, tool_args, policy["invalidation_key"], handler_identity(handler))
+        hit, result = self.cache.get(cache_key)
+        if hit:
+            with self._lock:
+                self._tool_stats(tool_name)["cache_hits"] += 1
+        return hit, result, cache_key
+
+    def _store(self, tool_name: str, handler: Callable, cache_key: Optional[str], result: Any,
+               policy: Dict[str, Any]) -> None:
+        """Cache a successful result of a cacheable tool."""
+        if cache_key is not None and not is_error_result(result):
+            self.cache.put(cache_key, tool_name, result, policy["cache_ttl"], handler_identity(handler))
+
+    def invalidate(self, tool_name: Optional[str] = None, handler: Optional[Callable] = None) -> int:
+        """
+        Drop cached tool results, for example after a tool changed what others read.
+
+        Args:
+            tool_name: Tool whose results to drop (None for all tools)
+            handler: Handler whose results to drop (None for the results of every
+                handler, including other registries sharing the executor)
+
+        Returns:
+            Number of dropped results
+        """
+        return self.cache.invalidate(tool_name, handler_identity(handler) if handler is not None else None)
+
+    def _submit(self, policy: Dict[str, Any], handler: Callable, tool_args: Dict[str, Any],
+                limit: Optional[threading.BoundedSemaphore]) -> concurrent.futures.Future:
+        """Submit a handler to its pool; the concurrency slot is released when it finishes."""
+        try:
+            if policy["isolation"] == ISOLATION_PROCESS:
+                future = self._process_pool().submit(handler, **tool_args)
+            elif asyncio.iscoroutinefunction(handler):
+                future = self._threads.submit(lambda: asyncio.run(handler(**tool_args)))
+            else:
+                future = self._threads.submit(handler, **tool_args)
+        except BaseException:
+            if limit is not None:
+                limit.release()
+            raise
+        if limit is not None:
+            future.add_done_callback(lambda _: limit.release())
+        return future
+
+    def _cancel(self, tool_name: str, policy: Dict[str, Any], future: concurrent.futures.Future) -> None:
+        """Cancel a timed-out call, restarting the process pool if the call already runs there."""
+        if future.cancel():
+            return
+        if policy["isolation"] == ISOLATION_PROCESS:
+            logger.warning(f"Restarting the tool process pool to stop {tool_name}")
+            self._restart_process_pool()
+        else:
+            logger.warning(f"Tool {tool_name} is still running after its timeout")
+
+    def _process_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._processes is None:
+                self._processes = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_processes)
+            return self._processes
+
+    def _restart_process_pool(self) -> None:
+        """Terminate the pool's worker processes; other calls running there fail with BrokenProcessPool."""
+        with self._lock:
+            pool, self._processes = self._processes, None
+        if pool is None:
+            return
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _limit(self, tool_name: str, handler: Optional[Callable] = None) -> Optional[threading.BoundedSemaphore]:
+        with self._lock:
+            scope = self._resolve(tool_name, handler)
+            return self._limits.get(scope) if scope is not None else None
+
+    @staticmethod
+    def _scope(tool_name: str, handler: Optional[Callable]) -> Tuple[str, Optional[str]]:
+        """Key of a policy: the tool and its handler (None for every handler)."""
+        return tool_name, handler_identity(handler) if handler is not None else None
+
+    def _resolve(self, tool_name: str, handler: Optional[Callable]) -> Optional[Tuple[str, Optional[str]]]:
+        """Find the policy key of a handler, preferring its own policy over the tool's (lock held)."""
+        for scope in (self._scope(tool_name, handler), (tool_name, None)):
+            if scope in self.policies:
+                return scope
+        return None
+
+    @staticmethod
+    def _deadline(policy: Dict[str, Any]) -> Optional[float]:
+        return time.time() + policy["timeout"] if policy["timeout"] is not None else None
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return max(0.0, deadline - time.time()) if deadline is not None else None
+
+    async def _acquire_async(self, limit: threading.BoundedSemaphore, deadline: Optional[float]) -> bool:
+        """Wait for a concurrency slot without blocking the event loop."""
+        while not limit.acquire(blocking=False):
+            if deadline is not None and time.time() >= deadline:
+                return False
+            await asyncio.sleep(0.01)
+        return True
+
+    def _record(self, tool_name: str, start_time: float, run_time: float,
+                error: bool = False, timed_out: bool = False) -> None:
+        """Record the timing of a tool call."""
+        now = time.time()
+        with self._lock:
+            stats = self._tool_stats(tool_name)
+            stats["calls"] += 1
+            stats["errors"] += error
+            stats["timeouts"] += timed_out
+            stats["queue_time"] += run_time - start_time
+            stats["total_time"] += now - start_time
+            stats["latency"].add(now - start_time)
+
+    def _tool_stats(self, tool_name: str) -> Dict[str, Any]:
+        """Get the statistics of a tool (call with the lock held)."""
+        stats = self.stats.get(tool_name)
+        if stats is None:
+            stats = self.stats[tool_name] = {
+                "calls": 0, "cache_hits": 0, "errors": 0, "timeouts": 0, "queue_time": 0.0,
+                "total_time": 0.0, "latency": LatencyHistogram()
+            }
+        return stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get timing metrics per tool.
+
+        Returns:
+            Dictionary keyed by tool name with calls (executions), cache hits,
+            errors, timeouts, queue and total time, and latency percentiles
+        """
+        with self._lock:
+            return {
+                tool_name: {
+                    **{key: value for key, value in stats.items() if key != "latency"},
+                    "queue_time": round(stats["queue_time"], 3),
+                    "total_time": round(stats["total_time"], 3),
+                    "latency": stats["latency"].to_dict()
+                }
+                for tool_name, stats in self.stats.items()
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shut down the pools.
+
+        Args:
+            wait: Wait for running tools to finish
+        """
+        self._threads.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            pool, self._processes = self._processes, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> ToolExecutor:
+    """
+    Get the process-wide tool executor.
+
+    The pool sizes can be set with the VOT1_TOOL_THREADS and
+    VOT1_TOOL_PROCESSES environment variables.
+
+    Returns:
+        The shared ToolExecutor instance
+    """
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ToolExecutor(
+                max_threads=int(os.environ.get("VOT1_TOOL_THREADS", 8)),
+                max_processes=int(os.environ.get("VOT1_TOOL_PROCESSES", 2))
+            )
+        return _default_executor
@@ -0,0 +1,311 @@
+"""
+VOT1 Triple Store
+
+This module implements a compact in-memory RDF-style triple store for the
+OWL reasoner:
+
+1. Three nested indexes (subject-predicate-object, predicate-object-subject
+   and object-subject-predicate), so every lookup pattern touches only the
+   matching triples instead of scanning the graph
+2. Bulk loading under a single lock acquisition
+3. Case-insensitive term lookup for resolving names in natural language
+   (IRIs are also found by their local name, e.g. "Cat" for ".../animals#Cat")
+4. Persistence as JSON lines, written atomically
+
+Terms are plain strings; prefixed names such as "rdf:type" are used for
+vocabulary terms.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RDF_TYPE = "rdf:type"
+RDFS_SUBCLASS_OF = "rdfs:subClassOf"
+
+Triple = Tuple[str, str, str]
+
+# Full IRIs of the vocabulary terms stored under prefixed names
+VOCABULARY = {
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#type": RDF_TYPE,
+    "http://www.w3.org/2000/01/rdf-schema#subClassOf": RDFS_SUBCLASS_OF,
+}
+
+
+def local_name(term: str) -> str:
+    """
+    Get the local name of an IRI (its fragment or last path segment).
+
+    Args:
+        term: Term (IRI or plain name)
+
+    Returns:
+        The local name, or the term itself if it is not an IRI
+    """
+    if "://" not in term and not term.startswith("urn:"):
+        return term
+    return re.split(r"[#/:]", term.rstrip("#/"))[-1] or term
+
+
+def _index_add(index: Dict[str, Dict[str, Dict[str, None]]], first: str, second: str, third: str) -> None:
+    """Add a key path to a nested index (the leaves are insertion-ordered sets)."""
+    index.setdefault(first, {}).setdefault(second, {})[third] = None
+
+
+def _index_remove(index: Dict[str, Dict[str, Dict[str, None]]], first: str, second: str, third: str) -> None:
+    """Remove a key path from a nested index, dropping emptied levels."""
+    level = index[first]
+    del level[second][third]
+    if not level[second]:
+        del level[second]
+        if not level:
+            del index[first]
+
+
+class TripleStore:
+    """
+    Indexed set of (subject, predicate, object) triples.
+
+    The store is safe to share across threads; queries return lists.
+    """
+
+    def __init__(self, triples: Optional[Iterable[Triple]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            triples: Optional triples to load
+        """
+        self._spo = {}
+        self._pos = {}
+        self._osp = {}
+        self._names = {}
+        self._size = 0
+        self._lock = threading.RLock()
+        if triples is not None:
+            self.add_many(triples)
+
+    def _add(self, subject: str, predicate: str, obj: str) -> bool:
+        """Add a triple (with the lock held)."""
+        objects = self._spo.get(subject, {}).get(predicate)
+        if objects is not None and obj in objects:
+            return False
+        _index_add(self._spo, subject, predicate, obj)
+        _index_add(self._pos, predicate, obj, subject)
+        _index_add(self._osp, obj, subject, predicate)
+        for term in (subject, obj):
+            for name in {term.lower(), local_name(term).lower()}:
+                self._names.setdefault(name, {})[term] = None
+        self._size += 1
+        return True
+
+    def add(self, triple: Triple) -> bool:
+        """
+        Add a triple.
+
+        Args:
+            triple: (subject, predicate, object)
+
+        Returns:
+            True if the triple was new
+        """
+        subject, predicate, obj = triple
+        with self._lock:
+            return self._add(subject, predicate, obj)
+
+    def add_many(self, triples: Iterable[Triple]) -> int:
+        """
+        Add triples in bulk.
+
+        Args:
+            triples: Triples to add
+
+        Returns:
+            Number of new triples
+        """
+        added = 0
+        with self._lock:
+            for subject, predicate, obj in triples:
+                added += self._add(subject, predicate, obj)
+        return added
+
+    def remove(self, triple: Triple) -> bool:
+        """
+        Remove a triple.
+
+        Args:
+            triple: (subject, predicate, object)
+
+        Returns:
+            True if the triple was present
+        """
+        subject, predicate, obj = triple
+        with self._lock:
+            if obj not in self._spo.get(subject, {}).get(predicate, {}):
+                return False
+            _index_remove(self._spo, subject, predicate, obj)
+            _index_remove(self._pos, predicate, obj, subject)
+            _index_remove(self._osp, obj, subject, predicate)
+            for term in (subject, obj):
+                if term not in self._spo and term not in self._osp:
+                    for name in {term.lower(), local_name(term).lower()}:
+                        names = self._names.get(name, {})
+                        names.pop(term, None)
+                        if not names:
+                            self._names.pop(name, None)
+            self._size -= 1
+            return True
+
+    def _match(self, subject: Optional[str], predicate: Optional[str], obj: Optional[str]) -> Iterator[Triple]:
+        """Yield the triples matching a pattern through the most selective index."""
+        if subject is not None:
+            by_predicate = self._spo.get(subject, {})
+            if predicate is not None:
+                objects = by_predicate.get(predicate, {})
+                if obj is not None:
+                    if obj in objects:
+                        yield subject, predicate, obj
+                    return
+                for o in objects:
+                    yield subject, predicate, o
+            elif obj is not None:
+                for p in self._osp.get(obj, {}).get(subject, {}):
+                    yield subject, p, obj
+            else:
+                for p, objects in by_predicate.items():
+                    for o in objects:
+                        yield subject, p, o
+        elif predicate is not None:
+            by_object = self._pos.get(predicate, {})
+            if obj is not None:
+                for s in by_object.get(obj, {}):
+                    yield s, predicate, obj
+            else:
+                for o, subjects in by_object.items():
+                    for s in subjects:
+                        yield s, predicate, o
+        elif obj is not None:
+            for s, predicates in self._osp.get(obj, {}).items():
+                for p in predicates:
+                    yield s, p, obj
+        else:
+            for s, by_predicate in self._spo.items():
+                for p, objects in by_predicate.items():
+                    for o in objects:
+                        yield s, p, o
+
+    def triples(self, subject: Optional[str] = None, predicate: Optional[str] = None,
+                obj: Optional[str] = None) -> List[Triple]:
+        """
+        Get the triples matching a pattern (None matches anything).
+
+        Args:
+            subject: Subject to match
+            predicate: Predicate to match
+            obj: Object to match
+
+        Returns:
+            Matching triples in insertion order per index
+        """
+        with self._lock:
+            return list(self._match(subject, predicate, obj))
+
+    def subjects(self, predicate: Optional[str] = None, obj: Optional[str] = None) -> List[str]:
+        """Get the distinct subjects of the triples matching a predicate and object."""
+        return list(dict.fromkeys(s for s, _, _ in self.triples(None, predicate, obj)))
+
+    def objects(self, subject: Optional[str] = None, predicate: Optional[str] = None) -> List[str]:
+        """Get the distinct objects of the triples matching a subject and predicate."""
+        return list(dict.fromkeys(o for _, _, o in self.triples(subject, predicate, None)))
+
+    def count(self, subject: Optional[str] = None, predicate: Optional[str] = None,
+              obj: Optional[str] = None) -> int:
+        """Count the triples matching a pattern."""
+        if subject is None and predicate is None and obj is None:
+            return len(self)
+        with self._lock:
+            return sum(1 for _ in self._match(subject, predicate, obj))
+
+    def find_terms(self, name: str) -> List[str]:
+        """
+        Find subject or object terms by case-insensitive name or IRI local name.
+
+        Args:
+            name: Term name
+
+        Returns:
+            Matching terms
+        """
+        with self._lock:
+            return list(self._names.get(name.lower(), {}))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with triple, subject, predicate and object counts
+        """
+        with self._lock:
+            return {
+                "triples": self._size,
+                "subjects": len(self._spo),
+                "predicates": len(self._pos),
+                "objects": len(self._osp)
+            }
+
+    def clear(self) -> None:
+        """Remove all triples."""
+        with self._lock:
+            self._spo, self._pos, self._osp, self._names = {}, {}, {}, {}
+            self._size = 0
+
+    def save(self, path: str) -> None:
+        """
+        Save the triples as JSON lines (atomically replacing the file).
+
+        Args:
+            path: File path
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with self._lock:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for triple in self._match(None, None, None):
+                    f.write(json.dumps(triple, ensure_ascii=False) + "\n")
+        os.replace(temp_path, path)
+
+    def load(self, path: str) -> int:
+        """
+        Load triples saved with save.
+
+        Args:
+            path: File path
+
+        Returns:
+            Number of new triples
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            added = self.add_many(tuple(json.loads(line)) for line in f if line.strip())
+        logger.info(f"Loaded {added} triples from {path}")
+        return added
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, triple: Triple) -> bool:
+        subject, predicate, obj = triple
+        with self._lock:
+            return obj in self._spo.get(subject, {}).get(predicate, {})
+
+    def __iter__(self) -> Iterator[Triple]:
+        return iter(self.triples())
@@ -0,0 +1,463 @@
+"""
+VOT1 Usage Ledger
+
+This module implements a unified usage ledger for model requests. Every
+provider call is recorded as one entry with:
+
+1. Provider, model and workflow (e.g. "generate", "swarm", "code_analysis")
+2. Input, output, cache-creation and cache-read tokens
+3. Latency split into queue time (rate limiting), time to first token and total
+4. Cost, priced from the model profiles used by the ModelRouter
+
+Entries are aggregated per model and per workflow, including latency
+histograms, and can optionally be persisted to SQLite so that spend can be
+analyzed across runs.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+from vot1.model_router import ModelRouter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+# Prompt caching prices relative to the base input price
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+
+# Batch requests are billed at half the standard price
+BATCH_MULTIPLIER = 0.5
+
+
+def estimate_cost(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_creation_input_tokens: int = 0,
+    cache_read_input_tokens: int = 0,
+    batch: bool = False
+) -> float:
+    """
+    Price a request from the model profile.
+
+    Args:
+        model: Model identifier
+        input_tokens: Uncached input tokens
+        output_tokens: Output tokens
+        cache_creation_input_tokens: Input tokens written to the prompt cache
+        cache_read_input_tokens: Input tokens read from the prompt cache
+        batch: Whether the request was served through the batch API
+
+    Returns:
+        Cost in USD
+    """
+    profile = ModelRouter.MODEL_PROFILES.get(model, ModelRouter.DEFAULT_PROFILE)
+    input_price = profile["input_cost_per_1k"] / 1000
+    cost = (
+        input_tokens * input_price
+        + cache_creation_input_tokens * input_price * CACHE_WRITE_MULTIPLIER
+        + cache_read_input_tokens * input_price * CACHE_READ_MULTIPLIER
+        + output_tokens * profile["output_cost_per_1k"] / 1000
+    )
+    return cost * BATCH_MULTIPLIER if batch else cost
+
+
+def extract_usage(response: Any) -> Dict[str, int]:
+    """
+    Read token usage from an API response object or response dictionary.
+
+    Supports Anthropic-style (input_tokens/output_tokens) and OpenAI-style
+    (prompt_tokens/completion_tokens) usage fields.
+
+    Args:
+        response: Provider response (object with .usage or dict with "usage")
+
+    Returns:
+        Dictionary with input, output and cache token counts
+    """
+    usage = response.get("usage") if isinstance(response, dict) else getattr(response, "usage", None)
+    if usage is None:
+        return {"input_tokens": 0, "output_tokens": 0, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+
+    def field(*names):
+        for name in names:
+            value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+            if isinstance(value, (int, float)):
+                return int(value)
+        return 0
+
+    return {
+        "input_tokens": field("input_tokens", "prompt_tokens"),
+        "output_tokens": field("output_tokens", "completion_tokens"),
+        "cache_creation_input_tokens": field("cache_creation_input_tokens"),
+        "cache_read_input_tokens": field("cache_read_input_tokens"),
+    }
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram with a bounded sample window for percentiles.
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        Initialize the histogram.
+
+        Args:
+            window: Number of recent samples kept for percentile estimates
+        """
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.samples = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        """Add a latency sample in seconds."""
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.samples.append(value)
+        self.total += value
+        self.count += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Get a percentile (0-100) of the recent samples."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize the histogram."""
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": {
+                ("+Inf" if bound == float("inf") else str(bound)): count
+                for bound, count in zip(LATENCY_BUCKETS, self.counts)
+            },
+        }
+
+
+class UsageLedger:
+    """
+    Records per-request usage and aggregates it per model and workflow.
+    """
+
+    TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+    def __init__(self, db_path: Optional[str] = None, history_size: int = 10000):
+        """
+        Initialize the usage ledger.
+
+        Args:
+            db_path: Optional SQLite path for persisting entries
+            history_size: Number of recent entries kept in memory
+        """
+        self.db_path = db_path
+        self.entries = deque(maxlen=history_size)
+        self.models = {}
+        self.workflows = {}
+        self._lock = threading.Lock()
+        self._db = None
+
+        if db_path:
+            self._init_db()
+
+        logger.info(f"Initialized UsageLedger{' at ' + db_path if db_path else ''}")
+
+    def _init_db(self) -> None:
+        """Create the usage table."""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS usage (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                provider TEXT,
+                model TEXT,
+                workflow TEXT,
+                input_tokens INTEGER,
+                output_tokens INTEGER,
+                cache_creation_input_tokens INTEGER,
+                cache_read_input_tokens INTEGER,
+                queue_time REAL,
+                ttft REAL,
+                total_time REAL,
+                cost REAL,
+                success INTEGER,
+                metadata TEXT
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_usage_model ON usage (model)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_usage_workflow ON usage (workflow)")
+        self._db.commit()
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cache_creation_input_tokens: int = 0,
+        cache_read_input_tokens: int = 0,
+        queue_time: float = 0.0,
+        ttft: Optional[float] = None,
+        total_time: float = 0.0,
+        workflow: Optional[str] = None,
+        success: bool = True,
+        batch: bool = False,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Record a single provider request.
+
+        Args:
+            provider: Provider name
+            model: Model that served the request
+            input_tokens: Uncached input tokens
+            output_tokens: Output tokens
+            cache_creation_input_tokens: Input tokens written to the prompt cache
+            cache_read_input_tokens: Input tokens read from the prompt cache
+            queue_time: Seconds spent waiting for the rate limiter
+            ttft: Seconds until the first token (streaming requests only)
+            total_time: Seconds from sending the request to the full response
+            workflow: Name of the workflow that issued the request
+            success: Whether the request succeeded
+            batch: Whether the request was served through the batch API
+            metadata: Optional additional metadata
+
+        Returns:
+            The recorded entry
+        """
+        entry = {
+            "timestamp": time.time(),
+            "provider": provider,
+            "model": model,
+            "workflow": workflow or "default",
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cache_creation_input_tokens": cache_creation_input_tokens,
+            "cache_read_input_tokens": cache_read_input_tokens,
+            "queue_time": queue_time,
+            "ttft": ttft,
+            "total_time": total_time,
+            "cost": estimate_cost(
+                model, input_tokens, output_tokens, cache_creation_input_tokens, cache_read_input_tokens, batch
+            ),
+            "success": success,
+            "metadata": metadata or {},
+        }
+
+        with self._lock:
+            self.entries.append(entry)
+            self._aggregate(self.models, model, entry)
+            self._aggregate(self.workflows, entry["workflow"], entry)
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT INTO usage (timestamp, provider, model, workflow, input_tokens, output_tokens, "
+                        "cache_creation_input_tokens, cache_read_input_tokens, queue_time, ttft, total_time, "
+                        "cost, success, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            entry["timestamp"], provider, model, entry["workflow"], input_tokens, output_tokens,
+                            cache_creation_input_tokens, cache_read_input_tokens, queue_time, ttft, total_time,
+                            entry["cost"], int(success), json.dumps(entry["metadata"], default=str)
+                        )
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.error(f"Error persisting usage entry: {e}")
+
+        return entry
+
+    def record_response(
+        self,
+        provider: str,
+        model: str,
+        response: Any,
+        queue_time: float = 0.0,
+        ttft: Optional[float] = None,
+        total_time: float = 0.0,
+        workflow: Optional[str] = None,
+        batch: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Record a request from its provider response.
+
+        Args:
+            provider: Provider name
+            model: Model that served the request
+            response: Provider response object or dictionary
+            queue_time: Seconds spent waiting for the rate limiter
+            ttft: Seconds until the first token (streaming requests only)
+            total_time: Seconds from sending the request to the full response
+            workflow: Name of the workflow that issued the request
+            batch: Whether the request was served through the batch API
+
+        Returns:
+            The recorded entry
+        """
+        return self.record(
+            provider,
+            model,
+            queue_time=queue_time,
+            ttft=ttft,
+            total_time=total_time,
+            workflow=workflow,
+            batch=batch,
+            **extract_usage(response)
+        )
+
+    def _aggregate(self, groups: Dict[str, Dict[str, Any]], key: str, entry: Dict[str, Any]) -> None:
+        """Add an entry to an aggregate group."""
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                "calls": 0,
+                "errors": 0,
+                "cost": 0.0,
+                **{field: 0 for field in self.TOKEN_FIELDS},
+                "queue_time": LatencyHistogram(),
+                "ttft": LatencyHistogram(),
+                "total_time": LatencyHistogram(),
+            }
+
+        group["calls"] += 1
+        if not entry["success"]:
+            group["errors"] += 1
+        group["cost"] += entry["cost"]
+        for field in self.TOKEN_FIELDS:
+            group[field] += entry[field]
+        group["queue_time"].add(entry["queue_time"])
+        if entry["ttft"] is not None:
+            group["ttft"].add(entry["ttft"])
+        group["total_time"].add(entry["total_time"])
+
+    @staticmethod
+    def _summarize(group: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: value.to_dict() if isinstance(value, LatencyHistogram) else (
+                round(value, 6) if isinstance(value, float) else value
+            )
+            for key, value in group.items()
+        }
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        Get aggregated usage per model and per workflow.
+
+        Returns:
+            Dictionary with "models", "workflows" and "totals"
+        """
+        with self._lock:
+            models = {model: self._summarize(group) for model, group in self.models.items()}
+            workflows = {workflow: self._summarize(group) for workflow, group in self.workflows.items()}
+
+        totals = {"calls": 0, "errors": 0, "cost": 0.0, **{field: 0 for field in self.TOKEN_FIELDS}}
+        for summary in models.values():
+            for key in totals:
+                totals[key] += summary[key]
+        totals["cost"] = round(totals["cost"], 6)
+
+        return {"models": models, "workflows": workflows, "totals": totals}
+
+    def get_entries(self, limit: Optional[int] = 100) -> List[Dict[str, Any]]:
+        """
+        Get the most recent entries.
+
+        Args:
+            limit: Maximum number of entries to return (None for all kept entries)
+
+        Returns:
+            List of entries, newest last
+        """
+        with self._lock:
+            entries = list(self.entries)
+        return entries[-limit:] if limit else entries
+
+    def query(self, group_by: str = "model", since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Aggregate persisted usage, including entries from earlier runs.
+
+        Args:
+            group_by: Column to group by ("model", "workflow" or "provider")
+            since: Optional Unix timestamp to restrict the query to
+
+        Returns:
+            List of aggregates ordered by cost, most expensive first
+        """
+        if self._db is None:
+            raise ValueError("Usage ledger has no database; pass db_path to persist usage")
+        if group_by not in ("model", "workflow", "provider"):
+            raise ValueError(f"Cannot group usage by {group_by}")
+
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {group_by}, COUNT(*), SUM(1 - success), SUM(input_tokens), SUM(output_tokens), "
+                f"SUM(cache_creation_input_tokens), SUM(cache_read_input_tokens), SUM(cost), "
+                f"AVG(queue_time), AVG(total_time) FROM usage WHERE timestamp >= ? "
+                f"GROUP BY {group_by} ORDER BY SUM(cost) DESC",
+                (since or 0,)
+            ).fetchall()
+
+        return [
+            {
+                group_by: row[0],
+                "calls": row[1],
+                "errors": row[2],
+                "input_tokens": row[3],
+                "output_tokens": row[4],
+                "cache_creation_input_tokens": row[5],
+                "cache_read_input_tokens": row[6],
+                "cost": round(row[7], 6),
+                "avg_queue_time": row[8],
+                "avg_total_time": row[9],
+            }
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+_default_ledger = None
+_default_ledger_lock = threading.Lock()
+
+
+def get_usage_ledger() -> UsageLedger:
+    """
+    Get the process-wide usage ledger.
+
+    Entries are persisted when the VOT1_USAGE_DB environment variable points
+    at a SQLite file.
+
+    Returns:
+        The shared UsageLedger instance
+    """
+    global _default_ledger
+    with _default_ledger_lock:
+        if _default_ledger is None:
+            _default_ledger = UsageLedger(db_path=os.environ.get("VOT1_USAGE_DB"))
+        return _default_ledger
@@ -1,18 +1,37 @@
 """
-VOT1 Model Control Protocol (VOT-MCP) - Test Implementation
+VOT1 Model Control Protocol (VOT-MCP)
 
-This module provides a simplified implementation of the VOT-MCP for testing
-the self-improvement workflow. It simulates AI model responses without making
-actual API calls.
+This module implements the VOT-MCP used by the self-improvement workflow and
+the automation scripts. Requests are routed to pluggable provider backends
+(see ``vot1.mcp_backends``):
+
+1. Anthropic, Perplexity and OpenAI-compatible (local) servers
+2. A mock backend for offline runs, used when a provider has no credentials
+   or ``config["mock"]`` is set
+
+The implementation is async-first: the synchronous API runs requests on a
+background event loop, so connections are pooled across calls. Requests go
+to the backend serving the requested model and fail over to the other
+configured backend through the shared resilience layer.
+
+``process_request_stream`` yields thinking and content chunks as they are
+generated; in the streaming execution mode every request is streamed, so
+time to first token is measured for the whole workflow.
 """
 
-import os
-import json
 import logging
+import threading
 import time
 import uuid
 import asyncio
-from typing import Dict, List, Any, Optional, Union, Callable
+import functools
+from typing import Dict, List, Any, Optional, Union, Callable, AsyncIterable, AsyncIterator, Iterable, Tuple
+
+from vot1.mcp_backends import ModelBackend, MockBackend, create_backend
+from vot1.resilience import ResilientCaller, RetryPolicy
+from vot1.token_estimator import get_token_estimator
+from vot1.tool_executor import ToolExecutor, get_tool_executor
+from vot1.usage import UsageLedger, estimate_cost, get_usage_ledger
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,16 +39,18 @@ logger = logging.getLogger(__name__)
 
 class VotModelControlProtocol:
     """
-    Simplified VOT-MCP implementation for testing purposes.
+    VOT-MCP implementation with primary/secondary provider routing.
     
-    This class simulates AI model responses without making actual API calls,
-    allowing the self-improvement workflow to be tested without external dependencies.
+    Without provider credentials (or with ``config["mock"]``) the mock backend
+    simulates model responses, so the self-improvement workflow can run
+    without external dependencies.
     """
     
     # Provider constants
     PROVIDER_ANTHROPIC = "anthropic"
     PROVIDER_PERPLEXITY = "perplexity"
     PROVIDER_CUSTOM = "custom"
+    PROVIDER_MOCK = "mock"
     
     # Execution mode constants
     MODE_SYNC = "sync"
@@ -45,7 +66,12 @@ class VotModelControlProtocol:
         tools: Optional[List[Dict[str, Any]]] = None,
         memory_manager = None,
         execution_mode: str = MODE_SYNC,
-        config: Optional[Dict[str, Any]] = None
+        config: Optional[Dict[str, Any]] = None,
+        usage_ledger: Optional[UsageLedger] = None,
+        primary_backend: Optional[ModelBackend] = None,
+        secondary_backend: Optional[ModelBackend] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        tool_executor: Optional[ToolExecutor] = None
     ):
         """
         Initialize the VOT-MCP.
@@ -58,7 +84,13 @@ class VotModelControlProtocol:
             tools: Tool definitions for the models
             memory_manager: Optional memory manager for context
             execution_mode: Execution mode (sync, async, streaming)
-            config: Additional configuration options
+            config: Additional configuration options ("mock", "mock_latency",
+                "failover", "replay", and per-provider backend options under "backends")
+            usage_ledger: Optional usage ledger (defaults to the process-wide ledger)
+            primary_backend: Optional pre-configured backend for the primary provider
+            secondary_backend: Optional pre-configured backend for the secondary provider
+            retry_policy: Optional retry policy for transient provider errors
+            tool_executor: Optional tool executor (defaults to the process-wide executor)
         """
         self.primary_provider = primary_provider
         self.primary_model = primary_model
@@ -68,27 +100,99 @@ class VotModelControlProtocol:
         self.memory_manager = memory_manager
         self.execution_mode = execution_mode
         self.config = config or {}
+        self.usage_ledger = usage_ledger or get_usage_ledger()
+        self.token_estimator = get_token_estimator()
+        self.resilience = ResilientCaller("mcp", retry_policy=retry_policy)
         
-        # Tool handlers
+        # Tool handlers, run with per-tool timeouts and concurrency limits
         self.tool_handlers = {}
+        self.tool_executor = tool_executor or get_tool_executor()
         
-        logger.info(f"Initialized VOT-MCP with {primary_provider}/{primary_model}")
+        # Provider backends
+        self.primary_backend = primary_backend or self._create_backend(primary_provider)
+        self.secondary_backend = None
         if secondary_provider and secondary_model:
-            logger.info(f"Secondary model: {secondary_provider}/{secondary_model}")
+            self.secondary_backend = secondary_backend or self._create_backend(secondary_provider)
+        
+        # Background event loop serving the synchronous API
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        
+        logger.info(f"Initialized VOT-MCP with {primary_provider}/{primary_model} ({self.primary_backend.provider} backend)")
+        if self.secondary_backend:
+            logger.info(f"Secondary model: {secondary_provider}/{secondary_model} ({self.secondary_backend.provider} backend)")
         
         # Check for thinking tokens configuration
         self.max_thinking_tokens = self.config.get("max_thinking_tokens", 0)
         if self.max_thinking_tokens:
             logger.info(f"Max thinking tokens: {self.max_thinking_tokens}")
     
-    def register_tool(self, tool_name: str, handler: Callable) -> None:
+    def _create_backend(self, provider: str) -> ModelBackend:
+        """
+        Create the backend for a provider, falling back to the mock backend.
+        
+        With ``config["replay"]`` ({"path", "mode", "latency", "latency_scale"})
+        the backend is wrapped to record or replay its responses.
+        
+        Args:
+            provider: Provider name
+            
+        Returns:
+            Model backend
+        """
+        replay = self.config.get("replay")
+        if replay:
+            from vot1.replay import RecordReplayBackend, ReplayStore, MODE_REPLAY
+            
+            mode = replay.get("mode", MODE_REPLAY)
+            return RecordReplayBackend(
+                ReplayStore(replay["path"]),
+                backend=None if mode == MODE_REPLAY else self._create_live_backend(provider),
+                mode=mode,
+                latency=replay.get("latency", "recorded"),
+                latency_scale=replay.get("latency_scale", 1.0),
+                provider=provider
+            )
+        return self._create_live_backend(provider)
+    
+    def _create_live_backend(self, provider: str) -> ModelBackend:
+        """Create the backend for a provider, falling back to the mock backend."""
+        if not self.config.get("mock") and provider != self.PROVIDER_MOCK:
+            try:
+                return create_backend(provider, **self.config.get("backends", {}).get(provider, {}))
+            except (ValueError, ImportError) as e:
+                logger.warning(f"{provider} backend unavailable ({e}); responses will be simulated")
+        
+        return MockBackend(
+            responder=self._generate_mock_response,
+            thinker=self._generate_mock_thinking,
+            latency=self.config.get("mock_latency", 0.0)
+        )
+    
+    def register_tool(
+        self,
+        tool_name: str,
+        handler: Callable,
+        **policy
+    ) -> None:
         """
         Register a handler for a tool.
         
         Args:
             tool_name: Name of the tool
             handler: Function to handle tool requests
+            **policy: Optional execution and caching policy for ToolExecutor.configure
+                (timeout, max_concurrency, isolation, cacheable, cache_ttl, invalidation_key);
+                without one the tool runs with the executor's defaults
         """
+        previous = self.tool_handlers.get(tool_name)
+        if previous is not None:
+            # Re-registering must not keep the policy of the replaced handler
+            self.tool_executor.reset(tool_name, previous)
+        if policy:
+            self.tool_executor.configure(tool_name, handler=handler, **policy)
+        else:
+            self.tool_executor.reset(tool_name, handler)
         self.tool_handlers[tool_name] = handler
         logger.info(f"Registered handler for tool: {tool_name}")
     
@@ -98,10 +202,11 @@ class VotModelControlProtocol:
         system: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 1024,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Process a request with the primary model.
+        Process a request with the primary model (or an explicit model override).
         
         Args:
             prompt: The user prompt
@@ -109,34 +214,14 @@ class VotModelControlProtocol:
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             context: Optional additional context
+            model: Optional model override (defaults to the primary model)
             
         Returns:
             Response data
         """
-        # Log the request
-        logger.info(f"Processing request (sync) with {self.primary_provider}/{self.primary_model}")
-        logger.debug(f"Prompt: {prompt[:100]}...")
-        
-        # Simulate thinking with max tokens
-        if self.max_thinking_tokens:
-            thinking = self._generate_mock_thinking(prompt, context)
-            logger.debug(f"Generated thinking stream with {len(thinking)} characters")
-        
-        # Generate mock response
-        response = self._generate_mock_response(prompt, system, context)
-        
-        return {
-            "id": str(uuid.uuid4()),
-            "model": self.primary_model,
-            "provider": self.primary_provider,
-            "content": response,
-            "usage": {
-                "prompt_tokens": len(prompt) // 4,
-                "completion_tokens": len(response) // 4,
-                "total_tokens": (len(prompt) + len(response)) // 4
-            },
-            "created": int(time.time())
-        }
+        return self._run_sync(
+            self.process_request_async(prompt, system, temperature, max_tokens, context, model)
+        )
     
     async def process_request_async(
         self,
@@ -144,10 +229,15 @@ class VotModelControlProtocol:
         system: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 1024,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Process a request asynchronously with the primary model.
+        Process a request asynchronously with the primary model (or an explicit model override).
+        
+        A request for the secondary model is served by the secondary backend.
+        When the serving backend fails, the request fails over to the other
+        configured backend (unless ``config["failover"]`` is False).
         
         Args:
             prompt: The user prompt
@@ -155,37 +245,396 @@ class VotModelControlProtocol:
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             context: Optional additional context
+            model: Optional model override (defaults to the primary model)
             
         Returns:
-            Response data
+            Response data (with an "error" key if every backend failed)
         """
+        if self.execution_mode == self.MODE_STREAMING:
+            async for chunk in self.process_request_stream(prompt, system, temperature, max_tokens, context, model):
+                if chunk["type"] == "done":
+                    return chunk["response"]
+        
+        model = model or self.primary_model
+        start_time = time.time()
+        request = self._build_request(prompt, system, temperature, max_tokens, context)
+        candidates = self._route(model)
+        
         # Log the request
-        logger.info(f"Processing request (async) with {self.primary_provider}/{self.primary_model}")
+        logger.info(f"Processing request with {candidates[0][0].provider}/{model}")
         logger.debug(f"Prompt: {prompt[:100]}...")
         
-        # Simulate thinking with max tokens
-        if self.max_thinking_tokens:
-            thinking = self._generate_mock_thinking(prompt, context)
-            logger.debug(f"Generated thinking stream with {len(thinking)} characters")
+        try:
+            model, (backend, result) = await self.resilience.execute_async([
+                (candidate_model, functools.partial(self._generate, backend, {**request, "model": candidate_model}))
+                for backend, candidate_model in candidates
+            ])
+        except Exception as e:
+            logger.error(f"Error processing request with {model}: {e}")
+            return self._error_response(model, candidates[0][0].provider, str(e))
+        
+        return self._build_response(backend, model, prompt, result, context, start_time)
+    
+    async def process_request_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        context: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a request, yielding thinking and content chunks as they are generated.
+        
+        Chunks are {"type": "thinking" | "content", "text": ...}. The last item
+        is {"type": "done", "response": ...} with the complete response data,
+        including "ttft" (seconds until the first chunk). The backend reads
+        only a bounded number of chunks ahead of the consumer, and closing the
+        iterator early (for example on obviously bad output) cancels the request.
+        
+        A backend failing before its first chunk fails over to the next
+        candidate; a failure after chunks were yielded ends the stream with an
+        error response.
+        
+        Args:
+            prompt: The user prompt
+            system: Optional system prompt
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            context: Optional additional context
+            model: Optional model override (defaults to the primary model)
+            
+        Yields:
+            Thinking and content chunks, then the "done" item
+        """
+        model = model or self.primary_model
+        start_time = time.time()
+        request = self._build_request(prompt, system, temperature, max_tokens, context)
+        candidates = self._route(model)
+        
+        logger.info(f"Streaming request with {candidates[0][0].provider}/{model}")
+        logger.debug(f"Prompt: {prompt[:100]}...")
+        
+        error = None
+        for backend, candidate_model in candidates:
+            ttft = None
+            try:
+                async for chunk in backend.stream({**request, "model": candidate_model}):
+                    if chunk["type"] == "result":
+                        response = self._build_response(
+                            backend, candidate_model, prompt, chunk["result"], context, start_time, ttft
+                        )
+                        yield {"type": "done", "response": response}
+                        return
+                    if ttft is None:
+                        ttft = time.time() - start_time
+                    yield chunk
+                error = RuntimeError(f"{backend.provider} stream ended without a result")
+            except Exception as e:
+                error = e
+            logger.error(f"Error streaming request with {backend.provider}/{candidate_model}: {error}")
+            if ttft is not None:
+                break
+        
+        yield {"type": "done", "response": self._error_response(model, candidates[0][0].provider, str(error))}
+    
+    def process_batch(
+        self,
+        requests: Iterable[Union[str, Dict[str, Any]]],
+        max_concurrency: int = 8,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Process a batch of requests concurrently and return the responses in input order.
+        
+        Args:
+            requests: Prompts or process_request keyword dictionaries
+            max_concurrency: Maximum number of requests in flight
+            timeout: Optional per-request timeout in seconds
+            
+        Returns:
+            List of response data, one per request
+        """
+        async def collect():
+            responses = {}
+            async for index, response in self.process_batch_async(requests, max_concurrency, timeout):
+                responses[index] = response
+            return [responses[index] for index in sorted(responses)]
+        
+        return self._run_sync(collect())
+    
+    async def process_batch_async(
+        self,
+        requests: Union[Iterable[Union[str, Dict[str, Any]]], AsyncIterable[Union[str, Dict[str, Any]]]],
+        max_concurrency: int = 8,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Process a batch of requests concurrently, yielding responses as they complete.
+        
+        Requests are pulled from ``requests`` (a list or an async iterator) only
+        as workers free up, so at most ``max_concurrency`` requests are in
+        flight and a slow consumer holds back new requests. A request may set
+        its own "timeout"; a timed out or failed request yields a response with
+        an "error" key. Closing the iterator early, or a request that cannot be
+        processed at all, cancels the requests in flight and closes ``requests``.
+        
+        Args:
+            requests: Prompts or process_request_async keyword dictionaries
+            max_concurrency: Maximum number of requests in flight
+            timeout: Optional per-request timeout in seconds
+            
+        Yields:
+            Tuples of (request index, response data) in completion order
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
         
-        # Simulate some delay
-        await asyncio.sleep(0.5)
+        source = self._enumerate_requests(requests)
+        source_lock = asyncio.Lock()
+        results = asyncio.Queue(maxsize=max_concurrency)
         
-        # Generate mock response
-        response = self._generate_mock_response(prompt, system, context)
+        async def worker():
+            try:
+                while True:
+                    async with source_lock:
+                        item = await source.__anext__()
+                    index, request = item
+                    await results.put((index, await self._process_batch_item(request, timeout)))
+            except StopAsyncIteration:
+                await results.put(None)
+            except Exception as e:
+                await results.put(e)
         
+        workers = [asyncio.create_task(worker()) for _ in range(max_concurrency)]
+        try:
+            finished = 0
+            while finished < len(workers):
+                item = await results.get()
+                if item is None:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await source.aclose()
+    
+    @staticmethod
+    async def _enumerate_requests(requests) -> AsyncIterator[Tuple[int, Any]]:
+        """Enumerate a list or async iterator of requests, closing the async iterator when done."""
+        index = 0
+        if hasattr(requests, "__aiter__"):
+            try:
+                async for request in requests:
+                    yield index, request
+                    index += 1
+            finally:
+                if hasattr(requests, "aclose"):
+                    await requests.aclose()
+        else:
+            for request in requests:
+                yield index, request
+                index += 1
+    
+    async def _process_batch_item(self, request: Union[str, Dict[str, Any]], timeout: Optional[float]) -> Dict[str, Any]:
+        """Process a single batch request with its timeout."""
+        request = {"prompt": request} if isinstance(request, str) else dict(request)
+        timeout = request.pop("timeout", timeout)
+        try:
+            return await asyncio.wait_for(self.process_request_async(**request), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Batch request timed out after {timeout}s")
+            model = request.get("model") or self.primary_model
+            return self._error_response(model, self._route(model)[0][0].provider, f"Request timed out after {timeout}s")
+    
+    def _error_response(self, model: str, provider: str, error: str) -> Dict[str, Any]:
+        """Build the response data for a failed request."""
         return {
             "id": str(uuid.uuid4()),
-            "model": self.primary_model,
-            "provider": self.primary_provider,
-            "content": response,
+            "model": model,
+            "provider": provider,
+            "content": "",
+            "error": error,
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            "created": int(time.time())
+        }
+    
+    def _build_request(
+        self,
+        prompt: str,
+        system: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Build the normalized backend request."""
+        return {
+            "prompt": prompt,
+            "system": system,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "context": context,
+            "tools": self.tools,
+            "thinking_tokens": self.max_thinking_tokens,
+            "workflow": (context or {}).get("workflow", "mcp")
+        }
+    
+    def _route(self, model: str) -> List[tuple]:
+        """
+        Get the (backend, model) candidates for a request in preference order.
+        
+        Args:
+            model: Requested model
+            
+        Returns:
+            List of (backend, model) pairs
+        """
+        primary = (self.primary_backend, model)
+        if not self.secondary_backend:
+            return [primary]
+        
+        secondary = (self.secondary_backend, self.secondary_model)
+        if model == self.secondary_model:
+            primary, secondary = secondary, (self.primary_backend, self.primary_model)
+        if not self.config.get("failover", True) or secondary[1] == primary[1]:
+            return [primary]
+        return [primary, secondary]
+    
+    @staticmethod
+    async def _generate(backend: ModelBackend, request: Dict[str, Any]) -> tuple:
+        """Generate with a backend, returning the backend with its result."""
+        return backend, await backend.generate(request)
+    
+    def _run_sync(self, coroutine) -> Any:
+        """
+        Run a coroutine on the background event loop and wait for its result.
+        
+        Args:
+            coroutine: Coroutine to run
+            
+        Returns:
+            The coroutine's result
+            
+        Raises:
+            RuntimeError: If called from a coroutine running on the background
+                loop itself (waiting there would deadlock the loop)
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="vot-mcp-loop", daemon=True).start()
+            loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coroutine.close()
+            raise RuntimeError(
+                "Synchronous VotModelControlProtocol methods cannot be called from its own event loop; "
+                "use the async variants instead"
+            )
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+    
+    def close(self) -> None:
+        """Close the backends' connections and stop the background event loop."""
+        async def close_backends():
+            for backend in (self.primary_backend, self.secondary_backend):
+                if backend is not None:
+                    await backend.close()
+        
+        self._run_sync(close_backends())
+        with self._loop_lock:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+    
+    def _build_response(
+        self,
+        backend: ModelBackend,
+        model: str,
+        prompt: str,
+        result: Dict[str, Any],
+        context: Optional[Dict[str, Any]],
+        start_time: float,
+        ttft: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the response data for a request and record it in the usage ledger.
+        
+        Backends that do not report usage (the mock backend) get estimated
+        token counts. Calls the backend did not record itself are recorded here.
+        
+        Args:
+            backend: Backend that served the request
+            model: Model that served the request
+            prompt: The user prompt
+            result: Normalized backend result
+            context: Optional request context (its "workflow" key tags the usage entry)
+            start_time: Time the request started
+            ttft: Seconds until the first streamed chunk (streaming requests only)
+            
+        Returns:
+            Response data
+        """
+        usage = result.get("usage")
+        if usage:
+            prompt_tokens = usage["input_tokens"] + usage.get("cache_creation_input_tokens", 0) + usage.get("cache_read_input_tokens", 0)
+            completion_tokens = usage["output_tokens"]
+        else:
+            prompt_tokens = self.token_estimator.count(prompt, model)
+            completion_tokens = self.token_estimator.count(result["content"], model)
+        
+        response = {
+            "id": str(uuid.uuid4()),
+            "model": model,
+            "provider": result.get("provider", backend.provider),
+            "content": result["content"],
             "usage": {
-                "prompt_tokens": len(prompt) // 4,
-                "completion_tokens": len(response) // 4,
-                "total_tokens": (len(prompt) + len(response)) // 4
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
             },
             "created": int(time.time())
         }
+        if result.get("thinking"):
+            response["thinking"] = result["thinking"]
+        if result.get("tool_calls"):
+            response["tool_calls"] = result["tool_calls"]
+        if ttft is not None:
+            response["ttft"] = ttft
+        
+        latency = time.time() - start_time
+        if result.get("usage_recorded", backend.records_usage):
+            response["latency"] = latency
+            response["cost"] = estimate_cost(model, **{field: (usage or {}).get(field, 0) for field in UsageLedger.TOKEN_FIELDS})
+            return response
+        
+        entry = self.usage_ledger.record_response(
+            response["provider"],
+            model,
+            response,
+            ttft=ttft,
+            total_time=latency,
+            workflow=(context or {}).get("workflow", "mcp")
+        )
+        response["latency"] = entry["total_time"]
+        response["cost"] = entry["cost"]
+        
+        return response
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """
+        Get usage aggregated per model and workflow from the usage ledger.
+        
+        Returns:
+            Dictionary with "models", "workflows" and "totals"
+        """
+        return self.usage_ledger.get_summary()
     
     def _generate_mock_thinking(self, prompt: str, context: Optional[Dict[str, Any]]) -> str:
         """Generate a mock thinking stream based on the prompt."""
@@ -689,7 +1138,7 @@ class VotModelControlProtocol:
         
         try:
             handler = self.tool_handlers[tool_name]
-            result = handler(**tool_args)
+            result = self.tool_executor.execute(tool_name, handler, tool_args)
             logger.info(f"Executed tool: {tool_name}")
             return result
         except Exception as e:
@@ -723,13 +1172,7 @@ class VotModelControlProtocol:
         
         try:
             handler = self.tool_handlers[tool_name]
-            
-            # Check if handler is a coroutine function
-            if asyncio.iscoroutinefunction(handler):
-                result = await handler(**tool_args)
-            else:
-                # Run synchronous function in executor
-                result = await asyncio.to_thread(handler, **tool_args)
+            result = await self.tool_executor.execute_async(tool_name, handler, tool_args)
             
             logger.info(f"Executed tool async: {tool_name}")
             return result
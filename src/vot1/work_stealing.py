@@ -0,0 +1,353 @@
+"""
+VOT1 Work-Stealing Process Executor
+
+This module runs CPU-bound work (code analysis, OWL reasoning, embedding)
+across worker processes, so it scales past the GIL:
+
+1. Each worker process has its own task queue; tasks with the same affinity
+   key (for example a swarm agent id) go to the same worker, which keeps its
+   caches warm
+2. Idle workers steal queued tasks from the other workers' queues, so an
+   unbalanced assignment does not leave cores idle
+3. Results stream back over a pipe as they complete; generator functions
+   stream each item they yield
+4. Futures for synchronous callers and awaitables / async iterators for the
+   async swarm orchestrator
+
+Functions, their arguments and their results must be picklable (functions
+must be defined at module level); submit pickles the task up front and raises
+if it cannot.
+Tasks that already started cannot be interrupted; a caller that times out
+simply drops the result. A worker process that dies fails the task it was
+running and is replaced; the tasks still in its queue are stolen by the
+other workers.
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+import zlib
+from typing import Dict, Any, Optional, Callable, AsyncIterator
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds a worker waits on its own queue before trying to steal again
+IDLE_WAIT = 0.01
+
+MESSAGE_START = "start"
+MESSAGE_CHUNK = "chunk"
+MESSAGE_DONE = "done"
+MESSAGE_ERROR = "error"
+
+
+def _picklable_error(error: BaseException) -> BaseException:
+    """Get an exception that can be sent back to the parent process."""
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def _take(queues: list, worker_id: int) -> tuple:
+    """Take the next task from a worker's own queue, or steal one from another worker."""
+    for offset in range(len(queues)):
+        try:
+            return queues[(worker_id + offset) % len(queues)].get_nowait(), offset > 0
+        except queue.Empty:
+            continue
+    try:
+        return queues[worker_id].get(timeout=IDLE_WAIT), False
+    except queue.Empty:
+        return None, False
+
+
+def _worker_main(worker_id: int, queues: list, results, stop) -> None:
+    """Run tasks from the queues until stopped, streaming results back."""
+    while not stop.is_set():
+        task, stolen = _take(queues, worker_id)
+        if task is None:
+            continue
+        task_id, payload = task
+        results.put((MESSAGE_START, task_id, None, worker_id, stolen))
+        try:
+            fn, args, kwargs = pickle.loads(payload)
+            value = fn(*args, **kwargs)
+            if inspect.isgenerator(value):
+                chunks = []
+                for chunk in value:
+                    results.put((MESSAGE_CHUNK, task_id, chunk, worker_id, stolen))
+                    chunks.append(chunk)
+                value = chunks
+            results.put((MESSAGE_DONE, task_id, value, worker_id, stolen))
+        except Exception as e:
+            results.put((MESSAGE_ERROR, task_id, _picklable_error(e), worker_id, stolen))
+
+
+class WorkStealingExecutor:
+    """
+    Process pool with per-worker queues and work stealing.
+
+    Workers start on first use. The executor is safe to share across threads
+    and event loops.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, mp_context: Optional[str] = None):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Number of worker processes (defaults to the CPU count)
+            mp_context: Optional multiprocessing start method ("fork", "spawn", ...)
+        """
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self._context = multiprocessing.get_context(mp_context)
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pending = {}
+        self._running = {}
+        self._workers = []
+        self._queues = []
+        self._results = None
+        self._stop = None
+        self._reader = None
+        self._round_robin = itertools.count()
+        self._stats = {"submitted": 0, "completed": 0, "errors": 0, "stolen": 0}
+        self._worker_stats = [{"executed": 0, "stolen": 0} for _ in range(self.max_workers)]
+
+    def _start(self) -> None:
+        """Start the worker processes and the result reader (with the lock held)."""
+        if self._workers:
+            return
+        self._queues = [self._context.Queue() for _ in range(self.max_workers)]
+        self._results = self._context.Queue()
+        self._stop = self._context.Event()
+        self._workers = [self._spawn(worker_id) for worker_id in range(self.max_workers)]
+        self._reader = threading.Thread(target=self._read_results, name="vot-worker-results", daemon=True)
+        self._reader.start()
+        logger.info(f"Started {self.max_workers} work-stealing worker processes")
+
+    def _spawn(self, worker_id: int):
+        """Start a worker process."""
+        worker = self._context.Process(
+            target=_worker_main, args=(worker_id, self._queues, self._results, self._stop),
+            name=f"vot-worker-{worker_id}", daemon=True
+        )
+        worker.start()
+        return worker
+
+    def _replace_dead_workers(self) -> None:
+        """Fail the tasks of crashed workers and start replacements."""
+        with self._lock:
+            if self._stop.is_set():
+                return
+            failed = []
+            for worker_id, worker in enumerate(self._workers):
+                if worker.is_alive():
+                    continue
+                logger.error(f"Worker process {worker_id} died (exit code {worker.exitcode}); restarting it")
+                for task_id in [task_id for task_id, owner in self._running.items() if owner == worker_id]:
+                    del self._running[task_id]
+                    entry = self._pending.pop(task_id, None)
+                    if entry is not None:
+                        failed.append(entry[0])
+                        self._stats["errors"] += 1
+                self._workers[worker_id] = self._spawn(worker_id)
+        for future in failed:
+            if not future.done():
+                future.set_exception(RuntimeError("Worker process died while running the task"))
+
+    def _read_results(self) -> None:
+        """Resolve futures from the result stream until the executor shuts down."""
+        results, stop = self._results, self._stop
+        while not (stop.is_set() and not self._pending):
+            try:
+                kind, task_id, value, worker_id, stolen = results.get(timeout=0.1)
+            except queue.Empty:
+                self._replace_dead_workers()
+                continue
+            except (EOFError, OSError):
+                break
+
+            with self._lock:
+                if kind == MESSAGE_START:
+                    self._running[task_id] = worker_id
+                    continue
+                entry = self._pending.get(task_id) if kind == MESSAGE_CHUNK else self._pending.pop(task_id, None)
+                if kind != MESSAGE_CHUNK:
+                    self._running.pop(task_id, None)
+                    self._stats["completed" if kind == MESSAGE_DONE else "errors"] += 1
+                    self._worker_stats[worker_id]["executed"] += 1
+                    if stolen:
+                        self._stats["stolen"] += 1
+                        self._worker_stats[worker_id]["stolen"] += 1
+            if entry is None:
+                continue
+
+            future, on_chunk = entry
+            if kind == MESSAGE_CHUNK:
+                if on_chunk is not None:
+                    try:
+                        on_chunk(value)
+                    except Exception as e:
+                        logger.error(f"Error handling streamed chunk of task {task_id}: {e}")
+            elif not future.done():
+                if kind == MESSAGE_DONE:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def submit(self,
+               fn: Callable,
+               *args,
+               affinity: Optional[Any] = None,
+               on_chunk: Optional[Callable[[Any], None]] = None,
+               **kwargs) -> concurrent.futures.Future:
+        """
+        Run a function in a worker process.
+
+        Args:
+            fn: Picklable function; a generator function streams its items
+            *args: Positional arguments
+            affinity: Optional key; tasks with the same key prefer the same worker
+            on_chunk: Optional callback for each streamed item (called on the
+                executor's reader thread)
+            **kwargs: Keyword arguments
+
+        Returns:
+            Future with the function's return value (the list of items for
+            generator functions)
+
+        Raises:
+            pickle.PicklingError: If the function or its arguments cannot be pickled
+            RuntimeError: If the executor has been shut down
+        """
+        # Pickle here rather than on the queue's feeder thread, which only
+        # prints pickling errors and would leave the future unresolved
+        try:
+            payload = pickle.dumps((fn, args, kwargs))
+        except Exception as e:
+            raise pickle.PicklingError(f"Cannot send {getattr(fn, '__qualname__', fn)!r} to a worker process: {e}") from e
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._stop is not None and self._stop.is_set():
+                raise RuntimeError("WorkStealingExecutor has been shut down")
+            self._start()
+            task_id = next(self._ids)
+            if affinity is None:
+                worker_id = next(self._round_robin) % self.max_workers
+            else:
+                worker_id = zlib.crc32(str(affinity).encode("utf-8")) % self.max_workers
+            self._pending[task_id] = (future, on_chunk)
+            self._stats["submitted"] += 1
+        try:
+            self._queues[worker_id].put((task_id, payload))
+        except Exception:
+            with self._lock:
+                self._pending.pop(task_id, None)
+            raise
+        return future
+
+    async def submit_async(self, fn: Callable, *args, affinity: Optional[Any] = None, **kwargs) -> Any:
+        """
+        Run a function in a worker process and await its result.
+
+        Args:
+            fn: Picklable function
+            *args: Positional arguments
+            affinity: Optional key; tasks with the same key prefer the same worker
+            **kwargs: Keyword arguments
+
+        Returns:
+            The function's return value
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, affinity=affinity, **kwargs))
+
+    async def stream_async(self, fn: Callable, *args, affinity: Optional[Any] = None, **kwargs) -> AsyncIterator[Any]:
+        """
+        Run a generator function in a worker process, yielding its items as they arrive.
+
+        A plain function yields its return value once.
+
+        Args:
+            fn: Picklable function
+            *args: Positional arguments
+            affinity: Optional key; tasks with the same key prefer the same worker
+            **kwargs: Keyword arguments
+
+        Yields:
+            Items produced by the function
+        """
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        done = object()
+        streamed = [False]
+
+        def on_chunk(chunk: Any) -> None:
+            streamed[0] = True
+            loop.call_soon_threadsafe(items.put_nowait, chunk)
+
+        future = self.submit(fn, *args, affinity=affinity, on_chunk=on_chunk, **kwargs)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(items.put_nowait, done))
+        while True:
+            item = await items.get()
+            if item is done:
+                break
+            yield item
+        value = future.result()
+        if not streamed[0]:
+            yield value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get executor statistics.
+
+        Returns:
+            Dictionary with submitted, completed, errors, stolen, pending and per-worker counts
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "pending": len(self._pending),
+                "workers": [dict(stats) for stats in self._worker_stats]
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker processes.
+
+        Args:
+            wait: Wait for queued and running tasks to finish first
+        """
+        with self._lock:
+            if not self._workers:
+                return
+            workers, reader, stop = self._workers, self._reader, self._stop
+        if wait:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        break
+                time.sleep(IDLE_WAIT)
+
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=1.0)
+            if worker.is_alive():
+                worker.terminate()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("WorkStealingExecutor was shut down"))
+        reader.join(timeout=1.0)
@@ -0,0 +1,150 @@
+"""
+Unit tests for the BatchClient class.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from src.vot1.batch import BatchClient, LocalBatchServer
+from src.vot1.usage import UsageLedger, estimate_cost
+
+
+def make_requests(count):
+    """Build batch requests for the local server."""
+    return [
+        {
+            "custom_id": f"item-{i}",
+            "params": {
+                "model": "claude-3-5-haiku-20241022",
+                "max_tokens": 100,
+                "messages": [{"role": "user", "content": f"prompt {i}"}],
+            },
+        }
+        for i in range(count)
+    ]
+
+
+class TestBatchClient(unittest.TestCase):
+    """Test cases for the BatchClient class."""
+
+    def setUp(self):
+        """Set up a temporary checkpoint location."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_path = os.path.join(self.temp_dir.name, "batch.json")
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        self.temp_dir.cleanup()
+
+    def test_requests_are_packed_into_jobs(self):
+        """Test that requests are split into jobs and all results are returned."""
+        server = LocalBatchServer()
+        client = BatchClient(server, batch_size=2, poll_interval=0.001)
+
+        results = list(client.run(make_requests(5)))
+
+        self.assertEqual(len(server.batches), 3)
+        self.assertEqual(sorted(r["custom_id"] for r in results), [f"item-{i}" for i in range(5)])
+        self.assertEqual(results[0]["content"], "Processed: prompt 0")
+        self.assertEqual(client.get_stats()["succeeded"], 5)
+
+    def test_polls_until_jobs_end(self):
+        """Test that in-progress jobs are polled with backoff until they end."""
+        client = BatchClient(LocalBatchServer(processing_delay=0.05), poll_interval=0.01, poll_backoff=2.0)
+
+        results = list(client.run(make_requests(2)))
+
+        self.assertEqual(len(results), 2)
+        self.assertGreater(client.get_stats()["polls"], 1)
+
+    def test_handler_errors_become_errored_results(self):
+        """Test that failing requests are reported without failing the batch."""
+        def handler(params):
+            if "1" in params["messages"][0]["content"]:
+                raise ValueError("bad request")
+            return "ok"
+
+        client = BatchClient(LocalBatchServer(handler), poll_interval=0.001)
+        results = {r["custom_id"]: r for r in client.run(make_requests(2))}
+
+        self.assertEqual(results["item-0"]["status"], "succeeded")
+        self.assertEqual(results["item-1"]["status"], "errored")
+        self.assertEqual(results["item-1"]["error"], "bad request")
+
+    def test_usage_is_recorded_at_batch_price(self):
+        """Test that collected results are recorded in the ledger once, priced as batch requests."""
+        server, ledger = LocalBatchServer(), UsageLedger()
+        client = BatchClient(server, checkpoint_path=self.checkpoint_path, poll_interval=0.001, usage_ledger=ledger)
+
+        results = list(client.run(make_requests(3)))
+
+        self.assertEqual(len(ledger.entries), 3)
+        entry = ledger.entries[0]
+        usage = results[0]["usage"]
+        self.assertEqual((entry["workflow"], entry["input_tokens"]), ("batch", usage["input_tokens"]))
+        full_price = estimate_cost(entry["model"], usage["input_tokens"], usage["output_tokens"])
+        self.assertAlmostEqual(entry["cost"], full_price / 2)
+
+        # Results restored by a resumed run were already recorded
+        resumed = BatchClient(server, checkpoint_path=self.checkpoint_path, poll_interval=0.001, usage_ledger=ledger)
+        list(resumed.run(make_requests(3)))
+        self.assertEqual(len(ledger.entries), 3)
+
+    def test_resume_does_not_resubmit(self):
+        """Test that a resumed run polls checkpointed jobs instead of resubmitting."""
+        server = LocalBatchServer(processing_delay=60)
+        first = BatchClient(server, checkpoint_path=self.checkpoint_path, poll_interval=0.001)
+        job_ids = first.submit(make_requests(3))
+
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            self.assertIn(job_ids[0], json.load(f)["jobs"])
+
+        # Simulate the jobs finishing while the process was down
+        server.processing_delay = 0
+        resumed = BatchClient(server, checkpoint_path=self.checkpoint_path, poll_interval=0.001)
+        results = list(resumed.run(make_requests(3)))
+
+        self.assertEqual(len(server.batches), 1)
+        self.assertEqual(resumed.get_stats()["jobs_submitted"], 0)
+        self.assertEqual(len(results), 3)
+
+        # Collected results are returned from the results file without polling
+        again = BatchClient(server, checkpoint_path=self.checkpoint_path)
+        self.assertEqual(sorted(again.run(make_requests(3)), key=lambda r: r["custom_id"]),
+                         sorted(results, key=lambda r: r["custom_id"]))
+        self.assertEqual(again.get_stats()["restored"], 3)
+        self.assertEqual(again.get_stats()["polls"], 0)
+
+    def test_results_survive_crash_after_collection(self):
+        """Test that results of a collected job are not lost if the consumer stops early."""
+        server = LocalBatchServer()
+        first = BatchClient(server, checkpoint_path=self.checkpoint_path, batch_size=2, poll_interval=0.001)
+        stream = first.run(make_requests(4))
+        collected = [next(stream)]
+        stream.close()
+
+        resumed = BatchClient(server, checkpoint_path=self.checkpoint_path, poll_interval=0.001)
+        results = {r["custom_id"]: r for r in resumed.run(make_requests(4))}
+
+        self.assertEqual(sorted(results), [f"item-{i}" for i in range(4)])
+        self.assertEqual(results[collected[0]["custom_id"]], collected[0])
+        self.assertEqual(resumed.get_stats()["restored"], 2)
+        self.assertEqual(len(server.batches), 2)
+
+    def test_missing_stored_results_are_fetched_again(self):
+        """Test that a collected job without stored results is fetched from the backend."""
+        server = LocalBatchServer()
+        list(BatchClient(server, checkpoint_path=self.checkpoint_path, poll_interval=0.001).run(make_requests(2)))
+        os.remove(self.checkpoint_path + ".results.jsonl")
+
+        resumed = BatchClient(server, checkpoint_path=self.checkpoint_path, poll_interval=0.001)
+        results = list(resumed.run(make_requests(2)))
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(resumed.get_stats()["succeeded"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
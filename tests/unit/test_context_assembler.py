@@ -0,0 +1,78 @@
+"""
+Unit tests for the ContextAssembler class.
+"""
+
+import unittest
+
+from src.vot1.context_assembler import ContextAssembler
+
+
+class TestContextAssembler(unittest.TestCase):
+    """Test cases for the ContextAssembler class."""
+
+    def test_small_context_is_included_unchanged(self):
+        """Test that context within budget is rendered in full."""
+        assembler = ContextAssembler(budget_tokens=1000)
+
+        result = assembler.assemble(
+            "What does the config do?",
+            context={"task_type": "simple", "config": "debug = True"}
+        )
+
+        self.assertIn("--- config ---\ndebug = True", result["text"])
+        self.assertNotIn("task_type", result["text"])
+        self.assertEqual(result["truncated"], [])
+        self.assertEqual(result["dropped"], [])
+
+    def test_budget_keeps_highest_scored_blocks(self):
+        """Test that low-relevance blocks are truncated or dropped first."""
+        assembler = ContextAssembler(budget_tokens=300, min_block_tokens=64)
+        big_file = "x = 1\n" * 2000
+
+        result = assembler.assemble(
+            "Summarize the notes",
+            context={"notes": "short notes", "source_file": big_file},
+            memories=[{"content": "old memory " * 200, "similarity": 0.2}],
+            scores={"source_file": 0.5}
+        )
+
+        self.assertLessEqual(result["tokens"], result["budget"])
+        self.assertIn("short notes", result["text"])
+        self.assertIn("source_file", result["truncated"])
+        self.assertIn("memory 1", result["dropped"])
+        self.assertIn(ContextAssembler.TRUNCATION_MARKER, result["text"])
+
+    def test_budget_respects_model_window(self):
+        """Test that the budget never exceeds the remaining model window."""
+        assembler = ContextAssembler(budget_tokens=10 ** 6)
+
+        budget = assembler.get_budget("pplx-70b-online", max_tokens=1024)
+
+        self.assertLessEqual(budget, 4096 - 1024)
+
+    def test_token_counts_are_cached(self):
+        """Test that token counts are memoized per content hash."""
+        assembler = ContextAssembler()
+
+        first = assembler.count_tokens("hello world")
+        second = assembler.count_tokens("hello world")
+
+        self.assertEqual(first, second)
+        self.assertEqual(assembler.stats["cache_misses"], 1)
+        self.assertEqual(assembler.stats["cache_hits"], 1)
+
+    def test_summarizer_is_preferred_over_truncation(self):
+        """Test that a summarizer replaces truncation when provided."""
+        assembler = ContextAssembler(
+            budget_tokens=200,
+            summarizer=lambda text, max_tokens: "summary"
+        )
+
+        result = assembler.assemble("q", context={"doc": "word " * 5000})
+
+        self.assertIn("--- doc ---\nsummary", result["text"])
+        self.assertEqual(result["truncated"], ["doc"])
+
+
+if __name__ == "__main__":
+    unittest.main()
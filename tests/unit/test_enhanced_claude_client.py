@@ -0,0 +1,172 @@
+"""
+Unit tests for EnhancedClaudeClient request coalescing, routing and usage accounting.
+"""
+
+import threading
+import time
+import unittest
+
+from src.vot1.client import EnhancedClaudeClient
+from src.vot1.pipeline import AnthropicTransport
+from src.vot1.rate_limiter import RateLimiter
+from src.vot1.singleflight import SingleFlight
+from src.vot1.token_estimator import TokenEstimator
+from src.vot1.usage import UsageLedger
+
+SONNET = EnhancedClaudeClient.SONNET_MODEL
+HAIKU = EnhancedClaudeClient.THIN_MODEL
+
+
+class FakeMessages:
+    """Stand-in for the SDK's messages resource that can hold calls until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def create(self, model, **request):
+        with self._lock:
+            self.calls.append(dict(request, model=model))
+        self.release.wait(5)
+        return {
+            "content": [{"type": "text", "text": f"Answer from {model}"}],
+            "usage": {"input_tokens": 20, "output_tokens": 5}
+        }
+
+
+class FakeSDK:
+    """Stand-in for anthropic.Anthropic."""
+
+    def __init__(self):
+        self.messages = FakeMessages()
+
+
+class FakeMemoryManager:
+    """Memory manager that records saved memories."""
+
+    def __init__(self):
+        self.saved = []
+
+    def search_memories(self, query, limit=5):
+        return []
+
+    def add_memory(self, content, memory_type, metadata=None):
+        self.saved.append(content)
+
+
+def wait_until(condition, timeout=5.0):
+    """Poll until a condition holds."""
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("Condition not reached")
+        time.sleep(0.005)
+
+
+class TestEnhancedClaudeClient(unittest.TestCase):
+    """Test cases for EnhancedClaudeClient with an injected transport."""
+
+    def setUp(self):
+        """Set up a transport around a fake SDK client."""
+        self.sdk = FakeSDK()
+        self.ledger = UsageLedger()
+        self.singleflight = SingleFlight()
+        self.transport = self.create_transport()
+
+    def create_transport(self):
+        return AnthropicTransport(
+            "test-key",
+            rate_limiter=RateLimiter(),
+            usage_ledger=self.ledger,
+            token_estimator=TokenEstimator(use_tiktoken=False),
+            client=self.sdk
+        )
+
+    def create_client(self, transport=None, **kwargs):
+        return EnhancedClaudeClient(
+            transport=transport or self.transport,
+            usage_ledger=self.ledger,
+            singleflight=self.singleflight,
+            **kwargs
+        )
+
+    def run_concurrently(self, calls, wait_for):
+        """Run calls in threads while the fake API holds them, releasing it once wait_for holds."""
+        self.sdk.messages.release.clear()
+        results = [None] * len(calls)
+
+        def run(index, call):
+            results[index] = call()
+
+        threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+        for thread in threads:
+            thread.start()
+        try:
+            wait_until(wait_for)
+        finally:
+            self.sdk.messages.release.set()
+            for thread in threads:
+                thread.join(5)
+        return results
+
+    def test_identical_requests_coalesce(self):
+        """Test that identical concurrent requests share one API call."""
+        client = self.create_client(hybrid_mode=False)
+
+        results = self.run_concurrently(
+            [lambda: client.generate("Hello"), lambda: client.generate("Hello")],
+            lambda: self.singleflight.get_stats()["coalesced"] == 1
+        )
+
+        self.assertEqual(results, [f"Answer from {SONNET}"] * 2)
+        self.assertEqual(len(self.sdk.messages.calls), 1)
+
+    def test_clients_with_other_memory_or_transport_do_not_coalesce(self):
+        """Test that requests only coalesce between clients sharing their memory manager and transport."""
+        first_memory, second_memory = FakeMemoryManager(), FakeMemoryManager()
+        first = self.create_client(hybrid_mode=False, memory_manager=first_memory)
+        second = self.create_client(hybrid_mode=False, memory_manager=second_memory)
+        other_transport = self.create_client(transport=self.create_transport(), hybrid_mode=False,
+                                             memory_manager=first_memory)
+
+        self.run_concurrently(
+            [lambda: first.generate("Hello"), lambda: second.generate("Hello"),
+             lambda: other_transport.generate("Hello")],
+            lambda: len(self.sdk.messages.calls) == 3
+        )
+
+        self.assertEqual(self.singleflight.get_stats()["coalesced"], 0)
+        # Each client persisted its own response
+        self.assertEqual(len(first_memory.saved), 2)
+        self.assertEqual(second_memory.saved, [f"Answer from {SONNET}"])
+
+    def test_routing(self):
+        """Test that requests go to the primary model, an explicit override or a hybrid candidate."""
+        self.create_client(hybrid_mode=False, coalesce_requests=False).generate("Hello")
+        self.create_client(coalesce_requests=False).generate("Hello", model=HAIKU)
+        hybrid = self.create_client(coalesce_requests=False)
+        hybrid.generate("Hello")
+
+        models = [call["model"] for call in self.sdk.messages.calls]
+        self.assertEqual(models[:2], [SONNET, HAIKU])
+        self.assertIn(models[2], (SONNET, HAIKU))
+        self.assertEqual(hybrid.get_routing_decisions()[-1]["model"], models[2])
+
+    def test_usage_stats(self):
+        """Test that every API call is added to the client's usage statistics and the ledger."""
+        client = self.create_client(hybrid_mode=False, coalesce_requests=False)
+
+        client.generate("Hello")
+        client.generate("Hello again", model=HAIKU)
+
+        stats = client.usage_stats
+        self.assertEqual((stats["input_tokens"], stats["output_tokens"], stats["total_tokens"]), (40, 10, 50))
+        self.assertEqual((stats["sonnet_calls"], stats["thin_calls"]), (1, 1))
+        self.assertEqual(stats["model_calls"], {SONNET: 1, HAIKU: 1})
+        self.assertAlmostEqual(stats["cost"], self.ledger.get_summary()["totals"]["cost"], places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
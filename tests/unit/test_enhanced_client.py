@@ -0,0 +1,153 @@
+"""
+Unit tests for the VOT1Client class.
+"""
+
+import unittest
+
+from src.vot1.enhanced_client import VOT1Client
+from src.vot1.pipeline import AnthropicTransport
+from src.vot1.rate_limiter import RateLimiter
+from src.vot1.resilience import RetryPolicy
+from src.vot1.token_estimator import TokenEstimator
+from src.vot1.usage import UsageLedger
+
+SONNET = "claude-3-5-sonnet-20240620"
+HAIKU = "claude-3-5-haiku-20241022"
+
+
+def text_response(text):
+    """Build a Messages API response dictionary with a single text block."""
+    return {"content": [{"type": "text", "text": text}], "usage": {"input_tokens": 20, "output_tokens": 5}}
+
+
+class FakeMessages:
+    """Stand-in for the SDK's messages resource answering from a script."""
+
+    def __init__(self, responses=None, failing_models=()):
+        self.calls = []
+        self.responses = list(responses or [])
+        self.failing_models = failing_models
+
+    def create(self, model, **request):
+        self.calls.append(dict(request, model=model))
+        if model in self.failing_models:
+            raise ConnectionError(f"{model} is unavailable")
+        return self.responses.pop(0) if self.responses else text_response(f"Answer from {model}")
+
+
+class FakeSDK:
+    """Stand-in for anthropic.Anthropic."""
+
+    def __init__(self, **kwargs):
+        self.messages = FakeMessages(**kwargs)
+
+
+class StubMemoryManager:
+    """Memory manager returning fixed memories and recording saves."""
+
+    def __init__(self, memories=None):
+        self.memories = memories or []
+        self.queries = []
+        self.conversation = []
+        self.knowledge = []
+
+    def retrieve_relevant_memories(self, query, limit=5):
+        self.queries.append(query)
+        return self.memories
+
+    def add_conversation_memory(self, role, content, metadata=None):
+        self.conversation.append((role, content, metadata["conversation_id"]))
+
+    def add_semantic_memory(self, content, metadata=None):
+        self.knowledge.append((content, metadata))
+
+
+class StubSearch:
+    """Stand-in for the Perplexity client's search."""
+
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query, include_links=True, detailed_responses=True):
+        self.queries.append(query)
+        return {"answer": "It is sunny.", "links": [{"title": "Weather", "url": "https://weather.example"}]}
+
+
+class TestVOT1Client(unittest.TestCase):
+    """Test cases for VOT1Client with an injected transport."""
+
+    def create_client(self, sdk, memory_manager=None, **kwargs):
+        """Create a client whose transport wraps a fake SDK client."""
+        self.ledger = UsageLedger()
+        transport = AnthropicTransport(
+            "test-key",
+            rate_limiter=RateLimiter(),
+            usage_ledger=self.ledger,
+            token_estimator=TokenEstimator(use_tiktoken=False),
+            client=sdk
+        )
+        return VOT1Client(
+            transport=transport,
+            memory_manager=memory_manager,
+            usage_ledger=self.ledger,
+            retry_policy=RetryPolicy(max_retries=0),
+            **kwargs
+        )
+
+    def test_conversation_memories_are_used_and_saved(self):
+        """Test that a conversation's memories go into the system prompt and the exchange is saved."""
+        sdk = FakeSDK()
+        memory = StubMemoryManager([{"content": "The user prefers tea.", "similarity": 0.9}])
+        client = self.create_client(sdk, memory)
+
+        result = client.generate_response("What do I like?", conversation_id="c1", use_web_search=False)
+
+        self.assertEqual(result, {"content": f"Answer from {SONNET}", "model": SONNET, "web_search_used": False})
+        request = sdk.messages.calls[0]
+        self.assertIn("The user prefers tea.", request["system"])
+        self.assertNotIn("tools", request)
+        self.assertEqual([(role, cid) for role, _, cid in memory.conversation], [("user", "c1"), ("assistant", "c1")])
+        self.assertEqual(self.ledger.get_summary()["workflows"]["vot1"]["calls"], 1)
+
+    def test_memory_needs_a_conversation(self):
+        """Test that requests without a conversation neither retrieve nor save memories."""
+        memory = StubMemoryManager([{"content": "The user prefers tea.", "similarity": 0.9}])
+        client = self.create_client(FakeSDK(), memory)
+
+        client.generate_response("Hello", use_web_search=False)
+
+        self.assertEqual((memory.queries, memory.conversation), ([], []))
+
+    def test_web_search_tool(self):
+        """Test that a search_web tool call is answered from the search client and stored as knowledge."""
+        sdk = FakeSDK(responses=[
+            {"content": [{"type": "tool_use", "id": "toolu_1", "name": "search_web", "input": {"query": "weather"}}],
+             "usage": {"input_tokens": 30, "output_tokens": 10}},
+            text_response("It is sunny today.")
+        ])
+        memory = StubMemoryManager()
+        client = self.create_client(sdk, memory)
+        client.perplexity_client = search = StubSearch()
+
+        result = client.generate_response("What is the weather?")
+
+        self.assertTrue(result["web_search_used"])
+        self.assertEqual(result["content"], "It is sunny today.")
+        self.assertEqual(search.queries, ["weather"])
+        self.assertEqual(sdk.messages.calls[0]["tools"], client.tools)
+        self.assertIn("https://weather.example", memory.knowledge[0][0])
+
+    def test_fallback_model(self):
+        """Test that an unavailable model fails over to the fallback model."""
+        sdk = FakeSDK(failing_models=(SONNET,))
+        client = self.create_client(sdk, fallback_model=HAIKU)
+
+        result = client.generate_response("Hello", use_web_search=False)
+
+        self.assertEqual(result["model"], HAIKU)
+        self.assertEqual([call["model"] for call in sdk.messages.calls], [SONNET, HAIKU])
+        self.assertEqual(self.ledger.get_summary()["totals"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Unit tests for the ModelRouter class.
+"""
+
+import unittest
+
+from src.vot1.model_router import ModelRouter
+
+SONNET = "claude-3-7-sonnet-20240620"
+HAIKU = "claude-3-5-haiku-20241022"
+
+
+class TestModelRouter(unittest.TestCase):
+    """Test cases for the ModelRouter class."""
+
+    def setUp(self):
+        """Set up a router over a slow and a fast model."""
+        self.router = ModelRouter([SONNET, HAIKU])
+
+    def test_easy_prompt_goes_to_fast_model(self):
+        """Test that simple prompts are routed to the cheaper, faster model."""
+        self.assertEqual(self.router.select("What is the capital of France?"), HAIKU)
+
+    def test_complex_prompt_goes_to_strong_model(self):
+        """Test that complex prompts are routed to the higher-quality model."""
+        prompt = "Analyze and compare these architecture designs and explain the tradeoffs"
+        self.assertEqual(self.router.select(prompt), SONNET)
+
+    def test_latency_slo_excludes_slow_model(self):
+        """Test that models expected to miss the latency SLO are not selected."""
+        prompt = "Analyze and compare these architecture designs and explain the tradeoffs"
+
+        decision = self.router.route(prompt, latency_slo=8.0)
+
+        self.assertEqual(decision["model"], HAIKU)
+        self.assertEqual(decision["reason"], "latency_slo")
+
+    def test_observations_and_feedback_change_routing(self):
+        """Test that poor observed quality moves traffic to the other model."""
+        for _ in range(20):
+            decision = self.router.route("Hi there", candidates=[HAIKU])
+            self.router.record(decision["decision_id"], latency=0.5, input_tokens=5, output_tokens=20)
+            self.router.record_feedback(decision["decision_id"], 0.0)
+
+        self.assertEqual(self.router.select("Hi there"), SONNET)
+
+    def test_decisions_are_inspectable(self):
+        """Test that decisions record features, candidate scores and outcomes."""
+        decision = self.router.route("Hello", candidates=[SONNET])
+        self.router.record(decision["decision_id"], latency=1.5, input_tokens=3, output_tokens=10)
+
+        logged = self.router.get_decisions(limit=1)[0]
+        self.assertEqual(logged["reason"], "forced")
+        self.assertIn(SONNET, logged["candidates"])
+        self.assertEqual(logged["outcome"]["latency"], 1.5)
+        self.assertEqual(self.router.get_stats()["short:simple"][SONNET]["n"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
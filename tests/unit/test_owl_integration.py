@@ -0,0 +1,70 @@
+"""
+Unit tests for OWL-enhanced reasoning.
+"""
+
+import time
+import unittest
+
+from src.vot1.owl_integration import OwlEnhancedReasoning
+
+
+def fake_agent(answer, delay=0.0):
+    """Build a reasoning agent class answering after a delay."""
+    class FakeAgent:
+        def __init__(self, **kwargs):
+            pass
+
+        def reason(self, query, context=None):
+            time.sleep(delay)
+            if isinstance(answer, Exception):
+                raise answer
+            return {"answer": answer, "reasoning": "steps"}
+
+    return FakeAgent
+
+
+class TestOwlEnhancedReasoning(unittest.TestCase):
+    """Test cases for multi-strategy reasoning."""
+
+    def create_reasoning(self, agents):
+        """Create a reasoning engine with fake strategy agents."""
+        reasoning = OwlEnhancedReasoning()
+        reasoning.strategy_map = agents
+        return reasoning
+
+    def test_agreeing_strategies_end_the_run_early(self):
+        """Test that strategies run concurrently and a quorum of agreeing answers stops waiting."""
+        reasoning = self.create_reasoning({
+            "react": fake_agent("The answer is 42.", 0.05),
+            "cot": fake_agent("the answer is 42", 0.05),
+            "reflexion": fake_agent("Something else"),
+            "tot": fake_agent("The answer is 42", 5.0),
+        })
+
+        start_time = time.time()
+        result = reasoning.multi_strategy_reason("Question?", quorum=2)
+
+        self.assertLess(time.time() - start_time, 1.0)
+        self.assertIn(result["consolidated_answer"], ["The answer is 42.", "the answer is 42"])
+        self.assertEqual(sorted(result["agreement"]["strategies"]), ["cot", "react"])
+        self.assertTrue(result["agreement"]["quorum_reached"])
+        self.assertEqual(result["cancelled"], ["tot"])
+
+    def test_timeouts_and_errors_fall_back_to_the_largest_group(self):
+        """Test that without a quorum the largest agreeing group wins and slow strategies time out."""
+        reasoning = self.create_reasoning({
+            "react": fake_agent("Paris"),
+            "cot": fake_agent(RuntimeError("model down")),
+            "tot": fake_agent("Paris", 5.0),
+        })
+
+        result = reasoning.multi_strategy_reason("Capital?", timeout=0.2, quorum=3)
+
+        self.assertEqual(result["consolidated_answer"], "Paris")
+        self.assertFalse(result["agreement"]["quorum_reached"])
+        self.assertEqual(result["timed_out"], ["tot"])
+        self.assertEqual(result["detailed_results"]["cot"], {"error": "model down"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Unit tests for the request pipeline and shared transport.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+
+from src.vot1.pipeline import (
+    AnthropicTransport, ContextAssemblyStage, MemoryPersistStage, MemoryRetrievalStage,
+    ModelCallStage, RequestPipeline, ToolExecutionStage, save_memories
+)
+from src.vot1.context_assembler import ContextAssembler
+from src.vot1.rate_limiter import RateLimiter
+from src.vot1.token_estimator import TokenEstimator
+from src.vot1.usage import UsageLedger
+
+HAIKU = "claude-3-5-haiku-20241022"
+
+
+def text_response(text, input_tokens=20, output_tokens=5):
+    """Build a Messages API response dictionary with a single text block."""
+    return {
+        "content": [{"type": "text", "text": text}],
+        "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens}
+    }
+
+
+def tool_response(name, tool_input):
+    """Build a Messages API response dictionary asking for a tool."""
+    return {
+        "content": [{"type": "tool_use", "id": "toolu_1", "name": name, "input": tool_input}],
+        "usage": {"input_tokens": 30, "output_tokens": 10}
+    }
+
+
+class TestRequestPipeline(unittest.TestCase):
+    """Test cases for the request pipeline stages and transport."""
+
+    def setUp(self):
+        """Set up a transport around a fake SDK client."""
+        self.sdk = MagicMock()
+        self.ledger = UsageLedger()
+        self.transport = AnthropicTransport(
+            "test-key",
+            rate_limiter=RateLimiter(),
+            usage_ledger=self.ledger,
+            token_estimator=TokenEstimator(use_tiktoken=False),
+            client=self.sdk
+        )
+        self.call_stage = ModelCallStage(
+            lambda model, request, state: (model, self.transport.send(model, request, state.get("workflow")))
+        )
+
+    def build_pipeline(self, handlers=None, memory_manager=None, placement="user"):
+        """Build a pipeline from the stock stages."""
+        return RequestPipeline(
+            retrieve=MemoryRetrievalStage(memory_manager),
+            assemble=ContextAssemblyStage(ContextAssembler(token_estimator=TokenEstimator(use_tiktoken=False)), placement),
+            call=self.call_stage,
+            tools=ToolExecutionStage(handlers or {}, self.call_stage),
+            persist=MemoryPersistStage(memory_manager)
+        )
+
+    def test_transport_records_usage(self):
+        """Test that every send is recorded in the ledger and reported to the caller."""
+        self.sdk.messages.create.return_value = text_response("Hi")
+        entries = []
+
+        self.transport.send(HAIKU, {"messages": [{"role": "user", "content": "Hello"}], "max_tokens": 16},
+                            workflow="test", on_usage=lambda model, entry: entries.append(entry))
+
+        self.assertEqual(entries[0]["input_tokens"], 20)
+        self.assertEqual(self.ledger.get_summary()["workflows"]["test"]["calls"], 1)
+
+    def test_context_is_placed_in_user_or_system(self):
+        """Test that assembled context goes where the placement says."""
+        self.sdk.messages.create.return_value = text_response("Done")
+
+        state = self.build_pipeline().run({
+            "prompt": "Question?", "model": HAIKU, "max_tokens": 64, "context": {"notes": "Fact."}
+        })
+        self.assertIn("Fact.", state["messages"][0]["content"])
+        self.assertEqual(state["messages"][0]["role"], "user")
+
+        state = self.build_pipeline(placement="system").run({
+            "prompt": "Question?", "system": "Be brief.", "model": HAIKU, "max_tokens": 64,
+            "context": {"notes": "Fact.", "workflow": "internal"}
+        })
+        self.assertEqual(state["messages"], [{"role": "user", "content": "Question?"}])
+        self.assertIn("Fact.", state["system"])
+        self.assertNotIn("internal", state["system"])
+        self.assertEqual(state["content"], "Done")
+
+    def test_tool_results_continue_the_conversation(self):
+        """Test that tool_use blocks are executed and answered with tool_result blocks."""
+        self.sdk.messages.create.side_effect = [tool_response("add", {"a": 2, "b": 3}), text_response("5")]
+
+        state = self.build_pipeline({"add": lambda a, b: a + b}).run({
+            "prompt": "2 + 3?", "model": HAIKU, "max_tokens": 64, "tools": [{"name": "add"}]
+        })
+
+        self.assertEqual(state["content"], "5")
+        self.assertEqual(state["tool_calls"][0]["result"], 5)
+        follow_up = self.sdk.messages.create.call_args.kwargs["messages"]
+        self.assertEqual([message["role"] for message in follow_up], ["user", "assistant", "user"])
+        self.assertEqual(follow_up[2]["content"][0]["tool_use_id"], "toolu_1")
+        self.assertEqual(set(state["timings"]), set(RequestPipeline.STAGES))
+
+    def test_memory_is_retrieved_and_persisted(self):
+        """Test that memories are searched before the call and the exchange saved after it."""
+        self.sdk.messages.create.return_value = text_response("Answer")
+        memory_manager = MagicMock(spec=["search_memories", "add_conversation_memory", "add_semantic_memory"])
+        memory_manager.search_memories.return_value = [{"id": "m1", "content": "Remembered.", "similarity": 0.9}]
+
+        self.build_pipeline(memory_manager=memory_manager).run({
+            "prompt": "Recall?", "model": HAIKU, "max_tokens": 64, "conversation_id": "c1"
+        })
+
+        memory_manager.search_memories.assert_called_once_with("Recall?", limit=5)
+        self.assertIn("Remembered.", self.sdk.messages.create.call_args.kwargs["messages"][0]["content"])
+        self.assertEqual(memory_manager.add_conversation_memory.call_count, 2)
+
+    def test_memories_are_saved_in_one_deduplicated_batch(self):
+        """Test that batch-capable memory managers get one insert without duplicate contents."""
+        memories = [
+            {"content": "Plan", "memory_type": "swarm_solution", "metadata": {"task_id": "t"}},
+            {"content": "Plan ", "memory_type": "swarm_solution"},
+            {"content": "Detail", "memory_type": "swarm_agent_result"},
+        ]
+        batched = MagicMock(spec=["add_semantic_memories"])
+        single = MagicMock(spec=["add_memory"])
+
+        self.assertEqual(save_memories(batched, memories), 2)
+        self.assertEqual(save_memories(single, memories), 2)
+
+        stored = batched.add_semantic_memories.call_args.args[0]
+        self.assertEqual([memory["content"] for memory in stored], ["Plan", "Detail"])
+        self.assertEqual(stored[0]["metadata"], {"type": "swarm_solution", "task_id": "t"})
+        self.assertEqual(single.add_memory.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Unit tests for the RateLimiter class.
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from src.vot1.rate_limiter import RateLimiter, RateLimitWaitExceeded, _limits_from_env
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the RateLimiter class."""
+
+    def setUp(self):
+        """Set up a limiter with a small per-minute budget."""
+        self.limiter = RateLimiter(limits={"test": {"rpm": 600, "input_tpm": 6000, "output_tpm": 600}})
+
+    def test_requests_within_budget_do_not_wait(self):
+        """Test that a burst up to the bucket capacity is admitted immediately."""
+        for _ in range(5):
+            slot = self.limiter.acquire("test", "m", input_tokens=100, output_tokens=10)
+            self.assertEqual(slot.waited, 0.0)
+
+    def test_exhausted_bucket_queues_instead_of_failing(self):
+        """Test that requests beyond the budget wait for the refill."""
+        limiter = RateLimiter(limits={"test": {"rpm": 0, "input_tpm": 0, "output_tpm": 600}})
+        limiter.acquire("test", "m", output_tokens=600)
+
+        # 600 tokens/min refills at 10 tokens/s, so 1 more token is 0.1s away
+        slot = limiter._reserve("test", "m", 0, 1)
+        self.assertAlmostEqual(slot.waited, 0.1, places=2)
+        self.assertEqual(limiter.get_stats()["test:m"]["throttled"], 1)
+
+    def test_settle_refunds_unused_output_tokens(self):
+        """Test that unused output reservation is returned to the bucket."""
+        limiter = RateLimiter(limits={"test": {"output_tpm": 600}})
+        with limiter.acquire("test", "m", output_tokens=600) as slot:
+            slot.settle(output_tokens=50)
+
+        self.assertEqual(limiter._reserve("test", "m", 0, 500).waited, 0.0)
+
+    def test_output_reservation_follows_actual_usage(self):
+        """Test that output is reserved at the recent average and overruns are charged."""
+        limiter = RateLimiter(limits={"test": {"output_tpm": 6000}})
+        with limiter.acquire("test", "m", output_tokens=4096) as slot:
+            self.assertEqual(slot.output_tokens, 4096)
+            slot.settle(output_tokens=100, input_tokens=10)
+
+        with limiter.acquire("test", "m", output_tokens=4096) as slot:
+            self.assertEqual(slot.output_tokens, 150)
+            slot.settle(output_tokens=5950, input_tokens=10)
+
+        # The overrun emptied the bucket, so the next request waits
+        self.assertGreater(limiter._reserve("test", "m", 0, 4096).waited, 0.0)
+
+    def test_limits_are_opt_in(self):
+        """Test that nothing is throttled without limits and waits are capped by default."""
+        limiter = RateLimiter()
+        for _ in range(100):
+            self.assertEqual(limiter._reserve("anthropic", "m", 100000, 4096).waited, 0.0)
+
+        limiter = RateLimiter(limits=RateLimiter.TIER_1_LIMITS)
+        with self.assertRaises(RateLimitWaitExceeded):
+            for _ in range(60):
+                limiter._reserve("anthropic", "m", 0, 4096)
+
+    def test_backlog_beyond_max_wait_does_not_burst(self):
+        """Test that requests that cannot be covered within max_wait are rejected, not released together."""
+        limiter = RateLimiter(limits={"test": {"rpm": 60}}, max_wait=2.0)
+        admitted, rejected = [], []
+        for _ in range(500):
+            try:
+                admitted.append(limiter._reserve("test", "m", 0, 0).waited)
+            except RateLimitWaitExceeded as e:
+                rejected.append(e.retry_after)
+
+        # 60 requests fit in the bucket and 2 more refill within max_wait (one per second)
+        self.assertLessEqual(len(admitted), 63)
+        delayed = [wait for wait in admitted if wait > 0]
+        self.assertEqual(delayed, sorted(delayed))
+        self.assertLessEqual(max(delayed), 2.0)
+        self.assertGreater(len(set(round(wait, 1) for wait in delayed)), 1)
+        self.assertTrue(all(retry_after > 0 for retry_after in rejected))
+
+        # Rejected requests left no debt behind
+        stats = limiter.get_stats()["test:m"]
+        self.assertEqual(stats["rejected"], len(rejected))
+        with self.assertRaises(RateLimitWaitExceeded) as raised:
+            limiter._reserve("test", "m", 0, 0)
+        self.assertLess(raised.exception.retry_after, 1.1)
+
+    def test_limits_from_env(self):
+        """Test parsing of the VOT1_RATE_LIMITS environment variable."""
+        self.assertEqual(_limits_from_env(None), {})
+        self.assertEqual(_limits_from_env("tier1"), RateLimiter.TIER_1_LIMITS)
+        self.assertEqual(_limits_from_env('{"anthropic": {"rpm": 1000}}'), {"anthropic": {"rpm": 1000}})
+        with self.assertRaises(ValueError):
+            _limits_from_env("rpm=1000")
+
+    def test_models_have_separate_buckets(self):
+        """Test that limits are tracked per provider and model."""
+        limiter = RateLimiter(limits={"test": {"rpm": 60}})
+        limiter.acquire("test", "a")
+        limiter.acquire("test", "b")
+
+        self.assertEqual(set(limiter.get_stats()), {"test:a", "test:b"})
+        self.assertEqual(limiter.get_stats()["test:b"]["throttled"], 0)
+
+    def test_async_acquire(self):
+        """Test that the async variant waits for the reservation."""
+        limiter = RateLimiter(limits={"test": {"rpm": 1200}})
+        limiter.acquire("test", "m")
+        limiter.store.reserve("test:m:rpm", 1199, 1200, 20.0)
+
+        slot = asyncio.run(limiter.acquire_async("test", "m"))
+        self.assertGreater(slot.waited, 0.0)
+
+    def test_shared_sqlite_buckets(self):
+        """Test that limiters sharing a database share one budget."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "limits.db")
+            limits = {"test": {"rpm": 60}}
+            first = RateLimiter(limits=limits, shared_path=path)
+            second = RateLimiter(limits=limits, shared_path=path)
+
+            for _ in range(60):
+                first._reserve("test", "m", 0, 0)
+
+            self.assertGreater(second._reserve("test", "m", 0, 0).waited, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
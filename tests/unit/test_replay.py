@@ -0,0 +1,148 @@
+"""
+Unit tests for the record/replay transport and backend.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from src.vot1.mcp_backends import MockBackend
+from src.vot1.rate_limiter import RateLimiter
+from src.vot1.replay import (
+    RecordReplayBackend, RecordReplayTransport, ReplayMissError, ReplayStore, lognormal_latency, request_key
+)
+from src.vot1.token_estimator import TokenEstimator
+from src.vot1.usage import UsageLedger
+from src.vot1.vot_mcp import VotModelControlProtocol
+
+HAIKU = "claude-3-5-haiku-20241022"
+REQUEST = {"messages": [{"role": "user", "content": "Hello"}], "max_tokens": 16}
+
+
+class TestRecordReplay(unittest.TestCase):
+    """Test cases for recording and replaying model calls."""
+
+    def setUp(self):
+        """Set up a temporary recording store."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "recordings.db")
+        self.store = ReplayStore(self.path)
+
+    def tearDown(self):
+        """Remove the recording store."""
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def create_transport(self, mode, client=None, **kwargs):
+        """Create a record/replay transport with its own accounting."""
+        return RecordReplayTransport(
+            self.store, mode=mode, api_key="test-key", client=client,
+            rate_limiter=RateLimiter(), usage_ledger=UsageLedger(),
+            token_estimator=TokenEstimator(use_tiktoken=False), **kwargs
+        )
+
+    def test_transport_replays_recorded_responses(self):
+        """Test that recorded Messages API calls are replayed offline."""
+        sdk = MagicMock()
+        sdk.messages.create.side_effect = [
+            {"content": [{"type": "text", "text": "first"}], "usage": {"input_tokens": 8, "output_tokens": 2}},
+            {"content": [{"type": "text", "text": "second"}], "usage": {"input_tokens": 8, "output_tokens": 2}},
+        ]
+        recorder = self.create_transport("record", client=sdk)
+        recorder.send(HAIKU, REQUEST)
+        recorder.send(HAIKU, REQUEST)
+
+        replayer = self.create_transport("replay", latency="none")
+        texts = [replayer.send(HAIKU, REQUEST)["content"][0]["text"] for _ in range(3)]
+
+        self.assertEqual(texts, ["first", "second", "first"])
+        self.assertEqual(replayer.usage_ledger.get_summary()["models"][HAIKU]["input_tokens"], 24)
+        with self.assertRaises(ReplayMissError):
+            replayer.send(HAIKU, {**REQUEST, "max_tokens": 32})
+
+    def test_recordings_persist(self):
+        """Test that recordings survive reopening the store."""
+        sdk = MagicMock()
+        sdk.messages.create.return_value = {"content": [{"type": "text", "text": "saved"}]}
+        self.create_transport("record", client=sdk).send(HAIKU, REQUEST)
+        self.store.close()
+
+        self.store = ReplayStore(self.path)
+        response = self.create_transport("replay").send(HAIKU, REQUEST)
+
+        self.assertEqual(response["content"][0]["text"], "saved")
+
+    def test_backend_record_and_replay(self):
+        """Test that protocol requests replay without calling the recorded backend."""
+        live = MockBackend(responder=lambda prompt, system, context: f"live: {prompt}")
+        ledger = UsageLedger()
+
+        def create_mcp(backend):
+            return VotModelControlProtocol(primary_model="model", primary_backend=backend, usage_ledger=ledger)
+
+        recorded = asyncio.run(create_mcp(RecordReplayBackend(self.store, live, mode="record")).process_request_async("Hi"))
+
+        live.responder = lambda prompt, system, context: "changed"
+        backend = RecordReplayBackend(self.store, mode="replay", provider="mock")
+        replayed = asyncio.run(create_mcp(backend).process_request_async("Hi", context={"workflow": "bench"}))
+
+        self.assertEqual(replayed["content"], recorded["content"])
+        self.assertEqual(backend.get_stats()["replayed"], 1)
+        self.assertEqual(ledger.get_summary()["totals"]["calls"], 2)
+
+    def test_auto_mode_records_misses(self):
+        """Test that auto mode goes live only for unrecorded requests."""
+        calls = []
+        live = MockBackend(responder=lambda prompt, system, context: calls.append(prompt) or prompt)
+        backend = RecordReplayBackend(self.store, live, mode="auto")
+
+        async def run():
+            for prompt in ("a", "b", "a"):
+                await backend.generate({"prompt": prompt, "model": "model"})
+
+        asyncio.run(run())
+
+        self.assertEqual(calls, ["a", "b"])
+        self.assertEqual(backend.get_stats()["recorded"], 2)
+
+    def test_streams_replay_with_recorded_pacing(self):
+        """Test that streamed chunks are recorded and replayed in order with their timing."""
+        live = MockBackend(responder=lambda prompt, system, context: "alpha beta gamma", latency=0.06)
+        request = {"prompt": "Hi", "model": "model"}
+
+        async def collect(backend):
+            start_time = time.time()
+            chunks = [chunk async for chunk in backend.stream(request)]
+            return chunks, time.time() - start_time
+
+        recorded, _ = asyncio.run(collect(RecordReplayBackend(self.store, live, mode="record")))
+        recording = self.store.get(request_key("mock", "model", request))
+        self.assertEqual(len(recording["chunks"]), 3)
+        self.assertGreater(recording["ttft"], 0)
+
+        replayer = RecordReplayBackend(self.store, mode="replay", provider="mock", latency_scale=0.5)
+        replayed, elapsed = asyncio.run(collect(replayer))
+
+        self.assertEqual(replayed[:-1], recorded[:-1])
+        self.assertEqual(replayed[-1]["result"]["content"], "alpha beta gamma")
+        self.assertGreater(elapsed, 0.02)
+        schedule = replayer.replayer.pace(recording, recording["chunks"])
+        self.assertAlmostEqual(sum(wait for wait, _ in schedule), recording["latency"] * 0.5)
+
+    def test_simulated_latency(self):
+        """Test that replayed latency follows the configured latency model."""
+        self.store.put("key", "mock", "model", {"content": "x"}, latency=0.2)
+        draw = lognormal_latency(median=0.05, seed=1)
+        self.assertEqual(draw(0), lognormal_latency(median=0.05, seed=1)(0))
+
+        backend = RecordReplayBackend(self.store, mode="replay", latency="recorded", latency_scale=0.25)
+        recording = self.store.get("key")
+        self.assertAlmostEqual(backend.replayer.delay(recording), 0.05)
+        self.assertEqual(RecordReplayBackend(self.store, mode="replay", latency="none").replayer.delay(recording), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Unit tests for the resilience layer.
+"""
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from src.vot1.resilience import (
+    CircuitOpenError,
+    ResilientCaller,
+    RetryPolicy,
+    get_retry_after,
+    is_retryable,
+    reset_circuit_breakers,
+)
+
+
+class StatusError(Exception):
+    """Exception carrying an HTTP status code like the provider SDK errors."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = MagicMock()
+        self.response.headers = headers or {}
+
+
+class TestResilientCaller(unittest.TestCase):
+    """Test cases for the ResilientCaller class."""
+
+    def setUp(self):
+        """Use fresh circuit breakers and near-zero backoff for each test."""
+        reset_circuit_breakers()
+        self.caller = ResilientCaller("test", retry_policy=RetryPolicy(max_retries=2, base_delay=0.001))
+
+    def test_transient_errors_are_retried(self):
+        """Test that a 529 is retried until the call succeeds."""
+        fn = MagicMock(side_effect=[StatusError(529), StatusError(429), "ok"])
+
+        self.assertEqual(self.caller.call(fn, model="m"), "ok")
+        self.assertEqual(fn.call_count, 3)
+        self.assertEqual(self.caller.get_stats()["retries"], 2)
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a 400 fails immediately."""
+        fn = MagicMock(side_effect=StatusError(400))
+
+        with self.assertRaises(StatusError):
+            self.caller.call(fn, model="m")
+        self.assertEqual(fn.call_count, 1)
+
+    def test_failover_to_secondary_model(self):
+        """Test that exhausted retries fail over to the next candidate."""
+        primary = MagicMock(side_effect=StatusError(503))
+
+        model, result = self.caller.execute([("primary", primary), ("secondary", lambda: "backup")])
+
+        self.assertEqual((model, result), ("secondary", "backup"))
+        self.assertEqual(self.caller.get_stats()["failovers"], 1)
+
+    def test_circuit_opens_and_fails_fast(self):
+        """Test that repeated failures open the circuit and reject calls."""
+        caller = ResilientCaller(
+            "outage",
+            retry_policy=RetryPolicy(max_retries=0),
+            breaker_settings={"failure_threshold": 2, "recovery_timeout": 60}
+        )
+        fn = MagicMock(side_effect=ConnectionError("down"))
+
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                caller.call(fn, model="m")
+        with self.assertRaises(CircuitOpenError):
+            caller.call(fn, model="m")
+
+        self.assertEqual(fn.call_count, 2)
+        self.assertEqual(caller.get_stats()["circuits"]["outage/m"]["state"], "open")
+
+        # Breakers are shared process-wide, so other callers fail fast too
+        with self.assertRaises(CircuitOpenError):
+            ResilientCaller("outage").call(fn, model="m")
+
+    def test_async_hedging_returns_fastest(self):
+        """Test that a hedged async call returns the first result."""
+        caller = ResilientCaller("hedge", hedge_delay=0.01)
+        delays = [0.5, 0.0]
+
+        async def request():
+            await asyncio.sleep(delays.pop(0))
+            return "done"
+
+        result = asyncio.run(caller.call_async(request, model="m", hedge=True))
+
+        self.assertEqual(result, "done")
+        self.assertEqual(caller.get_stats()["hedges_fired"], 1)
+        self.assertEqual(caller.get_stats()["hedge_wins"], 1)
+
+
+class TestErrorClassification(unittest.TestCase):
+    """Test cases for error classification helpers."""
+
+    def test_retry_after_header_is_parsed(self):
+        """Test that retry-after hints are read from the response headers."""
+        self.assertEqual(get_retry_after(StatusError(429, {"retry-after": "7"})), 7.0)
+        self.assertIsNone(get_retry_after(ValueError("no hint")))
+
+    def test_retryable_classification(self):
+        """Test which errors count as transient."""
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertTrue(is_retryable(StatusError(529)))
+        self.assertFalse(is_retryable(StatusError(401)))
+        self.assertFalse(is_retryable(ValueError()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Unit tests for the SingleFlight class.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.vot1.singleflight import SingleFlight, make_key
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for the SingleFlight class."""
+
+    def setUp(self):
+        """Set up a fresh single-flight group."""
+        self.group = SingleFlight()
+
+    def test_concurrent_threads_share_one_call(self):
+        """Test that identical in-flight calls from threads execute once."""
+        executions = []
+        started = threading.Event()
+
+        def request():
+            executions.append(1)
+            started.set()
+            time.sleep(0.1)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            first = pool.submit(self.group.do, "key", request)
+            started.wait()
+            others = [pool.submit(self.group.do, "key", request) for _ in range(4)]
+            results = [first.result()] + [future.result() for future in others]
+
+        self.assertEqual(results, ["result"] * 5)
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(self.group.get_stats()["coalesced"], 4)
+
+    def test_errors_are_shared_and_not_cached(self):
+        """Test that waiters see the shared error and later calls run again."""
+        with self.assertRaises(ValueError):
+            self.group.do("key", lambda: (_ for _ in ()).throw(ValueError("boom")))
+
+        self.assertEqual(self.group.do("key", lambda: "fresh"), "fresh")
+        self.assertEqual(self.group.in_flight(), 0)
+
+    def test_async_callers_share_one_call(self):
+        """Test that identical concurrent coroutines execute once."""
+        executions = []
+
+        async def request():
+            executions.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def run():
+            return await asyncio.gather(*(self.group.do_async("key", request) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(run()), ["result"] * 3)
+        self.assertEqual(len(executions), 1)
+
+    def test_cancelled_async_caller_does_not_cancel_shared_call(self):
+        """Test that cancelling the first caller leaves the call running for others."""
+        async def request():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def run():
+            first = asyncio.ensure_future(self.group.do_async("key", request))
+            second = asyncio.ensure_future(self.group.do_async("key", request))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), "result")
+
+    def test_keys_are_stable(self):
+        """Test that keys ignore dict ordering but not values."""
+        self.assertEqual(make_key("p", {"a": 1, "b": 2}), make_key("p", {"b": 2, "a": 1}))
+        self.assertNotEqual(make_key("p", {"a": 1}), make_key("p", {"a": 2}))
+
+
+if __name__ == "__main__":
+    unittest.main()
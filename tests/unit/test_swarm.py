@@ -0,0 +1,193 @@
+"""
+Unit tests for the swarm orchestrator.
+"""
+
+import asyncio
+import json
+import time
+import unittest
+
+from src.vot1.swarm import SwarmAgent, SwarmOrchestrator
+
+
+class FakeClient:
+    """Client answering prompts after a per-prompt delay."""
+
+    def __init__(self, reply="ok", delays=None):
+        self.reply = reply
+        self.delays = delays or {}
+        self.prompts = []
+        self.requests = []
+
+    def generate(self, prompt, context=None, **kwargs):
+        self.prompts.append(prompt)
+        self.requests.append(kwargs)
+        return self.reply if isinstance(self.reply, str) else self.reply(prompt)
+
+    async def generate_async(self, prompt, context=None, **kwargs):
+        self.prompts.append(prompt)
+        self.requests.append(kwargs)
+        await asyncio.sleep(next((delay for marker, delay in self.delays.items() if marker in prompt), 0.0))
+        return self.reply if isinstance(self.reply, str) else self.reply(prompt)
+
+
+class TestSwarmOrchestrator(unittest.TestCase):
+    """Test cases for the SwarmOrchestrator class."""
+
+    def create_swarm(self, agent_delays, coordinator=None, feedback_loops=0, **kwargs):
+        """Create a swarm whose agents answer after the given delays."""
+        swarm = SwarmOrchestrator(num_agents=0, feedback_loops=feedback_loops,
+                                  coordinator=coordinator or FakeClient("solution"), **kwargs)
+        swarm.agents = [
+            SwarmAgent(f"a{index}", f"Agent {index}", f"skill{index}", "", client=FakeClient(f"result {index}", {"": delay}))
+            for index, delay in enumerate(agent_delays)
+        ]
+        return swarm
+
+    def test_agents_run_concurrently_and_time_out(self):
+        """Test that agents overlap and that a slow agent times out without holding up the run."""
+        swarm = self.create_swarm([0.05, 0.05, 0.05, 5.0])
+
+        start_time = time.time()
+        solution = swarm.solve_complex_task("Task", max_workers=4, agent_timeout=0.2)
+
+        self.assertLess(time.time() - start_time, 1.0)
+        statuses = [result["status"] for result in solution["process"]["agent_results"]]
+        self.assertEqual(statuses, ["completed"] * 3 + ["timeout"])
+        self.assertEqual(solution["solution"], "solution")
+
+    def test_speculative_integration_merges_late_results(self):
+        """Test that integration starts before the slowest agent and merges its result afterwards."""
+        coordinator = FakeClient("solution")
+        swarm = self.create_swarm([0.0, 0.0, 0.0, 0.2], coordinator=coordinator)
+
+        solution = swarm.solve_complex_task("Task", max_workers=4, speculative_quorum=0.75)
+
+        self.assertTrue(solution["metadata"]["speculative_integration"])
+        merge_prompt = coordinator.prompts[-1]
+        self.assertIn("DRAFT SOLUTION", merge_prompt)
+        self.assertIn("result 3", merge_prompt)
+        self.assertNotIn("result 0", merge_prompt)
+
+    def test_dependencies_run_in_order(self):
+        """Test that subtasks wait for the subtasks they depend on and receive their results."""
+        swarm = self.create_swarm([0.05, 0.0])
+        first, second = swarm.agents
+        subtasks = [
+            (first, {"task_id": "t1", "prompt": "first"}),
+            (second, {"task_id": "t2", "prompt": "second", "depends_on": ["t1"]}),
+        ]
+
+        async def run():
+            return [result async for result in swarm._run_subtasks(subtasks, max_workers=2, agent_timeout=None)]
+
+        results = asyncio.run(run())
+
+        self.assertEqual([result["task_id"] for result in results], ["t1", "t2"])
+        self.assertEqual(second.task_history[0]["result"]["status"], "completed")
+
+    def test_structured_decomposition_is_routed_and_deduplicated(self):
+        """Test that JSON subtasks are merged, routed by specialization and keep their dependencies."""
+        decomposition = {"subtasks": [
+            {"id": "research", "description": "Collect prior work", "specialization": "skill1"},
+            {"id": "again", "description": "collect  prior work", "specialization": "skill1"},
+            {"id": "build", "description": "Write the plan", "specialization": "skill0", "depends_on": ["again"]},
+        ], "integration": "Combine."}
+        swarm = self.create_swarm([0.0, 0.0, 0.0])
+
+        subtasks = swarm._parse_subtasks(f"```json\n{json.dumps(decomposition)}\n```", "Task", swarm.agents)
+
+        self.assertEqual([(agent.agent_id, subtask["task_id"]) for agent, subtask in subtasks],
+                         [("a1", "research"), ("a0", "build")])
+        self.assertEqual(subtasks[1][1]["depends_on"], ["research"])
+
+    def test_invalid_decompositions_are_corrected_or_fall_back(self):
+        """Test that invalid decompositions are sent back once, then every agent gets the whole task."""
+        valid = json.dumps({"subtasks": [{"id": "only", "description": "Do it", "specialization": "skill0"}]})
+        replies = iter(['{"subtasks": [{"id": "x"}]}', valid])
+        coordinator = FakeClient(lambda prompt: next(replies, "solution"))
+        swarm = self.create_swarm([0.0, 0.0], coordinator=coordinator)
+
+        solution = swarm.solve_complex_task("Task")
+        self.assertEqual([subtask["task_id"] for subtask in solution["process"]["subtasks"]], ["only"])
+        self.assertIn("missing required key 'description'", coordinator.prompts[1])
+
+        cyclic = json.dumps({"subtasks": [
+            {"id": "a", "description": "A", "specialization": "skill0", "depends_on": ["b"]},
+            {"id": "b", "description": "B", "specialization": "skill1", "depends_on": ["a"]},
+        ]})
+        swarm = self.create_swarm([0.0, 0.0], coordinator=FakeClient(lambda prompt: cyclic))
+        solution = swarm.solve_complex_task("Task")
+        self.assertEqual(len(solution["process"]["agent_results"]), 2)
+
+    def test_agents_share_one_client_with_per_request_settings(self):
+        """Test that agents built on a shared client send their own system prompt and temperature."""
+        client = FakeClient("answer")
+        swarm = SwarmOrchestrator(num_agents=0, client=client, custom_agents=[
+            {"agent_id": "a", "name": "A", "specialization": "x", "system_prompt": "Be A", "temperature": 0.2},
+            {"agent_id": "b", "name": "B", "specialization": "y", "system_prompt": "Be B", "temperature": 0.9},
+        ])
+        first, second = swarm.agents
+
+        first.process_task({"prompt": "one"})
+        second.update_system_prompt("Be B2")
+        second.process_task({"prompt": "two"})
+
+        self.assertIs(first._client, second._client)
+        self.assertIs(swarm.coordinator, client)
+        self.assertEqual([(request["system"], request["temperature"]) for request in client.requests],
+                         [("Be A", 0.2), ("Be B2", 0.9)])
+
+    def test_refinement_stops_when_converged(self):
+        """Test that refinement stops once a round leaves the solution unchanged and later rounds get deltas."""
+        versions = iter(["draft one", "draft two", "draft two"])
+        coordinator = FakeClient(lambda prompt: next(versions) if "refine" in prompt else "draft zero")
+        swarm = self.create_swarm([0.0], coordinator=coordinator, feedback_loops=5)
+
+        solution = swarm.solve_complex_task("Task", speculative_quorum=None)
+
+        refinement = solution["metadata"]["refinement"]
+        self.assertEqual(solution["solution"], "draft two")
+        self.assertEqual((refinement["iterations"], refinement["stopped"]), (3, "converged"))
+        refinement_prompts = [prompt for prompt in coordinator.prompts if "refine" in prompt]
+        self.assertIn("SUMMARY OF AGENT RESULTS", refinement_prompts[0])
+        self.assertNotIn("SUMMARY OF AGENT RESULTS", refinement_prompts[1])
+        self.assertIn("+draft two", refinement_prompts[2])
+
+    def test_quality_judge_stops_refinement(self):
+        """Test that a good enough judge score skips the remaining refinement rounds."""
+        scores = iter([0.5, 0.95])
+
+        async def judge(task, solution):
+            return next(scores)
+
+        coordinator = FakeClient(lambda prompt: f"version {len(coordinator.prompts)}")
+        swarm = self.create_swarm([0.0], coordinator=coordinator, feedback_loops=5, quality_judge=judge)
+
+        refinement = swarm.solve_complex_task("Task")["metadata"]["refinement"]
+
+        self.assertEqual((refinement["iterations"], refinement["stopped"]), (1, "quality"))
+        self.assertEqual(refinement["scores"], [0.5, 0.95])
+
+    def test_run_is_saved_to_memory_in_one_batch(self):
+        """Test that a run's decomposition, agent results and solution are written together in the background."""
+        class MemoryManager:
+            def __init__(self):
+                self.batches = []
+
+            def add_semantic_memories(self, memories):
+                self.batches.append(memories)
+
+        memory_manager = MemoryManager()
+        swarm = self.create_swarm([0.0, 0.0], memory_manager=memory_manager)
+
+        swarm.solve_complex_task("Task")
+        swarm.flush_memory(timeout=5)
+
+        self.assertEqual(len(memory_manager.batches), 1)
+        self.assertEqual([memory["metadata"]["type"] for memory in memory_manager.batches[0]],
+                         ["swarm_decomposition", "swarm_agent_result", "swarm_agent_result", "swarm_solution"])
+
+
+if __name__ == "__main__":
+    unittest.main()
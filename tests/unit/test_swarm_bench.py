@@ -0,0 +1,37 @@
+"""
+Unit tests for the swarm load test harness.
+"""
+
+import unittest
+
+from src.vot1.replay import lognormal_latency
+from src.vot1.swarm_bench import run_swarm_benchmark
+
+
+class TestSwarmBenchmark(unittest.TestCase):
+    """Test cases for run_swarm_benchmark."""
+
+    def test_report_covers_every_call(self):
+        """Test that every subtask and refinement round runs and the report adds up."""
+        report = run_swarm_benchmark(num_agents=20, num_runs=3, concurrent_runs=2, dependency_depth=2,
+                                     feedback_loops=2, max_workers=4, latency=0.0, speculative_quorum=None)
+
+        self.assertEqual(report["agents"]["calls"], 3 * 20)
+        # Decomposition, integration and two refinement rounds per run
+        self.assertEqual(report["coordinator"]["calls"], 3 * 4)
+        self.assertEqual(report["queue_time"]["count"], 3 * 20)
+        self.assertEqual(report["run_latency"]["count"], 3)
+        self.assertLessEqual(report["critical_path"]["mean"], report["run_latency"]["mean"] + 0.01)
+        self.assertGreater(report["peak_memory"], 0)
+
+    def test_latency_distribution(self):
+        """Test that simulated latency follows the given distribution."""
+        report = run_swarm_benchmark(num_agents=4, num_runs=1, feedback_loops=0, max_workers=4,
+                                     latency=lognormal_latency(0.02, 0.1, seed=1))
+
+        self.assertGreater(report["agents"]["busy"], 4 * 0.01)
+        self.assertGreater(report["throughput"]["calls_per_second"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
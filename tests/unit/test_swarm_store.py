@@ -0,0 +1,135 @@
+"""
+Unit tests for the swarm run store.
+"""
+
+import os
+import tempfile
+import unittest
+
+from src.vot1.swarm import SwarmAgent, SwarmOrchestrator
+from src.vot1.swarm_store import SwarmRunStore, EVENT_START, EVENT_SUBTASK
+
+
+class FakeClient:
+    """Client answering every prompt with a fixed reply or a reply function."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+
+    async def generate_async(self, prompt, context=None, **kwargs):
+        self.prompts.append(prompt)
+        return self.reply if isinstance(self.reply, str) else self.reply(prompt)
+
+
+class TestSwarmRunStore(unittest.TestCase):
+    """Test cases for the SwarmRunStore class."""
+
+    def setUp(self):
+        """Set up a temporary store."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = SwarmRunStore(os.path.join(self.temp_dir.name, "runs", "swarm.db"))
+
+    def tearDown(self):
+        """Close and remove the store."""
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def create_swarm(self, coordinator, agent_clients, **kwargs):
+        """Create a stored swarm with one agent per client."""
+        swarm = SwarmOrchestrator(num_agents=0, feedback_loops=1, coordinator=coordinator, store=self.store, **kwargs)
+        swarm.agents = [
+            SwarmAgent(f"a{index}", f"Agent {index}", f"skill{index}", "", client=client)
+            for index, client in enumerate(agent_clients)
+        ]
+        return swarm
+
+    def test_events_fold_into_run_state(self):
+        """Test that a run's events are loaded in order and runs are listed by status."""
+        self.store.append("run", EVENT_START, {"task": "Task", "context": {"a": 1}})
+        self.store.append("run", EVENT_SUBTASK, {"task_id": "t1", "result": "old"}, key="k")
+        self.store.append("run", EVENT_SUBTASK, {"task_id": "t1", "result": "new"}, key="k")
+
+        state = self.store.load_run("run")
+
+        self.assertEqual((state["task"], state["context"], state["status"]), ("Task", {"a": 1}, "running"))
+        self.assertEqual(state["results"]["t1"]["result"], "new")
+        self.assertEqual(self.store.find_result("k")["result"], "new")
+        self.assertIsNone(self.store.find_result("k", run_id="other"))
+        self.assertEqual([run["run_id"] for run in self.store.list_runs(status="running")], ["run"])
+        self.assertIsNone(self.store.load_run("missing"))
+
+    def test_interrupted_run_resumes_without_repeating_agents(self):
+        """Test that a run failing at integration resumes from its stored agent results."""
+        def failing(prompt):
+            if "integrate" in prompt:
+                raise ConnectionError("network down")
+            return "solution"
+
+        agents = [FakeClient("result 0"), FakeClient("result 1")]
+        swarm = self.create_swarm(FakeClient(failing), agents)
+        with self.assertRaises(ConnectionError):
+            swarm.solve_complex_task("Task", run_id="run-1")
+
+        coordinator = FakeClient("solution")
+        swarm = self.create_swarm(coordinator, agents)
+        solution = swarm.resume_run("run-1")
+
+        self.assertEqual([len(client.prompts) for client in agents], [1, 1])
+        self.assertTrue(solution["metadata"]["resumed"])
+        self.assertEqual(solution["metadata"]["store_hits"], 2)
+        self.assertFalse(any("break down" in prompt for prompt in coordinator.prompts))
+        self.assertEqual(self.store.load_run("run-1")["status"], "completed")
+        self.assertEqual(swarm.resume_run("run-1")["solution"], solution["solution"])
+
+    def test_identical_subtasks_are_served_across_runs(self):
+        """Test that a new run reuses stored results of identical subtasks only when enabled."""
+        agents = [FakeClient("result 0")]
+        self.create_swarm(FakeClient("solution"), agents).solve_complex_task("Task")
+        self.create_swarm(FakeClient("solution"), agents).solve_complex_task("Task")
+        self.assertEqual(len(agents[0].prompts), 2)
+
+        swarm = self.create_swarm(FakeClient("solution"), agents, reuse_subtask_results=True)
+        solution = swarm.solve_complex_task("Task")
+        self.assertEqual(len(agents[0].prompts), 2)
+        self.assertEqual(solution["metadata"]["store_hits"], 1)
+
+        with self.assertRaises(ValueError):
+            swarm.resume_run("missing")
+
+    def test_failed_generations_are_not_persisted(self):
+        """Test that error placeholders from the client fail the step instead of being stored."""
+        agents = [FakeClient("Error generating response: overloaded")]
+        coordinator = FakeClient(lambda prompt: "Error generating response: overloaded" if "integrate" in prompt else "solution")
+        swarm = self.create_swarm(coordinator, agents, reuse_subtask_results=True)
+
+        with self.assertRaises(RuntimeError):
+            swarm.solve_complex_task("Task", run_id="run-1")
+
+        state = self.store.load_run("run-1")
+        self.assertEqual(state["results"], {})
+        self.assertIsNone(state["integration"])
+        self.assertEqual(state["status"], "running")
+
+    def test_template_agents_resume_from_new_orchestrator(self):
+        """Test that a run of template agents resumes its decomposition in a new orchestrator."""
+        def failing(prompt):
+            if "integrate" in prompt:
+                raise ConnectionError("network down")
+            return "solution"
+
+        def create(coordinator):
+            return SwarmOrchestrator(num_agents=2, feedback_loops=0, coordinator=coordinator,
+                                     client=FakeClient("result"), store=self.store)
+
+        with self.assertRaises(ConnectionError):
+            create(FakeClient(failing)).solve_complex_task("Task", run_id="run-1")
+
+        coordinator = FakeClient("solution")
+        solution = create(coordinator).resume_run("run-1")
+
+        self.assertFalse(any("break down" in prompt for prompt in coordinator.prompts))
+        self.assertEqual(solution["metadata"]["store_hits"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Unit tests for the TokenEstimator class.
+"""
+
+import os
+import tempfile
+import unittest
+
+from src.vot1.token_estimator import TokenEstimator
+
+HAIKU = "claude-3-5-haiku-20241022"
+
+
+class TestTokenEstimator(unittest.TestCase):
+    """Test cases for the TokenEstimator class."""
+
+    def setUp(self):
+        """Set up a heuristic estimator so results do not depend on tiktoken."""
+        self.estimator = TokenEstimator(use_tiktoken=False)
+
+    def test_heuristic_counts(self):
+        """Test that common text shapes get plausible token counts."""
+        self.assertEqual(self.estimator.count(""), 0)
+        self.assertEqual(self.estimator.count("Hello, world!"), 4)
+        # Long numbers and words split into several tokens
+        self.assertEqual(self.estimator.count("123456789"), 3)
+        self.assertGreater(self.estimator.count("internationalization"), 1)
+        # CJK text is about one token per character
+        self.assertEqual(self.estimator.count("你好世界"), 4)
+
+    def test_counts_are_memoized(self):
+        """Test that raw counts are cached by content hash."""
+        self.estimator.count("some repeated text")
+        self.estimator.count("some repeated text")
+
+        self.assertEqual(self.estimator.stats["cache_misses"], 1)
+        self.assertEqual(self.estimator.stats["cache_hits"], 1)
+
+    def test_calibration_from_reported_usage(self):
+        """Test that reported usage scales later estimates for that model."""
+        text = "word " * 200
+        raw = self.estimator.count(text)
+
+        for _ in range(5):
+            self.estimator.calibrate(HAIKU, raw, int(raw * 1.5))
+
+        self.assertAlmostEqual(self.estimator.count(text, HAIKU) / raw, 1.5, places=2)
+        # The default ratio also learns, so unknown models benefit
+        self.assertGreater(self.estimator.count(text, "unknown-model"), raw)
+
+    def test_small_samples_do_not_calibrate(self):
+        """Test that tiny requests are ignored for calibration."""
+        self.estimator.calibrate(HAIKU, 5, 50)
+        self.assertEqual(self.estimator.get_ratio(HAIKU), 1.0)
+
+    def test_request_counts_include_framing_and_tools(self):
+        """Test that messages, system prompt and tools are all counted."""
+        request = {
+            "system": "You are helpful.",
+            "messages": [
+                {"role": "user", "content": "Hi"},
+                {"role": "assistant", "content": [{"type": "text", "text": "Hello there"}]},
+            ],
+        }
+        without_tools = self.estimator.count_request(request)
+        with_tools = self.estimator.count_request({**request, "tools": [{"name": "search"}]})
+
+        self.assertGreater(without_tools, self.estimator.count("You are helpful. Hi Hello there"))
+        self.assertGreater(with_tools, without_tools + TokenEstimator.TOOL_USE_OVERHEAD)
+
+    def test_calibration_round_trip(self):
+        """Test that calibration ratios can be saved and loaded."""
+        self.estimator.calibrate(HAIKU, 100, 120)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "calibration.json")
+            self.estimator.save(path)
+
+            loaded = TokenEstimator(use_tiktoken=False)
+            self.assertTrue(loaded.load(path))
+
+        self.assertAlmostEqual(loaded.get_ratio(HAIKU), 1.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Unit tests for the tool executor.
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from src.vot1.tool_executor import ToolExecutor, ToolTimeoutError, file_mtimes
+
+
+class TestToolExecutor(unittest.TestCase):
+    """Test cases for the ToolExecutor class."""
+
+    def setUp(self):
+        """Set up an executor with a short default timeout."""
+        self.executor = ToolExecutor(max_threads=4, max_processes=1, default_timeout=1.0)
+
+    def tearDown(self):
+        """Shut down the executor's pools."""
+        self.executor.shutdown(wait=False)
+
+    def test_slow_tools_time_out(self):
+        """Test that a hanging tool times out without blocking other tools."""
+        release = threading.Event()
+        self.executor.configure("hang", timeout=0.1)
+
+        start_time = time.time()
+        with self.assertRaises(ToolTimeoutError):
+            self.executor.execute("hang", lambda: release.wait(5), {})
+        self.assertLess(time.time() - start_time, 0.5)
+
+        self.assertEqual(self.executor.execute("add", lambda a, b: a + b, {"a": 2, "b": 3}), 5)
+        release.set()
+
+        stats = self.executor.get_stats()
+        self.assertEqual(stats["hang"]["timeouts"], 1)
+        self.assertEqual(stats["add"]["calls"], 1)
+
+    def test_concurrency_limit(self):
+        """Test that a tool never runs more often at once than its limit."""
+        in_flight, peak = [0], [0]
+        lock = threading.Lock()
+
+        def tool():
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.03)
+            with lock:
+                in_flight[0] -= 1
+
+        self.executor.configure("serial", max_concurrency=1)
+
+        async def run():
+            await asyncio.gather(*(self.executor.execute_async("serial", tool, {}) for _ in range(4)))
+
+        asyncio.run(run())
+
+        self.assertEqual(peak[0], 1)
+
+    def test_coroutine_tools_are_cancelled(self):
+        """Test that coroutine tools are cancelled when they time out."""
+        cancelled = []
+
+        async def tool():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        self.executor.configure("slow", timeout=0.05)
+
+        with self.assertRaises(ToolTimeoutError):
+            asyncio.run(self.executor.execute_async("slow", tool, {}))
+        self.assertEqual(cancelled, [True])
+
+    def test_process_isolation(self):
+        """Test that process-isolated tools run in the process pool."""
+        self.executor.configure("power", isolation="process")
+
+        self.assertEqual(self.executor.execute("power", pow, {"base": 2, "exp": 10}), 1024)
+        with self.assertRaises(ValueError):
+            self.executor.configure("bad", isolation="container")
+
+    def test_cacheable_tools_reuse_results(self):
+        """Test that identical calls of a cacheable tool run once and errors are not cached."""
+        calls = []
+
+        def search(query):
+            calls.append(query)
+            return {"error": "failed"} if query == "bad" else {"results": [query]}
+
+        self.executor.configure("search", cacheable=True, cache_ttl=60.0)
+
+        first = self.executor.execute("search", search, {"query": "x"})
+        first["results"].append("mutated")
+        second = asyncio.run(self.executor.execute_async("search", search, {"query": "x"}))
+        self.executor.execute("search", search, {"query": "bad"})
+        self.executor.execute("search", search, {"query": "bad"})
+
+        self.assertEqual(second, {"results": ["x"]})
+        self.assertEqual(calls, ["x", "bad", "bad"])
+        self.assertEqual(self.executor.get_stats()["search"]["cache_hits"], 1)
+
+        self.executor.invalidate("search")
+        self.executor.execute("search", search, {"query": "x"})
+        self.assertEqual(calls[-1], "x")
+
+    def test_cache_is_scoped_per_handler(self):
+        """Test that registries sharing the executor do not share or invalidate each other's results."""
+        class Workspace:
+            def __init__(self, name):
+                self.name = name
+                self.calls = 0
+
+            def search(self, query):
+                self.calls += 1
+                return {"results": [f"{self.name}:{query}"]}
+
+        first, second = Workspace("first"), Workspace("second")
+        self.executor.configure("search", cacheable=True)
+
+        self.assertEqual(self.executor.execute("search", first.search, {"query": "x"}), {"results": ["first:x"]})
+        self.assertEqual(self.executor.execute("search", second.search, {"query": "x"}), {"results": ["second:x"]})
+        self.executor.execute("search", first.search, {"query": "x"})
+        self.assertEqual((first.calls, second.calls), (1, 1))
+
+        self.assertEqual(self.executor.invalidate("search", handler=second.search), 1)
+        self.executor.execute("search", first.search, {"query": "x"})
+        self.executor.execute("search", second.search, {"query": "x"})
+        self.assertEqual((first.calls, second.calls), (1, 2))
+
+    def test_reset_drops_policy(self):
+        """Test that resetting a tool restores the default policy."""
+        self.executor.configure("search", timeout=5.0, max_concurrency=1, cacheable=True)
+        self.executor.reset("search")
+
+        policy = self.executor.get_policy("search")
+        self.assertEqual((policy["timeout"], policy["cacheable"]), (1.0, False))
+        self.assertIsNone(self.executor._limit("search"))
+
+    def test_file_mtimes_invalidate_results(self):
+        """Test that a code tool's cached results go stale when its file changes."""
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "module.py"), "w") as f:
+                f.write("a = 1\n")
+
+            def read(file_path):
+                with open(os.path.join(root, file_path)) as f:
+                    return f.read()
+
+            self.executor.configure("read", invalidation_key=file_mtimes("file_path", root=root))
+            self.assertEqual(self.executor.execute("read", read, {"file_path": "module.py"}), "a = 1\n")
+
+            with open(os.path.join(root, "module.py"), "w") as f:
+                f.write("a = 2\n")
+            os.utime(os.path.join(root, "module.py"), (time.time() + 10, time.time() + 10))
+
+            self.assertEqual(self.executor.execute("read", read, {"file_path": "module.py"}), "a = 2\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
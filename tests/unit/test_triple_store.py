@@ -0,0 +1,139 @@
+"""
+Unit tests for the triple store and the OWL reasoner built on it.
+"""
+
+import os
+import tempfile
+import unittest
+
+from src.vot1.owl_reasoning import OWLReasoner
+from src.vot1.triple_store import RDF_TYPE, RDFS_SUBCLASS_OF, TripleStore, local_name
+
+
+class TestTripleStore(unittest.TestCase):
+    """Test cases for TripleStore."""
+
+    def setUp(self):
+        self.store = TripleStore([
+            ("Fluffy", RDF_TYPE, "Cat"),
+            ("Rex", RDF_TYPE, "Dog"),
+            ("Cat", RDFS_SUBCLASS_OF, "Mammal"),
+            ("Fluffy", "likes", "Rex")
+        ])
+
+    def test_patterns(self):
+        """Test that every lookup pattern returns the matching triples."""
+        self.assertEqual(self.store.triples("Fluffy"), [("Fluffy", RDF_TYPE, "Cat"), ("Fluffy", "likes", "Rex")])
+        self.assertEqual(self.store.subjects(RDF_TYPE), ["Fluffy", "Rex"])
+        self.assertEqual(self.store.objects("Fluffy", RDF_TYPE), ["Cat"])
+        self.assertEqual(self.store.triples("Fluffy", obj="Rex"), [("Fluffy", "likes", "Rex")])
+        self.assertEqual(self.store.triples(obj="Mammal"), [("Cat", RDFS_SUBCLASS_OF, "Mammal")])
+        self.assertEqual(self.store.count(predicate=RDF_TYPE, obj="Dog"), 1)
+        self.assertEqual(len(self.store.triples()), 4)
+
+    def test_add_and_remove(self):
+        """Test that duplicates are ignored and removed terms are forgotten."""
+        self.assertEqual(self.store.add_many([("Rex", RDF_TYPE, "Dog"), ("Dog", RDFS_SUBCLASS_OF, "Mammal")]), 1)
+        self.assertEqual(len(self.store), 5)
+
+        self.assertTrue(self.store.remove(("Fluffy", "likes", "Rex")))
+        self.assertFalse(self.store.remove(("Fluffy", "likes", "Rex")))
+        self.assertNotIn(("Fluffy", "likes", "Rex"), self.store)
+        self.assertEqual(self.store.find_terms("rex"), ["Rex"])
+
+        self.store.remove(("Rex", RDF_TYPE, "Dog"))
+        self.assertEqual(self.store.find_terms("rex"), [])
+        self.assertEqual(self.store.get_stats()["predicates"], 2)
+
+    def test_iri_local_names(self):
+        """Test that IRIs are found by their local names."""
+        cat = "http://example.org/animals#Cat"
+        self.store.add(("http://example.org/animals/Tom", RDF_TYPE, cat))
+
+        self.assertEqual(local_name(cat), "Cat")
+        self.assertEqual(local_name("http://example.org/animals/Tom"), "Tom")
+        self.assertEqual(local_name("Cat"), "Cat")
+        self.assertEqual(self.store.find_terms("cat"), ["Cat", cat])
+        self.assertEqual(self.store.find_terms("TOM"), ["http://example.org/animals/Tom"])
+
+        self.store.remove(("http://example.org/animals/Tom", RDF_TYPE, cat))
+        self.assertEqual(self.store.find_terms("tom"), [])
+
+    def test_save_and_load(self):
+        """Test that saved triples load back."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "graph.jsonl")
+            self.store.save(path)
+
+            loaded = TripleStore()
+            self.assertEqual(loaded.load(path), 4)
+            self.assertEqual(sorted(loaded), sorted(self.store))
+
+
+class TestOWLReasoner(unittest.TestCase):
+    """Test cases for OWLReasoner."""
+
+    def setUp(self):
+        self.reasoner = OWLReasoner()
+
+    def test_add_knowledge_and_infer(self):
+        """Test that statements become triples and class membership is inferred transitively."""
+        added = self.reasoner.add_knowledge([
+            "A cat is a mammal that has fur.",
+            "A mammal is an animal.",
+            "Fluffy is a cat.",
+            "This is not a statement"
+        ])
+
+        self.assertEqual(added, 4)
+        graph = self.reasoner.engine.graph
+        self.assertIn(("Cat", RDFS_SUBCLASS_OF, "Mammal"), graph)
+        self.assertIn(("Cat", "has", "Fur"), graph)
+        self.assertIn(("Fluffy", RDF_TYPE, "Cat"), graph)
+
+        answer = self.reasoner.reason("Is Fluffy an animal?")
+        self.assertTrue(answer.startswith("Yes"))
+        self.assertIn("Cat is a subclass of Mammal", answer)
+        self.assertTrue(self.reasoner.reason("Is Fluffy a dog?").startswith("No"))
+
+    def test_iri_terms_resolve_by_name(self):
+        """Test that classes loaded as IRIs are resolved by their local names."""
+        base = "http://example.org/animals#"
+        self.reasoner.engine.add_triples([
+            (f"{base}Tom", RDF_TYPE, f"{base}Cat"),
+            (f"{base}Cat", RDFS_SUBCLASS_OF, f"{base}Mammal")
+        ])
+
+        self.assertEqual(self.reasoner.reason("Is Tom a mammal?"),
+                         "Yes, Tom is a Mammal: Tom is a Cat; Cat is a subclass of Mammal.")
+        self.assertIn("instances: Tom", self.reasoner.reason("Tell me about Cat"))
+
+    def test_unreadable_ontology_is_skipped(self):
+        """Test that a malformed ontology file is logged instead of failing initialization."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "broken.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("not json\n")
+
+            reasoner = OWLReasoner(ontology_path=path)
+
+        self.assertEqual(reasoner.get_stats()["triples"], 10)
+
+    def test_describe_entity(self):
+        """Test that entities named in a query are described from the graph."""
+        self.assertIn("VectorStore, ConversationMemory", self.reasoner.reason("Tell me about memory"))
+        self.assertIn("instance of the Agent class", self.reasoner.reason("What is SelfImprovementAgent?"))
+
+    def test_stats_and_clear(self):
+        """Test that statistics track queries and triples, and clear empties the graph."""
+        self.reasoner.reason("Tell me about memory")
+        stats = self.reasoner.get_stats()
+        self.assertEqual(stats["queries"], 1)
+        self.assertEqual(stats["total_axioms"], 10)
+
+        self.reasoner.clear()
+        self.assertEqual(self.reasoner.get_stats()["triples"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
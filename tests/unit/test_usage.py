@@ -0,0 +1,88 @@
+"""
+Unit tests for the UsageLedger class.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from src.vot1.usage import UsageLedger, estimate_cost, extract_usage
+
+SONNET = "claude-3-7-sonnet-20240620"
+HAIKU = "claude-3-5-haiku-20241022"
+
+
+class TestUsageLedger(unittest.TestCase):
+    """Test cases for the UsageLedger class."""
+
+    def setUp(self):
+        """Set up an in-memory ledger."""
+        self.ledger = UsageLedger()
+
+    def test_usage_is_aggregated_per_model(self):
+        """Test that tokens, calls and costs are tracked separately per model."""
+        self.ledger.record("anthropic", SONNET, input_tokens=1000, output_tokens=500, total_time=2.0)
+        self.ledger.record("anthropic", HAIKU, input_tokens=200, output_tokens=100, total_time=0.4)
+        self.ledger.record("anthropic", HAIKU, total_time=0.1, success=False)
+
+        summary = self.ledger.get_summary()
+
+        self.assertEqual(summary["models"][SONNET]["input_tokens"], 1000)
+        self.assertEqual(summary["models"][HAIKU]["calls"], 2)
+        self.assertEqual(summary["models"][HAIKU]["errors"], 1)
+        self.assertAlmostEqual(summary["models"][SONNET]["cost"], estimate_cost(SONNET, 1000, 500))
+        self.assertEqual(summary["totals"]["calls"], 3)
+
+    def test_latency_histograms(self):
+        """Test that queue, TTFT and total latency land in histogram buckets."""
+        self.ledger.record("anthropic", HAIKU, queue_time=0.05, ttft=0.2, total_time=0.8)
+        self.ledger.record("anthropic", HAIKU, total_time=12.0)
+
+        latency = self.ledger.get_summary()["models"][HAIKU]
+
+        self.assertEqual(latency["total_time"]["buckets"]["1.0"], 1)
+        self.assertEqual(latency["total_time"]["buckets"]["30.0"], 1)
+        self.assertEqual(latency["ttft"]["count"], 1)
+        self.assertEqual(latency["total_time"]["p95"], 12.0)
+
+    def test_cache_and_batch_pricing(self):
+        """Test that cache reads are cheaper than uncached input and batches are discounted."""
+        uncached = estimate_cost(SONNET, 10000, 0)
+        self.assertLess(estimate_cost(SONNET, 0, 0, cache_read_input_tokens=10000), uncached)
+        self.assertGreater(estimate_cost(SONNET, 0, 0, cache_creation_input_tokens=10000), uncached)
+        self.assertAlmostEqual(estimate_cost(SONNET, 10000, 0, batch=True), uncached / 2)
+
+    def test_extract_usage_from_objects_and_dicts(self):
+        """Test that usage is read from SDK objects and OpenAI-style dicts."""
+        response = MagicMock()
+        response.usage.input_tokens = 10
+        response.usage.output_tokens = 20
+        response.usage.cache_read_input_tokens = 5
+        response.usage.cache_creation_input_tokens = None
+
+        self.assertEqual(extract_usage(response)["cache_read_input_tokens"], 5)
+        self.assertEqual(extract_usage(response)["cache_creation_input_tokens"], 0)
+        self.assertEqual(
+            extract_usage({"usage": {"prompt_tokens": 3, "completion_tokens": 4}})["output_tokens"], 4
+        )
+
+    def test_persisted_usage_can_be_queried_by_workflow(self):
+        """Test that persisted entries are aggregated across ledger instances."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "usage.db")
+            first = UsageLedger(db_path=path)
+            first.record("anthropic", SONNET, input_tokens=1000, output_tokens=1000, workflow="swarm")
+            first.record("anthropic", HAIKU, input_tokens=100, output_tokens=100, workflow="generate")
+            first.close()
+
+            second = UsageLedger(db_path=path)
+            rows = second.query(group_by="workflow")
+            second.close()
+
+        self.assertEqual([row["workflow"] for row in rows], ["swarm", "generate"])
+        self.assertEqual(rows[0]["input_tokens"], 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,333 @@
+"""
+Unit tests for VotModelControlProtocol and its model backends.
+"""
+
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from src.vot1.mcp_backends import (
+    ModelBackend, MockBackend, OpenAICompatibleBackend, AnthropicBackend, normalize_tool
+)
+from src.vot1.pipeline import AnthropicTransport
+from src.vot1.rate_limiter import RateLimiter
+from src.vot1.resilience import RetryPolicy
+from src.vot1.token_estimator import TokenEstimator
+from src.vot1.tool_executor import ToolExecutor
+from src.vot1.usage import UsageLedger
+from src.vot1.vot_mcp import VotModelControlProtocol
+
+
+class FakeBackend(ModelBackend):
+    """Backend that records requests and optionally fails."""
+
+    records_usage = True
+
+    def __init__(self, provider, error=None, delay=0.0):
+        self.provider = provider
+        self.error = error
+        self.delay = delay
+        self.requests = []
+
+    async def generate(self, request):
+        self.requests.append(request)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self._result(request, f"{self.provider}:{request['model']}",
+                            usage={"input_tokens": 10, "output_tokens": 5})
+
+
+class TestVotModelControlProtocol(unittest.TestCase):
+    """Test cases for the VotModelControlProtocol class."""
+
+    def create_mcp(self, primary, secondary=None, **config):
+        """Create a protocol instance with the given backends."""
+        return VotModelControlProtocol(
+            primary_model="primary-model",
+            secondary_provider="custom" if secondary else None,
+            secondary_model="secondary-model" if secondary else None,
+            config=config,
+            usage_ledger=UsageLedger(),
+            primary_backend=primary,
+            secondary_backend=secondary,
+            retry_policy=RetryPolicy(max_retries=0),
+            tool_executor=ToolExecutor(max_threads=2, default_timeout=1.0)
+        )
+
+    def test_requests_route_to_the_backend_of_the_model(self):
+        """Test that the secondary model is served by the secondary backend."""
+        primary, secondary = FakeBackend("anthropic"), FakeBackend("perplexity")
+        mcp = self.create_mcp(primary, secondary)
+
+        response = asyncio.run(mcp.process_request_async("Hello", model="secondary-model"))
+
+        self.assertEqual(response["content"], "perplexity:secondary-model")
+        self.assertEqual(response["provider"], "perplexity")
+        self.assertEqual(response["usage"]["total_tokens"], 15)
+        self.assertEqual(primary.requests, [])
+
+    def test_failover_to_secondary_backend(self):
+        """Test that a failing primary backend fails over to the secondary."""
+        primary = FakeBackend("anthropic", error=ValueError("bad request"))
+        mcp = self.create_mcp(primary, FakeBackend("perplexity"))
+
+        response = mcp.process_request("Hello")
+
+        self.assertEqual(response["content"], "perplexity:secondary-model")
+        self.assertEqual(mcp.resilience.get_stats()["failovers"], 1)
+        mcp.close()
+
+    def test_errors_are_returned(self):
+        """Test that a request failing on every backend returns an error response."""
+        mcp = self.create_mcp(FakeBackend("anthropic", error=ValueError("bad request")), failover=False)
+
+        response = asyncio.run(mcp.process_request_async("Hello"))
+
+        self.assertEqual(response["error"], "bad request")
+        self.assertEqual(response["content"], "")
+
+    def test_concurrent_requests_do_not_serialize(self):
+        """Test that async requests run concurrently instead of one after another."""
+        mcp = self.create_mcp(FakeBackend("anthropic", delay=0.1))
+
+        async def run():
+            return await asyncio.gather(*(mcp.process_request_async(f"Prompt {i}") for i in range(5)))
+
+        start_time = time.time()
+        responses = asyncio.run(run())
+
+        self.assertEqual(len(responses), 5)
+        self.assertLess(time.time() - start_time, 0.4)
+
+    def test_batch_yields_as_completed_with_indices(self):
+        """Test that batch results arrive in completion order with their indices."""
+        class SlowFirstBackend(FakeBackend):
+            async def generate(self, request):
+                self.delay = 0.1 if request["prompt"] == "slow" else 0.0
+                return await super().generate(request)
+
+        mcp = self.create_mcp(SlowFirstBackend("anthropic"))
+
+        async def run():
+            return [index async for index, _ in mcp.process_batch_async(["slow", "fast", "fast"], max_concurrency=3)]
+
+        self.assertEqual(asyncio.run(run())[-1], 0)
+        responses = mcp.process_batch(["slow", "fast"], max_concurrency=2)
+        self.assertEqual([response["content"] for response in responses], ["anthropic:primary-model"] * 2)
+        mcp.close()
+
+    def test_batch_concurrency_limit_and_timeouts(self):
+        """Test that the batch respects its concurrency limit and per-request timeouts."""
+        in_flight, peak = [0], [0]
+
+        class CountingBackend(FakeBackend):
+            async def generate(self, request):
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+                try:
+                    await asyncio.sleep(0.5 if request["prompt"] == "hang" else 0.02)
+                    return self._result(request, "ok")
+                finally:
+                    in_flight[0] -= 1
+
+        mcp = self.create_mcp(CountingBackend("anthropic"))
+
+        async def requests():
+            for index in range(6):
+                yield {"prompt": "hang", "timeout": 0.05} if index == 0 else f"prompt {index}"
+
+        async def run():
+            return dict([item async for item in mcp.process_batch_async(requests(), max_concurrency=2)])
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(results), 6)
+        self.assertIn("timed out", results[0]["error"])
+        self.assertEqual(peak[0], 2)
+
+    def test_batch_failure_closes_the_source(self):
+        """Test that a failing batch request stops the batch and closes the request iterator."""
+        mcp = self.create_mcp(FakeBackend("anthropic"))
+        closed = []
+
+        async def requests():
+            try:
+                yield "prompt"
+                yield {"prompt": "bad", "unknown_option": True}
+                while True:
+                    yield "prompt"
+            finally:
+                closed.append(True)
+
+        async def run():
+            return [item async for item in mcp.process_batch_async(requests(), max_concurrency=2)]
+
+        with self.assertRaises(TypeError):
+            asyncio.run(run())
+        self.assertEqual(closed, [True])
+
+    def test_sync_call_from_own_loop_is_rejected(self):
+        """Test that a synchronous call made on the background loop raises instead of deadlocking."""
+        mcp = self.create_mcp(FakeBackend("anthropic"))
+
+        async def nested():
+            return mcp.process_request("hi")
+
+        with self.assertRaises(RuntimeError):
+            mcp._run_sync(nested())
+        self.assertEqual(mcp.process_request("hi")["content"], "anthropic:primary-model")
+        mcp.close()
+
+    def test_stream_yields_chunks_incrementally(self):
+        """Test that thinking and content stream before the final response."""
+        backend = MockBackend(responder=lambda prompt, system, context: "one two three",
+                              thinker=lambda prompt, context: "step 1\nstep 2\n")
+        mcp = self.create_mcp(backend, max_thinking_tokens=1024)
+
+        async def run():
+            return [chunk async for chunk in mcp.process_request_stream("Hello")]
+
+        chunks = asyncio.run(run())
+
+        self.assertEqual([chunk["type"] for chunk in chunks[:2]], ["thinking", "thinking"])
+        self.assertEqual("".join(chunk["text"] for chunk in chunks if chunk["type"] == "content"), "one two three")
+        response = chunks[-1]["response"]
+        self.assertEqual(response["content"], "one two three")
+        self.assertIsNotNone(response["ttft"])
+        self.assertEqual(mcp.usage_ledger.get_summary()["totals"]["calls"], 1)
+
+    def test_stream_cancellation_and_failover(self):
+        """Test that closing a stream stops generation and that failures before the first chunk fail over."""
+        produced = []
+
+        class EndlessBackend(FakeBackend):
+            async def stream(self, request):
+                while True:
+                    produced.append(1)
+                    await asyncio.sleep(0)
+                    yield {"type": "content", "text": "x"}
+
+        mcp = self.create_mcp(EndlessBackend("anthropic"))
+
+        async def read_three():
+            stream = mcp.process_request_stream("Hello")
+            chunks = [await stream.__anext__() for _ in range(3)]
+            await stream.aclose()
+            return chunks
+
+        self.assertEqual(len(asyncio.run(read_three())), 3)
+        self.assertEqual(len(produced), 3)
+
+        mcp = self.create_mcp(FakeBackend("anthropic", error=ValueError("down")), FakeBackend("perplexity"))
+        mcp.execution_mode = mcp.MODE_STREAMING
+        response = mcp.process_request("Hello")
+        self.assertEqual(response["content"], "perplexity:secondary-model")
+        mcp.close()
+
+    def test_anthropic_stream_events(self):
+        """Test that Messages API stream events become chunks, tool calls and usage."""
+        sdk = MagicMock()
+        sdk.messages.create.return_value = [
+            {"type": "message_start", "message": {"usage": {"input_tokens": 12, "output_tokens": 1}}},
+            {"type": "content_block_start", "index": 0, "content_block": {"type": "thinking", "thinking": ""}},
+            {"type": "content_block_delta", "index": 0, "delta": {"type": "thinking_delta", "thinking": "Hmm."}},
+            {"type": "content_block_start", "index": 1, "content_block": {"type": "text", "text": ""}},
+            {"type": "content_block_delta", "index": 1, "delta": {"type": "text_delta", "text": "Hi"}},
+            {"type": "content_block_start", "index": 2, "content_block": {"type": "tool_use", "id": "t1", "name": "add"}},
+            {"type": "content_block_delta", "index": 2, "delta": {"type": "input_json_delta", "partial_json": '{"a": '}},
+            {"type": "content_block_delta", "index": 2, "delta": {"type": "input_json_delta", "partial_json": "1}"}},
+            {"type": "message_delta", "delta": {"stop_reason": "tool_use"}, "usage": {"output_tokens": 9}},
+            {"type": "message_stop"},
+        ]
+        ledger = UsageLedger()
+        transport = AnthropicTransport("test-key", rate_limiter=RateLimiter(), usage_ledger=ledger,
+                                       token_estimator=TokenEstimator(use_tiktoken=False), client=sdk)
+        backend = AnthropicBackend(transport=transport)
+
+        async def run():
+            return [chunk async for chunk in backend.stream({"prompt": "Hi", "model": "m", "max_tokens": 16})]
+
+        chunks = asyncio.run(run())
+
+        self.assertEqual(chunks[:2], [{"type": "thinking", "text": "Hmm."}, {"type": "content", "text": "Hi"}])
+        result = chunks[-1]["result"]
+        self.assertEqual(result["tool_calls"], [{"id": "t1", "name": "add", "input": {"a": 1}}])
+        self.assertEqual(result["usage"]["output_tokens"], 9)
+        self.assertTrue(sdk.messages.create.call_args.kwargs["stream"])
+        entry = ledger.get_entries()[-1]
+        self.assertEqual((entry["input_tokens"], entry["output_tokens"]), (12, 9))
+        self.assertIsNotNone(entry["ttft"])
+
+    def test_tool_timeouts_return_errors(self):
+        """Test that registered tools run with their timeout and report failures as errors."""
+        mcp = self.create_mcp(FakeBackend("anthropic"))
+        mcp.register_tool("slow", lambda: time.sleep(0.5), timeout=0.05)
+        mcp.register_tool("echo", lambda text: {"text": text})
+
+        self.assertIn("timed out", mcp.execute_tool("slow", {})["error"])
+        self.assertEqual(asyncio.run(mcp.execute_tool_async("echo", {"text": "hi"})), {"text": "hi"})
+        self.assertEqual(mcp.tool_executor.get_stats()["slow"]["timeouts"], 1)
+
+        # Re-registering without a policy drops the earlier one
+        handler = lambda: None
+        mcp.register_tool("slow", handler)
+        self.assertEqual(mcp.tool_executor.get_policy("slow", handler)["timeout"], mcp.tool_executor.default_timeout)
+
+    def test_tool_policies_are_scoped_per_registry(self):
+        """Test that registries sharing an executor keep their own policies for the same tool name."""
+        first = self.create_mcp(FakeBackend("anthropic"))
+        second = self.create_mcp(FakeBackend("anthropic"))
+        second.tool_executor = first.tool_executor
+
+        first.register_tool("slow", lambda: time.sleep(0.5), timeout=0.05)
+        second.register_tool("slow", lambda: "done")
+
+        self.assertIn("timed out", first.execute_tool("slow", {})["error"])
+        self.assertEqual(second.execute_tool("slow", {}), "done")
+
+    def test_missing_credentials_fall_back_to_mock(self):
+        """Test that providers without credentials are simulated."""
+        mcp = VotModelControlProtocol(
+            primary_provider=VotModelControlProtocol.PROVIDER_PERPLEXITY,
+            config={"max_thinking_tokens": 2048, "backends": {"perplexity": {"api_key": None}}},
+            usage_ledger=UsageLedger()
+        )
+        if mcp.primary_backend.provider != "mock":
+            self.skipTest("PERPLEXITY_API_KEY is set")
+
+        response = asyncio.run(mcp.process_request_async("Hello", context={"task": "memory"}))
+
+        self.assertTrue(response["content"])
+        self.assertIn("memory", response["thinking"])
+        self.assertEqual(response["provider"], "mock")
+
+    def test_tool_definitions_are_normalized(self):
+        """Test that shorthand, OpenAI and Anthropic tool definitions are normalized alike."""
+        shorthand = {"name": "search", "description": "Search", "parameters": {"query": {"type": "string"}}}
+        openai = {"type": "function", "function": {
+            "name": "search", "description": "Search",
+            "parameters": {"type": "object", "properties": {"query": {"type": "string"}}}
+        }}
+
+        self.assertEqual(normalize_tool(shorthand), normalize_tool(openai))
+        self.assertEqual(normalize_tool(shorthand)["input_schema"]["properties"]["query"]["type"], "string")
+
+    def test_backend_payloads(self):
+        """Test the wire payloads built for each provider."""
+        request = {"prompt": "Hi", "system": "Be brief.", "model": "m", "max_tokens": 100,
+                   "temperature": 0.5, "tools": [{"name": "t", "parameters": {}}], "thinking_tokens": 2048}
+
+        payload = OpenAICompatibleBackend(base_url="http://localhost:1/v1").build_request(request)
+        self.assertEqual(payload["messages"][0], {"role": "system", "content": "Be brief."})
+        self.assertEqual(payload["tools"][0]["function"]["name"], "t")
+
+        params = AnthropicBackend(transport=object()).build_request(request)
+        self.assertEqual(params["thinking"]["budget_tokens"], 2048)
+        self.assertEqual(params["max_tokens"], 2148)
+        self.assertNotIn("temperature", params)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit tests for the work-stealing process executor.
+"""
+
+import asyncio
+import os
+import pickle
+import threading
+import time
+import unittest
+
+from src.vot1.swarm import SwarmOrchestrator
+from src.vot1.work_stealing import WorkStealingExecutor
+
+
+def slow_pid(seconds):
+    """Sleep, then report the worker's process id."""
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def count_up(n):
+    """Stream the numbers below n."""
+    for i in range(n):
+        yield i
+
+
+def fail():
+    """Raise an error."""
+    raise ValueError("bad input")
+
+
+def analyze(prompt, context):
+    """Stream an analysis of the prompt."""
+    yield f"{prompt}: "
+    yield str(os.getpid() != context.get("parent"))
+
+
+class TestWorkStealingExecutor(unittest.TestCase):
+    """Test cases for the WorkStealingExecutor class."""
+
+    def setUp(self):
+        """Set up an executor with two workers."""
+        self.executor = WorkStealingExecutor(max_workers=2)
+
+    def tearDown(self):
+        """Stop the workers."""
+        self.executor.shutdown()
+
+    def test_idle_workers_steal_work(self):
+        """Test that tasks pinned to one worker are shared with the idle one."""
+        futures = [self.executor.submit(slow_pid, 0.1, affinity="same") for _ in range(6)]
+        pids = {future.result(timeout=10) for future in futures}
+
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+        stats = self.executor.get_stats()
+        self.assertGreater(stats["stolen"], 0)
+        self.assertEqual(stats["completed"], 6)
+
+    def test_results_stream_and_errors_propagate(self):
+        """Test that generator items stream in order and worker errors reach the caller."""
+        async def run():
+            return [item async for item in self.executor.stream_async(count_up, 5)]
+
+        self.assertEqual(asyncio.run(run()), [0, 1, 2, 3, 4])
+        with self.assertRaises(ValueError):
+            self.executor.submit(fail).result(timeout=10)
+
+    def test_unpicklable_tasks_are_rejected(self):
+        """Test that a task that cannot be sent to a worker fails at submit instead of hanging."""
+        with self.assertRaises(pickle.PicklingError):
+            self.executor.submit(lambda: 1)
+        with self.assertRaises(pickle.PicklingError):
+            self.executor.submit(slow_pid, threading.Lock())
+
+        self.assertEqual(self.executor.get_stats()["pending"], 0)
+        self.assertNotEqual(self.executor.submit(slow_pid, 0).result(timeout=10), os.getpid())
+
+        swarm = SwarmOrchestrator(num_agents=0, executor=self.executor, custom_agents=[
+            {"agent_id": "local", "name": "Local", "specialization": "analysis", "handler": lambda p, c: p}
+        ])
+        result = swarm.agents[0].process_task({"task_id": "t1", "prompt": "check"})
+        self.assertEqual(result["status"], "error")
+
+    def test_swarm_agents_run_handlers_in_workers(self):
+        """Test that local swarm agents run their handlers in the worker processes."""
+        swarm = SwarmOrchestrator(num_agents=0, executor=self.executor, custom_agents=[
+            {"agent_id": "local", "name": "Local", "specialization": "analysis", "handler": analyze}
+        ])
+
+        result = asyncio.run(swarm.agents[0].process_task_async(
+            {"task_id": "t1", "prompt": "check", "context": {"parent": os.getpid()}}, timeout=10
+        ))
+
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(result["result"], "check: True")
+
+
+if __name__ == "__main__":
+    unittest.main()